@@ -39,11 +39,21 @@ def create_app(config_name='development'):
     from app.model.User import User
     from app.model.Cliente import Cliente
     from app.model.Carteira import Carteira
+    from app.model.PriceBlock import PriceBlock
+    from app.model.PriceBar import PriceBar
     from app.model.Asset import Asset
+    from app.model.IndicadoresCache import IndicadoresCache
+    from app.model.CarteiraEstatisticas import CarteiraEstatisticas
     
     # Register blueprints/routes
     from app import routes
     
+    # Comandos de manutenção (flask partitions ..., flask prices ...)
+    from app.utils.partitions import partitions_cli
+    from app.utils.price_store import prices_cli
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(prices_cli)
+    
     # Health check endpoint
     @app.route('/health')
     def health_check():
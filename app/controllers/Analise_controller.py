@@ -0,0 +1,215 @@
+from flask import request, jsonify, current_app
+from app.utils.middleware import request_logger, rate_limit, require_auth
+from app.utils.serialization import negotiate_format, read_payload, render
+from app.services.Asset_service import ARRAYS_FORMAT
+from app.services.Analise_service import AnaliseService, AVALIACAO_METRICAS
+
+
+def _otimizacao_arrow_table(payload):
+    """Arrow: uma linha por ponto da fronteira, com os pesos como colunas `pesos.<ticker>`."""
+    otimizacao = dict(payload['otimizacao'])
+    fronteira = dict(otimizacao.pop('fronteira'))
+    pesos = fronteira.pop('pesos')
+
+    columns = dict(fronteira)
+    for j, ticker in enumerate(otimizacao['ativos']):
+        columns[f"pesos.{ticker}"] = pesos[:, j]
+
+    return columns, {**payload, 'otimizacao': otimizacao}
+
+
+def _avaliacao_arrow_table(payload):
+    """Arrow: uma linha por cenário com as métricas; o restante vai nos metadados."""
+    avaliacao = dict(payload['avaliacao'])
+    columns = {key: avaliacao.pop(key) for key in AVALIACAO_METRICAS}
+    return columns, {**payload, 'avaliacao': avaliacao}
+
+
+def _risco_arrow_table(payload):
+    """Arrow: uma linha por nível de confiança, com VaR e CVaR de cada método."""
+    risco = dict(payload['risco'])
+    columns = {'confianca': risco['confiancas']}
+    for metodo in ('historico', 'parametrico', 'monte_carlo'):
+        medidas = risco[metodo]
+        if medidas is None:
+            continue
+        medidas = dict(medidas)
+        columns[f"var_{metodo}"] = medidas.pop('var')
+        columns[f"cvar_{metodo}"] = medidas.pop('cvar')
+        risco[metodo] = medidas
+    return columns, {**payload, 'risco': risco}
+
+
+def _backtest_arrow_table(payload):
+    """Arrow: uma linha por pregão (patrimônio e drawdown); as métricas vão nos metadados."""
+    backtest = dict(payload['backtest'])
+    columns = backtest.pop('serie')
+    return columns, {**payload, 'backtest': backtest}
+
+
+class AnaliseController:
+    """Controller for portfolio analytics (optimization, what-if evaluation, risk and backtest)."""
+
+    @request_logger()
+    @require_auth(['admin'])
+    @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
+    def otimizar(self, carteira_id):
+        """
+        Otimiza os pesos de uma carteira (mínima variância, máximo Sharpe e fronteira eficiente).
+
+        Args:
+            carteira_id (int): ID da carteira
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            data = request.get_json(silent=True) or {}
+            current_app.logger.info(f"Otimizando carteira {carteira_id} com parâmetros: {data}")
+
+            output = negotiate_format()
+            formato = ARRAYS_FORMAT if output != 'json' else 'records'
+            response, status_code = AnaliseService.otimizar(carteira_id, data, formato=formato)
+
+            if status_code != 200 or not response.get('success'):
+                current_app.logger.error(f"Falha ao otimizar carteira {carteira_id}: {response.get('message', 'Unknown error')}")
+                return jsonify(response), status_code
+
+            current_app.logger.info(f"Carteira {carteira_id} otimizada em {response['otimizacao']['tempo_ms']} ms.")
+            return render(response, output, 200, arrow_table=_otimizacao_arrow_table)
+
+        except Exception as e:
+            current_app.logger.error(f"Erro ao otimizar carteira: {str(e)}")
+            return jsonify({
+                "success": False,
+                "message": "Internal server error"
+            }), 500
+
+    @request_logger()
+    @require_auth(['admin'])
+    @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
+    def avaliar_cenarios(self, carteira_id):
+        """
+        Avalia vários vetores de pesos de uma carteira em uma única requisição.
+
+        O corpo pode ser JSON ou MessagePack (matriz de pesos como buffer).
+
+        Args:
+            carteira_id (int): ID da carteira
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            data = read_payload()
+            if not data or not isinstance(data, dict):
+                current_app.logger.warning("Request body is required to evaluate weights.")
+                return jsonify({
+                    "success": False,
+                    "message": "Request body with pesos is required"
+                }), 400
+
+            output = negotiate_format()
+            formato = ARRAYS_FORMAT if output != 'json' else 'records'
+            response, status_code = AnaliseService.avaliar_cenarios(carteira_id, data, formato=formato)
+
+            if status_code != 200 or not response.get('success'):
+                current_app.logger.error(f"Falha ao avaliar cenários da carteira {carteira_id}: {response.get('message', 'Unknown error')}")
+                return jsonify(response), status_code
+
+            avaliacao = response['avaliacao']
+            current_app.logger.info(f"{avaliacao['n_cenarios']} cenários da carteira {carteira_id} avaliados em {avaliacao['tempo_ms']} ms.")
+            return render(response, output, 200, arrow_table=_avaliacao_arrow_table)
+
+        except Exception as e:
+            current_app.logger.error(f"Erro ao avaliar cenários: {str(e)}")
+            return jsonify({
+                "success": False,
+                "message": "Internal server error"
+            }), 500
+
+    @request_logger()
+    @require_auth(['admin'])
+    @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
+    def simular_risco(self, carteira_id):
+        """
+        VaR, CVaR e probabilidade de perda (histórico, paramétrico e Monte Carlo) de uma carteira.
+
+        Args:
+            carteira_id (int): ID da carteira
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            data = read_payload() or {}
+            if not isinstance(data, dict):
+                return jsonify({
+                    "success": False,
+                    "message": "Request body must be an object"
+                }), 400
+            current_app.logger.info(f"Simulando risco da carteira {carteira_id} com parâmetros: "
+                                    f"{ {key: value for key, value in data.items() if key != 'pesos'} }")
+
+            output = negotiate_format()
+            formato = ARRAYS_FORMAT if output != 'json' else 'records'
+            response, status_code = AnaliseService.simular_risco(carteira_id, data, formato=formato)
+
+            if status_code != 200 or not response.get('success'):
+                current_app.logger.error(f"Falha ao simular risco da carteira {carteira_id}: {response.get('message', 'Unknown error')}")
+                return jsonify(response), status_code
+
+            monte_carlo = response['risco']['monte_carlo']
+            current_app.logger.info(f"{monte_carlo['caminhos']} caminhos da carteira {carteira_id} simulados em "
+                                    f"{monte_carlo['tempo_ms']} ms ({monte_carlo['workers']} processo(s)).")
+            return render(response, output, 200, arrow_table=_risco_arrow_table)
+
+        except Exception as e:
+            current_app.logger.error(f"Erro ao simular risco: {str(e)}")
+            return jsonify({
+                "success": False,
+                "message": "Internal server error"
+            }), 500
+
+    @request_logger()
+    @require_auth(['admin'])
+    @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
+    def backtest(self, carteira_id):
+        """
+        Backtest de uma alocação da carteira (comprar e manter ou rebalanceada) contra o BOVA11.SA.
+
+        Args:
+            carteira_id (int): ID da carteira
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            data = read_payload() or {}
+            if not isinstance(data, dict):
+                return jsonify({
+                    "success": False,
+                    "message": "Request body must be an object"
+                }), 400
+            current_app.logger.info(f"Backtest da carteira {carteira_id} com parâmetros: "
+                                    f"{ {key: value for key, value in data.items() if key != 'pesos'} }")
+
+            output = negotiate_format()
+            formato = ARRAYS_FORMAT if output != 'json' else 'records'
+            response, status_code = AnaliseService.backtest(carteira_id, data, formato=formato)
+
+            if status_code != 200 or not response.get('success'):
+                current_app.logger.error(f"Falha no backtest da carteira {carteira_id}: {response.get('message', 'Unknown error')}")
+                return jsonify(response), status_code
+
+            backtest = response['backtest']
+            current_app.logger.info(f"Backtest da carteira {carteira_id} ({backtest['pregoes']} pregões) "
+                                    f"em {backtest['tempo_ms']} ms.")
+            return render(response, output, 200, arrow_table=_backtest_arrow_table)
+
+        except Exception as e:
+            current_app.logger.error(f"Erro no backtest: {str(e)}")
+            return jsonify({
+                "success": False,
+                "message": "Internal server error"
+            }), 500
@@ -1,6 +1,68 @@
+import numpy as np
 from flask import request, jsonify, current_app
 from app.utils.middleware import request_logger, rate_limit, require_auth
-from app.services.Asset_service import AssetService
+from app.utils.serialization import negotiate_format, render
+from app.services.Asset_service import (AssetService, ARRAYS_FORMAT, HISTORICO_FIELDS, INDICADORES_VETORES,
+                                        INDICADORES_MATRIZES)
+
+
+def _historico_arrow_table(payload):
+    """Arrow: uma linha por barra do histórico; o restante vai nos metadados."""
+    assets = dict(payload['assets'])
+    columns = assets.pop('historico')
+    return columns, {**payload, 'assets': assets}
+
+
+def _historico_lote_arrow_table(payload):
+    """Arrow: uma linha por barra, com a coluna `ticker`; falhas e resultados vão nos metadados."""
+    assets, tickers, historicos = {}, [], []
+    for ticker, result in payload['assets'].items():
+        result = dict(result)
+        historico = result.pop('historico', None)
+        if historico is not None:
+            tickers.append(np.full(len(historico['data']), ticker, dtype=object))
+            historicos.append(historico)
+        assets[ticker] = result
+
+    if not historicos:
+        return {}, {**payload, 'assets': assets}
+    columns = {'ticker': np.concatenate(tickers)}
+    for field in HISTORICO_FIELDS:
+        columns[field] = np.concatenate([historico[field] for historico in historicos])
+    return columns, {**payload, 'assets': assets}
+
+
+def _indicadores_arrow_table(payload):
+    """Arrow: uma linha por ticker, com as linhas das matrizes como colunas `<matriz>.<ticker>`."""
+    indicadores = dict(payload['indicadores'])
+    tickers = indicadores.pop('ativos_ordenados')
+
+    columns = {'ticker': tickers}
+    for key in INDICADORES_VETORES:
+        columns[key] = indicadores.pop(key)
+    for key in INDICADORES_MATRIZES:
+        matrix = indicadores.pop(key)
+        for j, ticker in enumerate(tickers):
+            columns[f"{key}.{ticker}"] = matrix[:, j]
+
+    return columns, {**payload, 'indicadores': indicadores}
+
+
+def _indicadores_lote_arrow_table(payload):
+    """Arrow: uma linha por carteira (comparação); os indicadores completos vão nos metadados."""
+    payload = dict(payload)
+    comparacao = payload.pop('comparacao')
+    columns = {key: [linha[key] for linha in comparacao] for key in (comparacao[0] if comparacao else {})}
+    return columns, payload
+
+
+def _ativos_arrow_table(payload):
+    """Arrow: uma linha por registro de preço; a paginação vai nos metadados."""
+    payload = dict(payload)
+    assets = payload.pop('assets')
+    columns = {key: [asset[key] for asset in assets] for key in (assets[0] if assets else {})}
+    return columns, payload
+
 
 class AssetController:
     """Controller for asset-related operations."""
@@ -19,6 +81,15 @@ class AssetController:
             data = request.get_json()
             ticker = data.get('asset_name', None)
             period = data.get('periodo', None)
+            formato = data.get('format') or request.args.get('format', 'records')
+            max_points = data.get('max_points', request.args.get('max_points', type=int))
+            downsample = data.get('downsample') or request.args.get('downsample', 'lttb')
+            output = negotiate_format()
+            if output != 'json':
+                # Respostas binárias serializam os arrays do histórico diretamente
+                formato = ARRAYS_FORMAT
+            elif formato == ARRAYS_FORMAT:
+                formato = 'columnar'
 
             current_app.logger.info(f"Retrieving assets for ticker: {ticker}, period: {period}")
 
@@ -29,7 +100,9 @@ class AssetController:
                     "message": "Ticker and Period is required"
                 }), 400
             
-            response, status_code = AssetService.get_asset_data(ticker, period)
+            response, status_code = AssetService.get_asset_data(
+                ticker, period, formato=formato, max_points=max_points, downsample=downsample
+            )
 
             if status_code != 200:
                 current_app.logger.error(f"Failed to retrieve assets for ticker {ticker}: {response.get('message', 'Unknown error')}")
@@ -39,7 +112,58 @@ class AssetController:
                 }), status_code
 
             current_app.logger.info("Assets retrieved successfully.")
-            return {"success": True, "assets": response}, 200
+            return render({"success": True, "assets": response}, output, 200, arrow_table=_historico_arrow_table)
+        
+        except Exception as e:
+            current_app.logger.error(f"Error retrieving assets: {str(e)}")
+            return jsonify({
+                "success": False,
+                "message": "Internal server error"
+            }), 500
+
+    @request_logger()
+    @require_auth(['admin'])
+    @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
+    def get_assets_batch(self):
+        """
+        Retrieves data for several assets in a single request.
+        
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            data = request.get_json() or {}
+            tickers = data.get('asset_names', None)
+            period = data.get('periodo', None)
+            formato = data.get('format') or request.args.get('format', 'records')
+            max_points = data.get('max_points', request.args.get('max_points', type=int))
+            downsample = data.get('downsample') or request.args.get('downsample', 'lttb')
+            output = negotiate_format()
+            if output != 'json':
+                # Respostas binárias serializam os arrays dos históricos diretamente
+                formato = ARRAYS_FORMAT
+            elif formato == ARRAYS_FORMAT:
+                formato = 'columnar'
+
+            current_app.logger.info(f"Retrieving assets for tickers: {tickers}, period: {period}")
+
+            if not tickers or not period:
+                current_app.logger.warning("Tickers or Period is required to retrieve assets.")
+                return jsonify({
+                    "success": False,
+                    "message": "Tickers and Period is required"
+                }), 400
+            
+            response, status_code = AssetService.get_assets_data_batch(
+                tickers, period, formato=formato, max_points=max_points, downsample=downsample
+            )
+
+            if status_code != 200:
+                current_app.logger.error(f"Failed to retrieve assets for tickers {tickers}: {response.get('message', 'Unknown error')}")
+                return jsonify(response), status_code
+
+            current_app.logger.info("Assets retrieved successfully.")
+            return render(response, output, 200, arrow_table=_historico_lote_arrow_table)
         
         except Exception as e:
             current_app.logger.error(f"Error retrieving assets: {str(e)}")
@@ -125,6 +249,77 @@ class AssetController:
                 "message": "Internal server error"
             }), 500
 
+    @request_logger()
+    @require_auth(['admin'])
+    @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
+    def remover_ativo(self, carteira_id, ticker):
+        """
+        Remove um ativo de uma carteira.
+        
+        Args:
+            carteira_id (int): ID da carteira
+            ticker (str): Símbolo do ativo
+        
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            current_app.logger.info(f"Removendo ativo {ticker} da carteira {carteira_id}")
+
+            response, status_code = AssetService.remover_ativo(carteira_id, ticker)
+
+            if status_code != 200:
+                current_app.logger.error(f"Falha ao remover ativo: {response.get('message', 'Unknown error')}")
+                return jsonify(response), status_code
+
+            current_app.logger.info("Ativo removido com sucesso.")
+            return jsonify(response), 200
+        
+        except Exception as e:
+            current_app.logger.error(f"Erro ao remover ativo: {str(e)}")
+            return jsonify({
+                "success": False,
+                "message": "Internal server error"
+            }), 500
+
+    @request_logger()
+    @require_auth(['admin'])
+    @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
+    def listar_ativos(self, carteira_id):
+        """
+        Lista os registros de preço de uma carteira (query params: limit, cursor, fields, ticker).
+        
+        Args:
+            carteira_id (int): ID da carteira
+        
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            current_app.logger.info(f"Listando ativos da carteira {carteira_id}")
+
+            output = negotiate_format()
+            response, status_code = AssetService.listar_ativos(
+                carteira_id,
+                limit=request.args.get('limit'),
+                cursor=request.args.get('cursor'),
+                fields=request.args.get('fields'),
+                ticker=request.args.get('ticker')
+            )
+
+            if status_code != 200:
+                current_app.logger.error(f"Falha ao listar ativos: {response.get('message', 'Unknown error')}")
+                return jsonify(response), status_code
+
+            return render(response, output, 200, arrow_table=_ativos_arrow_table)
+        
+        except Exception as e:
+            current_app.logger.error(f"Erro ao listar ativos: {str(e)}")
+            return jsonify({
+                "success": False,
+                "message": "Internal server error"
+            }), 500
+
     @request_logger()
     @require_auth(['admin'])
     @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
@@ -148,17 +343,68 @@ class AssetController:
                     "message": "Carteira ID is required"
                 }), 400
             
-            response, status_code = AssetService.calcular_indicadores_carteira(carteira_id)
+            output = negotiate_format()
+            formato = ARRAYS_FORMAT if output != 'json' else 'records'
+            response, status_code = AssetService.calcular_indicadores_carteira(carteira_id, formato=formato)
 
             if status_code != 200:
                 current_app.logger.error(f"Falha ao calcular indicadores da carteira {carteira_id}: {response.get('message', 'Unknown error')}")
                 return jsonify(response), status_code
 
+            if not response.get('success'):
+                return jsonify(response), 200
+
             current_app.logger.info(f"Indicadores da carteira {carteira_id} calculados com sucesso.")
-            return jsonify(response), 200
+            return render(response, output, 200, arrow_table=_indicadores_arrow_table)
         
         except Exception as e:
             current_app.logger.error(f"Erro ao calcular indicadores: {str(e)}")
+            return jsonify({
+                "success": False,
+                "message": "Internal server error"
+            }), 500
+
+    @request_logger()
+    @require_auth(['admin'])
+    @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
+    def get_indicadores_carteiras(self):
+        """
+        Retorna os indicadores de todas as carteiras do admin (ou das informadas em `ids`).
+        
+        Query params:
+            ids (str): IDs das carteiras separados por vírgula (opcional)
+        
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            ids = request.args.get('ids')
+            carteira_ids = None
+            if ids:
+                try:
+                    carteira_ids = [int(value) for value in ids.split(',') if value.strip()]
+                except ValueError:
+                    current_app.logger.warning(f"Invalid carteira ids: {ids}")
+                    return jsonify({
+                        "success": False,
+                        "message": "ids must be a comma-separated list of integers"
+                    }), 400
+            current_app.logger.info(f"Calculando indicadores das carteiras {carteira_ids or 'do admin'}")
+            
+            output = negotiate_format()
+            formato = ARRAYS_FORMAT if output != 'json' else 'records'
+            response, status_code = AssetService.calcular_indicadores_lote(carteira_ids, formato=formato)
+
+            if status_code != 200:
+                current_app.logger.error(f"Falha ao calcular indicadores em lote: {response.get('message', 'Unknown error')}")
+                return jsonify(response), status_code
+
+            current_app.logger.info(f"Indicadores de {response['total']} carteira(s) em {response['tempo_ms']} ms "
+                                    f"({response['calculadas']} calculada(s)).")
+            return render(response, output, 200, arrow_table=_indicadores_lote_arrow_table)
+        
+        except Exception as e:
+            current_app.logger.error(f"Erro ao calcular indicadores em lote: {str(e)}")
             return jsonify({
                 "success": False,
                 "message": "Internal server error"
@@ -81,14 +81,18 @@ class CarteiraController:
     @rate_limit(limit=10, window=60)  # Limit to 10 requests per minute
     def get_portfolios(self):
         """
-        Retrieves a list of portfolios.
+        Retrieves a page of portfolios (query params: limit, cursor, fields).
         
         Returns:
             tuple: (response, status_code)
         """
         try:
             current_app.logger.info("Retrieving portfolios.")
-            response, status = CarteiraService.get_portfolios()
+            response, status = CarteiraService.get_portfolios(
+                limit=request.args.get('limit'),
+                cursor=request.args.get('cursor'),
+                fields=request.args.get('fields')
+            )
             
             if status != 200:
                 current_app.logger.warning(f"Failed to retrieve portfolios: {response.get('message')}")
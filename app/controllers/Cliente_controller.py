@@ -42,14 +42,18 @@ class ClienteController:
     @rate_limit(limit=10, window=60)  # Limit to 10 requests
     def get_clients(self):
         """
-        Retrieves a list of clients.
+        Retrieves a page of clients (query params: limit, cursor, fields).
         
         Returns:
             tuple: (response, status_code)
         """
         try:
             current_app.logger.info("Retrieving clients.")
-            response, status = ClienteService.get_clientes()
+            response, status = ClienteService.get_clientes(
+                limit=request.args.get('limit'),
+                cursor=request.args.get('cursor'),
+                fields=request.args.get('fields')
+            )
             
             if status != 200:
                 current_app.logger.warning(f"Failed to retrieve clients: {response.get('message')}")
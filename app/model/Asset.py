@@ -1,148 +1,279 @@
 from app import db
 from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import and_
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, func, or_, select
+from app.model.PriceBar import PriceBar
+
+ASSET_FIELDS = ('carteira_id', 'ticker', 'interval', 'date', 'open', 'high', 'low', 'close', 'volume')
+
 
 class Asset(db.Model):
     """
-    Modelo de ativo financeiro com dados históricos.
-    
+    Ativo acompanhado por uma carteira (associação carteira-ticker).
+
+    Os preços ficam em `PriceBar`, uma única vez por (ticker, interval, date);
+    a carteira enxerga as barras do seu intervalo a partir de `start_date`
+    (a data mais antiga já pedida no cadastro).
+
     Attributes:
-        id (int): ID único do registro
-        carteira_id (int): ID da carteira proprietária
+        carteira_id (int): ID da carteira
         ticker (str): Símbolo do ativo (ex: ITUB4.SA)
-        date (datetime): Data do fechamento
-        close (float): Preço de fechamento
+        interval (str): Intervalo das barras acompanhadas (ex: 1d)
+        start_date (date): Primeira data visível para a carteira (None = todo o histórico)
         created_at (datetime): Data de criação do registro
     """
-    __tablename__ = 'asset'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    carteira_id = db.Column(db.Integer, db.ForeignKey('carteiras.id', ondelete='CASCADE'), nullable=False, index=True)
-    ticker = db.Column(db.String(20), nullable=False, index=True)
-    date = db.Column(db.Date, nullable=False, index=True)
-    close = db.Column(db.Float, nullable=False)
+    __tablename__ = 'carteira_ativo'
+
+    carteira_id = db.Column(db.Integer, db.ForeignKey('carteiras.id', ondelete='CASCADE'), primary_key=True)
+    ticker = db.Column(db.String(20), primary_key=True, index=True)
+    interval = db.Column(db.String(5), nullable=False, default='1d')
+    start_date = db.Column(db.Date, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # Constraints
-    __table_args__ = (
-        db.UniqueConstraint('carteira_id', 'ticker', 'date', name='uq_carteira_ticker_date'),
-        db.CheckConstraint('close > 0', name='check_close_positive'),
-    )
 
-    def __init__(self, carteira_id: int, ticker: str, date: datetime, close: float):
+    def __init__(self, carteira_id: int, ticker: str, interval: str = '1d', start_date=None):
         """
-        Inicializa um novo registro de ativo.
-        
+        Inicializa a associação de um ticker à carteira.
+
         Args:
             carteira_id (int): ID da carteira
             ticker (str): Símbolo do ativo
-            date (datetime): Data do fechamento
-            close (float): Preço de fechamento
+            interval (str): Intervalo das barras
+            start_date (date, optional): Primeira data visível para a carteira
         """
         self.carteira_id = carteira_id
         self.ticker = ticker.upper()
-        self.date = date.date() if hasattr(date, 'date') else date
-        self.close = close
+        self.interval = interval
+        self.start_date = start_date.date() if hasattr(start_date, 'date') else start_date
+
+    @classmethod
+    def _join_barras(cls):
+        """Associações da carteira unidas às barras visíveis (mesmo ticker e intervalo, a partir de start_date)."""
+        ativos, barras = cls.__table__, PriceBar.__table__
+        return ativos.join(barras, and_(
+            barras.c.ticker == ativos.c.ticker,
+            barras.c.interval == ativos.c.interval,
+            or_(ativos.c.start_date.is_(None), barras.c.date >= ativos.c.start_date),
+        ))
+
+    @classmethod
+    def barras(cls, carteira_ids: Optional[List[int]] = None):
+        """
+        Barras visíveis de cada carteira, como subconsulta com as colunas de ASSET_FIELDS.
+
+        Substitui a antiga tabela `asset` (uma linha por carteira, ticker e
+        data) nas leituras: o banco resolve a junção pela chave primária de
+        `price_bar` (ticker, interval, date).
+
+        Args:
+            carteira_ids (List[int], optional): Restringe a estas carteiras
+
+        Returns:
+            Subquery: Colunas carteira_id, ticker, interval, date, open, high, low, close, volume
+        """
+        ativos, barras = cls.__table__, PriceBar.__table__
+        stmt = select(
+            ativos.c.carteira_id, ativos.c.ticker, ativos.c.interval, barras.c.date, barras.c.open,
+            barras.c.high, barras.c.low, barras.c.close, barras.c.volume,
+        ).select_from(cls._join_barras())
+        if carteira_ids is not None:
+            stmt = stmt.where(ativos.c.carteira_id.in_(list(carteira_ids)))
+        return stmt.subquery('barras_carteira')
+
+    @classmethod
+    def contar_barras(cls, carteira_id):
+        """Número de barras visíveis da carteira (aceita uma coluna, para subconsultas correlacionadas)."""
+        return select(func.count()).select_from(cls._join_barras()).where(cls.__table__.c.carteira_id == carteira_id)
 
     @classmethod
     def get_assets_by_carteira(cls, carteira_id: int) -> List['Asset']:
         """
         Busca todos os ativos de uma carteira.
-        
+
         Args:
             carteira_id (int): ID da carteira
-            
+
         Returns:
             List[Asset]: Lista de ativos da carteira
         """
-        return cls.query.filter_by(carteira_id=carteira_id).order_by(cls.date.desc()).all()
+        return cls.query.filter_by(carteira_id=carteira_id).order_by(cls.ticker).all()
+
+    @classmethod
+    def get_page_by_carteira(cls, carteira_id: int, fields: List[str], limit: int,
+                             after: Optional[tuple] = None, ticker: Optional[str] = None) -> list:
+        """
+        Busca uma página das barras de uma carteira em ordem de (ticker, date), só com as colunas pedidas.
+
+        Para cada ticker, a página é uma faixa contígua da chave primária de
+        `price_bar` (ticker, interval, date).
+
+        Args:
+            carteira_id (int): ID da carteira
+            fields (List[str]): Campos de ASSET_FIELDS a carregar
+            limit (int): Número máximo de linhas
+            after (tuple, optional): (ticker, date) da última barra da página anterior
+            ticker (str, optional): Restringe a um ticker
+
+        Returns:
+            list: Linhas (Row) com os campos pedidos, ticker e date
+        """
+        from app.utils.pagination import keyset_after
+
+        barras = cls.barras([carteira_id])
+        columns = [barras.c[field] for field in dict.fromkeys(['ticker', 'date', *fields])]
+        stmt = select(*columns)
+        if ticker:
+            stmt = stmt.where(barras.c.ticker == ticker.upper())
+        if after is not None:
+            stmt = stmt.where(keyset_after([barras.c.ticker, barras.c.date], after))
+        return db.session.execute(stmt.order_by(barras.c.ticker, barras.c.date).limit(limit)).all()
 
     @classmethod
     def get_unique_tickers_by_carteira(cls, carteira_id: int) -> List[str]:
         """
         Busca todos os tickers únicos de uma carteira.
-        
+
         Args:
             carteira_id (int): ID da carteira
-            
+
         Returns:
             List[str]: Lista de tickers únicos
         """
-        result = db.session.query(cls.ticker).filter_by(carteira_id=carteira_id).distinct().all()
+        result = db.session.query(cls.ticker).filter_by(carteira_id=carteira_id).order_by(cls.ticker).all()
         return [row[0] for row in result]
 
     @classmethod
-    def asset_exists(cls, carteira_id: int, ticker: str, date: datetime) -> bool:
+    def get_date_range(cls, carteira_id: int, ticker: str) -> tuple:
         """
-        Verifica se um ativo já existe para uma data específica.
-        
+        Busca a primeira e a última data visíveis de um ticker na carteira.
+
         Args:
             carteira_id (int): ID da carteira
             ticker (str): Símbolo do ativo
-            date (datetime): Data do fechamento
-            
+
         Returns:
-            bool: True se o ativo já existe
+            tuple: (primeira data, última data) ou (None, None) se não houver registros
         """
-        check_date = date.date() if hasattr(date, 'date') else date
-        return cls.query.filter(
-            and_(
-                cls.carteira_id == carteira_id,
-                cls.ticker == ticker.upper(),
-                cls.date == check_date
-            )
-        ).first() is not None
+        barras = cls.barras([carteira_id])
+        return db.session.execute(
+            select(func.min(barras.c.date), func.max(barras.c.date)).where(barras.c.ticker == ticker.upper())
+        ).one()
+
+    @classmethod
+    def get_carteiras_by_ticker(cls, ticker: str, interval: str, since=None) -> List[int]:
+        """
+        Carteiras que enxergam barras de um ticker a partir de uma data.
+
+        Args:
+            ticker (str): Símbolo do ativo
+            interval (str): Intervalo das barras
+            since (date, optional): Só carteiras cuja janela alcança datas até esta
+
+        Returns:
+            List[int]: IDs das carteiras
+        """
+        query = db.session.query(cls.carteira_id).filter(cls.ticker == ticker.upper(), cls.interval == interval)
+        if since is not None:
+            query = query.filter(or_(cls.start_date.is_(None), cls.start_date <= since))
+        return [row[0] for row in query.all()]
+
+    @classmethod
+    def link(cls, carteira_id: int, ticker: str, interval: str, start_date) -> Tuple['Asset', bool, Optional[object]]:
+        """
+        Associa o ticker à carteira ou amplia a janela visível (não faz commit).
+
+        Args:
+            carteira_id (int): ID da carteira
+            ticker (str): Símbolo do ativo
+            interval (str): Intervalo das barras
+            start_date (date): Primeira data pedida (None = todo o histórico)
+
+        Returns:
+            tuple: (associação, True se a janela visível mudou, start_date anterior)
+        """
+        ativo = db.session.get(cls, (carteira_id, ticker.upper()))
+        if ativo is None:
+            ativo = cls(carteira_id, ticker, interval, start_date)
+            db.session.add(ativo)
+            db.session.flush()
+            return ativo, True, None
+
+        anterior = ativo.start_date
+        if ativo.interval != interval:
+            # Outro intervalo: passa a acompanhar a outra série, com a janela pedida
+            ativo.interval = interval
+            ativo.start_date = start_date
+        elif anterior is not None and (start_date is None or start_date < anterior):
+            ativo.start_date = start_date
+        else:
+            return ativo, False, anterior
+        db.session.flush()
+        return ativo, True, anterior
 
     @classmethod
     def bulk_insert(cls, assets_data: List[dict]) -> int:
         """
-        Inserção em lote de ativos.
-        
+        Inserção em lote de barras por carteira (ignora as que já existem).
+
+        As barras vão para `price_bar` e cada (carteira, ticker) é associado
+        com a janela a partir da sua primeira data.
+
         Args:
-            assets_data (List[dict]): Lista de dados dos ativos
-            
+            assets_data (List[dict]): carteira_id, ticker, date, close e, opcionalmente, interval e OHLCV
+
         Returns:
-            int: Número de registros inseridos
+            int: Número de barras inseridas
         """
         try:
-            # Remove duplicatas baseado em carteira_id, ticker e date
-            unique_assets = []
-            seen = set()
-            
+            inicios: Dict[tuple, object] = {}
             for asset_data in assets_data:
-                key = (asset_data['carteira_id'], asset_data['ticker'], asset_data['date'])
-                if key not in seen:
-                    seen.add(key)
-                    unique_assets.append(asset_data)
-            
-            if unique_assets:
-                db.session.bulk_insert_mappings(cls, unique_assets)
-                db.session.commit()
-                return len(unique_assets)
-            return 0
-            
+                key = (asset_data['carteira_id'], asset_data['ticker'].upper(), asset_data.get('interval') or '1d')
+                day = asset_data['date'].date() if hasattr(asset_data['date'], 'date') else asset_data['date']
+                inicios[key] = min(inicios.get(key, day), day)
+
+            inserted = PriceBar.insert_ignore_duplicates(assets_data)
+            for (carteira_id, ticker, interval), start_date in inicios.items():
+                cls.link(carteira_id, ticker, interval, start_date)
+            db.session.commit()
+            return len(inserted)
+
         except Exception as e:
             db.session.rollback()
             raise e
 
+    @classmethod
+    def delete_by_ticker(cls, carteira_id: int, ticker: str) -> Optional[int]:
+        """
+        Desassocia o ticker da carteira (não faz commit); as barras compartilhadas permanecem.
+
+        Args:
+            carteira_id (int): ID da carteira
+            ticker (str): Símbolo do ativo
+
+        Returns:
+            Optional[int]: Número de barras que a carteira deixou de enxergar (None se o ticker não estava na carteira)
+        """
+        ticker = ticker.upper()
+        ativos = cls.__table__
+        registros = db.session.execute(
+            cls.contar_barras(carteira_id).where(ativos.c.ticker == ticker)
+        ).scalar_one()
+        deleted = cls.query.filter_by(carteira_id=carteira_id, ticker=ticker).delete(synchronize_session=False)
+        return registros if deleted else None
+
     def to_dict(self) -> dict:
         """
         Converte o ativo para dicionário.
-        
+
         Returns:
             dict: Dados do ativo
         """
         return {
-            'id': self.id,
             'carteira_id': self.carteira_id,
             'ticker': self.ticker,
-            'date': self.date.isoformat(),
-            'close': self.close,
-            'created_at': self.created_at.isoformat()
+            'interval': self.interval,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
     def __repr__(self) -> str:
-        return f'<Asset {self.ticker} {self.date}: R$ {self.close}>'
-
-    
\ No newline at end of file
+        return f'<Asset {self.ticker} ({self.interval}) carteira={self.carteira_id}>'
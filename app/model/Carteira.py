@@ -1,9 +1,14 @@
 from app import db
-from typing import Optional, List
+from typing import Optional, List, Sequence, Tuple
 from datetime import datetime
 from decimal import Decimal
+from sqlalchemy import func
 from app.model.Cliente import Cliente
 
+CARTEIRA_FIELDS = ('id', 'cliente_id', 'cliente_nome', 'nome', 'descricao', 'quantidade_ativos',
+                   'quantidade_registros', 'created_at', 'updated_at')
+
+
 class Carteira(db.Model):
     """
     Modelo de carteira que pertence a um cliente.
@@ -105,6 +110,85 @@ class Carteira(db.Model):
         """
         return cls.query.join(Cliente).filter(Cliente.user_adm_id == user_adm_id).all()
 
+    @classmethod
+    def _colunas_contagem(cls) -> dict:
+        """
+        Tickers e barras de preço visíveis como subconsultas correlacionadas.
+
+        Cada subconsulta percorre as associações da carteira e as faixas da
+        chave primária de `price_bar`, e só é avaliada para as carteiras
+        devolvidas (a página), sem carregar o histórico de preços.
+        """
+        from app.model.Asset import Asset
+
+        return {
+            'quantidade_ativos': db.session.query(func.count(Asset.ticker))
+            .filter(Asset.carteira_id == cls.id).correlate(cls).scalar_subquery(),
+            'quantidade_registros': Asset.contar_barras(cls.id).correlate(cls).scalar_subquery(),
+        }
+
+    @classmethod
+    def get_resumos_by_admin(cls, user_adm_id: int,
+                             carteira_id: Optional[int] = None) -> List[Tuple['Carteira', str, int, int]]:
+        """
+        Busca as carteiras do admin com o nome do cliente e a contagem de ativos em uma única consulta.
+
+        Args:
+            user_adm_id (int): ID do usuário administrador
+            carteira_id (int, optional): Restringe a consulta a uma carteira
+
+        Returns:
+            List[Tuple[Carteira, str, int, int]]: (carteira, nome do cliente,
+            tickers distintos, registros de preço), ordenadas por ID
+        """
+        contagens = cls._colunas_contagem()
+        query = (
+            db.session.query(cls, Cliente.name, contagens['quantidade_ativos'], contagens['quantidade_registros'])
+            .join(Cliente, Cliente.id == cls.cliente_id)
+            .filter(Cliente.user_adm_id == user_adm_id)
+        )
+        if carteira_id is not None:
+            query = query.filter(cls.id == carteira_id)
+
+        return [(carteira, cliente_nome, int(tickers or 0), int(registros or 0))
+                for carteira, cliente_nome, tickers, registros in query.order_by(cls.id).all()]
+
+    @classmethod
+    def get_page_by_admin(cls, user_adm_id: int, fields: Sequence[str], limit: int,
+                          after_id: Optional[int] = None) -> List:
+        """
+        Busca uma página (por ID crescente) das carteiras do admin, só com as colunas pedidas.
+
+        As contagens de ativos só entram na consulta se pedidas em `fields`.
+
+        Args:
+            user_adm_id (int): ID do usuário administrador
+            fields (Sequence[str]): Campos de CARTEIRA_FIELDS a carregar
+            limit (int): Número máximo de linhas
+            after_id (int, optional): ID da última carteira da página anterior
+
+        Returns:
+            List: Linhas (Row) com os campos pedidos e o id
+        """
+        contagens = cls._colunas_contagem() if set(fields) & {'quantidade_ativos', 'quantidade_registros'} else {}
+        columns = []
+        for field in dict.fromkeys(['id', *fields]):
+            if field == 'cliente_nome':
+                columns.append(Cliente.name.label(field))
+            elif field in contagens:
+                columns.append(contagens[field].label(field))
+            else:
+                columns.append(getattr(cls, field))
+
+        query = (
+            db.session.query(*columns)
+            .join(Cliente, Cliente.id == cls.cliente_id)
+            .filter(Cliente.user_adm_id == user_adm_id)
+        )
+        if after_id is not None:
+            query = query.filter(cls.id > after_id)
+        return query.order_by(cls.id).limit(limit).all()
+
     @classmethod
     def update_carteira_by_admin(cls, carteira_id: int, user_adm_id: int, data: dict) -> Optional['Carteira']:
         """
@@ -163,7 +247,20 @@ class Carteira(db.Model):
         Returns:
             int: Número de ativos na carteira
         """
-        return len(self.ativos)
+        from app.model.Asset import Asset
+
+        return db.session.query(func.count(Asset.ticker)).filter(Asset.carteira_id == self.id).scalar() or 0
+
+    def get_quantidade_registros(self) -> int:
+        """
+        Retorna a quantidade de barras de preço visíveis na carteira.
+
+        Returns:
+            int: Número de registros de preço
+        """
+        from app.model.Asset import Asset
+
+        return db.session.execute(Asset.contar_barras(self.id)).scalar() or 0
 
     def get_ativos_por_tipo(self) -> dict:
         """
@@ -180,28 +277,39 @@ class Carteira(db.Model):
             tipos[tipo].append(ativo)
         return tipos
 
-    def to_dict(self, include_ativos: bool = False) -> dict:
+    def to_dict(self, include_ativos: bool = False, cliente_nome: Optional[str] = None,
+                quantidade_ativos: Optional[int] = None, quantidade_registros: Optional[int] = None) -> dict:
         """
         Converte a carteira em um dicionário para serialização.
 
+        O nome do cliente e as contagens podem vir prontos de
+        `get_resumos_by_admin`; os que faltarem são consultados aqui.
+
         Args:
             include_ativos (bool): Se deve incluir os ativos na serialização
+            cliente_nome (str, optional): Nome do cliente proprietário
+            quantidade_ativos (int, optional): Tickers distintos da carteira
+            quantidade_registros (int, optional): Registros de preço da carteira
 
         Returns:
             dict: Representação da carteira em dicionário
         """
 
-        client = Cliente.find_by_id(self.cliente_id)
-        if not client:
-            raise ValueError("Cliente não encontrado para a carteira.")
+        if cliente_nome is None:
+            client = Cliente.find_by_id(self.cliente_id)
+            if not client:
+                raise ValueError("Cliente não encontrado para a carteira.")
+            cliente_nome = client.name
 
         result = {
             'id': self.id,
             'cliente_id': self.cliente_id,
-            'cliente_nome': client.name,
+            'cliente_nome': cliente_nome,
             'nome': self.nome,
             'descricao': self.descricao,
-            'quantidade_ativos': self.get_quantidade_ativos(),
+            'quantidade_ativos': self.get_quantidade_ativos() if quantidade_ativos is None else quantidade_ativos,
+            'quantidade_registros': (self.get_quantidade_registros() if quantidade_registros is None
+                                     else quantidade_registros),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
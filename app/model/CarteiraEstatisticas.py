@@ -0,0 +1,148 @@
+from app import db
+from datetime import datetime
+import logging
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event, select, update, delete, insert
+from sqlalchemy.orm import Session
+from app.model.Carteira import Carteira
+from app.utils.streaming_stats import CovarianceState
+
+logger = logging.getLogger(__name__)
+
+
+def _decode_state(data: bytes) -> Optional[CovarianceState]:
+    """Estado gravado; None se ilegível (reconstruído a partir do histórico)."""
+    try:
+        return CovarianceState.from_bytes(data)
+    except Exception as e:
+        logger.warning(f"Estatísticas gravadas ilegíveis, reconstruindo: {str(e)}")
+        return None
+
+
+class CarteiraEstatisticas(db.Model):
+    """
+    Estatísticas suficientes de covariância de uma carteira (n, médias e co-momentos das datas em comum).
+
+    São atualizadas de forma incremental no cadastro/remoção de ativos e
+    carimbadas com a `data_version` de IndicadoresCache correspondente. Um
+    estado com versão diferente da atual está desatualizado (ex: escrita feita
+    fora do serviço) e é reconstruído a partir do histórico na próxima leitura.
+
+    Attributes:
+        carteira_id (int): ID da carteira
+        data_version (int): Versão dos dados incorporada ao estado
+        state (bytes): CovarianceState serializado (.npz, sem pickle)
+        updated_at (datetime): Data da última atualização
+    """
+    __tablename__ = 'carteira_estatisticas'
+
+    carteira_id = db.Column(db.Integer, db.ForeignKey('carteiras.id', ondelete='CASCADE'), primary_key=True)
+    data_version = db.Column(db.Integer, nullable=False, default=0)
+    state = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def load(cls, carteira_id: int) -> Tuple[Optional[int], Optional[CovarianceState]]:
+        """
+        Busca o estado da carteira.
+
+        Args:
+            carteira_id (int): ID da carteira
+
+        Returns:
+            tuple: (versão dos dados, estado) ou (None, None) se não existir ou estiver ilegível
+        """
+        table = cls.__table__
+        row = db.session.execute(
+            select(table.c.data_version, table.c.state).where(table.c.carteira_id == carteira_id)
+        ).first()
+        state = _decode_state(row.state) if row is not None else None
+        if state is None:
+            return None, None
+        return row.data_version, state
+
+    @classmethod
+    def load_many(cls, carteira_ids: List[int]) -> Dict[int, Tuple[int, CovarianceState]]:
+        """
+        Busca os estados de várias carteiras em uma única consulta.
+
+        Args:
+            carteira_ids (List[int]): IDs das carteiras
+
+        Returns:
+            Dict[int, tuple]: (versão dos dados, estado) por carteira que tem estado
+        """
+        table = cls.__table__
+        rows = db.session.execute(
+            select(table.c.carteira_id, table.c.data_version, table.c.state)
+            .where(table.c.carteira_id.in_(list(carteira_ids)))
+        ).all()
+        states = {row.carteira_id: (row.data_version, _decode_state(row.state)) for row in rows}
+        return {carteira_id: entry for carteira_id, entry in states.items() if entry[1] is not None}
+
+    @classmethod
+    def save(cls, carteira_id: int, data_version: int, state: CovarianceState) -> None:
+        """
+        Grava o estado da carteira (não faz commit).
+
+        No Postgres e no SQLite é um único `INSERT ... ON CONFLICT DO UPDATE`:
+        duas primeiras leituras simultâneas da mesma carteira (que reconstroem
+        e gravam o estado) não conflitam na chave primária. Um estado de versão
+        anterior à gravada não a substitui.
+
+        Args:
+            carteira_id (int): ID da carteira
+            data_version (int): Versão dos dados incorporada ao estado
+            state (CovarianceState): Estado a gravar
+        """
+        table = cls.__table__
+        values = {
+            'data_version': data_version,
+            'state': state.to_bytes(),
+            'updated_at': datetime.utcnow(),
+        }
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            result = db.session.execute(update(table).where(table.c.carteira_id == carteira_id).values(**values))
+            if result.rowcount == 0:
+                db.session.execute(insert(table).values(carteira_id=carteira_id, **values))
+            return
+
+        statement = dialect_insert(table).values(carteira_id=carteira_id, **values)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['carteira_id'],
+            set_={name: statement.excluded[name] for name in values},
+            where=table.c.data_version <= statement.excluded.data_version,
+        ))
+
+    @classmethod
+    def remove(cls, carteira_id: int, connection=None) -> None:
+        """
+        Remove o estado da carteira (não faz commit).
+
+        Args:
+            carteira_id (int): ID da carteira
+            connection: Conexão a usar (padrão: a sessão atual)
+        """
+        executor = connection if connection is not None else db.session
+        executor.execute(delete(cls.__table__).where(cls.__table__.c.carteira_id == carteira_id))
+
+    def __repr__(self) -> str:
+        return f'<CarteiraEstatisticas carteira={self.carteira_id} v{self.data_version}>'
+
+
+@event.listens_for(Session, 'after_flush')
+def _remove_deleted(session, flush_context):
+    """Remove as estatísticas das carteiras removidas pelo ORM."""
+    deleted_carteiras = {obj.id for obj in session.deleted if isinstance(obj, Carteira)}
+    if not deleted_carteiras:
+        return
+
+    connection = session.connection()
+    for carteira_id in deleted_carteiras:
+        CarteiraEstatisticas.remove(carteira_id, connection)
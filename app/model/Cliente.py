@@ -1,8 +1,11 @@
 from app import db
 from werkzeug.security import generate_password_hash, check_password_hash
-from typing import Optional
+from typing import Optional, List, Sequence
 from datetime import datetime
 
+CLIENTE_FIELDS = ('id', 'user_adm_id', 'name', 'email', 'telefone', 'cpf', 'status', 'created_at', 'updated_at')
+
+
 class Cliente(db.Model):
     """
     Modelo de cliente que pertence a um usuário administrador.
@@ -35,6 +38,11 @@ class Cliente(db.Model):
     # Relacionamentos
     carteiras = db.relationship('Carteira', backref='cliente', lazy=True, cascade='all, delete-orphan')
 
+    # Paginação por cursor: clientes do admin em ordem de ID, direto do índice
+    __table_args__ = (
+        db.Index('ix_clientes_user_adm_id_id', 'user_adm_id', 'id'),
+    )
+
     def __init__(self, user_adm_id: int, name: str, email: str, cpf: str,
                  telefone: str = None, status: str = 'ativo'):
         """
@@ -114,6 +122,27 @@ class Cliente(db.Model):
             return []
         
         return clients
+
+    @classmethod
+    def get_page_by_admin(cls, user_adm_id: int, fields: Sequence[str], limit: int,
+                          after_id: Optional[int] = None) -> List:
+        """
+        Busca uma página (por ID crescente) dos clientes de um administrador, só com as colunas pedidas.
+
+        Args:
+            user_adm_id (int): ID do usuário administrador
+            fields (Sequence[str]): Campos de CLIENTE_FIELDS a carregar
+            limit (int): Número máximo de linhas
+            after_id (int, optional): ID do último cliente da página anterior
+
+        Returns:
+            List: Linhas (Row) com os campos pedidos e o id
+        """
+        columns = [getattr(cls, field) for field in dict.fromkeys(['id', *fields])]
+        query = db.session.query(*columns).filter(cls.user_adm_id == user_adm_id)
+        if after_id is not None:
+            query = query.filter(cls.id > after_id)
+        return query.order_by(cls.id).limit(limit).all()
     
     @classmethod
     def save(cls, cliente: 'Cliente') -> 'Cliente':
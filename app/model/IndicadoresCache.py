@@ -0,0 +1,266 @@
+from app import db
+from datetime import datetime
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event, select, update, delete, insert
+from sqlalchemy.orm import Session
+from app.model.Asset import Asset
+from app.model.Carteira import Carteira
+from app.model.Cliente import Cliente
+from app.utils import serialization
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_payload(indicadores: Any) -> Optional[bytes]:
+    """Indicadores em MessagePack (só dados: a leitura não executa código), ou None sem msgpack."""
+    if serialization.msgpack is None:
+        return None
+    return serialization.to_msgpack(indicadores)
+
+
+def _decode_payload(payload: Optional[bytes]) -> Optional[Any]:
+    """Indicadores gravados por `_encode_payload`; None se ausentes ou ilegíveis (recalculados)."""
+    if payload is None or serialization.msgpack is None:
+        return None
+    try:
+        return serialization.from_msgpack(payload)
+    except Exception as e:
+        logger.warning(f"Indicadores materializados ilegíveis, recalculando: {str(e)}")
+        return None
+
+
+class IndicadoresCache(db.Model):
+    """
+    Indicadores calculados de uma carteira, materializados com um carimbo de versão.
+
+    `data_version` é incrementado a cada escrita nos preços da carteira
+    (cadastro de ativo, remoção de ativo). O payload só é válido enquanto
+    `payload_version == data_version`.
+
+    Attributes:
+        carteira_id (int): ID da carteira
+        data_version (int): Versão atual dos dados de preço da carteira
+        payload_version (int): Versão dos dados usada para calcular o payload
+        payload (bytes): Indicadores no formato 'arrays', em MessagePack (arrays como buffers)
+        updated_at (datetime): Data da última atualização
+    """
+    __tablename__ = 'carteira_indicadores_cache'
+
+    carteira_id = db.Column(db.Integer, db.ForeignKey('carteiras.id', ondelete='CASCADE'), primary_key=True)
+    data_version = db.Column(db.Integer, nullable=False, default=0)
+    payload_version = db.Column(db.Integer, nullable=True)
+    payload = db.Column(db.LargeBinary, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def lookup(cls, carteira_id: int, user_adm_id: int) -> Tuple[bool, int, Optional[Any]]:
+        """
+        Verifica a carteira e busca os indicadores materializados em uma única consulta.
+
+        Args:
+            carteira_id (int): ID da carteira
+            user_adm_id (int): ID do usuário administrador
+
+        Returns:
+            tuple: (carteira pertence ao admin, versão dos dados, indicadores
+                válidos ou None)
+        """
+        table = cls.__table__
+        row = db.session.execute(
+            select(table.c.data_version, table.c.payload_version, table.c.payload)
+            .select_from(Carteira.__table__)
+            .join(Cliente.__table__, Cliente.__table__.c.id == Carteira.__table__.c.cliente_id)
+            .outerjoin(table, table.c.carteira_id == Carteira.__table__.c.id)
+            .where(Carteira.__table__.c.id == carteira_id, Cliente.__table__.c.user_adm_id == user_adm_id)
+        ).first()
+
+        if row is None:
+            return False, 0, None
+
+        data_version, payload_version, payload = row
+        data_version = data_version or 0
+        if payload is None or payload_version != data_version:
+            return True, data_version, None
+        return True, data_version, _decode_payload(payload)
+
+    @classmethod
+    def lookup_many(cls, user_adm_id: int,
+                    carteira_ids: Optional[List[int]] = None) -> Dict[int, Tuple[str, int, Optional[Any]]]:
+        """
+        Carteiras do admin com os indicadores materializados, em uma única consulta.
+
+        Args:
+            user_adm_id (int): ID do usuário administrador
+            carteira_ids (List[int]): Restringe a estas carteiras (padrão: todas as do admin)
+
+        Returns:
+            Dict[int, tuple]: (nome, versão dos dados, indicadores válidos ou
+                None) por carteira do admin, em ordem de ID
+        """
+        table = cls.__table__
+        carteiras = Carteira.__table__
+        stmt = (
+            select(carteiras.c.id, carteiras.c.nome, table.c.data_version, table.c.payload_version, table.c.payload)
+            .select_from(carteiras)
+            .join(Cliente.__table__, Cliente.__table__.c.id == carteiras.c.cliente_id)
+            .outerjoin(table, table.c.carteira_id == carteiras.c.id)
+            .where(Cliente.__table__.c.user_adm_id == user_adm_id)
+            .order_by(carteiras.c.id)
+        )
+        if carteira_ids is not None:
+            stmt = stmt.where(carteiras.c.id.in_(list(carteira_ids)))
+
+        result = {}
+        for carteira_id, nome, data_version, payload_version, payload in db.session.execute(stmt):
+            data_version = data_version or 0
+            valid = payload is not None and payload_version == data_version
+            result[carteira_id] = (nome, data_version, _decode_payload(payload) if valid else None)
+        return result
+
+    @classmethod
+    def _ensure_row(cls, carteira_id: int, connection=None) -> None:
+        """Cria a linha da carteira (versão 0) se ainda não existir."""
+        executor = connection if connection is not None else db.session
+        dialect = executor.get_bind().dialect.name if connection is None else connection.dialect.name
+        table = cls.__table__
+        values = {'carteira_id': carteira_id, 'data_version': 0}
+
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            exists = executor.execute(
+                select(table.c.carteira_id).where(table.c.carteira_id == carteira_id)
+            ).first()
+            if exists is None:
+                executor.execute(insert(table).values(**values))
+            return
+
+        executor.execute(dialect_insert(table).values(**values).on_conflict_do_nothing())
+
+    @classmethod
+    def store(cls, carteira_id: int, data_version: int, indicadores: Any) -> bool:
+        """
+        Grava os indicadores calculados, desde que os dados não tenham mudado durante o cálculo.
+
+        Args:
+            carteira_id (int): ID da carteira
+            data_version (int): Versão dos dados lida antes do cálculo
+            indicadores (Any): Indicadores no formato 'arrays'
+
+        Returns:
+            bool: True se o payload foi gravado (False também sem msgpack instalado)
+        """
+        payload = _encode_payload(indicadores)
+        if payload is None:
+            return False
+
+        cls._ensure_row(carteira_id)
+        table = cls.__table__
+        result = db.session.execute(
+            update(table)
+            .where(table.c.carteira_id == carteira_id, table.c.data_version == data_version)
+            .values(payload=payload, payload_version=data_version, updated_at=datetime.utcnow())
+        )
+        db.session.commit()
+        return result.rowcount > 0
+
+    @classmethod
+    def bump_version(cls, carteira_id: int, connection=None) -> int:
+        """
+        Invalida os indicadores materializados da carteira (não faz commit).
+
+        Args:
+            carteira_id (int): ID da carteira
+            connection: Conexão a usar (padrão: a sessão atual)
+
+        Returns:
+            int: Nova versão dos dados da carteira
+        """
+        executor = connection if connection is not None else db.session
+        cls._ensure_row(carteira_id, connection)
+        table = cls.__table__
+        executor.execute(
+            update(table)
+            .where(table.c.carteira_id == carteira_id)
+            .values(data_version=table.c.data_version + 1, payload=None, payload_version=None,
+                    updated_at=datetime.utcnow())
+        )
+        return executor.execute(
+            select(table.c.data_version).where(table.c.carteira_id == carteira_id)
+        ).scalar_one()
+
+    @classmethod
+    def bump_versions(cls, carteira_ids: List[int]) -> None:
+        """
+        Invalida os indicadores materializados de várias carteiras (não faz commit).
+
+        Usado quando barras compartilhadas de um ticker mudam: todas as
+        carteiras que o acompanham são invalidadas com um INSERT e um UPDATE.
+
+        Args:
+            carteira_ids (List[int]): IDs das carteiras
+        """
+        carteira_ids = sorted(set(carteira_ids))
+        if not carteira_ids:
+            return
+
+        table = cls.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+
+        if dialect_insert is None:
+            for carteira_id in carteira_ids:
+                cls._ensure_row(carteira_id)
+        else:
+            db.session.execute(
+                dialect_insert(table)
+                .values([{'carteira_id': carteira_id, 'data_version': 0} for carteira_id in carteira_ids])
+                .on_conflict_do_nothing()
+            )
+        db.session.execute(
+            update(table)
+            .where(table.c.carteira_id.in_(carteira_ids))
+            .values(data_version=table.c.data_version + 1, payload=None, payload_version=None,
+                    updated_at=datetime.utcnow())
+        )
+
+    @classmethod
+    def remove(cls, carteira_id: int, connection=None) -> None:
+        """
+        Remove os indicadores materializados da carteira (não faz commit).
+
+        Args:
+            carteira_id (int): ID da carteira
+            connection: Conexão a usar (padrão: a sessão atual)
+        """
+        executor = connection if connection is not None else db.session
+        executor.execute(delete(cls.__table__).where(cls.__table__.c.carteira_id == carteira_id))
+
+    def __repr__(self) -> str:
+        return f'<IndicadoresCache carteira={self.carteira_id} v{self.data_version}>'
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_deleted(session, flush_context):
+    """Invalida os indicadores quando ativos (associações) ou carteiras são removidos pelo ORM."""
+    deleted_carteiras = {obj.id for obj in session.deleted if isinstance(obj, Carteira)}
+    changed_carteiras = {
+        obj.carteira_id for obj in session.deleted
+        if isinstance(obj, Asset) and obj.carteira_id not in deleted_carteiras
+    }
+    if not deleted_carteiras and not changed_carteiras:
+        return
+
+    connection = session.connection()
+    for carteira_id in deleted_carteiras:
+        IndicadoresCache.remove(carteira_id, connection)
+    for carteira_id in changed_carteiras:
+        IndicadoresCache.bump_version(carteira_id, connection)
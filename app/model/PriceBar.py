@@ -0,0 +1,237 @@
+from app import db
+import sqlite3
+from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy import event, func, tuple_
+from app.model.PriceBlock import PriceBlock
+
+# Linhas por INSERT multi-valores (até 9 parâmetros por linha, abaixo dos limites do Postgres e do SQLite)
+INSERT_CHUNK_ROWS = 1000
+
+# Colunas OHLCV opcionais (o fechamento é obrigatório)
+OHLCV_FIELDS = ('open', 'high', 'low', 'volume')
+
+
+class PriceBar(db.Model):
+    """
+    Barra de preço de um ticker, compartilhada por todas as carteiras que o acompanham.
+
+    Cada (ticker, interval, date) é armazenado uma única vez; as carteiras
+    enxergam as barras pela associação carteira-ticker (`Asset`).
+
+    No Postgres, a tabela é particionada por ano de `date`, com índice BRIN
+    em date (ver `app.utils.partitions`); nos demais bancos é uma tabela comum.
+
+    Attributes:
+        ticker (str): Símbolo do ativo (ex: ITUB4.SA)
+        interval (str): Intervalo das barras (ex: 1d, 1wk)
+        date (date): Data da barra
+        open (float): Abertura
+        high (float): Máxima
+        low (float): Mínima
+        close (float): Fechamento
+        volume (int): Volume negociado
+        created_at (datetime): Data de criação do registro
+    """
+    __tablename__ = 'price_bar'
+
+    ticker = db.Column(db.String(20), primary_key=True)
+    interval = db.Column(db.String(5), primary_key=True, default='1d')
+    date = db.Column(db.Date, primary_key=True)
+    open = db.Column(db.Float, nullable=True)
+    high = db.Column(db.Float, nullable=True)
+    low = db.Column(db.Float, nullable=True)
+    close = db.Column(db.Float, nullable=False)
+    volume = db.Column(db.BigInteger, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.CheckConstraint('close > 0', name='check_price_bar_close_positive'),
+        db.Index('ix_price_bar_date', 'date', postgresql_using='brin'),
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
+
+    @classmethod
+    def get_date_range(cls, ticker: str, interval: str = '1d') -> tuple:
+        """
+        Busca a primeira e a última data armazenadas de um ticker (em qualquer carteira).
+
+        Args:
+            ticker (str): Símbolo do ativo
+            interval (str): Intervalo das barras
+
+        Returns:
+            tuple: (primeira data, última data) ou (None, None) se não houver barras
+        """
+        return db.session.query(func.min(cls.date), func.max(cls.date)).filter(
+            cls.ticker == ticker.upper(), cls.interval == interval
+        ).one()
+
+    @staticmethod
+    def _stage(bars: List[dict]) -> dict:
+        """Barras normalizadas por (ticker, interval, date); repetidas ficam com a última."""
+        staged = {}
+        for bar in bars:
+            row = {
+                'ticker': bar['ticker'].upper(),
+                'interval': bar.get('interval') or '1d',
+                'date': bar['date'].date() if hasattr(bar['date'], 'date') else bar['date'],
+                'close': float(bar['close']),
+            }
+            for field in OHLCV_FIELDS:
+                value = bar.get(field)
+                row[field] = None if value is None or value != value else value
+            if row['volume'] is not None:
+                row['volume'] = int(row['volume'])
+            staged[(row['ticker'], row['interval'], row['date'])] = row
+        return staged
+
+    @classmethod
+    def insert_ignore_duplicates(cls, bars: List[dict]) -> List[Tuple[str, str, 'datetime']]:
+        """
+        Insere barras em lote ignorando as que já existem, sem fazer commit.
+
+        Cada bloco de INSERT_CHUNK_ROWS linhas é um único
+        `INSERT ... ON CONFLICT (ticker, interval, date) DO NOTHING RETURNING`
+        (Postgres e SQLite >= 3.35): a checagem de duplicatas fica na chave
+        primária, sem uma consulta por barra, e ingestões concorrentes do mesmo
+        ticker não conflitam. Nos demais bancos, as chaves existentes são lidas
+        em uma consulta e só as novas são inseridas. As barras inseridas também
+        são incorporadas aos blocos anuais (`PriceBlock`).
+
+        Barras repetidas na entrada (mesmo ticker, intervalo e data) ficam com a última.
+
+        Args:
+            bars (List[dict]): ticker, date, close e, opcionalmente, interval
+                (padrão '1d'), open, high, low e volume
+
+        Returns:
+            List[Tuple[str, str, date]]: (ticker, interval, date) das barras efetivamente inseridas
+        """
+        staged = cls._stage(bars)
+        created_at = datetime.utcnow()
+        rows = [{**row, 'created_at': created_at} for row in staged.values()]
+        if not rows:
+            return []
+
+        insert = cls._insert_on_conflict()
+        if insert is None:
+            inserted = cls._insert_missing(rows)
+        else:
+            table = cls.__table__
+            inserted = []
+            for start in range(0, len(rows), INSERT_CHUNK_ROWS):
+                statement = (
+                    insert(table)
+                    .values(rows[start:start + INSERT_CHUNK_ROWS])
+                    .on_conflict_do_nothing(index_elements=['ticker', 'interval', 'date'])
+                    .returning(table.c.ticker, table.c.interval, table.c.date)
+                )
+                inserted.extend(tuple(row) for row in db.session.execute(statement))
+
+        # Mantém a cópia compacta (um bloco por ticker e ano) na mesma transação
+        PriceBlock.write([staged[key] for key in inserted])
+        return inserted
+
+    @classmethod
+    def update_changed(cls, bars: List[dict]) -> List[Tuple[str, str, 'datetime']]:
+        """
+        Regrava as barras já armazenadas cujos valores mudaram, sem fazer commit.
+
+        Usado para a barra baixada de novo na sincronização incremental, que
+        pode ter sido gravada com o pregão aberto ou ajustada depois pelo
+        provedor. Barras que não existem são ignoradas (ficam para
+        `insert_ignore_duplicates`); as alteradas também são regravadas nos
+        blocos anuais (`PriceBlock`).
+
+        Args:
+            bars (List[dict]): Mesmo formato de `insert_ignore_duplicates`
+
+        Returns:
+            List[Tuple[str, str, date]]: (ticker, interval, date) das barras alteradas
+        """
+        staged = cls._stage(bars)
+        if not staged:
+            return []
+
+        fields = ('close',) + OHLCV_FIELDS
+        stored = {
+            (row.ticker, row.interval, row.date): row
+            for row in db.session.query(cls.ticker, cls.interval, cls.date, *(getattr(cls, f) for f in fields))
+            .filter(tuple_(cls.ticker, cls.interval, cls.date).in_(list(staged)))
+        }
+        # Campos ausentes na barra baixada (ex: provedor só com fechamento) mantêm o valor gravado
+        changes = {}
+        for key, row in staged.items():
+            if key in stored:
+                values = {field: row[field] for field in fields
+                          if row[field] is not None and getattr(stored[key], field) != row[field]}
+                if values:
+                    changes[key] = values
+
+        table = cls.__table__
+        for (ticker, interval, day), values in changes.items():
+            db.session.execute(
+                table.update()
+                .where(table.c.ticker == ticker, table.c.interval == interval, table.c.date == day)
+                .values(**values)
+            )
+        changed = list(changes)
+        PriceBlock.write([staged[key] for key in changed])
+        return changed
+
+    @staticmethod
+    def _insert_on_conflict():
+        """`insert` do dialeto com ON CONFLICT ... RETURNING, ou None se o banco não suportar."""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            return insert
+        if dialect == 'sqlite' and sqlite3.sqlite_version_info >= (3, 35):
+            from sqlalchemy.dialects.sqlite import insert
+            return insert
+        return None
+
+    @classmethod
+    def _insert_missing(cls, rows: List[dict]) -> List[Tuple[str, str, 'datetime']]:
+        """Alternativa sem ON CONFLICT: lê as chaves existentes em uma consulta e insere as novas."""
+        keys = [(row['ticker'], row['interval'], row['date']) for row in rows]
+        existing = set()
+        for start in range(0, len(keys), INSERT_CHUNK_ROWS):
+            existing.update(
+                tuple(key) for key in db.session.query(cls.ticker, cls.interval, cls.date).filter(
+                    tuple_(cls.ticker, cls.interval, cls.date).in_(keys[start:start + INSERT_CHUNK_ROWS])
+                )
+            )
+        new_rows = [row for row, key in zip(rows, keys) if key not in existing]
+        if new_rows:
+            db.session.execute(cls.__table__.insert(), new_rows)
+        return [(row['ticker'], row['interval'], row['date']) for row in new_rows]
+
+    def to_dict(self) -> dict:
+        """
+        Converte a barra para dicionário.
+
+        Returns:
+            dict: Dados da barra
+        """
+        return {
+            'ticker': self.ticker,
+            'interval': self.interval,
+            'date': self.date.isoformat(),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+        }
+
+    def __repr__(self) -> str:
+        return f'<PriceBar {self.ticker} {self.interval} {self.date}: R$ {self.close}>'
+
+
+@event.listens_for(PriceBar.__table__, 'after_create')
+def _criar_particoes(target, connection, **kw):
+    """No Postgres, `create_all` também cria a partição padrão e as partições anuais."""
+    from app.utils.partitions import ensure_partitions
+    ensure_partitions(connection)
@@ -0,0 +1,53 @@
+"""
+Provedores de dados de mercado.
+
+O provedor ativo é escolhido por MARKET_DATA_PROVIDER:
+- 'yfinance' (padrão): Yahoo Finance
+- 'replay': séries gravadas em REPLAY_DATA_DIR ou sintéticas, com latência
+  (REPLAY_LATENCY_MS) e falhas (REPLAY_ERROR_RATE) configuráveis
+"""
+import threading
+
+from app.providers.base import MarketDataProvider, period_start
+from app.utils.settings import get_setting
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    """
+    Obtém o provedor de dados de mercado configurado.
+
+    Returns:
+        MarketDataProvider: Instância do provedor (reutilizada entre chamadas)
+    """
+    name = str(get_setting('MARKET_DATA_PROVIDER', 'yfinance')).lower()
+
+    if name == 'replay':
+        settings = (
+            get_setting('REPLAY_DATA_DIR') or None,
+            float(get_setting('REPLAY_LATENCY_MS', 0)),
+            float(get_setting('REPLAY_ERROR_RATE', 0)),
+            int(get_setting('REPLAY_SEED', 42)),
+        )
+    elif name == 'yfinance':
+        settings = ()
+    else:
+        raise ValueError(f"Provedor de dados de mercado desconhecido: {name}")
+
+    key = (name, settings)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            if name == 'replay':
+                from app.providers.replay_provider import ReplayProvider
+                provider = ReplayProvider(*settings)
+            else:
+                from app.providers.yfinance_provider import YFinanceProvider
+                provider = YFinanceProvider()
+            _providers[key] = provider
+        return provider
+
+
+__all__ = ['MarketDataProvider', 'get_market_data_provider', 'period_start']
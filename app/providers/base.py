@@ -0,0 +1,91 @@
+"""
+Interface comum dos provedores de dados de mercado.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Janela coberta por cada `period` aceito pelo yfinance
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """
+    Calcula a data inicial coberta por um `period` do yfinance.
+
+    Args:
+        period: Período (ex: 3mo, 1y, ytd, max)
+        now: Data de referência (padrão: hoje)
+
+    Returns:
+        Optional[pd.Timestamp]: Início da janela ou None para 'max'/períodos desconhecidos
+    """
+    now = (now or pd.Timestamp.now()).normalize()
+    if period == 'ytd':
+        return pd.Timestamp(year=now.year, month=1, day=1)
+    offset = PERIOD_OFFSETS.get(period)
+    return now - offset if offset is not None else None
+
+
+class MarketDataProvider(ABC):
+    """
+    Fonte de séries históricas OHLCV.
+
+    As implementações devolvem DataFrames com colunas simples
+    (Open, High, Low, Close, Volume) indexados por data. `history` é
+    obrigatório: um provedor sem ele falha ao ser criado.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def history(self, ticker: str, period: Optional[str] = None, interval: str = '1d',
+                start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Busca a série de um ticker para um período ou intervalo de datas.
+
+        Args:
+            ticker: Símbolo do ativo (ex: PETR4.SA)
+            period: Período (ex: 3mo, 1y); ignorado se `start` for informado
+            interval: Intervalo das barras (ex: 1d, 5d, 1wk)
+            start: Data inicial (inclusiva, YYYY-MM-DD)
+            end: Data final (exclusiva, YYYY-MM-DD)
+
+        Returns:
+            pd.DataFrame: Série OHLCV (vazia se não houver dados)
+        """
+
+    def history_many(self, tickers: List[str], period: Optional[str] = None, interval: str = '1d',
+                     start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Busca as séries de vários tickers.
+
+        Args:
+            tickers: Símbolos dos ativos
+            period: Período (ex: 3mo, 1y); ignorado se `start` for informado
+            interval: Intervalo das barras
+            start: Data inicial (inclusiva, YYYY-MM-DD)
+            end: Data final (exclusiva, YYYY-MM-DD)
+
+        Returns:
+            Dict[str, pd.DataFrame]: Série por ticker (tickers sem dados ficam de fora)
+        """
+        frames = {}
+        for ticker in tickers:
+            df = self.history(ticker, period=period, interval=interval, start=start, end=end)
+            if not df.empty:
+                frames[ticker] = df
+        return frames
@@ -0,0 +1,152 @@
+"""
+Provedor de dados de mercado offline para benchmarks e testes de carga.
+
+Serve séries gravadas em disco (`<data_dir>/<TICKER>.csv`, colunas
+Date, Open, High, Low, Close, Volume) e, para tickers sem arquivo, gera uma
+série sintética determinística (passeio aleatório geométrico semeado pelo
+ticker). Latência e falhas podem ser injetadas para simular a rede.
+"""
+import os
+import random
+import threading
+import time
+import zlib
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.providers.base import MarketDataProvider, OHLCV_COLUMNS, period_start
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_START = '2000-01-03'
+
+# Regras de reamostragem a partir das barras diárias
+RESAMPLE_RULES = {
+    '1wk': 'W-FRI',
+    '1mo': 'MS',
+    '3mo': 'QS',
+}
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Provedor que reproduz séries locais ou sintéticas.
+
+    Attributes:
+        data_dir (str): Diretório com os arquivos CSV gravados (opcional)
+        latency_ms (float): Latência artificial por chamada em milissegundos
+        error_rate (float): Probabilidade (0-1) de uma chamada falhar
+        seed (int): Semente das séries sintéticas e da injeção de falhas
+    """
+
+    name = 'replay'
+
+    def __init__(self, data_dir: Optional[str] = None, latency_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 42):
+        self.data_dir = data_dir
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._daily = {}
+
+    def _simulate_network(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        if self.error_rate:
+            with self._rng_lock:
+                failed = self._rng.random() < self.error_rate
+            if failed:
+                raise ConnectionError("Falha injetada pelo provedor de replay")
+
+    def _load_recorded(self, ticker: str) -> Optional[pd.DataFrame]:
+        if not self.data_dir:
+            return None
+
+        path = os.path.join(self.data_dir, f"{ticker}.csv")
+        if not os.path.exists(path):
+            return None
+
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        df.index.name = 'Date'
+        return df.sort_index()
+
+    def _synthetic(self, ticker: str) -> pd.DataFrame:
+        """Gera barras diárias determinísticas para o ticker desde SYNTHETIC_START."""
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode('utf-8'))])
+        dates = pd.bdate_range(SYNTHETIC_START, pd.Timestamp.now().normalize(), name='Date')
+        n = len(dates)
+
+        drift = rng.uniform(-0.0002, 0.0008)
+        vol = rng.uniform(0.01, 0.03)
+        log_returns = rng.normal(drift, vol, n)
+        close = rng.uniform(10, 100) * np.exp(np.cumsum(log_returns))
+        open_ = np.concatenate(([close[0]], close[:-1])) * (1 + rng.normal(0, vol / 4, n))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2, n)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, n)))
+        volume = rng.integers(100_000, 10_000_000, n)
+
+        return pd.DataFrame({
+            'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume
+        }, index=dates)
+
+    def _daily_bars(self, ticker: str) -> pd.DataFrame:
+        df = self._daily.get(ticker)
+        if df is None:
+            df = self._load_recorded(ticker)
+            if df is None:
+                df = self._synthetic(ticker)
+            self._daily[ticker] = df
+        return df
+
+    @staticmethod
+    def _resample(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+        if interval == '1d' or df.empty:
+            return df
+
+        aggregation = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+        aggregation = {col: func for col, func in aggregation.items() if col in df.columns}
+
+        if interval == '5d':
+            groups = np.arange(len(df)) // 5
+            resampled = df.groupby(groups).agg(aggregation)
+            resampled.index = df.index[::5]
+            return resampled
+
+        rule = RESAMPLE_RULES.get(interval)
+        if rule is None:
+            raise ValueError(f"Intervalo não suportado pelo provedor de replay: {interval}")
+        return df.resample(rule).agg(aggregation).dropna(subset=['Close'])
+
+    def _history(self, ticker: str, period: Optional[str], interval: str,
+                 start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+        df = self._daily_bars(ticker)
+        window_start = pd.Timestamp(start) if start else period_start(period or '1y')
+        if window_start is not None:
+            df = df[df.index >= window_start]
+        if end:
+            df = df[df.index < pd.Timestamp(end)]
+
+        columns = [col for col in OHLCV_COLUMNS if col in df.columns]
+        return self._resample(df[columns], interval).copy()
+
+    def history(self, ticker: str, period: Optional[str] = None, interval: str = '1d',
+                start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        self._simulate_network()
+        return self._history(ticker, period, interval, start, end)
+
+    def history_many(self, tickers: List[str], period: Optional[str] = None, interval: str = '1d',
+                     start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        # Uma única "chamada de rede" para o lote, como no yf.download agrupado
+        self._simulate_network()
+        frames = {}
+        for ticker in tickers:
+            df = self._history(ticker, period, interval, start, end)
+            if not df.empty:
+                frames[ticker] = df
+        return frames
@@ -0,0 +1,49 @@
+"""
+Provedor de dados de mercado baseado no yfinance.
+"""
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from app.providers.base import MarketDataProvider
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Busca séries históricas no Yahoo Finance."""
+
+    name = 'yfinance'
+
+    @staticmethod
+    def _period_kwargs(period: Optional[str], start: Optional[str], end: Optional[str]) -> dict:
+        if start:
+            return {'start': start, 'end': end}
+        return {'period': period or '1y'}
+
+    def history(self, ticker: str, period: Optional[str] = None, interval: str = '1d',
+                start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        df = yf.download(ticker, interval=interval, progress=False,
+                         **self._period_kwargs(period, start, end))
+
+        # yf.download devolve colunas (campo, ticker) mesmo para um único ticker
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+        return df
+
+    def history_many(self, tickers: List[str], period: Optional[str] = None, interval: str = '1d',
+                     start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        df = yf.download(tickers=tickers, interval=interval, group_by='ticker', progress=False,
+                         **self._period_kwargs(period, start, end))
+
+        frames = {}
+        for ticker in tickers:
+            if isinstance(df.columns, pd.MultiIndex):
+                if ticker not in df.columns.get_level_values(0):
+                    continue
+                frame = df[ticker]
+            else:
+                frame = df
+            frame = frame.dropna(how='all')
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
@@ -21,13 +21,21 @@ Router.get('/api/clients/<int:cliente_id>', 'Cliente#get_client_by_id')
 #Rotas para Carteiras do Usuário Administrativo
 Router.post('/api/wallets', 'Carteira#create_portfolio')
 Router.get('/api/wallets', 'Carteira#get_portfolios')
+Router.get('/api/wallets/indicadores', 'Asset#get_indicadores_carteiras')
 Router.put('/api/wallets/<int:portfolio_id>', 'Carteira#update_portfolio')
 Router.delete('/api/wallets/<int:portfolio_id>', 'Carteira#delete_portfolio')
 Router.get('/api/wallets/<int:portfolio_id>', 'Carteira#get_portfolio_by_id')
 Router.get('/api/wallets/<int:carteira_id>/indicadores', 'Asset#get_indicadores_carteira')
+Router.post('/api/wallets/<int:carteira_id>/otimizacao', 'Analise#otimizar')
+Router.post('/api/wallets/<int:carteira_id>/cenarios', 'Analise#avaliar_cenarios')
+Router.post('/api/wallets/<int:carteira_id>/risco', 'Analise#simular_risco')
+Router.post('/api/wallets/<int:carteira_id>/backtest', 'Analise#backtest')
 
 # Rotas para Ativos
 Router.post('/api/assets/search', 'Asset#get_assets')
+Router.post('/api/assets/search/batch', 'Asset#get_assets_batch')
 Router.post('/api/assets', 'Asset#cadastrar_ativo')
+Router.get('/api/wallets/<int:carteira_id>/assets', 'Asset#listar_ativos')
+Router.delete('/api/wallets/<int:carteira_id>/assets/<ticker>', 'Asset#remover_ativo')
 
 
@@ -0,0 +1,495 @@
+import logging
+import time
+from datetime import date
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.services.Asset_service import AssetService, ARRAYS_FORMAT
+from app.utils.backtest import (PERIODOS_REBALANCEAMENTO, drawdown, inicios_periodos, metricas_desempenho,
+                                simular_alocacao)
+from app.utils.indicadores import MARKET_TICKER, ordenar_tickers, vetor_para_dict
+from app.utils.otimizacao import avaliar_pesos, otimizar_carteira
+from app.utils.price_matrix import PriceMatrix, load_price_matrix
+from app.utils.risco import medidas_risco, retornos_historicos, risco_parametrico, simular_retornos
+
+logger = logging.getLogger(__name__)
+
+# Matrizes de covariância disponíveis para a otimização
+COVARIANCIAS = {'amostral': 'matriz_covariancia', 'indice_unico': 'matriz_cov_customizada'}
+
+MAX_PONTOS_FRONTEIRA = 200
+
+# Limite de vetores de pesos avaliados por requisição
+MAX_CENARIOS = 20000
+# Métricas devolvidas por cenário (um valor por vetor de pesos)
+AVALIACAO_METRICAS = ('retorno_esperado', 'variancia', 'desvio_padrao', 'indice_desempenho', 'indice_sharpe',
+                      'soma_pesos')
+
+# Limites da simulação de risco
+MAX_CAMINHOS = 5_000_000
+MIN_CAMINHOS = 1000
+MAX_HORIZONTE = 252
+MAX_CONFIANCAS = 10
+
+# Custo de transação máximo aceito no backtest (fração do valor negociado)
+MAX_CUSTO_TRANSACAO = 0.1
+# Desvio máximo da soma dos pesos do backtest em relação a 1
+TOLERANCIA_SOMA_PESOS = 1e-6
+
+
+class AnaliseService:
+    """Análises de uma carteira (otimização, avaliação de pesos, risco e backtest)."""
+
+    @staticmethod
+    def _ativos_investimento(indicadores: Dict[str, Any], covariancia: str) -> tuple:
+        """Tickers, retornos esperados e covariância dos ativos de investimento (sem o BOVA11.SA)."""
+        tickers = indicadores["ativos_ordenados"][:-1]
+        mu = np.asarray(indicadores["retorno_esperado"][:-1], dtype=float)
+        cov = np.asarray(indicadores[COVARIANCIAS[covariancia]], dtype=float)[:-1, :-1]
+        return tickers, mu, cov
+
+    @staticmethod
+    def _carteira_records(tickers, carteira: Dict[str, Any]) -> Dict[str, Any]:
+        return {**carteira, "pesos": vetor_para_dict(tickers, carteira["pesos"])}
+
+    @classmethod
+    def otimizar(cls, carteira_id: int, data: Dict[str, Any], formato: str = 'records') -> tuple:
+        """
+        Carteiras de mínima variância e de máximo Sharpe e a fronteira eficiente.
+
+        Usa os retornos esperados e a matriz de covariância dos indicadores da
+        carteira (materializados), apenas com os ativos de investimento.
+
+        Args:
+            carteira_id: ID da carteira
+            data: Parâmetros: pontos_fronteira (padrão 20), max_peso (padrão 1.0),
+                long_only (padrão True) e covariancia ('amostral' ou 'indice_unico')
+            formato: 'records' (pesos por ticker) ou 'arrays' (vetores/matrizes
+                do numpy alinhados com `ativos`)
+
+        Returns:
+            tuple: (response_dict, status_code)
+        """
+        try:
+            try:
+                pontos = int(data.get('pontos_fronteira', 20))
+                max_peso = float(data.get('max_peso', 1.0))
+            except (TypeError, ValueError):
+                return {"success": False, "message": "pontos_fronteira and max_peso must be numbers"}, 400
+            long_only = data.get('long_only', True)
+            covariancia = data.get('covariancia', 'amostral')
+
+            if not 2 <= pontos <= MAX_PONTOS_FRONTEIRA:
+                return {"success": False,
+                        "message": f"pontos_fronteira must be between 2 and {MAX_PONTOS_FRONTEIRA}"}, 400
+            if not 0 < max_peso <= 1:
+                return {"success": False, "message": "max_peso must be in (0, 1]"}, 400
+            if not isinstance(long_only, bool):
+                return {"success": False, "message": "long_only must be a boolean"}, 400
+            if covariancia not in COVARIANCIAS:
+                return {"success": False,
+                        "message": f"Invalid covariancia. Use one of: {', '.join(COVARIANCIAS)}"}, 400
+
+            indicadores, _, error = AssetService.obter_indicadores(carteira_id)
+            if error:
+                return error
+
+            tickers, mu, cov = cls._ativos_investimento(indicadores, covariancia)
+            if max_peso * len(tickers) < 1:
+                return {"success": False,
+                        "message": f"max_peso {max_peso} is infeasible for {len(tickers)} assets"}, 400
+
+            start = time.perf_counter()
+            resultado = otimizar_carteira(mu, cov, pontos, max_peso=max_peso, long_only=long_only)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            fronteira = resultado["fronteira"]
+            minima_variancia = resultado["minima_variancia"]
+            maximo_sharpe = resultado["maximo_sharpe"]
+            if formato != ARRAYS_FORMAT:
+                minima_variancia = cls._carteira_records(tickers, minima_variancia)
+                maximo_sharpe = cls._carteira_records(tickers, maximo_sharpe)
+                fronteira = {key: value.tolist() for key, value in fronteira.items() if key != "pesos"}
+                fronteira["pesos"] = [vetor_para_dict(tickers, pesos) for pesos in resultado["fronteira"]["pesos"]]
+
+            return {
+                "success": True,
+                "carteira_id": carteira_id,
+                "otimizacao": {
+                    "ativos": tickers,
+                    "restricoes": {
+                        "long_only": long_only,
+                        "max_peso": max_peso,
+                        "covariancia": covariancia
+                    },
+                    "minima_variancia": minima_variancia,
+                    "maximo_sharpe": maximo_sharpe,
+                    "fronteira": fronteira,
+                    "iteracoes": resultado["iteracoes"],
+                    "tempo_ms": round(elapsed_ms, 2)
+                }
+            }, 200
+
+        except Exception as e:
+            logger.error(f"Erro ao otimizar carteira: {str(e)}")
+            return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
+
+    @staticmethod
+    def _normalizar_ticker(ticker: str) -> str:
+        ticker = str(ticker).upper()
+        return ticker if ticker.endswith('.SA') else f"{ticker}.SA"
+
+    @staticmethod
+    def _matriz_pesos(pesos: Any, ativos: List[str]) -> np.ndarray:
+        """Pesos como matriz (cenários x ativos): lista de listas/array ou lista de {ticker: peso}."""
+        if len(pesos) and isinstance(pesos[0], dict):
+            index = {ticker: j for j, ticker in enumerate(ativos)}
+            matriz = np.zeros((len(pesos), len(ativos)))
+            for i, cenario in enumerate(pesos):
+                for ticker, peso in cenario.items():
+                    matriz[i, index[AnaliseService._normalizar_ticker(ticker)]] = peso
+            return matriz
+        return np.atleast_2d(np.asarray(pesos, dtype=float))
+
+    @classmethod
+    def avaliar_cenarios(cls, carteira_id: int, data: Dict[str, Any], formato: str = 'records') -> tuple:
+        """
+        Avalia vários vetores de pesos de uma vez contra os indicadores da carteira.
+
+        Retorno, variância, desvio, índice de desempenho e Sharpe de todos os
+        cenários saem de um único produto matricial (einsum) com a matriz de
+        covariância materializada.
+
+        Args:
+            carteira_id: ID da carteira
+            data: 'pesos' (lista de vetores alinhados com 'ativos', matriz do
+                numpy em MessagePack ou lista de {ticker: peso}), 'ativos'
+                (padrão: os ativos de investimento da carteira) e 'covariancia'
+            formato: 'records' (listas) ou 'arrays' (vetores do numpy)
+
+        Returns:
+            tuple: (response_dict, status_code)
+        """
+        try:
+            pesos = data.get('pesos')
+            covariancia = data.get('covariancia', 'amostral')
+            if isinstance(pesos, dict):
+                # Um único cenário {ticker: peso}
+                pesos = [pesos]
+            if pesos is None:
+                return {"success": False, "message": "pesos is required"}, 400
+            if not isinstance(pesos, (list, tuple, np.ndarray)):
+                return {"success": False, "message": "pesos must be a list of weight vectors"}, 400
+            if not len(pesos):
+                return {"success": False, "message": "pesos is required"}, 400
+            if len(pesos) > MAX_CENARIOS:
+                return {"success": False, "message": f"Maximum of {MAX_CENARIOS} weight vectors per request"}, 400
+            if covariancia not in COVARIANCIAS:
+                return {"success": False,
+                        "message": f"Invalid covariancia. Use one of: {', '.join(COVARIANCIAS)}"}, 400
+
+            indicadores, _, error = AssetService.obter_indicadores(carteira_id)
+            if error:
+                return error
+
+            tickers = list(indicadores["ativos_ordenados"])
+            ativos = data.get('ativos')
+            if ativos is not None and (not isinstance(ativos, list)
+                                       or not all(isinstance(ticker, str) for ticker in ativos)):
+                return {"success": False, "message": "ativos must be a list of tickers"}, 400
+            if ativos:
+                ativos = [cls._normalizar_ticker(ticker) for ticker in ativos]
+            else:
+                ativos = tickers[:-1]
+            desconhecidos = [ticker for ticker in ativos if ticker not in tickers]
+            if desconhecidos:
+                return {"success": False,
+                        "message": f"Assets not found in this carteira: {', '.join(desconhecidos)}"}, 400
+
+            try:
+                W = cls._matriz_pesos(pesos, ativos)
+            except (AttributeError, KeyError, TypeError, ValueError):
+                return {"success": False, "message": "pesos must be vectors aligned with ativos"}, 400
+            if W.ndim != 2 or W.shape[1] != len(ativos):
+                return {"success": False, "message": f"Each weight vector must have {len(ativos)} values"}, 400
+            if not np.isfinite(W).all():
+                return {"success": False, "message": "pesos must be finite numbers"}, 400
+
+            columns = [tickers.index(ticker) for ticker in ativos]
+            mu = np.asarray(indicadores["retorno_esperado"], dtype=float)[columns]
+            cov = np.asarray(indicadores[COVARIANCIAS[covariancia]], dtype=float)[np.ix_(columns, columns)]
+
+            start = time.perf_counter()
+            metricas = avaliar_pesos(W, mu, cov)
+            metricas["soma_pesos"] = W.sum(axis=1)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            melhor_sharpe = int(np.argmax(metricas["indice_sharpe"]))
+            if formato != ARRAYS_FORMAT:
+                metricas = {key: value.tolist() for key, value in metricas.items()}
+
+            return {
+                "success": True,
+                "carteira_id": carteira_id,
+                "avaliacao": {
+                    "ativos": ativos,
+                    "covariancia": covariancia,
+                    "n_cenarios": len(W),
+                    **metricas,
+                    "melhor_sharpe": melhor_sharpe,
+                    "tempo_ms": round(elapsed_ms, 2)
+                }
+            }, 200
+
+        except Exception as e:
+            logger.error(f"Erro ao avaliar cenários da carteira: {str(e)}")
+            return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
+
+    @classmethod
+    def _vetor_pesos(cls, pesos: Any, tickers: List[str]) -> np.ndarray:
+        """Pesos como vetor alinhado com `tickers`: lista/array ou {ticker: peso} (ausentes = 0)."""
+        if isinstance(pesos, dict):
+            return cls._matriz_pesos([pesos], tickers)[0]
+        return np.asarray(pesos, dtype=float)
+
+    @classmethod
+    def simular_risco(cls, carteira_id: int, data: Dict[str, Any], formato: str = 'records') -> tuple:
+        """
+        VaR, CVaR e probabilidade de perda de uma carteira em um horizonte.
+
+        Estimativas histórica (janelas sobrepostas dos fechamentos), paramétrica
+        (normal) e por Monte Carlo (caminhos correlacionados com a covariância
+        dos indicadores materializados), todas para a carteira comprada e
+        mantida durante o horizonte.
+
+        Args:
+            carteira_id: ID da carteira
+            data: Parâmetros: horizonte (pregões, padrão 10), confiancas (padrão
+                [0.95, 0.99]), caminhos (padrão 100000), seed, pesos (padrão:
+                pesos iguais nos ativos de investimento) e covariancia
+            formato: 'records' (listas) ou 'arrays' (vetores do numpy)
+
+        Returns:
+            tuple: (response_dict, status_code)
+        """
+        try:
+            try:
+                horizonte = int(data.get('horizonte', 10))
+                caminhos = int(data.get('caminhos', 100_000))
+                confiancas = [float(nivel) for nivel in data.get('confiancas', [0.95, 0.99])]
+                seed = data.get('seed')
+                seed = None if seed is None else int(seed)
+            except (TypeError, ValueError):
+                return {"success": False,
+                        "message": "horizonte, caminhos, seed and confiancas must be numbers"}, 400
+            covariancia = data.get('covariancia', 'amostral')
+
+            if not 1 <= horizonte <= MAX_HORIZONTE:
+                return {"success": False, "message": f"horizonte must be between 1 and {MAX_HORIZONTE}"}, 400
+            if not MIN_CAMINHOS <= caminhos <= MAX_CAMINHOS:
+                return {"success": False,
+                        "message": f"caminhos must be between {MIN_CAMINHOS} and {MAX_CAMINHOS}"}, 400
+            if not confiancas or len(confiancas) > MAX_CONFIANCAS or not all(0 < nivel < 1 for nivel in confiancas):
+                return {"success": False,
+                        "message": f"confiancas must have 1 to {MAX_CONFIANCAS} levels in (0, 1)"}, 400
+            if seed is not None and seed < 0:
+                return {"success": False, "message": "seed must be a non-negative integer"}, 400
+            if covariancia not in COVARIANCIAS:
+                return {"success": False,
+                        "message": f"Invalid covariancia. Use one of: {', '.join(COVARIANCIAS)}"}, 400
+
+            indicadores, _, error = AssetService.obter_indicadores(carteira_id)
+            if error:
+                return error
+
+            inicio = time.perf_counter()
+            tickers, mu, cov = cls._ativos_investimento(indicadores, covariancia)
+            pesos = data.get('pesos')
+            if pesos is None:
+                pesos = np.full(len(tickers), 1.0 / len(tickers))
+            else:
+                try:
+                    pesos = cls._vetor_pesos(pesos, tickers)
+                except (KeyError, TypeError, ValueError):
+                    return {"success": False, "message": "pesos must be aligned with the carteira assets"}, 400
+                if pesos.shape != (len(tickers),) or not np.isfinite(pesos).all():
+                    return {"success": False, "message": f"pesos must have {len(tickers)} finite values"}, 400
+
+            # Histórico: fechamentos das datas com barra para todos os ativos
+            matriz = load_price_matrix(carteira_id).complete().select(tickers)
+            historicos = retornos_historicos(matriz.prices, pesos, horizonte)
+            historico = None
+            if len(historicos):
+                historico = {**medidas_risco(historicos, confiancas), "observacoes": len(historicos)}
+
+            parametrico = risco_parametrico(mu, cov, pesos, horizonte, confiancas)
+
+            inicio_simulacao = time.perf_counter()
+            simulacao = simular_retornos(mu, cov, pesos, horizonte, caminhos, seed=seed)
+            monte_carlo = medidas_risco(simulacao.pop("retornos"), confiancas)
+            simulacao_ms = (time.perf_counter() - inicio_simulacao) * 1000
+            monte_carlo.update(caminhos=caminhos, **simulacao, tempo_ms=round(simulacao_ms, 2))
+
+            if formato != ARRAYS_FORMAT:
+                for medidas in (historico, parametrico, monte_carlo):
+                    if medidas is not None:
+                        medidas["var"] = medidas["var"].tolist()
+                        medidas["cvar"] = medidas["cvar"].tolist()
+                pesos = vetor_para_dict(tickers, pesos)
+            elapsed_ms = (time.perf_counter() - inicio) * 1000
+
+            return {
+                "success": True,
+                "carteira_id": carteira_id,
+                "risco": {
+                    "ativos": tickers,
+                    "pesos": pesos,
+                    "horizonte": horizonte,
+                    "confiancas": confiancas,
+                    "covariancia": covariancia,
+                    "historico": historico,
+                    "parametrico": parametrico,
+                    "monte_carlo": monte_carlo,
+                    "tempo_ms": round(elapsed_ms, 2)
+                }
+            }, 200
+
+        except Exception as e:
+            logger.error(f"Erro ao simular risco da carteira: {str(e)}")
+            return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
+
+    @classmethod
+    def backtest(cls, carteira_id: int, data: Dict[str, Any], formato: str = 'records') -> tuple:
+        """
+        Desempenho histórico de uma alocação da carteira comparado ao BOVA11.SA.
+
+        Usa os fechamentos gravados (datas com barra para todos os tickers),
+        com compra inicial nos pesos-alvo e, opcionalmente, rebalanceamento
+        mensal ou trimestral com custo de transação.
+
+        Args:
+            carteira_id: ID da carteira
+            data: Parâmetros: pesos (padrão: pesos iguais nos ativos de
+                investimento), rebalanceamento ('nenhum', 'mensal' ou
+                'trimestral'; padrão 'mensal'), custo_transacao (fração do valor
+                negociado, padrão 0), inicio e fim (YYYY-MM-DD)
+            formato: 'records' (listas) ou 'arrays' (vetores do numpy)
+
+        Returns:
+            tuple: (response_dict, status_code)
+        """
+        try:
+            from flask import g
+            from app.model.Carteira import Carteira
+            from app.model.Cliente import Cliente
+
+            rebalanceamento = data.get('rebalanceamento', 'mensal')
+            try:
+                custo = float(data.get('custo_transacao', 0.0))
+            except (TypeError, ValueError):
+                return {"success": False, "message": "custo_transacao must be a number"}, 400
+            try:
+                inicio = date.fromisoformat(data['inicio']) if data.get('inicio') else None
+                fim = date.fromisoformat(data['fim']) if data.get('fim') else None
+            except (TypeError, ValueError):
+                return {"success": False, "message": "inicio and fim must be dates (YYYY-MM-DD)"}, 400
+
+            if rebalanceamento not in PERIODOS_REBALANCEAMENTO:
+                return {"success": False,
+                        "message": f"Invalid rebalanceamento. Use one of: {', '.join(PERIODOS_REBALANCEAMENTO)}"}, 400
+            if not 0 <= custo <= MAX_CUSTO_TRANSACAO:
+                return {"success": False, "message": f"custo_transacao must be between 0 and {MAX_CUSTO_TRANSACAO}"}, 400
+            if inicio and fim and fim <= inicio:
+                return {"success": False, "message": "fim must be after inicio"}, 400
+
+            # Verifica se a carteira existe e pertence ao admin
+            carteira = Carteira.query.join(Cliente).filter(
+                Carteira.id == carteira_id,
+                Cliente.user_adm_id == g.current_user_id
+            ).first()
+            if not carteira:
+                return {"success": False, "message": "Carteira not found or not authorized"}, 404
+
+            inicio_ms = time.perf_counter()
+            matriz = load_price_matrix(carteira_id, start=inicio)
+            if matriz.empty:
+                return {"success": False, "message": "No assets found in this carteira"}, 200
+            if MARKET_TICKER not in matriz.tickers:
+                return {"success": False, "message": f"{MARKET_TICKER} is required for the benchmark"}, 400
+            tickers = ordenar_tickers(matriz.tickers)
+            if len(tickers) < 2:
+                return {"success": False, "message": "No investment assets found (excluding BOVA11.SA)"}, 400
+
+            matriz = matriz.complete().select(tickers)
+            if fim is not None:
+                manter = matriz.dates <= np.datetime64(fim)
+                matriz = PriceMatrix(matriz.dates[manter], tickers, matriz.prices[manter])
+            if len(matriz.dates) < 2:
+                return {"success": False, "message": "Insufficient data for backtest"}, 400
+
+            ativos = tickers[:-1]
+            pesos = data.get('pesos')
+            if pesos is None:
+                pesos = np.full(len(ativos), 1.0 / len(ativos))
+            else:
+                try:
+                    pesos = cls._vetor_pesos(pesos, ativos)
+                except (KeyError, TypeError, ValueError):
+                    return {"success": False, "message": "pesos must be aligned with the carteira assets"}, 400
+                if pesos.shape != (len(ativos),) or not np.isfinite(pesos).all():
+                    return {"success": False, "message": f"pesos must have {len(ativos)} finite values"}, 400
+                # A simulação parte de patrimônio 1 e rebalanceia para os pesos: eles precisam somar 1
+                if abs(pesos.sum() - 1) > TOLERANCIA_SOMA_PESOS:
+                    return {"success": False, "message": "pesos must sum to 1"}, 400
+
+            precos = matriz.prices[:, :-1]
+            inicios = inicios_periodos(matriz.dates, rebalanceamento)
+            simulacao = simular_alocacao(precos, pesos, inicios, custo)
+            patrimonio = simulacao["patrimonio"]
+            benchmark = matriz.prices[:, -1] / matriz.prices[0, -1]
+
+            turnover = simulacao["turnover"]
+            resultado_carteira = {
+                **metricas_desempenho(patrimonio),
+                "turnover_total": float(turnover.sum()),
+                "turnover_medio": float(turnover.mean()) if len(turnover) else 0.0,
+                "custos": simulacao["custos"],
+            }
+            resultado_benchmark = {"ticker": MARKET_TICKER, **metricas_desempenho(benchmark)}
+
+            serie = {
+                "datas": np.datetime_as_string(matriz.dates, unit='D'),
+                "carteira": patrimonio,
+                "benchmark": benchmark,
+                "drawdown_carteira": drawdown(patrimonio),
+                "drawdown_benchmark": drawdown(benchmark),
+            }
+            if formato != ARRAYS_FORMAT:
+                serie = {key: value.tolist() for key, value in serie.items()}
+                pesos = vetor_para_dict(ativos, pesos)
+            elapsed_ms = (time.perf_counter() - inicio_ms) * 1000
+
+            return {
+                "success": True,
+                "carteira_id": carteira_id,
+                "backtest": {
+                    "ativos": ativos,
+                    "pesos": pesos,
+                    "rebalanceamento": rebalanceamento,
+                    "custo_transacao": custo,
+                    "inicio": str(matriz.dates[0]),
+                    "fim": str(matriz.dates[-1]),
+                    "pregoes": len(matriz.dates),
+                    "rebalanceamentos": len(inicios) - 1,
+                    "carteira": resultado_carteira,
+                    "benchmark": resultado_benchmark,
+                    "retorno_excedente": resultado_carteira["retorno_total"] - resultado_benchmark["retorno_total"],
+                    "serie": serie,
+                    "tempo_ms": round(elapsed_ms, 2)
+                }
+            }, 200
+
+        except Exception as e:
+            logger.error(f"Erro no backtest da carteira: {str(e)}")
+            return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
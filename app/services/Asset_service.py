@@ -1,6 +1,5 @@
-import yfinance as yf
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from typing import Dict, Any, Optional, List
 import requests
@@ -8,14 +7,199 @@ from requests.exceptions import RequestException
 import time
 import os
 import numpy as np
+from app.providers import get_market_data_provider, period_start
+from app.services.Estatisticas_service import EstatisticasService
+from app.utils.indicadores import (calcular_indicadores, indicadores_from_moments, ordenar_tickers,
+                                   vetor_para_dict, matriz_para_dict)
+from app.utils.price_matrix import load_price_matrices, load_price_matrix
+from app.utils.process_pool import parallel_map, pool_workers
+from app.utils.downsampling import DOWNSAMPLING_METHODS, MIN_POINTS, downsample_historico
+from app.utils.price_cache import get_price_cache
+from app.utils.settings import get_bool_setting, get_setting
+from app.utils.single_flight import coalesce
 
 logger = logging.getLogger(__name__)
 
+# Intervalos cujas barras são ancoradas no calendário e podem ser completadas com start=/end=
+DELTA_SYNC_INTERVALS = ('1d', '1wk', '1mo')
+
+# Formatos aceitos para o histórico: lista de registros ou colunas (struct-of-arrays)
+HISTORICO_FORMATS = ('records', 'columnar')
+HISTORICO_FIELDS = ('data', 'close', 'high', 'low', 'open')
+# Formato interno das respostas binárias: as colunas como arrays do numpy
+ARRAYS_FORMAT = 'arrays'
+
+# Campos dos indicadores da carteira: um valor por ticker / matrizes tickers x tickers
+INDICADORES_VETORES = ('retorno_esperado', 'desvio_padrao', 'indice_desempenho', 'indice_sharpe', 'pesos', 'beta')
+INDICADORES_MATRIZES = ('matriz_covariancia', 'matriz_cov_customizada')
+
+# Limite de tickers por requisição de busca em lote
+MAX_BATCH_TICKERS = 50
+
+# Tolerância para considerar que a série armazenada cobre o início do período
+PERIOD_COVERAGE_TOLERANCE = pd.Timedelta(days=7)
+
 class AssetService:
     """Serviço para operações com ativos financeiros."""
 
+    @staticmethod
+    def _round2(values: np.ndarray) -> np.ndarray:
+        """
+        Arredonda para 2 casas com o mesmo resultado de `round(float(x), 2)`.
+
+        `np.round` multiplica por 100 antes de arredondar e pode divergir do
+        `round` do Python em valores muito próximos de ...5; esses poucos
+        elementos são arredondados individualmente.
+        """
+        rounded = np.round(values, 2)
+        with np.errstate(invalid='ignore'):
+            near_tie = np.abs(np.mod(values * 100, 1) - 0.5) < 1e-6
+        if near_tie.any():
+            rounded[near_tie] = [round(value, 2) for value in values[near_tie].tolist()]
+        return rounded
+
+    @staticmethod
+    def _format_dates(values) -> np.ndarray:
+        """
+        Formata as datas como 'YYYY-MM-DD' em uma única passada.
+
+        Returns:
+            np.ndarray: Array de strings (None onde a data é ausente ou inválida)
+        """
+        values = pd.Series(values)
+
+        if pd.api.types.is_datetime64_any_dtype(values):
+            formatted = values.dt.strftime('%Y-%m-%d')
+            return formatted.astype(object).where(formatted.notna(), None).to_numpy()
+
+        # Caminho raro: datas como texto ou objetos diversos
+        formatted = []
+        for value in values.tolist():
+            if pd.isna(value):
+                formatted.append(None)
+            elif hasattr(value, 'strftime'):
+                formatted.append(value.strftime('%Y-%m-%d'))
+            elif isinstance(value, str):
+                try:
+                    formatted.append(pd.to_datetime(value).strftime('%Y-%m-%d'))
+                except Exception:
+                    formatted.append(value[:10])
+            else:
+                try:
+                    formatted.append(pd.to_datetime(str(value)).strftime('%Y-%m-%d'))
+                except Exception:
+                    logger.warning(f"Não foi possível converter data: {value}")
+                    formatted.append(None)
+        return np.array(formatted, dtype=object)
+
     @classmethod
-    def calculateIndexAsset(cls, df, asset: str):
+    def _historico_arrays(cls, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Extrai as colunas do histórico (data, close, high, low, open) como arrays.
+
+        Usa a coluna de data (Date/Datetime/date/datetime) ou o índice, arredonda
+        os preços para 2 casas e descarta as barras sem data.
+
+        Args:
+            df: DataFrame com a coluna 'fechamento' já sem NaN
+
+        Returns:
+            Dict[str, np.ndarray]: Arrays alinhados por barra
+        """
+        date_values = df.index
+        for col in ['Date', 'Datetime', 'date', 'datetime']:
+            if df.index.name == col:
+                break
+            if col in df.columns:
+                date_values = df[col]
+                break
+
+        datas = cls._format_dates(date_values)
+        close = df['fechamento'].to_numpy(dtype=float)
+
+        arrays = {'data': datas, 'close': close}
+        for key, col in (('high', 'High'), ('low', 'Low'), ('open', 'Open')):
+            arrays[key] = df[col].to_numpy(dtype=float) if col in df.columns else close
+
+        valid = pd.notna(datas)
+        if not valid.all():
+            arrays = {key: values[valid] for key, values in arrays.items()}
+
+        for key in ('close', 'high', 'low', 'open'):
+            arrays[key] = cls._round2(arrays[key])
+
+        return arrays
+
+    @staticmethod
+    def _serialize_historico(arrays: Dict[str, np.ndarray], formato: str = 'records'):
+        """
+        Converte os arrays do histórico no formato de resposta.
+
+        Args:
+            arrays: Histórico em colunas (data, close, high, low, open)
+            formato: 'records' (lista de registros), 'columnar' (um array por campo)
+                ou 'arrays' (as colunas como arrays do numpy, para respostas binárias)
+
+        Returns:
+            Lista de registros ou dicionário de colunas
+        """
+        if formato == ARRAYS_FORMAT:
+            return {field: arrays[field] for field in HISTORICO_FIELDS}
+
+        if formato == 'columnar':
+            return {field: arrays[field].tolist() for field in HISTORICO_FIELDS}
+
+        return [
+            {'data': data, 'close': close, 'high': high, 'low': low, 'open': open_}
+            for data, close, high, low, open_ in zip(
+                arrays['data'].tolist(), arrays['close'].tolist(), arrays['high'].tolist(),
+                arrays['low'].tolist(), arrays['open'].tolist()
+            )
+        ]
+
+    @classmethod
+    def _build_historico(cls, df: pd.DataFrame, formato: str = 'records'):
+        """
+        Monta o histórico de barras (data, close, high, low, open) para o front-end.
+
+        Args:
+            df: DataFrame com a coluna 'fechamento' já sem NaN
+            formato: 'records' (lista de registros) ou 'columnar' (um array por campo)
+
+        Returns:
+            Lista de registros ou dicionário de colunas
+        """
+        return cls._serialize_historico(cls._historico_arrays(df), formato)
+
+    @staticmethod
+    def _validate_historico_options(formato: str, max_points: Optional[int], downsample: str) -> Optional[str]:
+        """
+        Valida as opções de formato e downsampling do histórico.
+
+        Returns:
+            Optional[str]: Mensagem de erro ou None se as opções são válidas
+        """
+        if formato not in HISTORICO_FORMATS and formato != ARRAYS_FORMAT:
+            return f"Invalid format. Use one of: {', '.join(HISTORICO_FORMATS)}"
+        if max_points is not None and (isinstance(max_points, bool) or not isinstance(max_points, int)
+                                       or max_points < MIN_POINTS):
+            return f"max_points must be an integer >= {MIN_POINTS}"
+        if downsample not in DOWNSAMPLING_METHODS:
+            return f"Invalid downsample method. Use one of: {', '.join(DOWNSAMPLING_METHODS)}"
+        return None
+
+    @staticmethod
+    def _empty_historico(formato: str = 'records'):
+        """Histórico vazio no formato solicitado."""
+        if formato == ARRAYS_FORMAT:
+            return {field: np.array([], dtype=object if field == 'data' else float) for field in HISTORICO_FIELDS}
+        if formato == 'columnar':
+            return {field: [] for field in HISTORICO_FIELDS}
+        return []
+
+    @classmethod
+    def calculateIndexAsset(cls, df, asset: str, formato: str = 'records',
+                            max_points: Optional[int] = None, downsample: str = 'lttb'):
         """
         Calcula dados de um Ativo Financeiro:
         - Retorno Esperado
@@ -25,6 +209,10 @@ class AssetService:
         Args:
             df: DataFrame com dados do ativo
             asset: Nome do ativo
+            formato: Formato do histórico, 'records' (padrão) ou 'columnar'
+            max_points: Quantidade máxima de barras no histórico (as estatísticas
+                usam sempre a série completa)
+            downsample: Método de redução, 'lttb' (padrão) ou 'ohlc'
             
         Returns:
             dict: Dicionário com os dados calculados do ativo.
@@ -46,7 +234,7 @@ class AssetService:
                 logger.error(f"Coluna 'fechamento' não encontrada. Colunas disponíveis: {df.columns.tolist()}")
                 return {
                     "results": {},
-                    "historico": []
+                    "historico": cls._empty_historico(formato)
                 }
             
             # Remove valores NaN
@@ -56,7 +244,7 @@ class AssetService:
                 logger.warning("DataFrame vazio após remoção de NaN")
                 return {
                     "results": {},
-                    "historico": []
+                    "historico": cls._empty_historico(formato)
                 }
             
             # Calcula variação percentual
@@ -69,77 +257,14 @@ class AssetService:
             volatilidade_anual = desvio_padrao * np.sqrt(252)
             
             # Prepara dados históricos para o front-end
-            df_clean = df.copy()
-            df_clean.reset_index(inplace=True)
-            
-            # Trata diferentes nomes de coluna de data
-            date_column = None
-            for col in ['Date', 'Datetime', 'date', 'datetime']:
-                if col in df_clean.columns:
-                    date_column = col
-                    break
-            
-            # Se não encontrou coluna de data, usa o índice original
-            if date_column is None and hasattr(df.index, 'name') and df.index.name:
-                date_column = df.index.name
-            elif date_column is None:
-                # Cria uma coluna de data baseada no índice
-                df_clean['data'] = df.index
-                date_column = 'data'
-            
-            # Converte dados para lista de dicionários de forma segura
-            historico_list = []
-            
-            for idx, row in df_clean.iterrows():
-                try:
-                    # Extrai a data de forma segura
-                    if date_column in df_clean.columns:
-                        data_value = row[date_column]
-                    else:
-                        data_value = df.index[idx]
-                    
-                    # Converte para string de data limpa
-                    if pd.isna(data_value):
-                        continue
-                        
-                    # Se for Timestamp do pandas, converte para string
-                    if hasattr(data_value, 'strftime'):
-                        data_str = data_value.strftime('%Y-%m-%d')
-                    elif isinstance(data_value, str):
-                        # Se já for string, tenta extrair apenas a data
-                        try:
-                            data_parsed = pd.to_datetime(data_value)
-                            data_str = data_parsed.strftime('%Y-%m-%d')
-                        except:
-                            data_str = str(data_value)[:10]  # Pega apenas os primeiros 10 caracteres
-                    else:
-                        # Tenta converter para datetime
-                        try:
-                            data_parsed = pd.to_datetime(str(data_value))
-                            data_str = data_parsed.strftime('%Y-%m-%d')
-                        except:
-                            logger.warning(f"Não foi possível converter data: {data_value}")
-                            continue
-                    
-                    # Extrai o preço de fechamento
-                    fechamento_value = row['fechamento']
-                    if pd.isna(fechamento_value):
-                        continue
-                    
-                    historico_list.append({
-                        'data': data_str,
-                        'close': round(float(fechamento_value), 2),
-                        'high': round(float(row.get('High', fechamento_value)), 2),
-                        'low': round(float(row.get('Low', fechamento_value)), 2),
-                        'open': round(float(row.get('Open', fechamento_value)), 2),
-                    })
-                    
-                except Exception as e:
-                    logger.warning(f"Erro ao processar linha {idx}: {str(e)}")
-                    continue
-            
+            arrays = cls._historico_arrays(df)
+            total_points = len(arrays['close'])
+            downsampled = max_points is not None and total_points > max_points
+            if downsampled:
+                arrays = downsample_historico(arrays, max_points, downsample)
+            historico_list = cls._serialize_historico(arrays, formato)
             
-            return {
+            result = {
                 "results": {
                     "retorno": round(float(retorno_esperado), 4),
                     "desvio": round(float(desvio_padrao), 4),
@@ -148,21 +273,120 @@ class AssetService:
                 },
                 "historico": historico_list
             }
+            if downsampled:
+                result["downsampling"] = {
+                    "method": downsample,
+                    "original_points": total_points,
+                    "points": len(arrays['close'])
+                }
+            return result
             
         except Exception as e:
             logger.error(f"Erro em calculateIndexAsset: {str(e)}")
             return {
                 "results": {},
-                "historico": []
+                "historico": cls._empty_historico(formato)
             }
 
 
+    @staticmethod
+    def _flatten_columns(df: pd.DataFrame) -> pd.DataFrame:
+        """Remove o nível de ticker de colunas MultiIndex (formato do yf.download)."""
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.copy()
+            df.columns = df.columns.get_level_values(0)
+        return df
+
+    @classmethod
+    def _delta_sync(cls, existing: pd.DataFrame, asset: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        Completa uma série já armazenada baixando apenas as barras que faltam.
+
+        A última barra armazenada é baixada novamente, pois pode ter sido gravada
+        com o pregão ainda aberto.
+
+        Args:
+            existing: Série armazenada (cache)
+            asset: Símbolo do ativo
+            period: Período solicitado
+            interval: Intervalo das barras
+
+        Returns:
+            Optional[pd.DataFrame]: Série atualizada e recortada para o período, ou None
+            se a série armazenada não cobre o período (exige download completo)
+        """
+        existing = cls._flatten_columns(existing)
+        if existing.empty:
+            return None
+
+        index_tz = existing.index.tz
+        window_start = period_start(period)
+        last_date = existing.index.max()
+
+        if window_start is not None:
+            if index_tz is not None:
+                window_start = window_start.tz_localize(index_tz)
+            if existing.index.min() > window_start + PERIOD_COVERAGE_TOLERANCE or last_date < window_start:
+                return None
+
+        new_bars = get_market_data_provider().history(asset, start=last_date.strftime('%Y-%m-%d'), interval=interval)
+
+        merged = pd.concat([existing, new_bars]) if not new_bars.empty else existing
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+        if window_start is not None:
+            merged = merged[merged.index >= window_start]
+
+        logger.info(f"Sincronização incremental de {asset}: {len(new_bars)} barras baixadas desde {last_date}")
+        return merged
+
+    @classmethod
+    def _fetch_history(cls, asset: str, period: str, interval: str, cache) -> tuple:
+        """
+        Busca a série de um ativo no provedor de dados (incremental quando possível) e grava no cache.
+
+        Args:
+            asset: Símbolo do ativo
+            period: Período solicitado
+            interval: Intervalo das barras
+            cache: Cache de preços ou None
+
+        Returns:
+            tuple: (DataFrame ou None se não houver dados, 'delta' | 'miss')
+        """
+        if cache and interval in DELTA_SYNC_INTERVALS and get_bool_setting('DELTA_SYNC_ENABLED', True):
+            stale = cache.get_stale(asset, period, interval)
+            if stale is not None:
+                df = cls._delta_sync(stale, asset, period, interval)
+                if df is not None:
+                    cache.set(asset, period, interval, df)
+                    return df, 'delta'
+
+        df = get_market_data_provider().history(asset, period=period, interval=interval)
+        if df.empty:
+            return None, 'miss'
+
+        if cache:
+            cache.set(asset, period, interval, df)
+        return df, 'miss'
+
+    @staticmethod
+    def _recheck_cache(asset: str, period: str, interval: str, cache) -> Optional[tuple]:
+        """Consulta o cache de novo após obter o lock entre workers (outro worker pode ter baixado)."""
+        df = cache.get(asset, period, interval) if cache else None
+        return (df, 'hit') if df is not None else None
+
     @classmethod
-    def get_asset_data(cls, asset: str, period: str = '1y', interval: str = '5d') -> Dict[str, Any]:
+    def get_asset_data(cls, asset: str, period: str = '1y', interval: str = '5d',
+                       formato: str = 'records', max_points: Optional[int] = None,
+                       downsample: str = 'lttb') -> Dict[str, Any]:
         """
             Busca informações de um ativo financeiro.        Args:
             asset: Símbolo do ativo (ex: PETR4, AAPL)
             start_date: Mercado (BR, US, CA) opcional, se fornecido, filtra os dados a partir dessa data.
+            formato: Formato do histórico, 'records' (padrão) ou 'columnar'
+            max_points: Quantidade máxima de barras no histórico (opcional)
+            downsample: Método de redução, 'lttb' (padrão) ou 'ohlc'
             
         Returns:
             tuple: (response_data, status_code)
@@ -170,17 +394,37 @@ class AssetService:
         
         if not asset:
             return {"success": False, "message": "Asset symbol is required"}, 400
+
+        error = cls._validate_historico_options(formato, max_points, downsample)
+        if error:
+            return {"success": False, "message": error}, 400
         
         try:
             if not asset.endswith('.SA'):
                 asset = f"{asset}.SA"
-        
-            df = yf.download(asset, period=period, interval=interval)
-            
-            if df.empty:
-                return {"success": False, "message": "No data found for the given asset"}, 404
 
-            result = cls.calculateIndexAsset(df, asset)
+            cache = get_price_cache()
+            df = cache.get(asset, period, interval) if cache else None
+            cache_status = 'hit'
+
+            if df is None:
+                # Requisições concorrentes para a mesma série aguardam uma única busca
+                df, cache_status = coalesce(
+                    ('history', asset, period, interval),
+                    lambda: cls._fetch_history(asset, period, interval, cache),
+                    recheck=lambda: cls._recheck_cache(asset, period, interval, cache)
+                )
+
+                if df is None:
+                    return {"success": False, "message": "No data found for the given asset"}, 404
+
+                # O mesmo DataFrame é entregue a todos os chamadores coalescidos
+                df = df.copy()
+
+            logger.info(f"Cache de preços {cache_status} para {asset} ({period}, {interval})")
+
+            result = cls.calculateIndexAsset(df, asset, formato, max_points, downsample)
+            result['cache'] = cache_status
 
             return result, 200
         
@@ -188,10 +432,109 @@ class AssetService:
             logger.error(f"Error fetching asset data: {str(e)}")
             return {"success": False, "message": str(e)}, 500
 
+    @classmethod
+    def get_assets_data_batch(cls, assets: List[str], period: str = '1y', interval: str = '5d',
+                              formato: str = 'records', max_points: Optional[int] = None,
+                              downsample: str = 'lttb') -> tuple:
+        """
+        Busca informações de vários ativos com uma única chamada ao provedor de dados.
+
+        Tickers presentes no cache são servidos diretamente; os demais são baixados
+        juntos com uma única chamada `history_many` ao provedor (no yfinance,
+        `yf.download(tickers=[...], group_by='ticker')`). Falhas são
+        reportadas por ticker, sem interromper o lote.
+
+        Args:
+            assets: Lista de símbolos (ex: ['PETR4', 'ITUB4'])
+            period: Período solicitado
+            interval: Intervalo das barras
+            formato: Formato do histórico, 'records' (padrão) ou 'columnar'
+            max_points: Quantidade máxima de barras por histórico (opcional)
+            downsample: Método de redução, 'lttb' (padrão) ou 'ohlc'
+
+        Returns:
+            tuple: (response_data, status_code)
+        """
+        if not assets or not isinstance(assets, list):
+            return {"success": False, "message": "A non-empty list of asset symbols is required"}, 400
+
+        error = cls._validate_historico_options(formato, max_points, downsample)
+        if error:
+            return {"success": False, "message": error}, 400
+
+        tickers = []
+        for asset in assets:
+            if not isinstance(asset, str) or not asset.strip():
+                continue
+            ticker = asset.strip().upper()
+            if not ticker.endswith('.SA'):
+                ticker = f"{ticker}.SA"
+            if ticker not in tickers:
+                tickers.append(ticker)
+
+        if not tickers:
+            return {"success": False, "message": "A non-empty list of asset symbols is required"}, 400
+
+        if len(tickers) > MAX_BATCH_TICKERS:
+            return {"success": False, "message": f"At most {MAX_BATCH_TICKERS} assets per request"}, 400
+
+        cache = get_price_cache()
+        frames = {}
+        cache_status = {}
+        results = {}
+
+        for ticker in tickers:
+            df = cache.get(ticker, period, interval) if cache else None
+            if df is not None:
+                frames[ticker] = df
+                cache_status[ticker] = 'hit'
+
+        misses = [ticker for ticker in tickers if ticker not in frames]
+        if misses:
+            try:
+                downloaded = get_market_data_provider().history_many(misses, period=period, interval=interval)
+            except Exception as e:
+                logger.error(f"Error fetching batch asset data: {str(e)}")
+                downloaded = None
+                for ticker in misses:
+                    results[ticker] = {"success": False, "message": str(e)}
+
+            if downloaded is not None:
+                for ticker in misses:
+                    df = downloaded.get(ticker)
+                    if df is None or df.empty:
+                        results[ticker] = {"success": False, "message": "No data found for the given asset"}
+                        continue
+
+                    frames[ticker] = df
+                    cache_status[ticker] = 'miss'
+                    if cache:
+                        cache.set(ticker, period, interval, df)
+
+        for ticker, df in frames.items():
+            try:
+                result = cls.calculateIndexAsset(df, ticker, formato, max_points, downsample)
+                if not result['results']:
+                    results[ticker] = {"success": False, "message": "Insufficient data for calculations"}
+                    continue
+                result['cache'] = cache_status[ticker]
+                results[ticker] = result
+            except Exception as e:
+                logger.error(f"Error calculating asset data for {ticker}: {str(e)}")
+                results[ticker] = {"success": False, "message": str(e)}
+
+        logger.info(f"Busca em lote: {len(tickers)} tickers, {len(misses)} baixados, "
+                    f"{sum(1 for r in results.values() if r.get('success') is False)} falhas")
+
+        return {
+            "success": True,
+            "assets": {ticker: results[ticker] for ticker in tickers}
+        }, 200
+
     @staticmethod
     def cadastrar_ativo(data: Dict[str, Any]) -> tuple:
         """
-        Cadastra um novo ativo financeiro buscando dados do yfinance.
+        Cadastra um novo ativo financeiro buscando dados no provedor de mercado (yfinance por padrão).
         
         Args:
             data: Dicionário com ticker, carteira_id, intervalo, period
@@ -204,6 +547,8 @@ class AssetService:
             from app.model.Asset import Asset
             from app.model.Carteira import Carteira
             from app.model.Cliente import Cliente
+            from app.model.IndicadoresCache import IndicadoresCache
+            from app.model.PriceBar import PriceBar
             from app import db
             
             user_adm_id = g.current_user_id
@@ -211,6 +556,7 @@ class AssetService:
             carteira_id = data.get('carteira_id')
             intervalo = data.get('intervalo', '1d')
             period = data.get('period', '3mo')  # 3 meses = ~90 dias
+            sync_mode = data.get('sync_mode', 'delta')  # 'delta' baixa apenas as barras que faltam
             
             # Validações
             if not ticker:
@@ -231,59 +577,102 @@ class AssetService:
             if not carteira:
                 return {"success": False, "message": "Carteira not found or not authorized"}, 404
             
-            # Busca dados do yfinance
-            logger.info(f"Buscando dados do ticker {ticker} para período {period}")
+            # Sincronização incremental: as barras são compartilhadas entre as carteiras, então
+            # se o banco já cobre o período (cadastrado por qualquer carteira), baixa só o que falta
+            window_start = period_start(period)
+            delta_start = None
+            if (sync_mode == 'delta' and intervalo in DELTA_SYNC_INTERVALS
+                    and get_bool_setting('DELTA_SYNC_ENABLED', True)):
+                first_date, last_date = PriceBar.get_date_range(ticker, intervalo)
+                if last_date and (window_start is None or (
+                        pd.Timestamp(first_date) <= window_start + PERIOD_COVERAGE_TOLERANCE
+                        and pd.Timestamp(last_date) >= window_start)):
+                    # A última barra é baixada de novo: pode ter sido gravada com o pregão aberto
+                    delta_start = last_date
+            
+            # Busca dados no provedor de mercado (yfinance por padrão)
+            if delta_start:
+                logger.info(f"Buscando dados do ticker {ticker} a partir de {delta_start} (incremental)")
+            else:
+                logger.info(f"Buscando dados do ticker {ticker} para período {period}")
             
             try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period=period, interval=intervalo)
+                provider = get_market_data_provider()
+                if delta_start:
+                    start = delta_start.strftime('%Y-%m-%d')
+                    hist = coalesce(
+                        ('ticker_history', ticker, start, intervalo),
+                        lambda: provider.history(ticker, start=start, interval=intervalo),
+                        cross_worker=False
+                    )
+                else:
+                    hist = coalesce(
+                        ('ticker_history', ticker, period, intervalo),
+                        lambda: provider.history(ticker, period=period, interval=intervalo),
+                        cross_worker=False
+                    )
                 
-                if hist.empty:
+                if hist.empty and not delta_start:
                     return {"success": False, "message": f"No data found for ticker {ticker}"}, 404
                 
             except Exception as yf_error:
                 logger.error(f"Erro ao buscar dados do yfinance: {yf_error}")
                 return {"success": False, "message": f"Error fetching data from yfinance: {str(yf_error)}"}, 500
             
-            # Prepara dados para inserção
-            assets_to_insert = []
-            existing_count = 0
+            # Prepara as barras: a checagem de duplicatas fica no banco (ON CONFLICT)
+            ohlcv = [column for column in ('Open', 'High', 'Low', 'Close', 'Volume') if column in hist.columns]
+            bars = [
+                {'ticker': ticker, 'interval': intervalo, 'date': date.date(),
+                 **{column.lower(): value for column, value in zip(ohlcv, values)}}
+                for date, values in zip(hist.index, hist[ohlcv].itertuples(index=False, name=None))
+            ]
             
-            for date, row in hist.iterrows():
-                # Converte timestamp para date
-                date_only = date.date()
-                
-                # Verifica se já existe
-                existing_asset = Asset.query.filter_by(
-                    carteira_id=carteira_id,
-                    ticker=ticker,
-                    date=date_only
-                ).first()
-                
-                if existing_asset:
-                    existing_count += 1
-                    continue
-                
-                # Cria novo asset
-                new_asset = Asset(
-                    carteira_id=carteira_id,
-                    ticker=ticker,
-                    date=date_only,
-                    close=float(row['Close'])
-                )
-                assets_to_insert.append(new_asset)
+            # Janela da carteira: o início do período pedido (ou a primeira barra recebida, se anterior)
+            start_date = window_start.date() if window_start is not None else None
+            if start_date is not None and bars:
+                start_date = min(start_date, min(bar['date'] for bar in bars))
             
-            # Inserção em lote
             inserted_count = 0
-            if assets_to_insert:
-                try:
-                    db.session.bulk_save_objects(assets_to_insert)
-                    db.session.commit()
-                    inserted_count = len(assets_to_insert)
-                except Exception as db_error:
-                    db.session.rollback()
-                    logger.error(f"Erro ao inserir no banco: {db_error}")
-                    return {"success": False, "message": f"Database error: {str(db_error)}"}, 500
+            existing_count = 0
+            updated_count = 0
+            try:
+                # A barra baixada de novo substitui a gravada se os valores mudaram (ajuste ou pregão aberto)
+                updated = PriceBar.update_changed(
+                    [bar for bar in bars if bar['date'] == delta_start]) if delta_start else []
+                inserted = PriceBar.insert_ignore_duplicates(bars)
+                inserted_count = len(inserted)
+                updated_count = len(updated)
+                existing_count = len({bar['date'] for bar in bars}) - inserted_count
+                ativo, window_changed, _ = Asset.link(carteira_id, ticker, intervalo, start_date)
+                
+                changed = updated + inserted
+                new_dates = [date for _, _, date in changed
+                             if ativo.start_date is None or date >= ativo.start_date]
+                if window_changed:
+                    # Barras já armazenadas passam a ser visíveis: o ticker é recalculado nas estatísticas
+                    first_visible, _ = Asset.get_date_range(carteira_id, ticker)
+                    new_dates = ([first_visible] if first_visible else []) + new_dates
+                
+                if changed:
+                    # Barras novas ou alteradas valem para todas as carteiras que acompanham o ticker
+                    IndicadoresCache.bump_versions([
+                        other for other in Asset.get_carteiras_by_ticker(
+                            ticker, intervalo, since=max(date for _, _, date in changed))
+                        if other != carteira_id
+                    ])
+                if new_dates:
+                    # Invalida os indicadores materializados na mesma transação
+                    data_version = IndicadoresCache.bump_version(carteira_id)
+                    try:
+                        # Incorpora as barras novas às estatísticas de covariância
+                        EstatisticasService.registrar_cadastro(carteira_id, ticker, new_dates, data_version)
+                    except Exception as stats_error:
+                        logger.warning(f"Erro ao atualizar estatísticas da carteira {carteira_id}: {stats_error}")
+                db.session.commit()
+            except Exception as db_error:
+                db.session.rollback()
+                logger.error(f"Erro ao inserir no banco: {db_error}")
+                return {"success": False, "message": f"Database error: {str(db_error)}"}, 500
             
             return {
                 "success": True,
@@ -294,8 +683,10 @@ class AssetService:
                     "total_records": len(hist),
                     "inserted_records": inserted_count,
                     "existing_records": existing_count,
+                    "updated_records": updated_count,
                     "period": period,
-                    "intervalo": intervalo
+                    "intervalo": intervalo,
+                    "sync_mode": 'delta' if delta_start else 'full'
                 }
             }, 201
             
@@ -304,12 +695,13 @@ class AssetService:
             return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
 
     @staticmethod
-    def calcular_indicadores_carteira(carteira_id: int) -> tuple:
+    def remover_ativo(carteira_id: int, ticker: str) -> tuple:
         """
-        Calcula indicadores financeiros para uma carteira.
+        Remove um ativo (todo o histórico do ticker) de uma carteira.
         
         Args:
             carteira_id: ID da carteira
+            ticker: Símbolo do ativo
             
         Returns:
             tuple: (response_dict, status_code)
@@ -319,8 +711,16 @@ class AssetService:
             from app.model.Asset import Asset
             from app.model.Carteira import Carteira
             from app.model.Cliente import Cliente
+            from app.model.IndicadoresCache import IndicadoresCache
+            from app import db
             
             user_adm_id = g.current_user_id
+            ticker = (ticker or '').upper()
+            if ticker and not ticker.endswith('.SA'):
+                ticker = f"{ticker}.SA"
+            
+            if not ticker:
+                return {"success": False, "message": "Ticker is required"}, 400
             
             # Verifica se a carteira existe e pertence ao admin
             carteira = Carteira.query.join(Cliente).filter(
@@ -331,135 +731,431 @@ class AssetService:
             if not carteira:
                 return {"success": False, "message": "Carteira not found or not authorized"}, 404
             
-            # Busca todos os ativos da carteira
-            assets = Asset.query.filter_by(carteira_id=carteira_id).all()
-            
-            if not assets:
-                return {"success": False, "message": "No assets found in this carteira"}, 200
-            
-            # Converte para DataFrame
-            df_data = []
-            for asset in assets:
-                df_data.append({
-                    'ticker': asset.ticker,
-                    'date': asset.date,
-                    'close': asset.close
-                })
-            
-            df = pd.DataFrame(df_data)
-            
-            # Pivot para ter tickers como colunas
-            df_pivot = df.pivot_table(index='date', columns='ticker', values='close', aggfunc='first')
-            df_pivot = df_pivot.dropna()
+            try:
+                deleted_count = Asset.delete_by_ticker(carteira_id, ticker)
+                if deleted_count is not None:
+                    # Invalida os indicadores materializados na mesma transação
+                    data_version = IndicadoresCache.bump_version(carteira_id)
+                    try:
+                        EstatisticasService.registrar_remocao(carteira_id, ticker, data_version)
+                    except Exception as stats_error:
+                        logger.warning(f"Erro ao atualizar estatísticas da carteira {carteira_id}: {stats_error}")
+                db.session.commit()
+            except Exception as db_error:
+                db.session.rollback()
+                logger.error(f"Erro ao remover ativo do banco: {db_error}")
+                return {"success": False, "message": f"Database error: {str(db_error)}"}, 500
             
-            if df_pivot.empty:
-                return {"success": False, "message": "Insufficient data for calculations"}, 400
+            if deleted_count is None:
+                return {"success": False, "message": f"Asset {ticker} not found in this carteira"}, 404
             
-            # Verifica se BOVA11.SA existe
-            if 'BOVA11.SA' not in df_pivot.columns:
-                return {"success": False, "message": "BOVA11.SA is required for calculations"}, 400
+            return {
+                "success": True,
+                "message": f"Asset {ticker} removed successfully",
+                "data": {
+                    "ticker": ticker,
+                    "carteira_id": carteira_id,
+                    "deleted_records": deleted_count
+                }
+            }, 200
             
-            # Calcula retornos diários
-            returns = df_pivot.pct_change().dropna()
+        except Exception as e:
+            logger.error(f"Erro ao remover ativo: {str(e)}")
+            return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
+
+    @staticmethod
+    def listar_ativos(carteira_id: int, limit: Optional[str] = None, cursor: Optional[str] = None,
+                      fields: Optional[str] = None, ticker: Optional[str] = None) -> tuple:
+        """
+        Lista os registros de preço de uma carteira, uma página (keyset) por vez.
+        
+        Args:
+            carteira_id: ID da carteira
+            limit: Tamanho da página
+            cursor: `next_cursor` da página anterior
+            fields: Campos a carregar, separados por vírgula
+            ticker: Restringe a listagem a um ticker
             
-            # Ordena tickers com BOVA11.SA no final
-            tickers = list(df_pivot.columns)
-            if 'BOVA11.SA' in tickers:
-                tickers.remove('BOVA11.SA')
-                tickers.append('BOVA11.SA')
+        Returns:
+            tuple: (response_dict, status_code)
+        """
+        try:
+            from flask import g
+            from datetime import date
+            from app.model.Asset import Asset, ASSET_FIELDS
+            from app.model.Carteira import Carteira
+            from app.model.Cliente import Cliente
+            from app.utils.pagination import decode_cursor, paginate, parse_fields, parse_limit
             
-            # Calcula indicadores
-            retorno_esperado = returns.mean()
-            desvio_padrao = returns.std()
+            try:
+                limit = parse_limit(limit)
+                fields = parse_fields(fields, ASSET_FIELDS)
+                after = None
+                if cursor:
+                    after_ticker, after_date = decode_cursor(cursor, 2)
+                    after = (str(after_ticker), date.fromisoformat(after_date))
+            except (TypeError, ValueError) as e:
+                return {"success": False, "message": str(e)}, 400
             
-            # Índice de desempenho (Sharpe simples)
-            indice_desempenho = retorno_esperado / desvio_padrao
+            ticker = (ticker or '').upper()
+            if ticker and not ticker.endswith('.SA'):
+                ticker = f"{ticker}.SA"
             
-            # Índice de Sharpe (assumindo taxa livre de risco = 0.5% ao ano / 252 dias úteis)
-            taxa_livre_risco = 0.005 / 252
-            indice_sharpe = (retorno_esperado - taxa_livre_risco) / desvio_padrao
+            carteira = Carteira.query.join(Cliente).filter(
+                Carteira.id == carteira_id,
+                Cliente.user_adm_id == g.current_user_id
+            ).with_entities(Carteira.id).first()
             
-            # Pesos igualitários (excluindo BOVA11.SA)
-            ativos_investimento = [t for t in tickers if t != 'BOVA11.SA']
-            n_ativos = len(ativos_investimento)
+            if not carteira:
+                return {"success": False, "message": "Carteira not found or not authorized"}, 404
             
-            if n_ativos == 0:
-                return {"success": False, "message": "No investment assets found (excluding BOVA11.SA)"}, 400
+            rows = Asset.get_page_by_carteira(carteira_id, fields, limit + 1, after, ticker or None)
+            pagina = paginate(rows, fields, ['ticker', 'date'], limit)
+            return {
+                "success": True,
+                "carteira_id": carteira_id,
+                "assets": pagina['items'],
+                "pagina": pagina['pagina']
+            }, 200
             
-            peso_individual = 1.0 / n_ativos
-            pesos = pd.Series(index=tickers, data=0.0)
-            for ticker in ativos_investimento:
-                pesos[ticker] = peso_individual
+        except Exception as e:
+            logger.error(f"Erro ao listar ativos da carteira {carteira_id}: {str(e)}")
+            return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
+
+    @classmethod
+    def _indicadores_estatisticas(cls, carteira_id: int, data_version: int) -> tuple:
+        """
+        Indicadores a partir das estatísticas incrementais, em O(k²) sem reler o histórico.
+        
+        Returns:
+            tuple: (indicadores calculados, tickers ordenados, None) ou (None, None, (response_dict, status_code))
+        """
+        return cls._indicadores_estado(EstatisticasService.obter_estado(carteira_id, data_version))
+
+    @staticmethod
+    def _indicadores_estado(state) -> tuple:
+        """
+        Indicadores de um estado de estatísticas incrementais (CovarianceState).
+        
+        Returns:
+            tuple: (indicadores calculados, tickers ordenados, None) ou (None, None, (response_dict, status_code))
+        """
+        if not state.tickers:
+            return None, None, ({"success": False, "message": "No assets found in this carteira"}, 200)
+        
+        # Verifica se BOVA11.SA existe
+        if 'BOVA11.SA' not in state.tickers:
+            return None, None, ({"success": False, "message": "BOVA11.SA is required for calculations"}, 400)
+        
+        # Ordena tickers com BOVA11.SA no final
+        tickers = ordenar_tickers(state.tickers)
+        if len(tickers) < 2:
+            return None, None, ({"success": False, "message": "No investment assets found (excluding BOVA11.SA)"}, 400)
+        
+        means, cov, min_obs = state.moments(tickers)
+        if min_obs < 2:
+            return None, None, ({"success": False, "message": "Insufficient data for calculations"}, 400)
+        
+        return indicadores_from_moments(means, cov), tickers, None
+
+    @classmethod
+    def _indicadores_historico(cls, carteira_id: int) -> tuple:
+        """
+        Indicadores recalculados sobre a matriz de fechamentos da carteira.
+        
+        Returns:
+            tuple: (indicadores calculados, tickers ordenados, None) ou (None, None, (response_dict, status_code))
+        """
+        # Fechamentos da carteira como matriz datas x tickers (sem ORM)
+        prices, tickers, error = cls._preparar_historico(load_price_matrix(carteira_id))
+        if error:
+            return None, None, error
+        return calcular_indicadores(prices), tickers, None
+
+    @staticmethod
+    def _preparar_historico(matriz) -> tuple:
+        """
+        Fechamentos das datas completas, com as colunas em ordem (BOVA11.SA no final).
+        
+        Returns:
+            tuple: (fechamentos, tickers ordenados, None) ou (None, None, (response_dict, status_code))
+        """
+        if matriz.empty:
+            return None, None, ({"success": False, "message": "No assets found in this carteira"}, 200)
+        
+        # Apenas as datas com fechamento para todos os tickers
+        matriz = matriz.complete()
+        
+        if matriz.empty:
+            return None, None, ({"success": False, "message": "Insufficient data for calculations"}, 400)
+        
+        # Verifica se BOVA11.SA existe
+        if 'BOVA11.SA' not in matriz.tickers:
+            return None, None, ({"success": False, "message": "BOVA11.SA is required for calculations"}, 400)
+        
+        # Ordena tickers com BOVA11.SA no final
+        tickers = ordenar_tickers(matriz.tickers)
+        if len(tickers) < 2:
+            return None, None, ({"success": False, "message": "No investment assets found (excluding BOVA11.SA)"}, 400)
+
+        return matriz.select(tickers).prices, tickers, None
+
+    @classmethod
+    def _indicadores_arrays(cls, carteira_id: int, data_version: Optional[int] = None) -> tuple:
+        """
+        Calcula os indicadores de uma carteira.
+        
+        Com INDICADORES_SOURCE='streaming' (padrão) e a versão dos dados
+        informada, parte das estatísticas de covariância mantidas no cadastro
+        de ativos; com 'history', recalcula sobre a matriz de fechamentos. As
+        duas origens usam as datas com fechamento para todos os tickers.
+        
+        Args:
+            carteira_id: ID da carteira
+            data_version: Versão atual dos dados da carteira
             
-            # Retorno da carteira
-            retorno_carteira = np.dot(retorno_esperado[ativos_investimento], pesos[ativos_investimento])
+        Returns:
+            tuple: (indicadores no formato 'arrays', None) ou (None, (response_dict, status_code))
+        """
+        if data_version is not None and get_setting('INDICADORES_SOURCE', 'streaming') == 'streaming':
+            ind, tickers, error = cls._indicadores_estatisticas(carteira_id, data_version)
+        else:
+            ind, tickers, error = cls._indicadores_historico(carteira_id)
+        if error:
+            return None, error
+        return cls._montar_indicadores(ind, tickers), None
+
+    @staticmethod
+    def _montar_indicadores(ind: Dict[str, Any], tickers: List[str]) -> Dict[str, Any]:
+        """Indicadores no formato 'arrays' (vetores e matrizes do numpy, alinhados com ativos_ordenados)."""
+        return {
+            "ativos_ordenados": tickers,
+            "retorno_esperado": ind["retorno_esperado"],
+            "desvio_padrao": ind["desvio_padrao"],
+            "indice_desempenho": ind["indice_desempenho"],
+            "indice_sharpe": ind["indice_sharpe"],
+            "pesos": ind["pesos"],
+            "retorno_carteira": ind["retorno_carteira"],
+            "beta": ind["beta"],
+            "matriz_covariancia": ind["matriz_covariancia"],
+            "matriz_cov_customizada": ind["matriz_cov_customizada"],
+            "desvio_padrao_carteira": ind["desvio_padrao_carteira"],
+            "indicadores_carteira": {
+                "retorno_esperado": ind["retorno_carteira"],
+                "variancia": ind["variancia_carteira"],
+                "desvio_padrao": ind["desvio_padrao_carteira"],
+                "indice_desempenho": ind["indice_desempenho_carteira"],
+                "indice_sharpe": ind["indice_sharpe_carteira"]
+            }
+        }
+
+    @classmethod
+    def obter_indicadores(cls, carteira_id: int) -> tuple:
+        """
+        Indicadores da carteira no formato 'arrays', materializados ou calculados.
+        
+        Verifica se a carteira pertence ao admin autenticado. Os indicadores
+        ficam materializados por carteira (IndicadoresCache) e são servidos
+        diretamente até que um cadastro/remoção de ativo mude a versão dos dados.
+        
+        Args:
+            carteira_id: ID da carteira
             
-            # Cálculo do Beta
-            bova_returns = returns['BOVA11.SA']
-            bova_variance = bova_returns.var()
+        Returns:
+            tuple: (indicadores, 'hit'/'miss', None) ou (None, None, (response_dict, status_code))
+        """
+        from flask import g
+        from app import db
+        from app.model.IndicadoresCache import IndicadoresCache
+        
+        user_adm_id = g.current_user_id
+        
+        # Verifica a carteira e busca os indicadores materializados na mesma consulta
+        autorizada, data_version, indicadores = IndicadoresCache.lookup(carteira_id, user_adm_id)
+        
+        if not autorizada:
+            return None, None, ({"success": False, "message": "Carteira not found or not authorized"}, 404)
+        
+        if indicadores is not None and get_bool_setting('INDICADORES_CACHE_ENABLED', True):
+            return indicadores, 'hit', None
+        
+        indicadores, error = cls._indicadores_arrays(carteira_id, data_version)
+        if error:
+            return None, None, error
+        
+        try:
+            IndicadoresCache.store(carteira_id, data_version, indicadores)
+        except Exception as cache_error:
+            db.session.rollback()
+            logger.warning(f"Erro ao materializar indicadores da carteira {carteira_id}: {cache_error}")
+        
+        return indicadores, 'miss', None
+
+    @staticmethod
+    def _indicadores_records(indicadores: Dict[str, Any]) -> Dict[str, Any]:
+        """Indicadores com vetores e matrizes serializados por ticker."""
+        tickers = indicadores["ativos_ordenados"]
+        indicadores = dict(indicadores)
+        for key in INDICADORES_VETORES:
+            indicadores[key] = vetor_para_dict(tickers, indicadores[key])
+        for key in INDICADORES_MATRIZES:
+            indicadores[key] = matriz_para_dict(tickers, indicadores[key])
+        return indicadores
+
+    @classmethod
+    def calcular_indicadores_carteira(cls, carteira_id: int, formato: str = 'records') -> tuple:
+        """
+        Calcula indicadores financeiros para uma carteira.
+        
+        O resultado fica materializado por carteira (IndicadoresCache) e é
+        servido diretamente até que um cadastro/remoção de ativo mude a versão
+        dos dados da carteira.
+        
+        Args:
+            carteira_id: ID da carteira
+            formato: 'records' (dicionários por ticker) ou 'arrays' (vetores e
+                matrizes do numpy alinhados com `ativos_ordenados`, para
+                respostas binárias)
             
-            beta = {}
-            for ticker in tickers:
-                if ticker != 'BOVA11.SA':
-                    covariance = returns[ticker].cov(bova_returns)
-                    beta[ticker] = covariance / bova_variance if bova_variance != 0 else 0
-                else:
-                    beta[ticker] = 1.0
-            
-            # Matriz de covariância
-            matriz_covariancia = returns.cov()
-            
-            # Matriz de covariância customizada baseada no Beta
-            matriz_cov_customizada = pd.DataFrame(index=tickers, columns=tickers)
-            for i, ticker_i in enumerate(tickers):
-                for j, ticker_j in enumerate(tickers):
-                    if ticker_i == ticker_j:
-                        matriz_cov_customizada.loc[ticker_i, ticker_j] = returns[ticker_i].var()
-                    else:
-                        # Cov(i,j) = Beta_i * Beta_j * Var(mercado)
-                        cov_custom = beta[ticker_i] * beta[ticker_j] * bova_variance
-                        matriz_cov_customizada.loc[ticker_i, ticker_j] = cov_custom
-            
-            matriz_cov_customizada = matriz_cov_customizada.astype(float)
-            
-            # Desvio padrão da carteira
-            pesos_array = pesos[ativos_investimento].values
-            cov_matrix = matriz_covariancia.loc[ativos_investimento, ativos_investimento].values
-            variancia_carteira = np.dot(pesos_array, np.dot(cov_matrix, pesos_array))
-            desvio_padrao_carteira = np.sqrt(variancia_carteira)
-            
-            # Indicadores finais da carteira
-            indice_desempenho_carteira = retorno_carteira / desvio_padrao_carteira if desvio_padrao_carteira != 0 else 0
-            indice_sharpe_carteira = (retorno_carteira - taxa_livre_risco) / desvio_padrao_carteira if desvio_padrao_carteira != 0 else 0
-            
-            # Monta resposta
+        Returns:
+            tuple: (response_dict, status_code)
+        """
+        try:
+            indicadores, cache_status, error = cls.obter_indicadores(carteira_id)
+            if error:
+                return error
+
+            if formato != ARRAYS_FORMAT:
+                indicadores = cls._indicadores_records(indicadores)
+
             response = {
                 "success": True,
                 "carteira_id": carteira_id,
-                "indicadores": {
-                    "ativos_ordenados": tickers,
-                    "retorno_esperado": {ticker: float(retorno_esperado[ticker]) for ticker in tickers},
-                    "desvio_padrao": {ticker: float(desvio_padrao[ticker]) for ticker in tickers},
-                    "indice_desempenho": {ticker: float(indice_desempenho[ticker]) if not pd.isna(indice_desempenho[ticker]) else 0.0 for ticker in tickers},
-                    "indice_sharpe": {ticker: float(indice_sharpe[ticker]) if not pd.isna(indice_sharpe[ticker]) else 0.0 for ticker in tickers},
-                    "pesos": {ticker: float(pesos[ticker]) for ticker in tickers},
-                    "retorno_carteira": float(retorno_carteira),
-                    "beta": {ticker: float(beta[ticker]) for ticker in tickers},
-                    "matriz_covariancia": {col: {row: float(matriz_covariancia.loc[row, col]) for row in matriz_covariancia.index} for col in matriz_covariancia.columns},
-                    "matriz_cov_customizada": {col: {row: float(matriz_cov_customizada.loc[row, col]) for row in matriz_cov_customizada.index} for col in matriz_cov_customizada.columns},
-                    "desvio_padrao_carteira": float(desvio_padrao_carteira),
-                    "indicadores_carteira": {
-                        "retorno_esperado": float(retorno_carteira),
-                        "variancia": float(variancia_carteira),
-                        "desvio_padrao": float(desvio_padrao_carteira),
-                        "indice_desempenho": float(indice_desempenho_carteira),
-                        "indice_sharpe": float(indice_sharpe_carteira)
-                    }
-                }
+                "indicadores": indicadores,
+                "cache": cache_status
             }
             
             return response, 200
             
         except Exception as e:
             logger.error(f"Erro ao calcular indicadores: {str(e)}")
-            return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
\ No newline at end of file
+            return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
+
+    @classmethod
+    def _indicadores_lote(cls, versoes: Dict[int, int]) -> Dict[int, tuple]:
+        """
+        Calcula os indicadores de várias carteiras de uma vez.
+        
+        Com INDICADORES_SOURCE='streaming', parte das estatísticas incrementais
+        (as desatualizadas são reconstruídas a partir de uma única leitura);
+        com 'history', carrega os fechamentos de todas as carteiras em uma
+        única consulta (matriz compartilhada) e distribui os cálculos no pool
+        de processos.
+        
+        Args:
+            versoes: Versão atual dos dados por carteira
+            
+        Returns:
+            Dict[int, tuple]: (indicadores no formato 'arrays', None) ou (None, (response_dict, status_code))
+        """
+        minimo = int(get_setting('INDICADORES_POOL_MIN_CARTEIRAS', 4))
+        workers = pool_workers() if len(versoes) >= minimo else 1
+        
+        if get_setting('INDICADORES_SOURCE', 'streaming') == 'streaming':
+            estados = EstatisticasService.obter_estados(versoes, workers=workers)
+            calculados = {carteira_id: cls._indicadores_estado(estados[carteira_id]) for carteira_id in versoes}
+        else:
+            matrizes = load_price_matrices(list(versoes))
+            calculados, pendentes = {}, []
+            for carteira_id in versoes:
+                prices, tickers, error = cls._preparar_historico(matrizes[carteira_id])
+                if error:
+                    calculados[carteira_id] = (None, None, error)
+                else:
+                    pendentes.append((carteira_id, prices, tickers))
+            resultados = parallel_map(calcular_indicadores, [prices for _, prices, _ in pendentes],
+                                      workers=min(workers, len(pendentes)))
+            for (carteira_id, _, tickers), ind in zip(pendentes, resultados):
+                calculados[carteira_id] = (ind, tickers, None)
+        
+        return {
+            carteira_id: (None, error) if error else (cls._montar_indicadores(ind, tickers), None)
+            for carteira_id, (ind, tickers, error) in calculados.items()
+        }
+
+    @classmethod
+    def calcular_indicadores_lote(cls, carteira_ids: Optional[List[int]] = None, formato: str = 'records') -> tuple:
+        """
+        Indicadores de todas as carteiras do admin (ou de um subconjunto) em uma chamada.
+        
+        Os indicadores materializados são lidos junto com a verificação das
+        carteiras em uma única consulta; apenas as carteiras sem indicadores
+        válidos são calculadas (em lote) e materializadas.
+        
+        Args:
+            carteira_ids: IDs das carteiras (padrão: todas as do admin)
+            formato: 'records' (dicionários por ticker) ou 'arrays' (vetores e
+                matrizes do numpy)
+            
+        Returns:
+            tuple: (response_dict, status_code)
+        """
+        try:
+            from flask import g
+            from app import db
+            from app.model.IndicadoresCache import IndicadoresCache
+            
+            start = time.perf_counter()
+            carteiras = IndicadoresCache.lookup_many(g.current_user_id, carteira_ids)
+            
+            if carteira_ids is not None:
+                nao_encontradas = sorted(set(carteira_ids) - set(carteiras))
+                if nao_encontradas:
+                    return {"success": False,
+                            "message": f"Carteiras not found or not authorized: "
+                                       f"{', '.join(map(str, nao_encontradas))}"}, 404
+            
+            cache_enabled = get_bool_setting('INDICADORES_CACHE_ENABLED', True)
+            versoes = {
+                carteira_id: data_version
+                for carteira_id, (_, data_version, indicadores) in carteiras.items()
+                if indicadores is None or not cache_enabled
+            }
+            calculados = cls._indicadores_lote(versoes) if versoes else {}
+            
+            resultados, comparacao = [], []
+            for carteira_id, (nome, data_version, indicadores) in carteiras.items():
+                cache_status = 'hit'
+                if carteira_id in calculados:
+                    indicadores, error = calculados[carteira_id]
+                    cache_status = 'miss'
+                    if error:
+                        resultados.append({"carteira_id": carteira_id, "nome": nome, "success": False,
+                                           "message": error[0].get("message")})
+                        continue
+                    try:
+                        IndicadoresCache.store(carteira_id, data_version, indicadores)
+                    except Exception as cache_error:
+                        db.session.rollback()
+                        logger.warning(f"Erro ao materializar indicadores da carteira {carteira_id}: {cache_error}")
+                
+                comparacao.append({"carteira_id": carteira_id, "nome": nome,
+                                   "ativos": len(indicadores["ativos_ordenados"]) - 1,
+                                   **indicadores["indicadores_carteira"]})
+                if formato != ARRAYS_FORMAT:
+                    indicadores = cls._indicadores_records(indicadores)
+                resultados.append({"carteira_id": carteira_id, "nome": nome, "success": True,
+                                   "cache": cache_status, "indicadores": indicadores})
+            
+            return {
+                "success": True,
+                "total": len(resultados),
+                "calculadas": len(versoes),
+                "carteiras": resultados,
+                "comparacao": comparacao,
+                "tempo_ms": round((time.perf_counter() - start) * 1000, 2)
+            }, 200
+            
+        except Exception as e:
+            logger.error(f"Erro ao calcular indicadores em lote: {str(e)}")
+            return {"success": False, "message": f"Internal server error: {str(e)}"}, 500
@@ -1,16 +1,29 @@
-from app.model.Carteira import Carteira
+from app.model.Carteira import Carteira, CARTEIRA_FIELDS
 from app.model.Cliente import Cliente
+from app.utils.pagination import decode_cursor, paginate, parse_fields, parse_limit
 from flask import g
 
 class CarteiraService:
     """Service for portfolio-related operations."""
 
     # ...existing code...
+
+    @staticmethod
+    def _portfolio_dict(resumo):
+        """Serializa um resumo de `Carteira.get_resumos_by_admin` sem novas consultas."""
+        carteira, cliente_nome, quantidade_ativos, quantidade_registros = resumo
+        return carteira.to_dict(cliente_nome=cliente_nome, quantidade_ativos=quantidade_ativos,
+                                quantidade_registros=quantidade_registros)
         
     @staticmethod
-    def get_portfolios():
+    def get_portfolios(limit=None, cursor=None, fields=None):
         """
-        Retrieves all portfolios for the authenticated admin user.
+        Retrieves the authenticated admin's portfolios, one keyset page at a time.
+        
+        Args:
+            limit (str, optional): Page size
+            cursor (str, optional): `next_cursor` of the previous page
+            fields (str, optional): Comma-separated fields to load
         
         Returns:
             tuple: (response, status_code)
@@ -18,13 +31,22 @@ class CarteiraService:
         try:
             user_adm_id = g.current_user_id
             
-            portfolios = Carteira.get_carteiras_by_admin(user_adm_id)
-            if not portfolios:
+            try:
+                limit = parse_limit(limit)
+                fields = parse_fields(fields, CARTEIRA_FIELDS)
+                after_id = int(decode_cursor(cursor, 1)[0]) if cursor else None
+            except (TypeError, ValueError) as e:
+                return {"success": False, "message": str(e)}, 400
+            
+            rows = Carteira.get_page_by_admin(user_adm_id, fields, limit + 1, after_id)
+            if not rows and cursor is None:
                 return {"success": False, "message": "No portfolios found"}, 404
             
+            pagina = paginate(rows, fields, ['id'], limit)
             response = {
                 "success": True,
-                "portfolios": [portfolio.to_dict() for portfolio in portfolios]
+                "portfolios": pagina['items'],
+                "pagina": pagina['pagina']
             }
             return response, 200
         
@@ -76,10 +98,11 @@ class CarteiraService:
             if not carteira_atualizada:
                 return {"success": False, "message": "Portfolio not found or not authorized"}, 404
             
+            resumos = Carteira.get_resumos_by_admin(user_adm_id, portfolio_id)
             response = {
                 "success": True,
                 "message": "Portfolio updated successfully",
-                "portfolio": carteira_atualizada.to_dict()
+                "portfolio": CarteiraService._portfolio_dict(resumos[0])
             }
             return response, 200
         
@@ -100,18 +123,15 @@ class CarteiraService:
         try:
             user_adm_id = g.current_user_id
             
-            # Busca a carteira e verifica se pertence a um cliente do admin
-            carteira = Carteira.query.join(Cliente).filter(
-                Carteira.id == portfolio_id,
-                Cliente.user_adm_id == user_adm_id
-            ).first()
+            # Busca a carteira (com cliente e contagens) e verifica se pertence a um cliente do admin
+            resumos = Carteira.get_resumos_by_admin(user_adm_id, portfolio_id)
             
-            if not carteira:
+            if not resumos:
                 return {"success": False, "message": "Portfolio not found"}, 404
             
             response = {
                 "success": True,
-                "portfolio": carteira.to_dict()
+                "portfolio": CarteiraService._portfolio_dict(resumos[0])
             }
             return response, 200
         
@@ -180,7 +200,8 @@ class CarteiraService:
             response = {
                 "success": True,
                 "message": "Portfolio created successfully",
-                "portfolio": carteira.to_dict()
+                "portfolio": carteira.to_dict(cliente_nome=cliente.name, quantidade_ativos=0,
+                                              quantidade_registros=0)
             }
             return response, 201
         
@@ -1,4 +1,5 @@
-from app.model.Cliente import Cliente
+from app.model.Cliente import Cliente, CLIENTE_FIELDS
+from app.utils.pagination import decode_cursor, paginate, parse_fields, parse_limit
 from flask import g
 
 class ClienteService:
@@ -24,15 +25,33 @@ class ClienteService:
         return {"success": True, "message": "Cliente criado com sucesso."}, 201
 
     @staticmethod
-    def get_clientes():
+    def get_clientes(limit=None, cursor=None, fields=None):
+        """
+        Lists the admin's clients, one keyset page at a time.
+        
+        Args:
+            limit (str, optional): Page size
+            cursor (str, optional): `next_cursor` of the previous page
+            fields (str, optional): Comma-separated fields to load
         
+        Returns:
+            tuple: (response, status_code)
+        """
         user_adm_id = g.current_user_id
 
-        clientes = Cliente.get_clientes_by_admin(user_adm_id)
-        if not clientes:
+        try:
+            limit = parse_limit(limit)
+            fields = parse_fields(fields, CLIENTE_FIELDS)
+            after_id = int(decode_cursor(cursor, 1)[0]) if cursor else None
+        except (TypeError, ValueError) as e:
+            return {"success": False, "message": str(e)}, 400
+
+        rows = Cliente.get_page_by_admin(user_adm_id, fields, limit + 1, after_id)
+        if not rows and cursor is None:
             return {"success": False, "message": "Nenhum cliente encontrado."}, 404
     
-        return {"success": True, "clientes": [cliente.to_dict() for cliente in clientes]}, 200
+        pagina = paginate(rows, fields, ['id'], limit)
+        return {"success": True, "clientes": pagina['items'], "pagina": pagina['pagina']}, 200
 
     def deleteUser(cliente_id):
         """
@@ -0,0 +1,148 @@
+import logging
+from typing import Dict, List
+
+import numpy as np
+
+from app.utils.price_matrix import load_price_matrices, load_price_matrix
+from app.utils.process_pool import parallel_map
+from app.utils.streaming_stats import CovarianceState
+
+logger = logging.getLogger(__name__)
+
+
+def _estado_de_precos(tickers: List[str], dates: np.ndarray, prices: np.ndarray) -> CovarianceState:
+    """Reconstrução do estado a partir dos fechamentos (executada no pool de processos)."""
+    return CovarianceState.from_prices(tickers, dates, prices)
+
+
+class EstatisticasService:
+    """Manutenção das estatísticas incrementais de covariância das carteiras."""
+
+    @staticmethod
+    def _rebuild(carteira_id: int) -> CovarianceState:
+        matriz = load_price_matrix(carteira_id)
+        return CovarianceState.from_prices(matriz.tickers, matriz.dates, matriz.prices)
+
+    @classmethod
+    def obter_estado(cls, carteira_id: int, data_version: int) -> CovarianceState:
+        """
+        Estado da carteira na versão atual dos dados, reconstruído do histórico se necessário.
+
+        Args:
+            carteira_id: ID da carteira
+            data_version: Versão atual dos dados (IndicadoresCache)
+
+        Returns:
+            CovarianceState: Estatísticas de todo o histórico da carteira
+        """
+        from app.model.CarteiraEstatisticas import CarteiraEstatisticas
+
+        version, state = CarteiraEstatisticas.load(carteira_id)
+        if state is not None and version == data_version:
+            return state
+
+        logger.info(f"Reconstruindo estatísticas da carteira {carteira_id} (v{version} -> v{data_version})")
+        state = cls._rebuild(carteira_id)
+        CarteiraEstatisticas.save(carteira_id, data_version, state)
+        return state
+
+    @classmethod
+    def obter_estados(cls, versoes: Dict[int, int], workers: int = 1) -> Dict[int, CovarianceState]:
+        """
+        Estados de várias carteiras, reconstruindo os desatualizados a partir de uma única leitura.
+
+        Os fechamentos das carteiras a reconstruir são carregados com uma
+        consulta só (matriz compartilhada) e as reconstruções são distribuídas
+        no pool de processos.
+
+        Args:
+            versoes: Versão atual dos dados por carteira
+            workers: Processos a usar nas reconstruções
+
+        Returns:
+            Dict[int, CovarianceState]: Estado de cada carteira
+        """
+        from app.model.CarteiraEstatisticas import CarteiraEstatisticas
+
+        estados = {
+            carteira_id: state
+            for carteira_id, (version, state) in CarteiraEstatisticas.load_many(list(versoes)).items()
+            if version == versoes[carteira_id]
+        }
+        desatualizadas = [carteira_id for carteira_id in versoes if carteira_id not in estados]
+        if not desatualizadas:
+            return estados
+
+        logger.info(f"Reconstruindo estatísticas de {len(desatualizadas)} carteira(s)")
+        matrizes = load_price_matrices(desatualizadas)
+        reconstruidos = parallel_map(
+            _estado_de_precos,
+            [matrizes[carteira_id].tickers for carteira_id in desatualizadas],
+            [matrizes[carteira_id].dates for carteira_id in desatualizadas],
+            [matrizes[carteira_id].prices for carteira_id in desatualizadas],
+            workers=min(workers, len(desatualizadas))
+        )
+        for carteira_id, state in zip(desatualizadas, reconstruidos):
+            CarteiraEstatisticas.save(carteira_id, versoes[carteira_id], state)
+            estados[carteira_id] = state
+        return estados
+
+    @classmethod
+    def registrar_cadastro(cls, carteira_id: int, ticker: str, inserted_dates: List, data_version: int) -> bool:
+        """
+        Incorpora as barras recém-inseridas de um ticker (não faz commit).
+
+        Só atualiza um estado que esteja exatamente uma versão atrás; caso
+        contrário ele já está desatualizado e será reconstruído na leitura.
+
+        Args:
+            carteira_id: ID da carteira
+            ticker: Ticker que recebeu barras
+            inserted_dates: Datas inseridas
+            data_version: Versão dos dados após a inserção
+
+        Returns:
+            bool: True se o estado foi atualizado
+        """
+        from app.model.CarteiraEstatisticas import CarteiraEstatisticas
+
+        version, state = CarteiraEstatisticas.load(carteira_id)
+        if state is None or version != data_version - 1 or not len(inserted_dates):
+            return False
+
+        first_new = np.asarray(inserted_dates, dtype='datetime64[D]').min()
+        if ticker in state.tickers and state.can_append(first_new):
+            # Barras posteriores à última data completa: combina apenas a janela nova
+            start = (state.last_date + np.timedelta64(1, 'D')).item()
+            matriz = load_price_matrix(carteira_id, start=start)
+            state.append(matriz.tickers, matriz.dates, matriz.prices)
+        else:
+            # Ticker novo ou barras anteriores: o conjunto de datas em comum muda
+            state = cls._rebuild(carteira_id)
+
+        CarteiraEstatisticas.save(carteira_id, data_version, state)
+        return True
+
+    @classmethod
+    def registrar_remocao(cls, carteira_id: int, ticker: str, data_version: int) -> bool:
+        """
+        Reconstrói o estado da carteira sem o ticker removido (não faz commit).
+
+        Sem o ticker, datas que não eram comuns a todos podem passar a ser.
+
+        Args:
+            carteira_id: ID da carteira
+            ticker: Ticker removido
+            data_version: Versão dos dados após a remoção
+
+        Returns:
+            bool: True se o estado foi atualizado
+        """
+        from app.model.CarteiraEstatisticas import CarteiraEstatisticas
+
+        version, state = CarteiraEstatisticas.load(carteira_id)
+        if state is None or version != data_version - 1:
+            return False
+
+        CarteiraEstatisticas.save(carteira_id, data_version, cls._rebuild(carteira_id))
+        return True
@@ -0,0 +1,112 @@
+"""
+Backtest vetorizado de uma alocação sobre os fechamentos da carteira.
+
+A carteira é comprada com os pesos-alvo na primeira data e, a cada data de
+rebalanceamento (primeiro pregão de cada mês/trimestre), volta aos pesos-alvo.
+Entre dois rebalanceamentos as quantidades ficam fixas, então o valor em cada
+data é o valor no início do período vezes (P_t / P_início) @ pesos: um único
+produto matricial sobre o eixo das datas, sem laço por pregão. Os valores no
+início de cada período saem de um produto acumulado (cumprod) do crescimento
+de cada período, já descontado o custo de transação do rebalanceamento.
+
+Custos: `custo` é a fração do valor negociado (Σ|Δw| x valor da carteira),
+cobrada na compra inicial e em cada rebalanceamento.
+"""
+from typing import Any, Dict
+
+import numpy as np
+
+from app.utils.indicadores import TAXA_LIVRE_RISCO
+
+PERIODOS_REBALANCEAMENTO = ('nenhum', 'mensal', 'trimestral')
+PREGOES_ANO = 252
+
+
+def inicios_periodos(dates: np.ndarray, rebalanceamento: str) -> np.ndarray:
+    """
+    Índices das datas que iniciam cada período (a primeira data e as de rebalanceamento).
+
+    Args:
+        dates: Datas crescentes (datetime64)
+        rebalanceamento: 'nenhum' (comprar e manter), 'mensal' ou 'trimestral'
+
+    Returns:
+        np.ndarray: Índices crescentes, começando em 0
+    """
+    if rebalanceamento == 'nenhum' or len(dates) == 0:
+        return np.zeros(1, dtype=int)
+    meses = dates.astype('datetime64[M]').astype(np.int64)
+    if rebalanceamento == 'trimestral':
+        meses = meses // 3
+    return np.concatenate([[0], np.flatnonzero(np.diff(meses)) + 1])
+
+
+def simular_alocacao(precos: np.ndarray, pesos: np.ndarray, inicios: np.ndarray,
+                     custo: float = 0.0) -> Dict[str, Any]:
+    """
+    Patrimônio diário (capital inicial 1) de uma alocação rebalanceada em `inicios`.
+
+    Args:
+        precos: Fechamentos (datas x ativos), sem lacunas
+        pesos: Pesos-alvo (ativos)
+        inicios: Índices das datas de início de cada período (ver `inicios_periodos`)
+        custo: Custo de transação como fração do valor negociado
+
+    Returns:
+        Dict[str, Any]: 'patrimonio' (uma posição por data), 'turnover' (Σ|Δw|/2
+        de cada rebalanceamento) e 'custos' (custos somados, em fração do
+        capital inicial)
+    """
+    n_datas = len(precos)
+    periodo = np.repeat(np.arange(len(inicios)), np.diff(np.append(inicios, n_datas)))
+    base = precos[inicios]
+
+    # Crescimento desde o início do período, para todas as datas de uma vez
+    crescimento = (precos / base[periodo]) @ pesos
+
+    # Fim de cada período (= início do seguinte): pesos derivados e valor negociado
+    relativo_fim = precos[inicios[1:]] / base[:-1]
+    crescimento_fim = relativo_fim @ pesos
+    derivados = pesos * relativo_fim / crescimento_fim[:, None]
+    negociado = np.abs(pesos - derivados).sum(axis=1)
+
+    valor_inicial = 1.0 - custo * np.abs(pesos).sum()
+    fatores = crescimento_fim * (1.0 - custo * negociado)
+    valor_inicio = valor_inicial * np.concatenate([[1.0], np.cumprod(fatores)])
+
+    custos = (1.0 - valor_inicial) + float((valor_inicio[:-1] * crescimento_fim * custo * negociado).sum())
+    return {
+        "patrimonio": valor_inicio[periodo] * crescimento,
+        "turnover": negociado / 2.0,
+        "custos": custos,
+    }
+
+
+def drawdown(patrimonio: np.ndarray) -> np.ndarray:
+    """Queda de cada data em relação ao máximo anterior (capital inicial 1 incluído)."""
+    return patrimonio / np.maximum.accumulate(np.maximum(patrimonio, 1.0)) - 1.0
+
+
+def metricas_desempenho(patrimonio: np.ndarray, taxa_livre_risco: float = TAXA_LIVRE_RISCO) -> Dict[str, float]:
+    """
+    Retorno total e anualizado, volatilidade, Sharpe e drawdown máximo de uma curva de patrimônio.
+
+    Args:
+        patrimonio: Patrimônio diário, com capital inicial 1
+        taxa_livre_risco: Taxa livre de risco por pregão
+
+    Returns:
+        Dict[str, float]: Métricas (anualizadas com 252 pregões)
+    """
+    retornos = np.diff(patrimonio) / patrimonio[:-1]
+    pregoes = max(len(retornos), 1)
+    desvio = float(retornos.std(ddof=1)) if len(retornos) > 1 else 0.0
+    sharpe = (float(retornos.mean()) - taxa_livre_risco) / desvio * np.sqrt(PREGOES_ANO) if desvio > 0 else 0.0
+
+    return {
+        "retorno_total": float(patrimonio[-1] - 1.0),
+        "retorno_anualizado": float(max(patrimonio[-1], 0.0) ** (PREGOES_ANO / pregoes) - 1.0),
+        "volatilidade_anualizada": desvio * float(np.sqrt(PREGOES_ANO)),
+        "indice_sharpe": float(sharpe),
+        "max_drawdown": float(drawdown(patrimonio).min()),
+    }
@@ -0,0 +1,123 @@
+"""
+Redução de pontos de séries de preços para gráficos.
+
+- LTTB (Largest-Triangle-Three-Buckets): escolhe, em cada bucket, a barra que
+  forma o maior triângulo com a barra escolhida no bucket anterior e a média do
+  bucket seguinte. Preserva o formato visual da curva de fechamento.
+- OHLC: agrega cada bucket em uma barra (abertura da primeira, fechamento da
+  última, máxima e mínima do bucket). Preserva os extremos de preço.
+
+As duas operam sobre o dicionário de arrays do histórico
+(data, close, high, low, open).
+"""
+from typing import Dict
+
+import numpy as np
+
+DOWNSAMPLING_METHODS = ('lttb', 'ohlc')
+
+# LTTB precisa manter a primeira e a última barra e ao menos um bucket
+MIN_POINTS = 3
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Calcula os índices das barras mantidas pelo LTTB.
+
+    O eixo x é a posição da barra (pregões igualmente espaçados no gráfico).
+    As médias dos buckets são calculadas de uma vez com `np.add.reduceat`; o
+    laço restante percorre apenas os buckets, pois cada escolha depende da
+    anterior.
+
+    Args:
+        y: Valores da série (ex: fechamento)
+        n_out: Quantidade de pontos desejada
+
+    Returns:
+        np.ndarray: Índices crescentes das barras selecionadas
+    """
+    n = len(y)
+    if n_out >= n or n_out < MIN_POINTS:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    x = np.arange(n, dtype=float)
+
+    # n_out - 2 buckets cobrindo as barras internas [1, n - 1)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+
+    # Para cada bucket, o terceiro vértice é a média do bucket seguinte (ou a última barra)
+    next_x = np.append(avg_x[1:], x[n - 1])
+    next_y = np.append(avg_y[1:], y[n - 1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    anchor = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        areas = np.abs(
+            (x[anchor] - next_x[bucket]) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (next_y[bucket] - y[anchor])
+        )
+        anchor = start + int(np.argmax(areas))
+        selected[bucket + 1] = anchor
+
+    return selected
+
+
+def ohlc_buckets(arrays: Dict[str, np.ndarray], n_out: int) -> Dict[str, np.ndarray]:
+    """
+    Agrega o histórico em `n_out` barras OHLC.
+
+    Args:
+        arrays: Histórico em colunas (data, close, high, low, open)
+        n_out: Quantidade de barras desejada
+
+    Returns:
+        Dict[str, np.ndarray]: Histórico agregado (data = data da primeira barra do bucket)
+    """
+    n = len(arrays['close'])
+    if n_out >= n:
+        return arrays
+
+    starts = np.linspace(0, n, n_out + 1).astype(np.int64)[:-1]
+    ends = np.append(starts[1:], n) - 1
+
+    return {
+        'data': arrays['data'][starts],
+        'open': arrays['open'][starts],
+        'close': arrays['close'][ends],
+        'high': np.fmax.reduceat(arrays['high'], starts),
+        'low': np.fmin.reduceat(arrays['low'], starts),
+    }
+
+
+def downsample_historico(arrays: Dict[str, np.ndarray], max_points: int,
+                         method: str = 'lttb') -> Dict[str, np.ndarray]:
+    """
+    Reduz o histórico para no máximo `max_points` barras.
+
+    Args:
+        arrays: Histórico em colunas (data, close, high, low, open)
+        max_points: Quantidade máxima de barras
+        method: 'lttb' (padrão) ou 'ohlc'
+
+    Returns:
+        Dict[str, np.ndarray]: Histórico reduzido
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Método de downsampling inválido: {method}")
+
+    if len(arrays['close']) <= max_points:
+        return arrays
+
+    if method == 'ohlc':
+        return ohlc_buckets(arrays, max_points)
+
+    indices = lttb_indices(arrays['close'], max_points)
+    return {key: values[indices] for key, values in arrays.items()}
@@ -0,0 +1,139 @@
+"""
+Indicadores de carteira calculados sobre a matriz de preços (datas x tickers).
+
+Todas as operações são vetorizadas sobre a matriz inteira: retornos,
+médias, desvios, covariância amostral, betas contra o índice de mercado e a
+matriz de covariância do modelo de índice único
+(beta_i * beta_j * Var(mercado) fora da diagonal, variâncias na diagonal).
+
+`indicadores_from_moments` parte apenas das médias e da covariância, o que
+permite calcular os indicadores a partir das estatísticas incrementais
+(app/utils/streaming_stats.py) sem reler o histórico.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+
+MARKET_TICKER = 'BOVA11.SA'
+
+# Taxa livre de risco diária (0.5% ao ano / 252 dias úteis)
+TAXA_LIVRE_RISCO = 0.005 / 252
+
+
+def ordenar_tickers(tickers: List[str], market_ticker: str = MARKET_TICKER) -> List[str]:
+    """Mantém a ordem dos tickers, movendo o índice de mercado para o final."""
+    ordenados = [ticker for ticker in tickers if ticker != market_ticker]
+    if market_ticker in tickers:
+        ordenados.append(market_ticker)
+    return ordenados
+
+
+def _nan_to_zero(values: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(values), 0.0, values)
+
+
+def calcular_indicadores(prices: np.ndarray, taxa_livre_risco: float = TAXA_LIVRE_RISCO) -> Dict[str, Any]:
+    """
+    Calcula os indicadores da carteira com pesos iguais nos ativos de investimento.
+
+    Args:
+        prices: Matriz (datas x tickers) de fechamentos sem NaN, com o índice de
+            mercado na última coluna
+        taxa_livre_risco: Taxa livre de risco por período
+
+    Returns:
+        Dict[str, Any]: Vetores (um valor por coluna de `prices`), matrizes
+        (tickers x tickers) e escalares da carteira
+    """
+    prices = np.asarray(prices, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices[1:] / prices[:-1] - 1.0
+        n_obs = returns.shape[0]
+
+        retorno_esperado = returns.mean(axis=0)
+        desvios = returns - retorno_esperado
+        matriz_covariancia = desvios.T @ desvios / (n_obs - 1)
+
+    return indicadores_from_moments(retorno_esperado, matriz_covariancia, returns.var(axis=0, ddof=1),
+                                    taxa_livre_risco)
+
+
+def indicadores_from_moments(retorno_esperado: np.ndarray, matriz_covariancia: np.ndarray,
+                             variancias: np.ndarray = None,
+                             taxa_livre_risco: float = TAXA_LIVRE_RISCO) -> Dict[str, Any]:
+    """
+    Calcula os indicadores a partir das médias e da covariância dos retornos, em O(k²).
+
+    Args:
+        retorno_esperado: Média dos retornos de cada ticker (mercado por último)
+        matriz_covariancia: Covariância amostral dos retornos (k x k)
+        variancias: Variâncias de cada ticker (padrão: diagonal da covariância)
+        taxa_livre_risco: Taxa livre de risco por período
+
+    Returns:
+        Dict[str, Any]: Mesmo formato de calcular_indicadores
+    """
+    n_tickers = len(retorno_esperado)
+    n_ativos = n_tickers - 1
+    if variancias is None:
+        variancias = np.diagonal(matriz_covariancia).copy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        desvio_padrao = np.sqrt(variancias)
+
+        indice_desempenho = _nan_to_zero(retorno_esperado / desvio_padrao)
+        indice_sharpe = _nan_to_zero((retorno_esperado - taxa_livre_risco) / desvio_padrao)
+
+        # Beta de cada ativo contra o mercado (última coluna)
+        variancia_mercado = variancias[-1]
+        if variancia_mercado != 0:
+            beta = matriz_covariancia[:, -1] / variancia_mercado
+        else:
+            beta = np.zeros(n_tickers)
+        beta[-1] = 1.0
+
+        # Modelo de índice único: Cov(i, j) = Beta_i * Beta_j * Var(mercado)
+        matriz_cov_customizada = np.outer(beta, beta) * variancia_mercado
+        np.fill_diagonal(matriz_cov_customizada, variancias)
+
+        pesos = np.full(n_tickers, 1.0 / n_ativos)
+        pesos[-1] = 0.0
+        pesos_ativos = pesos[:-1]
+
+        retorno_carteira = float(retorno_esperado[:-1] @ pesos_ativos)
+        variancia_carteira = float(pesos_ativos @ matriz_covariancia[:-1, :-1] @ pesos_ativos)
+        desvio_padrao_carteira = float(np.sqrt(variancia_carteira))
+
+    if desvio_padrao_carteira != 0:
+        indice_desempenho_carteira = retorno_carteira / desvio_padrao_carteira
+        indice_sharpe_carteira = (retorno_carteira - taxa_livre_risco) / desvio_padrao_carteira
+    else:
+        indice_desempenho_carteira = 0
+        indice_sharpe_carteira = 0
+
+    return {
+        "retorno_esperado": retorno_esperado,
+        "desvio_padrao": desvio_padrao,
+        "indice_desempenho": indice_desempenho,
+        "indice_sharpe": indice_sharpe,
+        "pesos": pesos,
+        "beta": beta,
+        "matriz_covariancia": matriz_covariancia,
+        "matriz_cov_customizada": matriz_cov_customizada,
+        "retorno_carteira": retorno_carteira,
+        "variancia_carteira": variancia_carteira,
+        "desvio_padrao_carteira": desvio_padrao_carteira,
+        "indice_desempenho_carteira": float(indice_desempenho_carteira),
+        "indice_sharpe_carteira": float(indice_sharpe_carteira),
+    }
+
+
+def vetor_para_dict(tickers: List[str], values: np.ndarray) -> Dict[str, float]:
+    """Serializa um vetor alinhado com `tickers` como {ticker: valor}."""
+    return dict(zip(tickers, values.tolist()))
+
+
+def matriz_para_dict(tickers: List[str], matrix: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """Serializa uma matriz (tickers x tickers) como {coluna: {linha: valor}}."""
+    return {col: dict(zip(tickers, column)) for col, column in zip(tickers, matrix.T.tolist())}
@@ -0,0 +1,243 @@
+"""
+Otimização de carteiras (média-variância) em lote, apenas com numpy.
+
+Cada problema é
+    min  w'Σw - λ μ'w   sujeito a   Σw = 1,  limite_inferior <= w <= limite_superior
+e vários λ (níveis de aversão ao risco) são resolvidos juntos: os pesos
+formam uma matriz (problemas x ativos) e cada iteração do gradiente projetado
+acelerado (FISTA com reinício adaptativo) é um único produto matricial com Σ,
+seguido da projeção de todas as linhas no conjunto viável.
+
+- Mínima variância: λ = 0.
+- Fronteira eficiente: uma solução por λ de uma grade geométrica, da mínima
+  variância até a carteira de máximo retorno.
+- Máximo Sharpe: o ponto de maior Sharpe da fronteira, refinado com grades
+  sucessivas de λ entre os vizinhos do melhor ponto.
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.utils.indicadores import TAXA_LIVRE_RISCO
+
+MAX_ITERACOES = 5000
+TOLERANCIA = 1e-10
+PONTOS_REFINAMENTO = 16
+RODADAS_REFINAMENTO = 3
+
+
+def projetar_pesos(V: np.ndarray, limite_inferior: float = 0.0, limite_superior: float = 1.0) -> np.ndarray:
+    """
+    Projeção euclidiana de cada linha de V em {w : Σw = 1, inferior <= w <= superior}.
+
+    A projeção é clip(v - τ, inferior, superior), com τ por linha tal que a
+    soma seja 1. A soma é linear por partes e decrescente em τ; τ é obtido
+    por Newton com salvaguarda de bissecção, vetorizado sobre as linhas.
+
+    Args:
+        V: Matriz (problemas x ativos)
+        limite_inferior: Peso mínimo por ativo
+        limite_superior: Peso máximo por ativo
+
+    Returns:
+        np.ndarray: Pesos viáveis, mesmo shape de V
+    """
+    V = np.atleast_2d(np.asarray(V, dtype=float))
+    return _projetar(V, limite_inferior, limite_superior)[0]
+
+
+def _projetar(V: np.ndarray, limite_inferior: float, limite_superior: float,
+              tau: Optional[np.ndarray] = None, tolerancia: float = 1e-12, max_iteracoes: int = 100) -> tuple:
+    """
+    Projeção com τ inicial opcional (o τ da iteração anterior converge em poucos passos).
+
+    Newton no segmento atual; se o passo sair do intervalo que contém a raiz,
+    usa a secante entre os extremos do intervalo (regula falsi).
+    """
+    k = V.shape[1]
+    lo = V.min(axis=1) - limite_superior
+    hi = V.max(axis=1) - limite_inferior
+    excesso_lo = np.full(len(V), k * limite_superior - 1.0)
+    excesso_hi = np.full(len(V), k * limite_inferior - 1.0)
+    if tau is None:
+        tau = V.mean(axis=1) - 1.0 / k
+
+    for _ in range(max_iteracoes):
+        shifted = V - tau[:, None]
+        W = np.clip(shifted, limite_inferior, limite_superior)
+        excesso = W.sum(axis=1) - 1.0
+        if np.abs(excesso).max() <= tolerancia:
+            return W, tau
+
+        acima = excesso > 0
+        lo = np.where(acima, tau, lo)
+        excesso_lo = np.where(acima, excesso, excesso_lo)
+        hi = np.where(acima, hi, tau)
+        excesso_hi = np.where(acima, excesso_hi, excesso)
+
+        livres = ((shifted > limite_inferior) & (shifted < limite_superior)).sum(axis=1)
+        newton = tau + excesso / np.maximum(livres, 1)
+        # excesso_lo >= 0 >= excesso_hi; os dois nulos só quando k * limite = 1 (lo já é raiz)
+        amplitude = excesso_lo - excesso_hi
+        secante = lo + np.divide(excesso_lo * (hi - lo), amplitude, out=np.zeros(len(V)), where=amplitude > 0)
+        tau = np.where((livres > 0) & (newton > lo) & (newton < hi), newton, secante)
+
+    return np.clip(V - tau[:, None], limite_inferior, limite_superior), tau
+
+
+def _maior_autovalor_restrito(cov: np.ndarray) -> float:
+    """Maior autovalor de PΣP, com P a projeção ortogonal no subespaço Σw = 0."""
+    centrada = cov - cov.mean(axis=0, keepdims=True)
+    centrada = centrada - centrada.mean(axis=1, keepdims=True)
+    return float(np.linalg.eigvalsh(centrada)[-1])
+
+
+def resolver_media_variancia(mu: np.ndarray, cov: np.ndarray, aversoes: np.ndarray,
+                             limite_inferior: float = 0.0, limite_superior: float = 1.0,
+                             W0: Optional[np.ndarray] = None, max_iteracoes: int = MAX_ITERACOES,
+                             tolerancia: float = TOLERANCIA) -> tuple:
+    """
+    Resolve min w'Σw - λ μ'w para vários λ ao mesmo tempo.
+
+    Args:
+        mu: Retornos esperados (k)
+        cov: Matriz de covariância (k x k)
+        aversoes: Valores de λ (m)
+        limite_inferior: Peso mínimo por ativo
+        limite_superior: Peso máximo por ativo
+        W0: Pesos iniciais (m x k) (padrão: pesos iguais)
+
+    Returns:
+        tuple: (pesos (m x k), iterações executadas)
+    """
+    aversoes = np.asarray(aversoes, dtype=float)
+    m, k = len(aversoes), len(mu)
+    linear = aversoes[:, None] * mu[None, :]
+
+    # Passo 1/L, com L = 2 * maior autovalor de Σ restrita ao hiperplano Σw = 1
+    # (o fator de mercado, comum a todos os ativos, não limita o passo)
+    passo = 1.0 / max(2.0 * _maior_autovalor_restrito(cov), 1e-18)
+
+    W = np.full((m, k), 1.0 / k) if W0 is None else np.array(W0, dtype=float)
+    W, tau = _projetar(W, limite_inferior, limite_superior)
+    Y = W.copy()
+    t = np.ones(m)
+
+    iteracao = 0
+    for iteracao in range(1, max_iteracoes + 1):
+        gradiente = 2.0 * (Y @ cov) - linear
+        W_novo, tau = _projetar(Y - passo * gradiente, limite_inferior, limite_superior, tau)
+
+        variacao = np.abs(W_novo - W).max()
+        # Reinício adaptativo: zera o momento das linhas em que ele aponta contra a descida
+        reinicio = np.einsum('ij,ij->i', Y - W_novo, W_novo - W) > 0
+        t_novo = np.where(reinicio, 1.0, (1.0 + np.sqrt(1.0 + 4.0 * t * t)) / 2.0)
+        momento = np.where(reinicio, 0.0, (t - 1.0) / t_novo)
+        Y = W_novo + momento[:, None] * (W_novo - W)
+        W, t = W_novo, t_novo
+
+        if variacao <= tolerancia:
+            break
+
+    return W, iteracao
+
+
+def avaliar_pesos(W: np.ndarray, mu: np.ndarray, cov: np.ndarray,
+                  taxa_livre_risco: float = TAXA_LIVRE_RISCO) -> Dict[str, np.ndarray]:
+    """
+    Retorno, variância, desvio, índice de desempenho e Sharpe de cada linha de W.
+
+    Args:
+        W: Pesos (carteiras x ativos)
+        mu: Retornos esperados (ativos)
+        cov: Matriz de covariância (ativos x ativos)
+        taxa_livre_risco: Taxa livre de risco por período
+
+    Returns:
+        Dict[str, np.ndarray]: Um vetor por métrica, alinhado com as linhas de W
+    """
+    W = np.atleast_2d(np.asarray(W, dtype=float))
+    retorno = W @ mu
+    # Um único matmul (cenários x ativos) @ Σ e a soma linha a linha com W
+    variancia = np.maximum(np.einsum('ij,ij->i', W @ cov, W), 0.0)
+    desvio = np.sqrt(variancia)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        desempenho = np.where(desvio > 0, retorno / desvio, 0.0)
+        sharpe = np.where(desvio > 0, (retorno - taxa_livre_risco) / desvio, 0.0)
+
+    return {
+        "retorno_esperado": retorno,
+        "variancia": variancia,
+        "desvio_padrao": desvio,
+        "indice_desempenho": desempenho,
+        "indice_sharpe": sharpe,
+    }
+
+
+def _escala_aversao(mu: np.ndarray, cov: np.ndarray) -> float:
+    """λ a partir do qual o termo de retorno domina o de variância."""
+    amplitude = float(mu.max() - mu.min())
+    if amplitude <= 0:
+        return 1.0
+    return 2.0 * _maior_autovalor_restrito(cov) / amplitude
+
+
+def otimizar_carteira(mu: np.ndarray, cov: np.ndarray, pontos_fronteira: int = 20,
+                      max_peso: float = 1.0, long_only: bool = True,
+                      taxa_livre_risco: float = TAXA_LIVRE_RISCO) -> Dict[str, Any]:
+    """
+    Mínima variância, máximo Sharpe e fronteira eficiente de uma carteira.
+
+    Args:
+        mu: Retornos esperados dos ativos de investimento (k)
+        cov: Matriz de covariância (k x k)
+        pontos_fronteira: Número de pontos da fronteira
+        max_peso: Peso máximo por ativo
+        long_only: Sem posições vendidas (peso mínimo 0; senão, -max_peso)
+        taxa_livre_risco: Taxa livre de risco por período
+
+    Returns:
+        Dict[str, Any]: 'minima_variancia' e 'maximo_sharpe' (pesos + métricas),
+        'fronteira' (pesos (pontos x k) + métricas, em ordem de retorno) e
+        'iteracoes'
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    limite_inferior = 0.0 if long_only else -max_peso
+
+    # λ = 0 (mínima variância) e uma grade geométrica até a carteira de máximo retorno
+    escala = _escala_aversao(mu, cov)
+    aversoes = np.concatenate([[0.0], escala * np.geomspace(1e-3, 1e2, max(pontos_fronteira, 2) - 1)])
+    W, iteracoes = resolver_media_variancia(mu, cov, aversoes, limite_inferior, max_peso)
+    metricas = avaliar_pesos(W, mu, cov, taxa_livre_risco)
+
+    # Refina o máximo Sharpe: grades sucessivas entre os vizinhos do melhor λ
+    grade, W_grade, sharpe = aversoes, W, metricas["indice_sharpe"]
+    melhor = int(np.argmax(sharpe))
+    w_sharpe, sharpe_max = W_grade[melhor], sharpe[melhor]
+    for _ in range(RODADAS_REFINAMENTO):
+        inicio = grade[max(melhor - 1, 0)]
+        fim = grade[min(melhor + 1, len(grade) - 1)]
+        grade = np.linspace(inicio, fim, PONTOS_REFINAMENTO)
+        W0 = np.repeat(w_sharpe[None, :], PONTOS_REFINAMENTO, axis=0)
+        W_grade, iteracoes_ref = resolver_media_variancia(mu, cov, grade, limite_inferior, max_peso, W0=W0)
+        iteracoes += iteracoes_ref
+        sharpe = avaliar_pesos(W_grade, mu, cov, taxa_livre_risco)["indice_sharpe"]
+        melhor = int(np.argmax(sharpe))
+        if sharpe[melhor] > sharpe_max:
+            w_sharpe, sharpe_max = W_grade[melhor], sharpe[melhor]
+
+    ordem = np.argsort(metricas["retorno_esperado"], kind='stable')
+
+    def carteira(w: np.ndarray) -> Dict[str, Any]:
+        resultado = {"pesos": w}
+        resultado.update({key: float(value[0]) for key, value in avaliar_pesos(w, mu, cov, taxa_livre_risco).items()})
+        return resultado
+
+    return {
+        "minima_variancia": carteira(W[0]),
+        "maximo_sharpe": carteira(w_sharpe),
+        "fronteira": {"pesos": W[ordem], **{key: value[ordem] for key, value in metricas.items()}},
+        "iteracoes": iteracoes,
+    }
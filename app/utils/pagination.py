@@ -0,0 +1,137 @@
+"""
+Paginação por cursor (keyset) e projeção de campos das listagens.
+
+A página seguinte é buscada por `WHERE chave > última_chave ORDER BY chave
+LIMIT n`, uma faixa do índice da chave: o custo de cada página não depende
+de quantas já foram lidas (ao contrário de OFFSET). O cursor devolvido ao
+cliente é a chave da última linha, em JSON codificado em base64 (opaco).
+
+`fields=` escolhe as colunas carregadas do banco; as colunas da chave são
+sempre lidas (para montar o cursor), mas só aparecem na resposta se pedidas.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, or_
+
+from app.utils.settings import get_setting
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Codifica a chave da última linha da página em um cursor opaco."""
+    plain = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(plain, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decodifica um cursor de `encode_cursor`.
+
+    Args:
+        cursor: Cursor recebido do cliente
+        size: Número de colunas da chave
+
+    Returns:
+        List[Any]: Valores da chave (datas como strings ISO)
+
+    Raises:
+        ValueError: Cursor malformado
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("cursor is invalid")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("cursor is invalid")
+    return values
+
+
+def parse_limit(raw: Optional[str]) -> int:
+    """
+    Valida o tamanho da página (PAGE_DEFAULT_LIMIT se ausente, até PAGE_MAX_LIMIT).
+
+    Raises:
+        ValueError: Valor não inteiro ou fora do intervalo
+    """
+    maximo = int(get_setting('PAGE_MAX_LIMIT', MAX_PAGE_LIMIT))
+    if raw in (None, ''):
+        return min(int(get_setting('PAGE_DEFAULT_LIMIT', DEFAULT_PAGE_LIMIT)), maximo)
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= maximo:
+        raise ValueError(f"limit must be between 1 and {maximo}")
+    return limit
+
+
+def parse_fields(raw: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """
+    Valida a projeção `fields=a,b,c` (todos os campos permitidos se ausente).
+
+    Raises:
+        ValueError: Campo desconhecido
+    """
+    if raw in (None, ''):
+        return list(allowed)
+    fields = list(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown or not fields:
+        raise ValueError(f"fields must be a comma-separated subset of: {', '.join(allowed)}")
+    return fields
+
+
+def keyset_after(columns: Sequence[Any], values: Sequence[Any]):
+    """
+    Condição `(c1, c2, ...) > (v1, v2, ...)` em ordem lexicográfica.
+
+    Escrita com OR/AND (em vez de comparação de tuplas) para funcionar também
+    no SQLite.
+    """
+    condicoes = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        iguais = [columns[j] == values[j] for j in range(i)]
+        condicoes.append(and_(*iguais, column > value))
+    return or_(*condicoes)
+
+
+def paginate(rows: Sequence[Any], fields: Sequence[str], key: Sequence[str], limit: int) -> Dict[str, Any]:
+    """
+    Monta a página a partir de até limit + 1 linhas da consulta.
+
+    Args:
+        rows: Linhas da consulta (com os campos e as colunas da chave), já na ordem da chave
+        fields: Campos da resposta
+        key: Nomes das colunas da chave
+        limit: Tamanho da página
+
+    Returns:
+        Dict[str, Any]: 'items' (dicionários serializáveis) e 'pagina'
+        (limit, count e next_cursor, None na última página)
+    """
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        {field: _json_value(row._mapping[field]) for field in fields}
+        for row in rows
+    ]
+    next_cursor = None
+    if has_next and rows:
+        next_cursor = encode_cursor([rows[-1]._mapping[column] for column in key])
+    return {
+        'items': items,
+        'pagina': {'limit': limit, 'count': len(items), 'next_cursor': next_cursor},
+    }
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
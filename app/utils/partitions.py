@@ -0,0 +1,225 @@
+"""
+Partições anuais da tabela de barras (`price_bar`) no Postgres.
+
+No Postgres, `price_bar` é particionada por faixa de data (uma partição por
+ano, `price_bar_2024`, mais a partição padrão `price_bar_default` para datas
+fora das faixas criadas). Cada partição tem a sua chave primária
+(ticker, interval, date) e um índice BRIN em date: as barras chegam em
+ordem de data, então o BRIN ocupa poucas páginas em vez de um B-tree do
+tamanho da tabela, e anos antigos podem ser desanexados sem reescrever o
+resto.
+
+Em outros bancos (SQLite nos testes e no desenvolvimento) a tabela é comum
+e as funções abaixo não fazem nada.
+
+Comandos (`flask partitions ...`):
+    list                      Lista as partições
+    ensure [--ahead N]        Cria as partições até N anos à frente
+    detach --before ANO       Desanexa as partições anteriores a ANO (--drop apaga)
+"""
+import logging
+import re
+from datetime import date
+from typing import List, Optional
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import text
+
+from app.utils.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLE = 'price_bar'
+DEFAULT_PARTITION = f'{PARTITIONED_TABLE}_default'
+DEFAULT_AHEAD_YEARS = 1
+
+_YEAR_PARTITION = re.compile(rf'^{PARTITIONED_TABLE}_(\d{{4}})$')
+
+
+def partition_name(year: int) -> str:
+    """Nome da partição de um ano (ex: price_bar_2024)."""
+    return f'{PARTITIONED_TABLE}_{year}'
+
+
+def partition_bounds(year: int) -> tuple:
+    """Faixa [início, fim) das datas de uma partição anual."""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def is_partitioned(connection) -> bool:
+    """True se `price_bar` é uma tabela particionada do Postgres."""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return bool(connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:tabela))"),
+        {'tabela': PARTITIONED_TABLE},
+    ).scalar())
+
+
+def list_partitions(connection) -> List[str]:
+    """Partições anexadas a `price_bar`, em ordem de nome (vazio se não for particionada)."""
+    if not is_partitioned(connection):
+        return []
+    return list(connection.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = to_regclass(:tabela) ORDER BY c.relname"),
+        {'tabela': PARTITIONED_TABLE},
+    ).scalars())
+
+
+def partition_years(connection) -> List[int]:
+    """Anos com partição própria."""
+    years = []
+    for name in list_partitions(connection):
+        match = _YEAR_PARTITION.match(name)
+        if match:
+            years.append(int(match.group(1)))
+    return years
+
+
+def create_partition(connection, year: int) -> bool:
+    """
+    Cria a partição de um ano, movendo para ela as barras que estavam na partição padrão.
+
+    A partição é criada como tabela comum e anexada depois (ATTACH): as
+    barras do ano que caíram na partição padrão são movidas antes, já que o
+    Postgres não permite anexar uma faixa que a partição padrão contém.
+
+    Args:
+        connection: Conexão em uma transação aberta
+        year (int): Ano da partição
+
+    Returns:
+        bool: True se a partição foi criada (False se já existia)
+    """
+    name = partition_name(year)
+    if name in list_partitions(connection):
+        return False
+
+    inicio, fim = partition_bounds(year)
+    faixa = {'inicio': inicio, 'fim': fim}
+    connection.execute(text(
+        f"CREATE TABLE {name} (LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    if DEFAULT_PARTITION in list_partitions(connection):
+        connection.execute(text(
+            f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE date >= :inicio AND date < :fim"
+        ), faixa)
+        connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE date >= :inicio AND date < :fim"), faixa)
+    connection.execute(text(
+        f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fim.isoformat()}')"
+    ))
+    logger.info(f"Partição {name} criada")
+    return True
+
+
+def ensure_partitions(connection, ahead: Optional[int] = None) -> List[str]:
+    """
+    Cria a partição padrão e as partições anuais que faltam.
+
+    Cobre do ano mais antigo com barras na partição padrão (ou o atual)
+    até `ahead` anos à frente, para que as ingestões do ano seguinte já
+    encontrem a sua partição.
+
+    Args:
+        connection: Conexão em uma transação aberta
+        ahead (int, optional): Anos à frente (padrão: PRICE_PARTITION_AHEAD_YEARS)
+
+    Returns:
+        List[str]: Partições criadas
+    """
+    if not is_partitioned(connection):
+        return []
+    if ahead is None:
+        ahead = int(get_setting('PRICE_PARTITION_AHEAD_YEARS', DEFAULT_AHEAD_YEARS))
+
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARTITIONED_TABLE} DEFAULT"))
+    current = date.today().year
+    oldest = connection.execute(text(f"SELECT MIN(date) FROM {DEFAULT_PARTITION}")).scalar()
+    first = min(oldest.year, current) if oldest else current
+
+    created = []
+    for year in range(first, current + ahead + 1):
+        if create_partition(connection, year):
+            created.append(partition_name(year))
+    return created
+
+
+def detach_partitions(connection, before_year: int, drop: bool = False) -> List[str]:
+    """
+    Desanexa (e opcionalmente apaga) as partições anuais anteriores a um ano.
+
+    As barras desanexadas deixam de aparecer para as carteiras, então os
+    blocos anuais desses anos são apagados e os indicadores das carteiras
+    cuja janela alcança esses anos são invalidados na mesma transação.
+
+    Args:
+        connection: Conexão da sessão (`db.session.connection()`), em uma transação aberta
+        before_year (int): Primeiro ano mantido
+        drop (bool): Apaga as tabelas desanexadas
+
+    Returns:
+        List[str]: Partições desanexadas
+    """
+    from app.model.Asset import Asset
+    from app.model.IndicadoresCache import IndicadoresCache
+    from app.model.PriceBlock import PriceBlock
+
+    years = [year for year in partition_years(connection) if year < before_year]
+    for year in years:
+        name = partition_name(year)
+        connection.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"))
+        if drop:
+            connection.execute(text(f"DROP TABLE {name}"))
+        logger.info(f"Partição {name} {'apagada' if drop else 'desanexada'}")
+
+    if years:
+        # Os blocos anuais seguem as barras: anos desanexados somem também das leituras por bloco
+        PriceBlock.delete_before(before_year)
+        limite = partition_bounds(before_year)[0]
+        IndicadoresCache.bump_versions([
+            carteira_id for (carteira_id,) in Asset.query.with_entities(Asset.carteira_id).filter(
+                (Asset.start_date.is_(None)) | (Asset.start_date < limite)
+            ).distinct()
+        ])
+    return [partition_name(year) for year in years]
+
+
+partitions_cli = AppGroup('partitions', help='Partições anuais de price_bar (Postgres).')
+
+
+@partitions_cli.command('list')
+def list_command():
+    """Lista as partições de price_bar."""
+    from app import db
+
+    partitions = list_partitions(db.session.connection())
+    if not partitions:
+        click.echo(f'{PARTITIONED_TABLE} não é particionada neste banco')
+    for name in partitions:
+        click.echo(name)
+
+
+@partitions_cli.command('ensure')
+@click.option('--ahead', type=int, default=None, help='Anos à frente (padrão: PRICE_PARTITION_AHEAD_YEARS).')
+def ensure_command(ahead):
+    """Cria as partições anuais que faltam."""
+    from app import db
+
+    created = ensure_partitions(db.session.connection(), ahead)
+    db.session.commit()
+    click.echo(f'{len(created)} partição(ões) criada(s)' + (f": {', '.join(created)}" if created else ''))
+
+
+@partitions_cli.command('detach')
+@click.option('--before', 'before_year', type=int, required=True, help='Primeiro ano mantido.')
+@click.option('--drop', is_flag=True, help='Apaga as partições desanexadas.')
+def detach_command(before_year, drop):
+    """Desanexa as partições anteriores a um ano."""
+    from app import db
+
+    detached = detach_partitions(db.session.connection(), before_year, drop)
+    db.session.commit()
+    click.echo(f'{len(detached)} partição(ões) desanexada(s)' + (f": {', '.join(detached)}" if detached else ''))
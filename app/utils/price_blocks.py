@@ -0,0 +1,100 @@
+"""
+Codificação compacta dos fechamentos de um ticker em um ano (bloco binário).
+
+Um bloco guarda as datas como deslocamento em dias desde 1º de janeiro
+(uint16) e os fechamentos como float64, comprimidos com zlib:
+
+    cabeçalho '<BBH': versão do formato, codificação dos valores, número de barras
+    datas: uint16[n]
+    valores: float64[n] (RAW) ou deltas inteiros dos bits do float64 (DELTA)
+
+Na codificação DELTA, cada fechamento é guardado como a diferença (int64,
+com overflow circular) entre os seus bits e os do anterior: fechamentos
+próximos têm sinal, expoente e bits altos da mantissa iguais, então os
+deltas têm muitos bytes zerados e comprimem melhor, sem perda nenhuma
+(a soma acumulada reconstrói os bits exatos). `encode_block` usa a menor
+das duas codificações.
+
+Um ano de pregões (~250 fechamentos, 2.5 KB em float64) ocupa uma linha de
+poucos KB, em vez de ~250 linhas de 60-80 bytes de overhead cada.
+"""
+import struct
+import zlib
+from typing import Tuple
+
+import numpy as np
+
+BLOCK_FORMAT_VERSION = 1
+RAW = 0
+DELTA = 1
+
+_HEADER = struct.Struct('<BBH')
+
+
+def year_start(year: int) -> np.datetime64:
+    """1º de janeiro do ano, como datetime64[D]."""
+    return np.datetime64(f'{year:04d}-01-01', 'D')
+
+
+def encode_block(year: int, dates: np.ndarray, closes: np.ndarray) -> bytes:
+    """
+    Codifica os fechamentos de um ano.
+
+    Args:
+        year: Ano do bloco (todas as datas devem pertencer a ele)
+        dates: Datas (datetime64[D]), crescentes e sem repetição
+        closes: Fechamentos de cada data
+
+    Returns:
+        bytes: Bloco comprimido
+
+    Raises:
+        ValueError: Datas fora do ano ou tamanhos diferentes
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    closes = np.ascontiguousarray(closes, dtype='<f8')
+    if len(dates) != len(closes):
+        raise ValueError("dates and closes must have the same length")
+    offsets = (dates - year_start(year)).astype(np.int64)
+    if len(offsets) and (offsets.min() < 0 or offsets.max() > 365):
+        raise ValueError(f"dates must belong to {year}")
+
+    day_bytes = offsets.astype('<u2').tobytes()
+    bits = closes.view('<i8')
+    deltas = np.diff(bits, prepend=np.int64(0))
+    candidates = [
+        zlib.compress(_HEADER.pack(BLOCK_FORMAT_VERSION, encoding, len(closes)) + day_bytes + values.tobytes())
+        for encoding, values in ((RAW, closes), (DELTA, deltas.astype('<i8')))
+    ]
+    return min(candidates, key=len)
+
+
+def decode_block(year: int, payload: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decodifica um bloco de `encode_block`.
+
+    Args:
+        year: Ano do bloco
+        payload: Bloco comprimido
+
+    Returns:
+        tuple: (datas datetime64[D], fechamentos float64)
+
+    Raises:
+        ValueError: Versão de formato ou codificação desconhecida
+    """
+    data = zlib.decompress(payload)
+    version, encoding, count = _HEADER.unpack_from(data)
+    if version != BLOCK_FORMAT_VERSION:
+        raise ValueError(f"unsupported price block version {version}")
+
+    offset = _HEADER.size
+    days = np.frombuffer(data, dtype='<u2', count=count, offset=offset)
+    values = np.frombuffer(data, dtype='<i8' if encoding == DELTA else '<f8', count=count, offset=offset + 2 * count)
+    if encoding == DELTA:
+        closes = np.cumsum(values, dtype=np.int64).view('<f8')
+    elif encoding == RAW:
+        closes = values.copy()
+    else:
+        raise ValueError(f"unknown price block encoding {encoding}")
+    return year_start(year) + days.astype('timedelta64[D]'), closes.astype(float)
@@ -0,0 +1,259 @@
+"""
+Cache persistente em disco para séries históricas de preços.
+
+As séries baixadas do yfinance são gravadas em um arquivo SQLite, uma linha por
+combinação (ticker, period, interval). Cada entrada tem um TTL e o arquivo é
+limitado em tamanho: quando o limite é ultrapassado, as entradas acessadas há
+mais tempo são removidas primeiro (LRU).
+
+Entradas vencidas não são apagadas imediatamente: ficam disponíveis por
+`retention` segundos via `get_stale`, para que a sincronização incremental
+baixe apenas as barras que faltam em vez do período inteiro.
+
+O arquivo SQLite é compartilhado entre os workers do gunicorn, então uma série
+baixada por um worker é servida pelos demais. Por padrão ele fica no
+diretório `instance` da aplicação (não no diretório temporário do sistema,
+gravável por qualquer usuário), e as séries são gravadas no formato Arrow
+IPC, que guarda apenas dados: ler uma entrada nunca executa código.
+"""
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Optional
+
+import pandas as pd
+
+from app.utils.settings import get_setting, get_bool_setting
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - dependência opcional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = 'price_cache.sqlite3'
+DEFAULT_TTL = 900  # 15 minutos
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+DEFAULT_RETENTION = 7 * 24 * 3600  # 7 dias
+
+
+class PriceCache:
+    """
+    Cache de DataFrames de preços indexado por (ticker, period, interval).
+
+    Attributes:
+        path (str): Caminho do arquivo SQLite
+        ttl (int): Tempo de vida das entradas em segundos
+        max_bytes (int): Tamanho máximo somado das entradas em bytes
+        retention (int): Tempo em segundos que entradas vencidas continuam
+            disponíveis para sincronização incremental
+    """
+
+    def __init__(self, path: str, ttl: int = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, retention: int = DEFAULT_RETENTION):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.retention = max(retention, ttl)
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_cache (
+                    ticker TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (ticker, period, interval)
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_price_cache_last_access ON price_cache (last_access)')
+
+    def get(self, ticker: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        Busca uma série no cache.
+
+        Args:
+            ticker (str): Símbolo do ativo
+            period (str): Período solicitado ao yfinance
+            interval (str): Intervalo das barras
+
+        Returns:
+            Optional[pd.DataFrame]: Série armazenada ou None se ausente/expirada
+        """
+        entry = self._read(ticker, period, interval)
+        if entry is None:
+            return None
+
+        df, fetched_at = entry
+        if time.time() - fetched_at > self.ttl:
+            return None
+        return df
+
+    def get_stale(self, ticker: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        Busca uma série no cache mesmo que o TTL já tenha vencido.
+
+        Usado pela sincronização incremental, que completa a série antiga com
+        as barras mais recentes.
+
+        Args:
+            ticker (str): Símbolo do ativo
+            period (str): Período solicitado ao yfinance
+            interval (str): Intervalo das barras
+
+        Returns:
+            Optional[pd.DataFrame]: Série armazenada ou None se ausente
+        """
+        entry = self._read(ticker, period, interval)
+        return entry[0] if entry is not None else None
+
+    def _read(self, ticker: str, period: str, interval: str) -> Optional[tuple]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT payload, fetched_at FROM price_cache WHERE ticker = ? AND period = ? AND interval = ?',
+                    (ticker, period, interval)
+                ).fetchone()
+
+                if row is None:
+                    return None
+
+                conn.execute(
+                    'UPDATE price_cache SET last_access = ? WHERE ticker = ? AND period = ? AND interval = ?',
+                    (time.time(), ticker, period, interval)
+                )
+
+            payload, fetched_at = row
+            return _decode_frame(payload), fetched_at
+
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache de preços para {ticker}: {str(e)}")
+            return None
+
+    def set(self, ticker: str, period: str, interval: str, df: pd.DataFrame) -> None:
+        """
+        Grava uma série no cache e aplica a política de expiração/tamanho.
+
+        Args:
+            ticker (str): Símbolo do ativo
+            period (str): Período solicitado ao yfinance
+            interval (str): Intervalo das barras
+            df (pd.DataFrame): Série a ser armazenada
+        """
+        try:
+            payload = _encode_frame(df)
+            now = time.time()
+
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO price_cache '
+                    '(ticker, period, interval, payload, size, fetched_at, last_access) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (ticker, period, interval, sqlite3.Binary(payload), len(payload), now, now)
+                )
+                self._evict(conn)
+
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache de preços para {ticker}: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Remove entradas fora da retenção e, se necessário, as menos acessadas até caber no limite."""
+        conn.execute('DELETE FROM price_cache WHERE fetched_at < ?', (time.time() - self.retention,))
+
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM price_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = conn.execute('SELECT ticker, period, interval, size FROM price_cache ORDER BY last_access ASC').fetchall()
+        for ticker, period, interval, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute(
+                'DELETE FROM price_cache WHERE ticker = ? AND period = ? AND interval = ?',
+                (ticker, period, interval)
+            )
+            total -= size
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM price_cache')
+
+
+def _encode_frame(df: pd.DataFrame) -> bytes:
+    """Série em Arrow IPC (índice e tipos preservados nos metadados do pandas)."""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _decode_frame(payload: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def _default_cache_path() -> Optional[str]:
+    """Arquivo do cache no diretório `instance` da aplicação (None fora de um app context)."""
+    try:
+        from flask import current_app
+        return os.path.join(current_app.instance_path, DEFAULT_CACHE_FILE)
+    except RuntimeError:
+        return None
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_price_cache() -> Optional[PriceCache]:
+    """
+    Obtém a instância do cache de preços configurada para a aplicação.
+
+    Lê PRICE_CACHE_ENABLED, PRICE_CACHE_PATH, PRICE_CACHE_TTL, PRICE_CACHE_MAX_MB e
+    PRICE_CACHE_RETENTION via get_setting (Flask config ou variáveis de ambiente).
+    Sem PRICE_CACHE_PATH, o arquivo fica no diretório `instance` da aplicação.
+
+    Returns:
+        Optional[PriceCache]: Cache configurado ou None se desabilitado (ou
+        sem pyarrow, ou sem caminho fora de um app context)
+    """
+    if not get_bool_setting('PRICE_CACHE_ENABLED', True) or pa is None:
+        return None
+
+    path = get_setting('PRICE_CACHE_PATH') or _default_cache_path()
+    if not path:
+        return None
+    ttl = int(get_setting('PRICE_CACHE_TTL', DEFAULT_TTL))
+    max_bytes = int(float(get_setting('PRICE_CACHE_MAX_MB', DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024)
+    retention = int(get_setting('PRICE_CACHE_RETENTION', DEFAULT_RETENTION))
+
+    with _instances_lock:
+        cache = _instances.get(path)
+        if cache is None:
+            cache = PriceCache(path, ttl=ttl, max_bytes=max_bytes, retention=retention)
+            _instances[path] = cache
+        else:
+            cache.ttl = ttl
+            cache.max_bytes = max_bytes
+            cache.retention = max(retention, ttl)
+        return cache
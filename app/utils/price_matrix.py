@@ -0,0 +1,340 @@
+"""
+Carregamento dos fechamentos de uma carteira direto em uma matriz numpy.
+
+A consulta seleciona apenas (ticker, date, close) das barras visíveis da
+carteira (`Asset.barras`: associações carteira-ticker unidas a `price_bar`)
+com o SQLAlchemy Core, ordenada por ticker e data, sem instanciar objetos
+nem passar pelo identity map da sessão. O cursor é lido em partições (`yield_per`) e cada
+partição vira arrays: códigos inteiros de ticker (atribuídos pelas trocas de
+ticker na ordenação), datas `datetime64[D]` (lidas como dias desde 1970 no
+SQLite/PostgreSQL) e fechamentos `float64`. No fim,
+os fechamentos são espalhados em uma matriz datas x tickers.
+
+Com PRICE_STORAGE='blocks', as séries vêm dos blocos anuais comprimidos
+(`PriceBlock`, uma linha por ticker e ano) em vez de uma linha por barra.
+Com PRICE_STORE_DIR configurado, as matrizes vêm antes do armazenamento
+compartilhado entre os workers (`app.utils.price_store`), quando atualizado.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, cast, func, literal, select
+
+from app.utils.settings import get_setting
+
+STREAM_CHUNK_ROWS = 50_000
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+class PriceMatrix:
+    """
+    Matriz de fechamentos (datas x tickers), com NaN onde não há barra.
+
+    Attributes:
+        dates (np.ndarray): Datas das linhas (datetime64[D], crescentes)
+        tickers (List[str]): Tickers das colunas (código inteiro = posição na lista)
+        prices (np.ndarray): Fechamentos, shape (len(dates), len(tickers))
+    """
+
+    def __init__(self, dates: np.ndarray, tickers: List[str], prices: np.ndarray):
+        self.dates = dates
+        self.tickers = tickers
+        self.prices = prices
+
+    @property
+    def empty(self) -> bool:
+        return self.prices.size == 0
+
+    def complete(self) -> 'PriceMatrix':
+        """Mantém apenas as datas com fechamento para todos os tickers."""
+        mask = ~np.isnan(self.prices).any(axis=1)
+        return PriceMatrix(self.dates[mask], self.tickers, self.prices[mask])
+
+    def select(self, tickers: List[str]) -> 'PriceMatrix':
+        """Reordena/filtra as colunas na ordem de `tickers`."""
+        index = {ticker: code for code, ticker in enumerate(self.tickers)}
+        columns = [index[ticker] for ticker in tickers]
+        return PriceMatrix(self.dates, list(tickers), self.prices[:, columns])
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame equivalente ao pivot (índice 'date', uma coluna por ticker)."""
+        return pd.DataFrame(self.prices, index=pd.DatetimeIndex(self.dates, name='date'), columns=self.tickers)
+
+
+def build_price_matrix(codes: np.ndarray, dates: np.ndarray, closes: np.ndarray,
+                       tickers: List[str]) -> PriceMatrix:
+    """
+    Espalha linhas (código do ticker, data, fechamento) em uma matriz datas x tickers.
+
+    Args:
+        codes: Código inteiro do ticker de cada linha (posição em `tickers`)
+        dates: Data de cada linha (datetime64[D])
+        closes: Fechamento de cada linha
+        tickers: Nomes dos tickers
+
+    Returns:
+        PriceMatrix: Matriz com NaN onde o ticker não tem barra na data
+    """
+    unique_dates, date_index = np.unique(dates, return_inverse=True)
+    prices = np.full((len(unique_dates), len(tickers)), np.nan)
+    prices[date_index, codes] = closes
+    return PriceMatrix(unique_dates, tickers, prices)
+
+
+def _epoch_days(column, dialect: str):
+    """
+    Expressão que devolve a data como dias desde 1970-01-01 (inteiro), evitando
+    a criação de um objeto `date` por linha. None se o dialeto não for suportado.
+    """
+    if dialect == 'sqlite':
+        return cast(func.julianday(column) - 2440587.5, Integer)
+    if dialect == 'postgresql':
+        return column - literal(EPOCH.item())
+    return None
+
+
+def load_price_matrix(carteira_id: int, tickers: Optional[List[str]] = None,
+                      chunk_rows: int = STREAM_CHUNK_ROWS, start: Optional[date] = None) -> PriceMatrix:
+    """
+    Carrega os fechamentos de uma carteira como matriz datas x tickers.
+
+    Args:
+        carteira_id: ID da carteira
+        tickers: Restringe a consulta a estes tickers (padrão: todos)
+        chunk_rows: Linhas lidas do cursor por partição
+        start: Carrega apenas as datas a partir desta (padrão: todo o histórico)
+
+    Returns:
+        PriceMatrix: Tickers em ordem alfabética, datas crescentes
+    """
+    from app import db
+    from app.model.Asset import Asset
+    from app.utils.price_store import load_store_matrices
+
+    shared = load_store_matrices([carteira_id], tickers, start)
+    if shared is not None:
+        return shared[carteira_id]
+
+    if _use_blocks():
+        codes, dates, closes, names = _read_blocks([carteira_id], tickers, start)
+    else:
+        table = Asset.barras([carteira_id])
+        connection = db.session.connection()
+        date_column = _epoch_days(table.c.date, connection.dialect.name)
+        as_epoch_days = date_column is not None
+        if not as_epoch_days:
+            date_column = table.c.date
+
+        stmt = select(table.c.ticker, date_column, table.c.close)
+        if tickers:
+            stmt = stmt.where(table.c.ticker.in_([ticker.upper() for ticker in tickers]))
+        if start is not None:
+            stmt = stmt.where(table.c.date >= start)
+        stmt = stmt.order_by(table.c.ticker, table.c.date).execution_options(yield_per=chunk_rows)
+
+        codes, dates, closes, names = _read_series(connection.execute(stmt), as_epoch_days)
+    if not names:
+        return PriceMatrix(np.array([], dtype='datetime64[D]'), [], np.empty((0, 0)))
+
+    return build_price_matrix(codes, dates, closes, names)
+
+
+def _read_series(result, as_epoch_days: bool, key_columns: int = 1) -> tuple:
+    """
+    Lê um cursor (chave..., data, fechamento) ordenado pela chave e pela data.
+
+    A chave são as `key_columns` primeiras colunas (ticker, ou carteira e
+    ticker); cada troca de chave na ordenação atribui um novo código.
+
+    Returns:
+        tuple: (códigos, datas, fechamentos, nomes das séries); os nomes são a
+        chave (ou uma tupla, com mais de uma coluna)
+    """
+    names = []
+    codes, dates, closes = [], [], []
+
+    for partition in result.partitions():
+        columns = list(zip(*partition))
+        keys = [np.array(column, dtype=object) for column in columns[:key_columns]]
+        chunk_dates, chunk_closes = columns[key_columns], columns[key_columns + 1]
+
+        # Linhas ordenadas pela chave: um novo código a cada troca de chave
+        changed = np.zeros(len(chunk_dates), dtype=bool)
+        changed[0] = True
+        for key in keys:
+            changed[1:] |= key[1:] != key[:-1]
+        run = np.cumsum(changed) - 1
+        if key_columns == 1:
+            new_names = keys[0][changed].tolist()
+        else:
+            new_names = list(zip(*(key[changed].tolist() for key in keys)))
+
+        base = len(names)
+        if names and new_names[0] == names[-1]:
+            # A primeira série da partição continua a última da anterior
+            base -= 1
+            new_names = new_names[1:]
+        names.extend(new_names)
+
+        codes.append(base + run)
+        if as_epoch_days:
+            dates.append(EPOCH + np.array(chunk_dates, dtype=np.int64))
+        else:
+            dates.append(np.array(chunk_dates, dtype='datetime64[D]'))
+        closes.append(np.array(chunk_closes, dtype=float))
+
+    if not codes:
+        return None, None, None, []
+    return np.concatenate(codes), np.concatenate(dates), np.concatenate(closes), names
+
+
+def _use_blocks() -> bool:
+    """True se as leituras devem usar os blocos anuais (PRICE_STORAGE='blocks')."""
+    return get_setting('PRICE_STORAGE', 'rows') == 'blocks'
+
+
+def _read_blocks(carteira_ids: List[int], tickers: Optional[List[str]] = None,
+                 start: Optional[date] = None, key_columns: int = 1) -> tuple:
+    """
+    Lê as séries das carteiras dos blocos anuais, no mesmo formato de `_read_series`.
+
+    Uma consulta busca as associações (ticker, intervalo e janela de cada
+    carteira) e outra os blocos de todos os tickers; cada série é recortada
+    a partir de start_date da associação (e de `start`).
+
+    Returns:
+        tuple: (códigos, datas, fechamentos, nomes das séries), em ordem de
+        carteira e ticker; os nomes são o ticker ou (carteira, ticker)
+    """
+    from app import db
+    from app.model.Asset import Asset
+    from app.model.PriceBlock import PriceBlock
+
+    query = db.session.query(Asset.carteira_id, Asset.ticker, Asset.interval, Asset.start_date).filter(
+        Asset.carteira_id.in_(list(carteira_ids))
+    )
+    if tickers:
+        query = query.filter(Asset.ticker.in_([ticker.upper() for ticker in tickers]))
+    ativos = query.order_by(Asset.carteira_id, Asset.ticker).all()
+    series = PriceBlock.load_series([(ativo.ticker, ativo.interval) for ativo in ativos],
+                                    since_year=start.year if start is not None else None)
+
+    names = []
+    codes, dates, closes = [], [], []
+    for carteira_id, ticker, interval, start_date in ativos:
+        if (ticker, interval) not in series:
+            continue
+        serie_dates, serie_closes = series[(ticker, interval)]
+        limite = max([day for day in (start_date, start) if day is not None], default=None)
+        if limite is not None:
+            mask = serie_dates >= np.datetime64(limite, 'D')
+            serie_dates, serie_closes = serie_dates[mask], serie_closes[mask]
+        if not len(serie_dates):
+            continue
+        codes.append(np.full(len(serie_dates), len(names)))
+        names.append(ticker if key_columns == 1 else (carteira_id, ticker))
+        dates.append(serie_dates)
+        closes.append(serie_closes)
+
+    if not codes:
+        return None, None, None, []
+    return np.concatenate(codes), np.concatenate(dates), np.concatenate(closes), names
+
+
+def load_price_matrices(carteira_ids: List[int], chunk_rows: int = STREAM_CHUNK_ROWS) -> Dict[int, PriceMatrix]:
+    """
+    Carrega os fechamentos de várias carteiras com uma única consulta.
+
+    As linhas de todas as carteiras vão para uma matriz compartilhada (datas x
+    (carteira, ticker)), com um único eixo de datas. Como as colunas de cada
+    carteira são contíguas, a matriz de cada carteira é uma fatia (view) da
+    compartilhada, sem cópia; datas de outras carteiras aparecem como NaN e
+    saem com `complete()`.
+
+    Args:
+        carteira_ids: IDs das carteiras
+        chunk_rows: Linhas lidas do cursor por partição
+
+    Returns:
+        Dict[int, PriceMatrix]: Matriz de cada carteira (tickers em ordem
+        alfabética; vazia se a carteira não tiver fechamentos)
+    """
+    from app import db
+    from app.model.Asset import Asset
+    from app.utils.price_store import load_store_matrices
+
+    shared = load_store_matrices(carteira_ids)
+    if shared is not None:
+        return shared
+
+    if _use_blocks():
+        codes, dates, closes, names = _read_blocks(carteira_ids, key_columns=2)
+    else:
+        table = Asset.barras(carteira_ids)
+        connection = db.session.connection()
+        date_column = _epoch_days(table.c.date, connection.dialect.name)
+        as_epoch_days = date_column is not None
+        if not as_epoch_days:
+            date_column = table.c.date
+
+        stmt = (
+            select(table.c.carteira_id, table.c.ticker, date_column, table.c.close)
+            .order_by(table.c.carteira_id, table.c.ticker, table.c.date)
+            .execution_options(yield_per=chunk_rows)
+        )
+        codes, dates, closes, names = _read_series(connection.execute(stmt), as_epoch_days, key_columns=2)
+
+    empty = PriceMatrix(np.array([], dtype='datetime64[D]'), [], np.empty((0, 0)))
+    matrices = {carteira_id: empty for carteira_id in carteira_ids}
+    if not names:
+        return matrices
+
+    shared = build_price_matrix(codes, dates, closes, names)
+    owners = np.array([carteira_id for carteira_id, _ in names])
+    bounds = np.flatnonzero(np.diff(owners)) + 1
+    for start, end in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(names)]])):
+        tickers = [ticker for _, ticker in names[start:end]]
+        matrices[int(owners[start])] = PriceMatrix(shared.dates, tickers, shared.prices[:, start:end])
+    return matrices
+
+
+def load_previous_closes(carteira_id: int, before: date) -> Dict[str, float]:
+    """
+    Último fechamento de cada ticker da carteira antes de uma data.
+
+    Args:
+        carteira_id: ID da carteira
+        before: Data limite (exclusiva)
+
+    Returns:
+        Dict[str, float]: Ticker -> fechamento
+    """
+    from app import db
+    from app.model.Asset import Asset
+
+    if _use_blocks():
+        codes, dates, closes, names = _read_blocks([carteira_id])
+        if not names:
+            return {}
+        anteriores = dates < np.datetime64(before, 'D')
+        result = {}
+        for code, ticker in enumerate(names):
+            mask = anteriores & (codes == code)
+            if mask.any():
+                result[ticker] = float(closes[mask][-1])
+        return result
+
+    table = Asset.barras([carteira_id])
+    latest = (
+        select(table.c.ticker, func.max(table.c.date).label('date'))
+        .where(table.c.date < before)
+        .group_by(table.c.ticker)
+        .subquery()
+    )
+    stmt = select(table.c.ticker, table.c.close).join(
+        latest, (table.c.ticker == latest.c.ticker) & (table.c.date == latest.c.date)
+    )
+    return dict(db.session.connection().execute(stmt).all())
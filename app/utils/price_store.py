@@ -0,0 +1,316 @@
+"""
+Matriz de fechamentos compartilhada entre os workers (arquivos .npy mapeados em memória).
+
+Com PRICE_STORE_DIR configurado (de preferência em tmpfs, ex: /dev/shm), um
+carregador lê os blocos anuais (`PriceBlock`) de todas as séries e grava uma
+geração do armazenamento:
+
+    PRICE_STORE_DIR/<geração>/dates.npy    datas (datetime64[D]), união de todas as séries
+    PRICE_STORE_DIR/<geração>/prices.npy   fechamentos float64, uma linha por série (NaN sem barra)
+    PRICE_STORE_DIR/<geração>/series.json  (ticker, interval, barras, última data) de cada linha
+    PRICE_STORE_DIR/CURRENT                nome da geração atual
+
+A troca de geração é atômica (`os.replace` de CURRENT). Cada worker abre a
+geração atual com `np.load(mmap_mode='r')`: as páginas ficam no cache do
+sistema operacional, uma única vez para todos os workers, e são lidas sem
+cópia; só as colunas da carteira são copiadas ao montar a sua matriz.
+
+Antes de usar o armazenamento, a leitura confere a contagem e a última data
+de cada série da carteira com os blocos do banco (uma consulta agregada de
+poucas linhas). Se alguma série mudou, a leitura volta ao banco e uma nova
+geração é montada em segundo plano (uma por vez entre os workers), então o
+resultado é sempre o mesmo da leitura direta.
+
+Comandos (`flask prices ...`):
+    refresh                   Monta uma nova geração
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import click
+import numpy as np
+from flask.cli import AppGroup
+
+from app.utils.price_matrix import PriceMatrix
+from app.utils.settings import get_bool_setting, get_setting
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = 'CURRENT'
+DEFAULT_REFRESH_SECONDS = 30
+
+_attached: Optional['SharedPriceStore'] = None
+_attach_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_refresh_started_at = 0.0
+
+
+class SharedPriceStore:
+    """
+    Geração do armazenamento aberta em modo somente leitura.
+
+    Attributes:
+        generation (str): Nome da geração
+        dates (np.ndarray): Datas das colunas (memmap datetime64[D])
+        prices (np.ndarray): Fechamentos, shape (séries, datas) (memmap float64)
+        rows (Dict[tuple, int]): (ticker, interval) -> linha em `prices`
+        fingerprints (Dict[tuple, tuple]): (ticker, interval) -> (barras, última data)
+    """
+
+    def __init__(self, generation: str, dates: np.ndarray, prices: np.ndarray, series: List[list]):
+        self.generation = generation
+        self.dates = dates
+        self.prices = prices
+        self.rows = {}
+        self.fingerprints = {}
+        for row, (ticker, interval, count, last_date) in enumerate(series):
+            self.rows[(ticker, interval)] = row
+            self.fingerprints[(ticker, interval)] = (count, last_date)
+
+
+def price_store_dir() -> Optional[str]:
+    """Diretório do armazenamento (None = desligado)."""
+    return get_setting('PRICE_STORE_DIR') or None
+
+
+def _current_generation(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as current:
+            return current.read().strip() or None
+    except OSError:
+        return None
+
+
+def build_price_store(directory: Optional[str] = None) -> Optional[str]:
+    """
+    Monta uma nova geração a partir dos blocos anuais e a torna a atual.
+
+    Args:
+        directory: Diretório do armazenamento (padrão: PRICE_STORE_DIR)
+
+    Returns:
+        Optional[str]: Nome da geração criada (None se o armazenamento estiver desligado)
+    """
+    from app import db
+    from app.model.PriceBlock import PriceBlock
+    from app.utils.price_blocks import decode_block
+    from sqlalchemy import select
+
+    directory = directory or price_store_dir()
+    if not directory:
+        return None
+
+    table = PriceBlock.__table__
+    stmt = (
+        select(table.c.ticker, table.c.interval, table.c.year, table.c.payload)
+        .order_by(table.c.ticker, table.c.interval, table.c.year)
+        .execution_options(yield_per=1000)
+    )
+    keys, parts = [], []
+    for ticker, interval, year, payload in db.session.connection().execute(stmt):
+        if not keys or keys[-1] != (ticker, interval):
+            keys.append((ticker, interval))
+            parts.append([])
+        parts[-1].append(decode_block(year, payload))
+
+    series_dates = [np.concatenate([dates for dates, _ in blocks]) for blocks in parts]
+    dates = np.unique(np.concatenate(series_dates)) if series_dates else np.array([], dtype='datetime64[D]')
+    prices = np.full((len(keys), len(dates)), np.nan)
+    series = []
+    for row, ((ticker, interval), blocks, serie_dates) in enumerate(zip(keys, parts, series_dates)):
+        prices[row, np.searchsorted(dates, serie_dates)] = np.concatenate([closes for _, closes in blocks])
+        series.append([ticker, interval, len(serie_dates), str(serie_dates[-1])])
+
+    # A geração é gravada em um diretório temporário e publicada com renomeações atômicas
+    os.makedirs(directory, exist_ok=True)
+    generation = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    staging = os.path.join(directory, f'.{generation}.tmp')
+    os.makedirs(staging)
+    np.save(os.path.join(staging, 'dates.npy'), dates)
+    np.save(os.path.join(staging, 'prices.npy'), prices)
+    with open(os.path.join(staging, 'series.json'), 'w') as manifest:
+        json.dump(series, manifest)
+    os.rename(staging, os.path.join(directory, generation))
+
+    pointer = os.path.join(directory, f'.{CURRENT_FILE}.{generation}.tmp')
+    with open(pointer, 'w') as current:
+        current.write(generation)
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+
+    # Gerações antigas: os workers que ainda as mapeiam mantêm o acesso até reabrir
+    for name in os.listdir(directory):
+        if name not in (generation, CURRENT_FILE) and not name.startswith('.'):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    logger.info(f"Armazenamento de preços {generation}: {len(keys)} séries x {len(dates)} datas")
+    return generation
+
+
+def attach_price_store() -> Optional[SharedPriceStore]:
+    """
+    Abre (sem cópia) a geração atual do armazenamento, reaproveitando a já aberta.
+
+    Returns:
+        Optional[SharedPriceStore]: Geração atual ou None se não houver
+    """
+    global _attached
+
+    directory = price_store_dir()
+    if not directory:
+        return None
+    generation = _current_generation(directory)
+    if generation is None:
+        return None
+
+    with _attach_lock:
+        if _attached is not None and _attached.generation == generation:
+            return _attached
+        path = os.path.join(directory, generation)
+        try:
+            with open(os.path.join(path, 'series.json')) as manifest:
+                series = json.load(manifest)
+            dates = np.load(os.path.join(path, 'dates.npy'), mmap_mode='r')
+            prices = np.load(os.path.join(path, 'prices.npy'), mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Armazenamento de preços {generation} indisponível: {str(e)}")
+            return None
+        _attached = SharedPriceStore(generation, dates, prices, series)
+        return _attached
+
+
+def schedule_refresh(generation: Optional[str]) -> None:
+    """
+    Monta uma nova geração em segundo plano (no máximo uma a cada PRICE_STORE_REFRESH_SECONDS por worker).
+
+    Entre workers, o lock de `cross_worker_lock` garante uma montagem por vez;
+    quem obtém o lock depois de outra montagem já publicada não monta de novo.
+
+    Args:
+        generation: Geração considerada desatualizada (None se não havia nenhuma)
+    """
+    global _refresh_started_at
+
+    if not get_bool_setting('PRICE_STORE_AUTO_REFRESH', True):
+        return
+    interval = float(get_setting('PRICE_STORE_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS))
+    with _refresh_lock:
+        if time.time() - _refresh_started_at < interval:
+            return
+        _refresh_started_at = time.time()
+
+    from flask import current_app
+    from app.utils.single_flight import cross_worker_lock
+
+    app = current_app._get_current_object()
+    directory = price_store_dir()
+
+    def refresh():
+        try:
+            with app.app_context(), cross_worker_lock(('price_store', directory)):
+                if _current_generation(directory) == generation:
+                    build_price_store(directory)
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar o armazenamento de preços: {str(e)}")
+
+    threading.Thread(target=refresh, name='price-store-refresh', daemon=True).start()
+
+
+def _fingerprints(keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], tuple]:
+    """(barras, última data) de cada série no banco, somados dos blocos anuais (uma consulta)."""
+    from app import db
+    from app.model.PriceBlock import PriceBlock
+    from sqlalchemy import func, select, tuple_
+
+    if not keys:
+        return {}
+    table = PriceBlock.__table__
+    rows = db.session.connection().execute(
+        select(table.c.ticker, table.c.interval, func.sum(table.c.count), func.max(table.c.last_date))
+        .where(tuple_(table.c.ticker, table.c.interval).in_(sorted(set(keys))))
+        .group_by(table.c.ticker, table.c.interval)
+    )
+    return {(ticker, interval): (int(count), str(last_date)) for ticker, interval, count, last_date in rows}
+
+
+def load_store_matrices(carteira_ids: List[int], tickers: Optional[List[str]] = None,
+                        start: Optional[date] = None) -> Optional[Dict[int, PriceMatrix]]:
+    """
+    Matrizes das carteiras a partir do armazenamento compartilhado.
+
+    Mesmo resultado de `load_price_matrix`/`load_price_matrices`: colunas
+    em ordem de ticker, NaN antes de start_date de cada associação e só as
+    datas em que algum ticker pedido tem barra. As matrizes das carteiras
+    são fatias (views) de uma única cópia das colunas usadas.
+
+    Args:
+        carteira_ids: IDs das carteiras
+        tickers: Restringe a estes tickers (padrão: todos)
+        start: Apenas as datas a partir desta
+
+    Returns:
+        Optional[Dict[int, PriceMatrix]]: Matriz de cada carteira, ou None se o
+        armazenamento estiver desligado, indisponível ou desatualizado para
+        alguma série (o chamador lê do banco)
+    """
+    from app import db
+    from app.model.Asset import Asset
+
+    store = attach_price_store()
+    if store is None:
+        if price_store_dir():
+            schedule_refresh(None)
+        return None
+
+    query = db.session.query(Asset.carteira_id, Asset.ticker, Asset.interval, Asset.start_date).filter(
+        Asset.carteira_id.in_(list(carteira_ids))
+    )
+    if tickers:
+        query = query.filter(Asset.ticker.in_([ticker.upper() for ticker in tickers]))
+    ativos = query.order_by(Asset.carteira_id, Asset.ticker).all()
+
+    keys = [(ativo.ticker, ativo.interval) for ativo in ativos]
+    atuais = _fingerprints(keys)
+    if any(store.fingerprints.get(key) != atuais.get(key) for key in set(keys)):
+        schedule_refresh(store.generation)
+        return None
+
+    # Séries sem barras no banco (e no armazenamento) ficam de fora, como na leitura direta
+    ativos = [ativo for ativo in ativos if (ativo.ticker, ativo.interval) in store.rows]
+    prices = store.prices[[store.rows[(ativo.ticker, ativo.interval)] for ativo in ativos]].T
+    for column, ativo in enumerate(ativos):
+        limite = max([day for day in (ativo.start_date, start) if day is not None], default=None)
+        if limite is not None:
+            prices[store.dates < np.datetime64(limite, 'D'), column] = np.nan
+
+    empty = PriceMatrix(np.array([], dtype='datetime64[D]'), [], np.empty((0, 0)))
+    matrices = {carteira_id: empty for carteira_id in carteira_ids}
+    visiveis = ~np.isnan(prices).all(axis=1)
+    dates, prices = np.asarray(store.dates[visiveis]), prices[visiveis]
+
+    owners = np.array([ativo.carteira_id for ativo in ativos])
+    bounds = np.flatnonzero(np.diff(owners)) + 1
+    for begin, end in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(ativos)]])):
+        if begin < end:
+            tickers_carteira = [ativo.ticker for ativo in ativos[begin:end]]
+            matrices[int(owners[begin])] = PriceMatrix(dates, tickers_carteira, prices[:, begin:end])
+    return matrices
+
+
+prices_cli = AppGroup('prices', help='Armazenamento compartilhado de fechamentos (PRICE_STORE_DIR).')
+
+
+@prices_cli.command('refresh')
+def refresh_command():
+    """Monta uma nova geração do armazenamento de preços."""
+    generation = build_price_store()
+    if generation is None:
+        click.echo('PRICE_STORE_DIR não configurado')
+    else:
+        click.echo(f'Geração {generation} publicada')
@@ -0,0 +1,98 @@
+"""
+Pool de processos compartilhado pelas análises pesadas em CPU.
+
+Cada processo do servidor (worker do gunicorn) cria o seu pool sob demanda,
+com o contexto 'spawn' (o processo do servidor tem threads; fork não é
+seguro), e o reaproveita entre requisições. `parallel_map` distribui o
+trabalho no pool e cai para a execução em série se houver um único processo
+ou se o pool quebrar.
+
+Como cada worker tem o seu pool (cada processo é um interpretador com o
+numpy carregado), o padrão é DEFAULT_POOL_WORKERS processos por worker;
+ANALYTICS_WORKERS ajusta o limite (0 = número de CPUs). Com workers gevent,
+a espera pelos resultados roda no threadpool do hub: bloquear o greenlet
+pararia todas as requisições do worker.
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, List, Optional
+
+from app.utils.settings import get_setting
+
+try:
+    from gevent import get_hub
+    from gevent import monkey as gevent_monkey
+except ImportError:  # servidor sem gevent
+    get_hub = None
+    gevent_monkey = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_WORKERS = 2  # processos do pool por worker do servidor
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+atexit.register(_shutdown_pool)
+
+
+def pool_workers() -> int:
+    """Processos do pool por worker: ANALYTICS_WORKERS (padrão DEFAULT_POOL_WORKERS; 0 = número de CPUs)."""
+    workers = int(get_setting('ANALYTICS_WORKERS', DEFAULT_POOL_WORKERS))
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool de processos do processo atual, recriado se o número de processos mudar."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            _shutdown_pool()
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def _wait(fn: Callable[[], List]) -> List:
+    """Executa `fn` (que aguarda o pool) fora do hub quando o gevent está ativo."""
+    if gevent_monkey is not None and gevent_monkey.is_module_patched('threading'):
+        return get_hub().threadpool.spawn(fn).get()
+    return fn()
+
+
+def parallel_map(fn: Callable, *iterables: Iterable, workers: int = 1) -> List:
+    """
+    Equivalente a list(map(fn, *iterables)), distribuído no pool quando workers > 1.
+
+    Args:
+        fn: Função de nível de módulo (precisa ser importável pelos processos)
+        iterables: Argumentos de cada chamada
+        workers: Processos a usar (1 = em série, no processo atual)
+
+    Returns:
+        List: Resultados na ordem dos argumentos
+    """
+    argumentos = list(zip(*iterables))
+    if workers > 1 and len(argumentos) > 1:
+        try:
+            pool = get_process_pool(workers)
+            return _wait(lambda: list(pool.map(fn, *zip(*argumentos))))
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Pool de processos indisponível, executando em série: {str(e)}")
+            with _pool_lock:
+                _shutdown_pool()
+    return [fn(*args) for args in argumentos]
@@ -0,0 +1,210 @@
+"""
+Medidas de risco de carteiras: VaR, CVaR e probabilidade de perda em um horizonte.
+
+Três estimativas, sempre como perda positiva (fração do valor da carteira):
+
+- Histórica: retornos de janelas de `horizonte` pregões sobrepostas, com os
+  fechamentos da carteira (comprar e manter, sem rebalanceamento).
+- Paramétrica: retorno normal com média h·μ e desvio √h·σ da carteira.
+- Monte Carlo: preços por ativo em movimento browniano geométrico
+  correlacionado, com log-retorno no horizonte h·(μ - σ²/2) + √h·L·z (L o
+  fator de Cholesky da covariância), agregados pelos pesos iniciais (comprar
+  e manter). Como o log-retorno acumulado é exatamente normal, cada caminho
+  precisa de um único vetor de choques, e não de um por pregão.
+
+A simulação roda em blocos de caminhos cujo tamanho é limitado por
+`MONTE_CARLO_CHUNK_MB`; cada bloco tem o próprio gerador, derivado de uma
+`SeedSequence`, de modo que a mesma semente dá o mesmo resultado em série ou
+distribuída em um pool de processos (usado a partir de
+`MONTE_CARLO_POOL_MIN_PATHS` caminhos).
+"""
+import math
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.process_pool import parallel_map, pool_workers
+from app.utils.settings import get_setting
+
+DEFAULT_CHUNK_MB = 32
+DEFAULT_POOL_MIN_PATHS = 200_000
+
+_NORMAL = NormalDist()
+
+
+def fator_covariancia(cov: np.ndarray) -> np.ndarray:
+    """
+    Fator L com L·L' = Σ.
+
+    Cholesky quando Σ é positiva definida; senão (ativos colineares ou menos
+    observações que ativos), a decomposição espectral com autovalores
+    negativos zerados.
+    """
+    cov = np.asarray(cov, dtype=float)
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        autovalores, autovetores = np.linalg.eigh(cov)
+        return autovetores * np.sqrt(np.clip(autovalores, 0.0, None))
+
+
+def medidas_risco(retornos: np.ndarray, confiancas: Sequence[float]) -> Dict[str, Any]:
+    """
+    VaR e CVaR empíricos de uma amostra de retornos.
+
+    Usa uma única seleção parcial (np.partition) com todos os quantis, sem
+    ordenar a amostra inteira.
+
+    Args:
+        retornos: Retornos da carteira no horizonte
+        confiancas: Níveis de confiança (ex.: 0.95, 0.99)
+
+    Returns:
+        Dict[str, Any]: 'var' e 'cvar' (alinhados com `confiancas`),
+        'probabilidade_perda' e 'retorno_medio'
+    """
+    retornos = np.asarray(retornos, dtype=float)
+    n = len(retornos)
+    posicoes = [min(int(math.floor((1.0 - nivel) * n)), n - 1) for nivel in confiancas]
+    parcial = np.partition(retornos, sorted(set(posicoes)))
+
+    var = np.array([-parcial[posicao] for posicao in posicoes])
+    cvar = np.array([-parcial[:posicao + 1].mean() for posicao in posicoes])
+    return {
+        "var": var,
+        "cvar": cvar,
+        "probabilidade_perda": float((retornos < 0).mean()),
+        "retorno_medio": float(retornos.mean()),
+    }
+
+
+def risco_parametrico(mu: np.ndarray, cov: np.ndarray, pesos: np.ndarray, horizonte: int,
+                      confiancas: Sequence[float]) -> Dict[str, Any]:
+    """
+    VaR, CVaR e probabilidade de perda com retorno normal no horizonte.
+
+    Args:
+        mu: Retornos esperados diários (k)
+        cov: Covariância diária (k x k)
+        pesos: Pesos da carteira (k)
+        horizonte: Horizonte em pregões
+        confiancas: Níveis de confiança
+
+    Returns:
+        Dict[str, Any]: 'var', 'cvar', 'probabilidade_perda' e 'retorno_medio'
+    """
+    media = horizonte * float(pesos @ mu)
+    desvio = math.sqrt(horizonte * max(float(pesos @ cov @ pesos), 0.0))
+
+    if desvio == 0:
+        var = np.full(len(confiancas), -media)
+        return {"var": var, "cvar": var.copy(), "probabilidade_perda": float(media < 0), "retorno_medio": media}
+
+    z = np.array([_NORMAL.inv_cdf(nivel) for nivel in confiancas])
+    densidade = np.array([_NORMAL.pdf(value) for value in z])
+    return {
+        "var": desvio * z - media,
+        "cvar": desvio * densidade / (1.0 - np.asarray(confiancas)) - media,
+        "probabilidade_perda": _NORMAL.cdf(-media / desvio),
+        "retorno_medio": media,
+    }
+
+
+def retornos_historicos(precos: np.ndarray, pesos: np.ndarray, horizonte: int) -> np.ndarray:
+    """
+    Retornos da carteira em todas as janelas de `horizonte` pregões (sobrepostas).
+
+    Args:
+        precos: Fechamentos (datas x ativos), sem lacunas
+        pesos: Pesos iniciais da carteira
+        horizonte: Tamanho da janela em pregões
+
+    Returns:
+        np.ndarray: Um retorno por janela (vazio se houver poucas datas)
+    """
+    if len(precos) <= horizonte:
+        return np.empty(0)
+    return (precos[horizonte:] / precos[:-horizonte]) @ pesos - pesos.sum()
+
+
+def _simular_blocos(deriva: np.ndarray, fator: np.ndarray, pesos: np.ndarray,
+                    blocos: List[tuple]) -> np.ndarray:
+    """
+    Simula uma sequência de blocos (SeedSequence, caminhos) e devolve os retornos no horizonte.
+
+    Cada caminho é um vetor de log-retornos no horizonte, deriva + L·z; a
+    memória por bloco é 2 x caminhos x ativos floats.
+    """
+    k = len(deriva)
+    fator_t = np.ascontiguousarray(fator.T)
+    resultados = []
+    for seed, caminhos in blocos:
+        rng = np.random.default_rng(seed)
+        choques = rng.standard_normal((caminhos, k))
+        crescimento = choques @ fator_t
+        crescimento += deriva
+        np.exp(crescimento, out=crescimento)
+        resultados.append(crescimento @ pesos - pesos.sum())
+    return np.concatenate(resultados) if resultados else np.empty(0)
+
+
+def simular_retornos(mu: np.ndarray, cov: np.ndarray, pesos: np.ndarray, horizonte: int, caminhos: int,
+                     seed: Optional[int] = None, workers: Optional[int] = None,
+                     chunk_mb: Optional[float] = None, pool_min_caminhos: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Retornos da carteira no horizonte em `caminhos` trajetórias correlacionadas.
+
+    Args:
+        mu: Retornos esperados diários (k)
+        cov: Covariância diária (k x k)
+        pesos: Pesos iniciais da carteira (k)
+        horizonte: Horizonte em pregões
+        caminhos: Número de trajetórias
+        seed: Semente (padrão: entropia do sistema, devolvida em 'seed')
+        workers: Processos do pool (padrão: ANALYTICS_WORKERS)
+        chunk_mb: Memória máxima por bloco (padrão: MONTE_CARLO_CHUNK_MB)
+        pool_min_caminhos: Caminhos a partir dos quais o pool é usado
+            (padrão: MONTE_CARLO_POOL_MIN_PATHS)
+
+    Returns:
+        Dict[str, Any]: 'retornos' (um por caminho), 'seed', 'blocos' e 'workers'
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    pesos = np.asarray(pesos, dtype=float)
+    # Log-retorno no horizonte: média h·(μ - σ²/2) e covariância h·Σ
+    deriva = horizonte * (mu - np.diag(cov) / 2.0)
+    fator = fator_covariancia(horizonte * cov)
+
+    if workers is None:
+        workers = pool_workers()
+    if chunk_mb is None:
+        chunk_mb = float(get_setting('MONTE_CARLO_CHUNK_MB', DEFAULT_CHUNK_MB))
+    if pool_min_caminhos is None:
+        pool_min_caminhos = int(get_setting('MONTE_CARLO_POOL_MIN_PATHS', DEFAULT_POOL_MIN_PATHS))
+
+    # Dois buffers (caminhos x ativos) por bloco
+    por_bloco = max(1, min(caminhos, int(chunk_mb * 1024 * 1024) // (2 * 8 * len(mu))))
+    tamanhos = [por_bloco] * (caminhos // por_bloco)
+    if caminhos % por_bloco:
+        tamanhos.append(caminhos % por_bloco)
+
+    if seed is None:
+        seed = int(np.random.default_rng().integers(2 ** 63))
+    sequencia = np.random.SeedSequence(seed)
+    blocos = list(zip(sequencia.spawn(len(tamanhos)), tamanhos))
+
+    usados = min(workers, len(blocos)) if caminhos >= pool_min_caminhos else 1
+    # Grupos contíguos de blocos: a concatenação preserva a ordem da execução em série
+    grupos = [[blocos[i] for i in grupo] for grupo in np.array_split(np.arange(len(blocos)), usados)]
+    partes = parallel_map(_simular_blocos, [deriva] * usados, [fator] * usados, [pesos] * usados, grupos,
+                          workers=usados)
+    retornos = np.concatenate(partes)
+
+    return {
+        "retornos": retornos,
+        "seed": seed,
+        "blocos": len(blocos),
+        "workers": usados,
+    }
@@ -0,0 +1,211 @@
+"""
+Negociação de conteúdo (cabeçalho Accept) para respostas analíticas.
+
+Além de JSON, os endpoints analíticos podem responder em:
+
+- MessagePack (`application/msgpack` ou `application/x-msgpack`): o mesmo
+  documento do JSON. Arrays numéricos do numpy são gravados como um mapa
+  `{"dtype": "<f8", "shape": [n], "data": <bytes>}`, com os bytes do buffer
+  em little-endian, sem converter célula a célula. Em JS, o campo `data`
+  vira um `Float64Array` sem cópia.
+- Arrow IPC stream (`application/vnd.apache.arrow.stream`): uma tabela com
+  as colunas da resposta (ex: o histórico) e os demais campos em JSON nos
+  metadados do schema, sob a chave `payload`.
+
+Requisições com `Content-Type: application/msgpack` são lidas com a mesma
+convenção (mapas `{"dtype", "shape", "data"}` viram arrays do numpy), o que
+permite enviar matrizes grandes sem o custo de parsear JSON.
+
+As bibliotecas `msgpack` e `pyarrow` são opcionais: sem elas, o formato
+correspondente não é oferecido e a resposta cai para JSON.
+"""
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from flask import Response, jsonify, request
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependência opcional
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - dependência opcional
+    pa = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Tipo de mídia aceito -> formato de saída (JSON primeiro: vence em "*/*")
+_MIMETYPES = (
+    (JSON_MIMETYPE, 'json'),
+    (MSGPACK_MIMETYPE, 'msgpack'),
+    ('application/x-msgpack', 'msgpack'),
+    (ARROW_STREAM_MIMETYPE, 'arrow'),
+)
+
+ArrowTable = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+def available_formats() -> Tuple[str, ...]:
+    """Formatos de saída suportados com as bibliotecas instaladas."""
+    formats = ['json']
+    if msgpack is not None:
+        formats.append('msgpack')
+    if pa is not None:
+        formats.append('arrow')
+    return tuple(formats)
+
+
+def negotiate_format(accept_header: Optional[str] = None) -> str:
+    """
+    Escolhe o formato de saída a partir do cabeçalho Accept.
+
+    Args:
+        accept_header: Valor do Accept (padrão: o da requisição atual)
+
+    Returns:
+        str: 'json', 'msgpack' ou 'arrow' (JSON se nada for compatível)
+    """
+    if accept_header is None:
+        accept = request.accept_mimetypes
+    else:
+        from werkzeug.datastructures import MIMEAccept
+        from werkzeug.http import parse_accept_header
+        accept = parse_accept_header(accept_header, MIMEAccept)
+
+    formats = available_formats()
+    offered = {mimetype: fmt for mimetype, fmt in _MIMETYPES if fmt in formats}
+    best = accept.best_match(list(offered))
+    return offered.get(best, 'json')
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind in 'biuf':
+            data = np.ascontiguousarray(obj, dtype=obj.dtype.newbyteorder('<'))
+            return {'dtype': data.dtype.str, 'shape': list(data.shape), 'data': data.tobytes()}
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Tipo não serializável em MessagePack: {type(obj).__name__}")
+
+
+def to_msgpack(payload: Any) -> bytes:
+    """
+    Serializa um documento em MessagePack, gravando arrays numéricos como buffers.
+
+    Args:
+        payload: Documento (dicts, listas, escalares e arrays do numpy)
+
+    Returns:
+        bytes: Documento codificado
+    """
+    return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+
+def _msgpack_object_hook(obj: Dict[Any, Any]) -> Any:
+    if obj.keys() == {'dtype', 'shape', 'data'} and isinstance(obj['data'], bytes):
+        return np.frombuffer(obj['data'], dtype=np.dtype(obj['dtype'])).reshape(obj['shape'])
+    return obj
+
+
+def from_msgpack(data: bytes) -> Any:
+    """
+    Desserializa um documento MessagePack, reconstruindo os arrays gravados como buffers.
+
+    Args:
+        data: Documento codificado
+
+    Returns:
+        Any: Documento com arrays do numpy (somente leitura, sem cópia)
+    """
+    return msgpack.unpackb(data, object_hook=_msgpack_object_hook, raw=False)
+
+
+def read_payload() -> Optional[Dict[str, Any]]:
+    """
+    Corpo da requisição atual em JSON ou MessagePack (conforme o Content-Type).
+
+    Returns:
+        Optional[Dict[str, Any]]: Documento, ou None se o corpo for inválido
+    """
+    if request.mimetype in (MSGPACK_MIMETYPE, 'application/x-msgpack') and msgpack is not None:
+        try:
+            return from_msgpack(request.get_data())
+        except Exception:
+            return None
+    return request.get_json(silent=True)
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+def to_arrow_ipc(columns: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Serializa colunas alinhadas em um Arrow IPC stream (um record batch).
+
+    Colunas numéricas do numpy são repassadas ao Arrow sem cópia.
+
+    Args:
+        columns: Nome da coluna -> array/lista (todas com o mesmo tamanho)
+        metadata: Demais campos da resposta, gravados em JSON nos metadados
+
+    Returns:
+        bytes: Stream Arrow IPC
+    """
+    arrays = []
+    for values in columns.values():
+        if isinstance(values, np.ndarray) and values.dtype == object:
+            arrays.append(pa.array(values, type=pa.string()))
+        else:
+            arrays.append(pa.array(values))
+
+    schema_metadata = None
+    if metadata:
+        schema_metadata = {'payload': json.dumps(metadata, default=_json_default)}
+
+    batch = pa.RecordBatch.from_arrays(arrays, names=list(columns))
+    batch = batch.replace_schema_metadata(schema_metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def render(payload: Dict[str, Any], output: str = 'json', status: int = 200,
+           arrow_table: Optional[Callable[[Dict[str, Any]], ArrowTable]] = None) -> tuple:
+    """
+    Monta a resposta no formato negociado.
+
+    Args:
+        payload: Documento da resposta
+        output: 'json', 'msgpack' ou 'arrow'
+        status: Código HTTP
+        arrow_table: Função que separa o documento em (colunas, metadados)
+            para o formato Arrow; sem ela, Arrow cai para MessagePack/JSON
+
+    Returns:
+        tuple: (response, status_code)
+    """
+    if output == 'arrow' and arrow_table is not None and pa is not None:
+        columns, metadata = arrow_table(payload)
+        return Response(to_arrow_ipc(columns, metadata), mimetype=ARROW_STREAM_MIMETYPE), status
+
+    if output in ('msgpack', 'arrow') and msgpack is not None:
+        return Response(to_msgpack(payload), mimetype=MSGPACK_MIMETYPE), status
+
+    if output == 'json':
+        return jsonify(payload), status
+
+    # Formato binário indisponível: o documento pode conter arrays do numpy
+    return Response(json.dumps(payload, default=_json_default), mimetype=JSON_MIMETYPE), status
@@ -0,0 +1,45 @@
+import os
+
+
+def get_setting(name: str, default=None):
+    """
+    Obtém uma configuração do Flask config ou de variáveis de ambiente.
+
+    Permite que utilitários usados fora de uma request (scripts, testes,
+    benchmarks) leiam a mesma configuração da aplicação.
+
+    Args:
+        name (str): Nome da configuração
+        default: Valor padrão caso não esteja definida
+
+    Returns:
+        Valor configurado ou o padrão
+    """
+    try:
+        from flask import current_app
+        if current_app:
+            value = current_app.config.get(name)
+            if value is not None:
+                return value
+    except RuntimeError:
+        # current_app não está disponível fora do contexto da aplicação
+        pass
+
+    return os.getenv(name, default)
+
+
+def get_bool_setting(name: str, default: bool = False) -> bool:
+    """
+    Obtém uma configuração booleana (aceita 1/true/yes em variáveis de ambiente).
+
+    Args:
+        name (str): Nome da configuração
+        default (bool): Valor padrão
+
+    Returns:
+        bool: Valor configurado
+    """
+    value = get_setting(name, default)
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes')
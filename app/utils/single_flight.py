@@ -0,0 +1,253 @@
+"""
+Coalescência de buscas idênticas de dados de mercado (single-flight).
+
+Quando várias requisições pedem a mesma série ao mesmo tempo, apenas a primeira
+vai ao yfinance; as demais aguardam e recebem o mesmo resultado.
+
+- Dentro de um worker, a coordenação é feita com locks/eventos de `threading`
+  (que o gunicorn com gevent transforma em primitivas de greenlets).
+- Entre workers, a busca é protegida por um lock no Redis. Sem Redis
+  configurado/acessível, um lock de arquivo (fcntl) faz o mesmo papel para os
+  workers da mesma máquina. Depois de obter o lock, o chamador consulta de novo
+  o armazenamento compartilhado (cache de preços) antes de baixar.
+"""
+import os
+import hashlib
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Optional
+
+from app.utils.settings import get_setting
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_TIMEOUT = 30  # segundos
+DEFAULT_LOCK_DIR = 'single_flight'  # subdiretório do diretório instance da aplicação
+LOCK_POLL_MIN_INTERVAL = 0.01  # segundos entre tentativas do lock de arquivo (dobra até o máximo)
+LOCK_POLL_MAX_INTERVAL = 0.5
+REDIS_RETRY_INTERVAL = 60  # segundos entre tentativas de reconectar ao Redis
+
+
+class _Call:
+    """Busca em andamento compartilhada pelos chamadores de uma mesma chave."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Garante que apenas uma execução por chave esteja em andamento no processo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Executa `fn` ou aguarda a execução em andamento para a mesma chave.
+
+        Args:
+            key: Chave da busca (ex: ('history', ticker, period, interval))
+            fn: Função que realiza a busca
+            timeout: Tempo máximo de espera dos chamadores concorrentes
+
+        Returns:
+            Resultado de `fn` (o mesmo objeto para todos os chamadores)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise TimeoutError(f"Timeout aguardando busca em andamento para {key}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+_single_flight = SingleFlight()
+_redis_client = None
+_redis_checked_at = 0.0
+_redis_lock = threading.Lock()
+
+
+def _get_redis():
+    """Retorna um cliente Redis acessível ou None (com nova tentativa periódica)."""
+    global _redis_client, _redis_checked_at
+
+    url = get_setting('REDIS_URL')
+    if not url:
+        return None
+
+    with _redis_lock:
+        if _redis_client is not None:
+            return _redis_client
+        if time.time() - _redis_checked_at < REDIS_RETRY_INTERVAL:
+            return None
+        _redis_checked_at = time.time()
+
+        try:
+            import redis
+            client = redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=2)
+            client.ping()
+            _redis_client = client
+            return client
+        except Exception as e:
+            logger.info(f"Redis indisponível para single-flight, usando lock local: {str(e)}")
+            return None
+
+
+def _default_lock_dir() -> Optional[str]:
+    """Diretório dos locks no diretório `instance` da aplicação (None fora de um app context)."""
+    try:
+        from flask import current_app
+        return os.path.join(current_app.instance_path, DEFAULT_LOCK_DIR)
+    except RuntimeError:
+        return None
+
+
+@contextmanager
+def _file_lock(name: str, timeout: float):
+    """
+    Lock de arquivo (fcntl) obtido por tentativas não bloqueantes até `timeout`.
+
+    Um `flock` bloqueante pararia o worker inteiro (todos os greenlets do
+    gevent) até o líder terminar; as esperas com `time.sleep` liberam o
+    worker entre as tentativas. Sem o lock no prazo, segue sem ele.
+
+    Os arquivos ficam em SINGLE_FLIGHT_LOCK_DIR ou, sem ele, no diretório
+    `instance` da aplicação, criado só para o usuário do processo: em um
+    diretório compartilhado como /tmp, outro usuário poderia criar ou segurar
+    os arquivos de lock e atrasar as buscas.
+
+    Yields:
+        bool: True se o lock foi obtido
+    """
+    lock_dir = get_setting('SINGLE_FLIGHT_LOCK_DIR') or _default_lock_dir()
+    if not lock_dir:
+        yield False
+        return
+    os.makedirs(lock_dir, mode=0o700, exist_ok=True)
+
+    with open(os.path.join(lock_dir, f"{name}.lock"), 'a') as lock_file:
+        deadline = time.monotonic() + timeout
+        delay = LOCK_POLL_MIN_INTERVAL
+        acquired = False
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+                break
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, LOCK_POLL_MAX_INTERVAL)
+
+        if not acquired:
+            logger.warning(f"Timeout aguardando lock de arquivo {name}, seguindo sem ele")
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def cross_worker_lock(key: Hashable):
+    """
+    Lock compartilhado entre workers para uma chave.
+
+    Usa Redis quando disponível e, caso contrário, um lock de arquivo local.
+    Se o lock não for obtido dentro do timeout, o chamador prossegue sem ele.
+
+    Args:
+        key: Chave da busca
+    """
+    name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+    timeout = float(get_setting('SINGLE_FLIGHT_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT))
+
+    client = _get_redis()
+    if client is not None:
+        lock = client.lock(f"single-flight:{name}", timeout=timeout, blocking_timeout=timeout)
+        acquired = False
+        try:
+            acquired = lock.acquire()
+        except Exception as e:
+            logger.warning(f"Erro ao obter lock no Redis para {key}: {str(e)}")
+        try:
+            yield
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except Exception:
+                    # O lock pode ter expirado durante a busca
+                    pass
+        return
+
+    if fcntl is not None:
+        with _file_lock(name, timeout):
+            yield
+        return
+
+    yield
+
+
+def coalesce(key: Hashable, fetch: Callable[[], Any],
+             recheck: Optional[Callable[[], Any]] = None,
+             cross_worker: bool = True) -> Any:
+    """
+    Busca coalescida: uma execução de `fetch` por chave, no processo e entre workers.
+
+    Args:
+        key: Chave da busca (ex: ('history', ticker, period, interval))
+        fetch: Função que realiza a busca
+        recheck: Função que consulta o armazenamento compartilhado depois de
+            obter o lock entre workers; se retornar algo diferente de None,
+            o resultado é usado sem chamar `fetch`
+        cross_worker: Se deve coordenar também entre workers
+
+    Returns:
+        Resultado de `recheck` ou de `fetch`
+    """
+    def leader():
+        if not cross_worker:
+            return fetch()
+
+        with cross_worker_lock(key):
+            if recheck is not None:
+                cached = recheck()
+                if cached is not None:
+                    return cached
+            return fetch()
+
+    timeout = float(get_setting('SINGLE_FLIGHT_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)) * 2
+    return _single_flight.do(key, leader, timeout=timeout)
@@ -0,0 +1,177 @@
+"""
+Estatísticas suficientes de covariância mantidas de forma incremental.
+
+As estatísticas cobrem as mesmas observações da recomputação sobre a matriz
+de preços: apenas as datas com fechamento para todos os tickers da carteira
+(`PriceMatrix.complete`), com o retorno de cada data calculado contra a data
+completa anterior. Para elas são guardados:
+
+- n: número de retornos
+- mean[i]: média dos retornos de i
+- comoment[i, j]: soma de (r_i - mean[i]) * (r_j - mean[j])
+- last_date / last_close: última data completa e os fechamentos nela
+
+Como todos os pares usam as mesmas datas, a covariância derivada é a mesma
+(e tão semidefinida positiva quanto) a da recomputação.
+
+Barras novas posteriores à última data completa são combinadas ao estado com
+a fórmula de Chan/Welford para médias e co-momentos, de modo que o custo de
+derivar médias, variâncias e covariâncias é O(k²), independente do tamanho do
+histórico. Qualquer outra mudança no conjunto de datas completas (ticker
+novo ou removido, barras anteriores à última data completa) exige
+reconstruir o estado a partir do histórico.
+"""
+import io
+from typing import List, Optional
+
+import numpy as np
+
+NO_DATE = np.datetime64('NaT', 'D')
+
+
+def complete_returns(prices: np.ndarray, previous: Optional[np.ndarray] = None) -> tuple:
+    """
+    Retornos entre as datas com fechamento para todos os tickers.
+
+    Args:
+        prices: Matriz (datas x tickers) com NaN onde não há barra
+        previous: Fechamentos da data completa anterior à matriz (opcional)
+
+    Returns:
+        tuple: (máscara das linhas completas, retornos entre linhas completas consecutivas)
+    """
+    prices = np.asarray(prices, dtype=float)
+    complete = ~np.isnan(prices).any(axis=1)
+    closes = prices[complete]
+    if previous is not None:
+        closes = np.vstack([previous, closes])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = closes[1:] / closes[:-1] - 1.0
+    return complete, returns
+
+
+class CovarianceState:
+    """
+    Estatísticas suficientes de covariância de uma carteira (datas em comum a todos os tickers).
+
+    Attributes:
+        tickers (List[str]): Tickers (posição = índice nos vetores e matrizes)
+        n (int): Número de retornos
+        mean (np.ndarray): Média dos retornos de cada ticker (k)
+        comoment (np.ndarray): Co-momentos (k x k, simétrica)
+        last_date (np.datetime64): Última data completa incorporada (NaT se nenhuma)
+        last_close (np.ndarray): Fechamentos na última data completa (k)
+    """
+
+    def __init__(self, tickers: Optional[List[str]] = None, n: int = 0, mean: Optional[np.ndarray] = None,
+                 comoment: Optional[np.ndarray] = None, last_date: np.datetime64 = NO_DATE,
+                 last_close: Optional[np.ndarray] = None):
+        self.tickers = list(tickers or [])
+        k = len(self.tickers)
+        self.n = int(n)
+        self.mean = mean if mean is not None else np.zeros(k)
+        self.comoment = comoment if comoment is not None else np.zeros((k, k))
+        self.last_date = np.datetime64(last_date, 'D')
+        self.last_close = last_close if last_close is not None else np.full(k, np.nan)
+
+    @classmethod
+    def from_prices(cls, tickers: List[str], dates: np.ndarray, prices: np.ndarray) -> 'CovarianceState':
+        """
+        Constrói o estado completo a partir da matriz de preços (datas x tickers).
+
+        Args:
+            tickers: Tickers das colunas
+            dates: Datas das linhas (datetime64[D])
+            prices: Fechamentos com NaN onde não há barra
+
+        Returns:
+            CovarianceState: Estado equivalente a todo o histórico
+        """
+        state = cls(tickers)
+        if not len(tickers):
+            return state
+
+        complete, returns = complete_returns(prices)
+        if complete.any():
+            state.last_date = np.asarray(dates, dtype='datetime64[D]')[complete][-1]
+            state.last_close = np.asarray(prices, dtype=float)[complete][-1].copy()
+        if len(returns):
+            state.n = len(returns)
+            state.mean = returns.mean(axis=0)
+            deviations = returns - state.mean
+            state.comoment = deviations.T @ deviations
+        return state
+
+    def can_append(self, first_date) -> bool:
+        """
+        True se barras a partir de `first_date` podem ser combinadas sem reconstruir o estado.
+
+        Barras anteriores à última data completa podem completar datas já
+        passadas, o que exige a reconstrução.
+        """
+        return not np.isnat(self.last_date) and np.datetime64(first_date, 'D') > self.last_date
+
+    def append(self, tickers: List[str], dates: np.ndarray, prices: np.ndarray) -> None:
+        """
+        Incorpora as datas completas posteriores à última data completa do estado.
+
+        Args:
+            tickers: Tickers das colunas de `prices` (subconjunto dos do estado;
+                sem um deles não há data completa nova)
+            dates: Datas das linhas (datetime64[D])
+            prices: Fechamentos (datas x tickers) com NaN onde não há barra
+        """
+        if sorted(tickers) != sorted(self.tickers):
+            return
+
+        order = [tickers.index(name) for name in self.tickers]
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        newer = dates > self.last_date
+        prices = np.asarray(prices, dtype=float)[newer][:, order]
+        complete, returns = complete_returns(prices, self.last_close)
+        if not len(returns):
+            return
+
+        n_b = len(returns)
+        mean_b = returns.mean(axis=0)
+        deviations = returns - mean_b
+        comoment_b = deviations.T @ deviations
+
+        # Combinação de Chan: média ponderada e correção do co-momento
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.comoment = self.comoment + comoment_b + np.outer(delta, delta) * self.n * n_b / n
+        self.mean = self.mean + delta * n_b / n
+        self.n = n
+        self.last_date = dates[newer][complete][-1]
+        self.last_close = prices[complete][-1].copy()
+
+    def moments(self, tickers: Optional[List[str]] = None) -> tuple:
+        """
+        Médias e matriz de covariância amostral derivadas do estado, em O(k²).
+
+        Args:
+            tickers: Ordem desejada (padrão: a do estado)
+
+        Returns:
+            tuple: (médias, covariância, número de retornos)
+        """
+        order = [self.tickers.index(t) for t in tickers] if tickers is not None else list(range(len(self.tickers)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = self.comoment[np.ix_(order, order)] / (self.n - 1) if self.n > 1 \
+                else np.full((len(order), len(order)), np.nan)
+        return self.mean[order], cov, self.n
+
+    def to_bytes(self) -> bytes:
+        """Estado em `.npz`: só arrays numéricos, de texto e de datas, lidos sem pickle."""
+        buffer = io.BytesIO()
+        np.savez(buffer, tickers=np.array(self.tickers, dtype=str), n=np.int64(self.n), mean=self.mean,
+                 comoment=self.comoment, last_date=np.array(self.last_date), last_close=self.last_close)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CovarianceState':
+        """Estado gravado por `to_bytes` (ValueError se o conteúdo exigir pickle)."""
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(arrays['tickers'].tolist(), int(arrays['n']), arrays['mean'], arrays['comoment'],
+                       arrays['last_date'][()], arrays['last_close'])
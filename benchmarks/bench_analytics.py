@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark determinístico dos caminhos analíticos, sem acesso à rede.
+
+Usa o provedor de replay (séries sintéticas ou gravadas em REPLAY_DATA_DIR) e
+um banco SQLite em memória para medir a vazão de:
+- AssetService.calculateIndexAsset
+- AssetService.calcular_indicadores_carteira (recomputando o histórico, a
+  partir das estatísticas incrementais e materializado)
+- carregamento dos fechamentos: ORM + pivot_table vs. load_price_matrix
+
+Uso:
+    python benchmarks/bench_analytics.py --tickers 10 --period 1y --iterations 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import g
+
+from app import create_app, db
+from app.providers import get_market_data_provider
+from app.services.Asset_service import AssetService
+from app.utils.price_matrix import load_price_matrix
+
+
+def _timeit(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations
+
+
+def bench_calculate_index_asset(provider, periods, iterations):
+    print("\ncalculateIndexAsset")
+    print(f"{'period':>8} {'barras':>8} {'ms/chamada':>12} {'chamadas/s':>12}")
+    for period in periods:
+        df = provider.history('PETR4.SA', period=period, interval='1d')
+        per_call = _timeit(lambda: AssetService.calculateIndexAsset(df.copy(), 'PETR4.SA'), iterations)
+        print(f"{period:>8} {len(df):>8} {per_call * 1000:>12.2f} {1 / per_call:>12.1f}")
+
+
+def bench_indicadores_carteira(app, n_tickers, period, iterations):
+    from app.model.User import User
+    from app.model.Cliente import Cliente
+    from app.model.Carteira import Carteira
+
+    user = User('Benchmark', 'bench@example.com', 'bench123')
+    db.session.add(user)
+    db.session.commit()
+
+    cliente = Cliente(user.id, 'Cliente Benchmark', 'cliente@example.com', '000.000.000-00')
+    Cliente.save(cliente)
+
+    carteira = Carteira(cliente.id, 'Carteira Benchmark')
+    Carteira.save(carteira)
+
+    tickers = ['BOVA11.SA'] + [f"TCK{i:03d}.SA" for i in range(n_tickers)]
+
+    with app.test_request_context():
+        g.current_user_id = user.id
+
+        start = time.perf_counter()
+        for ticker in tickers:
+            response, status = AssetService.cadastrar_ativo({
+                'ticker': ticker, 'carteira_id': carteira.id, 'intervalo': '1d', 'period': period
+            })
+            if status != 201:
+                raise RuntimeError(f"Falha ao cadastrar {ticker}: {response}")
+        ingest = time.perf_counter() - start
+
+        response, status = AssetService.calcular_indicadores_carteira(carteira.id)
+        if status != 200:
+            raise RuntimeError(f"Falha ao calcular indicadores: {response}")
+
+        # Cálculo completo (sem os indicadores materializados), pelas estatísticas
+        # incrementais (independe do tamanho do histórico) e leitura materializada
+        app.config['INDICADORES_CACHE_ENABLED'] = False
+        app.config['INDICADORES_SOURCE'] = 'history'
+        per_call = _timeit(lambda: AssetService.calcular_indicadores_carteira(carteira.id), iterations)
+        app.config['INDICADORES_SOURCE'] = 'streaming'
+        per_stream = _timeit(lambda: AssetService.calcular_indicadores_carteira(carteira.id), iterations)
+        app.config['INDICADORES_CACHE_ENABLED'] = True
+        AssetService.calcular_indicadores_carteira(carteira.id)
+        per_hit = _timeit(lambda: AssetService.calcular_indicadores_carteira(carteira.id), iterations)
+
+        bench_price_loader(carteira.id, iterations)
+
+    print("\ncalcular_indicadores_carteira")
+    print(f"{'tickers':>8} {'period':>8} {'ingestão (s)':>14} {'ms/chamada':>12} {'chamadas/s':>12} "
+          f"{'ms (incremental)':>17} {'ms (cache)':>11}")
+    print(f"{len(tickers):>8} {period:>8} {ingest:>14.2f} {per_call * 1000:>12.2f} {1 / per_call:>12.1f} "
+          f"{per_stream * 1000:>17.2f} {per_hit * 1000:>11.2f}")
+
+
+def _orm_pivot(carteira_id):
+    """Carregamento anterior: objetos do ORM -> dicts -> DataFrame -> pivot_table."""
+    import pandas as pd
+    from app.model.Asset import Asset
+    from app.model.PriceBar import PriceBar
+
+    assets = PriceBar.query.join(Asset, (Asset.ticker == PriceBar.ticker) & (Asset.interval == PriceBar.interval)) \
+        .filter(Asset.carteira_id == carteira_id).all()
+    df = pd.DataFrame([{'ticker': a.ticker, 'date': a.date, 'close': a.close} for a in assets])
+    db.session.expunge_all()
+    return df.pivot_table(index='date', columns='ticker', values='close', aggfunc='first').dropna()
+
+
+def bench_price_loader(carteira_id, iterations):
+    import numpy as np
+
+    pivot = _orm_pivot(carteira_id)
+    matriz = load_price_matrix(carteira_id).complete()
+    assert list(pivot.columns) == matriz.tickers
+    assert np.array_equal(pivot.to_numpy(), matriz.prices)
+
+    t_orm = _timeit(lambda: _orm_pivot(carteira_id), iterations)
+    t_core = _timeit(lambda: load_price_matrix(carteira_id).complete(), iterations)
+
+    print("\ncarregamento dos fechamentos")
+    print(f"{'linhas':>8} {'ORM+pivot (ms)':>15} {'Core+numpy (ms)':>16} {'speedup':>9}")
+    print(f"{pivot.size:>8} {t_orm * 1000:>15.1f} {t_core * 1000:>16.1f} {t_orm / t_core:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=10, help='Ativos na carteira (além do BOVA11.SA)')
+    parser.add_argument('--period', default='1y', help='Período cadastrado na carteira')
+    parser.add_argument('--iterations', type=int, default=20, help='Repetições por medição')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latência injetada no provedor')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.config.update(
+        MARKET_DATA_PROVIDER='replay',
+        REPLAY_LATENCY_MS=args.latency_ms,
+        REPLAY_ERROR_RATE=0.0,
+    )
+
+    with app.app_context():
+        db.create_all()
+        provider = get_market_data_provider()
+
+        bench_calculate_index_asset(provider, ['1y', '5y', '10y'], args.iterations)
+        bench_indicadores_carteira(app, args.tickers, args.period, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
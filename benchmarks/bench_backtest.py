@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark do backtest vetorizado (app/utils/backtest.py).
+
+Compara simular_alocacao (produtos matriciais sobre o eixo das datas) com um
+laço por pregão que atualiza as quantidades de cada ativo, para anos de
+fechamentos diários sintéticos.
+
+Uso:
+    python benchmarks/bench_backtest.py --ativos 50 --anos 1 5 10 --rebalanceamento mensal --custo 0.001
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.backtest import PREGOES_ANO, inicios_periodos, metricas_desempenho, simular_alocacao
+
+
+def _fechamentos(n_ativos, pregoes, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset('2015-01-01', np.arange(pregoes), roll='forward')
+    precos = 30 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (pregoes, n_ativos)), axis=0))
+    return dates, precos
+
+
+def _simular_laco(precos, pesos, inicios, custo):
+    """Referência: quantidades por ativo atualizadas pregão a pregão."""
+    rebalancear = set(inicios.tolist())
+    patrimonio = np.empty(len(precos))
+    quantidades, valor = None, 1.0
+    for t, linha in enumerate(precos):
+        if quantidades is not None:
+            valor = quantidades @ linha
+        if t in rebalancear:
+            atuais = pesos if quantidades is None else quantidades * linha / valor
+            valor *= 1 - custo * (np.abs(pesos).sum() if quantidades is None else np.abs(pesos - atuais).sum())
+            quantidades = pesos * valor / linha
+        patrimonio[t] = valor
+    return patrimonio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ativos', type=int, default=50, help='Ativos da carteira')
+    parser.add_argument('--anos', type=int, nargs='+', default=[1, 5, 10], help='Anos de pregões diários')
+    parser.add_argument('--rebalanceamento', default='mensal', choices=['nenhum', 'mensal', 'trimestral'])
+    parser.add_argument('--custo', type=float, default=0.001, help='Custo de transação (fração do negociado)')
+    parser.add_argument('--iterations', type=int, default=5, help='Repetições por medição')
+    args = parser.parse_args()
+
+    pesos = np.full(args.ativos, 1.0 / args.ativos)
+    print(f"{args.ativos} ativos, rebalanceamento {args.rebalanceamento}, custo {args.custo}")
+    print(f"{'anos':>5} {'pregões':>8} {'laço (ms)':>10} {'vetorizado (ms)':>16} {'speedup':>8} {'max drawdown':>13}")
+    for anos in args.anos:
+        dates, precos = _fechamentos(args.ativos, anos * PREGOES_ANO)
+
+        start = time.perf_counter()
+        referencia = _simular_laco(precos, pesos, inicios_periodos(dates, args.rebalanceamento), args.custo)
+        t_laco = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            inicios = inicios_periodos(dates, args.rebalanceamento)
+            resultado = simular_alocacao(precos, pesos, inicios, args.custo)
+            metricas = metricas_desempenho(resultado['patrimonio'])
+        t_vetor = (time.perf_counter() - start) / args.iterations
+
+        assert np.allclose(resultado['patrimonio'], referencia)
+        print(f"{anos:>5} {len(dates):>8} {t_laco * 1000:>10.1f} {t_vetor * 1000:>16.2f} {t_laco / t_vetor:>7.0f}x "
+              f"{metricas['max_drawdown']:>13.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização do histórico em calculateIndexAsset.
+
+Compara a montagem linha a linha (iterrows, implementação anterior) com a
+montagem vetorizada atual, para séries de tamanhos diferentes, e verifica que
+as duas produzem exatamente a mesma saída.
+
+Uso:
+    python benchmarks/bench_historico.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.Asset_service import AssetService
+
+
+def historico_iterrows(df):
+    """Implementação anterior: uma iteração Python (e uma Series) por barra."""
+    df_clean = df.reset_index()
+    date_column = None
+    for col in ['Date', 'Datetime', 'date', 'datetime']:
+        if col in df_clean.columns:
+            date_column = col
+            break
+    if date_column is None:
+        df_clean['data'] = df.index
+        date_column = 'data'
+
+    historico_list = []
+    for idx, row in df_clean.iterrows():
+        data_value = row[date_column]
+        if pd.isna(data_value):
+            continue
+        data_str = data_value.strftime('%Y-%m-%d')
+        fechamento_value = row['fechamento']
+        if pd.isna(fechamento_value):
+            continue
+        historico_list.append({
+            'data': data_str,
+            'close': round(float(fechamento_value), 2),
+            'high': round(float(row.get('High', fechamento_value)), 2),
+            'low': round(float(row.get('Low', fechamento_value)), 2),
+            'open': round(float(row.get('Open', fechamento_value)), 2),
+        })
+    return historico_list
+
+
+def make_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = np.round(30 * np.exp(np.cumsum(rng.normal(0, 0.01, n))), 3)
+    index = pd.date_range('1990-01-01', periods=n, freq='h', name='Datetime')
+    return pd.DataFrame({
+        'Open': np.round(close * (1 + rng.normal(0, 0.002, n)), 3),
+        'High': np.round(close * 1.005, 3),
+        'Low': np.round(close * 0.995, 3),
+        'fechamento': close,
+    }, index=index)
+
+
+def _best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'barras':>8} {'iterrows (ms)':>14} {'vetorizado (ms)':>16} {'speedup':>8}")
+    for n in [250, 2_500, 25_000, 100_000]:
+        df = make_series(n)
+
+        expected = historico_iterrows(df)
+        actual = AssetService._build_historico(df)
+        if expected != actual:
+            raise AssertionError(f"Saída divergente para {n} barras")
+
+        legacy = _best_of(lambda: historico_iterrows(df), repeat=1 if n > 10_000 else 3)
+        vectorized = _best_of(lambda: AssetService._build_historico(df))
+        print(f"{n:>8} {legacy * 1000:>14.1f} {vectorized * 1000:>16.1f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
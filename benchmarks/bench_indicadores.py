@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cálculo dos indicadores de carteira: implementação anterior
+(laços do pandas com .loc) vs. versão vetorizada em app/utils/indicadores.py.
+
+Os dois lados partem da mesma matriz de fechamentos (datas x tickers) e
+produzem o dicionário de resposta; o benchmark confere que os valores batem.
+
+Uso:
+    python benchmarks/bench_indicadores.py --tickers 10 100 500 --days 252
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.indicadores import (
+    MARKET_TICKER, TAXA_LIVRE_RISCO, calcular_indicadores, ordenar_tickers, vetor_para_dict, matriz_para_dict
+)
+
+VETORES = ('retorno_esperado', 'desvio_padrao', 'indice_desempenho', 'indice_sharpe', 'pesos', 'beta')
+MATRIZES = ('matriz_covariancia', 'matriz_cov_customizada')
+
+
+def legacy(df_pivot):
+    """Cálculo anterior de calcular_indicadores_carteira, a partir do pivot."""
+    returns = df_pivot.pct_change().dropna()
+    tickers = ordenar_tickers(list(df_pivot.columns))
+
+    retorno_esperado = returns.mean()
+    desvio_padrao = returns.std()
+    indice_desempenho = retorno_esperado / desvio_padrao
+    indice_sharpe = (retorno_esperado - TAXA_LIVRE_RISCO) / desvio_padrao
+
+    ativos_investimento = [t for t in tickers if t != MARKET_TICKER]
+    pesos = pd.Series(index=tickers, data=0.0)
+    for ticker in ativos_investimento:
+        pesos[ticker] = 1.0 / len(ativos_investimento)
+
+    retorno_carteira = np.dot(retorno_esperado[ativos_investimento], pesos[ativos_investimento])
+
+    bova_returns = returns[MARKET_TICKER]
+    bova_variance = bova_returns.var()
+    beta = {}
+    for ticker in tickers:
+        if ticker != MARKET_TICKER:
+            beta[ticker] = returns[ticker].cov(bova_returns) / bova_variance if bova_variance != 0 else 0
+        else:
+            beta[ticker] = 1.0
+
+    matriz_covariancia = returns.cov()
+    matriz_cov_customizada = pd.DataFrame(index=tickers, columns=tickers)
+    for ticker_i in tickers:
+        for ticker_j in tickers:
+            if ticker_i == ticker_j:
+                matriz_cov_customizada.loc[ticker_i, ticker_j] = returns[ticker_i].var()
+            else:
+                matriz_cov_customizada.loc[ticker_i, ticker_j] = beta[ticker_i] * beta[ticker_j] * bova_variance
+    matriz_cov_customizada = matriz_cov_customizada.astype(float)
+
+    pesos_array = pesos[ativos_investimento].values
+    cov_matrix = matriz_covariancia.loc[ativos_investimento, ativos_investimento].values
+    variancia_carteira = np.dot(pesos_array, np.dot(cov_matrix, pesos_array))
+
+    return {
+        "retorno_esperado": {t: float(retorno_esperado[t]) for t in tickers},
+        "desvio_padrao": {t: float(desvio_padrao[t]) for t in tickers},
+        "indice_desempenho": {t: float(indice_desempenho[t]) if not pd.isna(indice_desempenho[t]) else 0.0 for t in tickers},
+        "indice_sharpe": {t: float(indice_sharpe[t]) if not pd.isna(indice_sharpe[t]) else 0.0 for t in tickers},
+        "pesos": {t: float(pesos[t]) for t in tickers},
+        "beta": {t: float(beta[t]) for t in tickers},
+        "matriz_covariancia": {c: {r: float(matriz_covariancia.loc[r, c]) for r in matriz_covariancia.index} for c in matriz_covariancia.columns},
+        "matriz_cov_customizada": {c: {r: float(matriz_cov_customizada.loc[r, c]) for r in matriz_cov_customizada.index} for c in matriz_cov_customizada.columns},
+        "retorno_carteira": float(retorno_carteira),
+        "variancia_carteira": float(variancia_carteira),
+    }
+
+
+def vectorized(df_pivot):
+    tickers = ordenar_tickers(list(df_pivot.columns))
+    ind = calcular_indicadores(df_pivot[tickers].to_numpy(dtype=float))
+    result = {key: vetor_para_dict(tickers, ind[key]) for key in VETORES}
+    result.update({key: matriz_para_dict(tickers, ind[key]) for key in MATRIZES})
+    result["retorno_carteira"] = ind["retorno_carteira"]
+    result["variancia_carteira"] = ind["variancia_carteira"]
+    return result
+
+
+def _flatten(value):
+    if isinstance(value, dict):
+        return np.array([x for key in sorted(value) for x in np.atleast_1d(_flatten(value[key]))])
+    return np.array([value])
+
+
+def make_prices(n_tickers, days, seed=42):
+    rng = np.random.default_rng(seed)
+    market = np.cumsum(rng.normal(0.0003, 0.012, days))
+    columns = {MARKET_TICKER: 100 * np.exp(market)}
+    for i in range(n_tickers):
+        beta = rng.uniform(0.5, 1.5)
+        idio = np.cumsum(rng.normal(0, 0.015, days))
+        columns[f"TCK{i:03d}.SA"] = rng.uniform(10, 100) * np.exp(beta * market + idio)
+    dates = pd.bdate_range('2023-01-02', periods=days, name='date')
+    return pd.DataFrame(columns, index=dates).sort_index(axis=1)
+
+
+def _timeit(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[10, 100, 500], help='Ativos na carteira (além do BOVA11.SA)')
+    parser.add_argument('--days', type=int, default=252, help='Pregões na matriz de preços')
+    parser.add_argument('--iterations', type=int, default=3, help='Repetições por medição')
+    args = parser.parse_args()
+
+    print(f"{'tickers':>8} {'anterior (ms)':>14} {'vetorizado (ms)':>16} {'speedup':>9} {'max |dif|':>10}")
+    for n in args.tickers:
+        df_pivot = make_prices(n, args.days)
+
+        old = legacy(df_pivot)
+        new = vectorized(df_pivot)
+        diff = float(np.max(np.abs(_flatten(old) - _flatten(new))))
+
+        iterations = 1 if n >= 200 else args.iterations
+        t_old = _timeit(lambda: legacy(df_pivot), iterations)
+        t_new = _timeit(lambda: vectorized(df_pivot), args.iterations)
+        print(f"{n + 1:>8} {t_old * 1000:>14.1f} {t_new * 1000:>16.2f} {t_old / t_new:>8.0f}x {diff:>10.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos indicadores em lote (GET /api/wallets/indicadores).
+
+Compara N chamadas de AssetService.calcular_indicadores_carteira (uma consulta
+e um cálculo por carteira) com uma chamada de calcular_indicadores_lote (uma
+consulta para todas as carteiras e o cálculo distribuído no pool de processos),
+com os indicadores materializados desligados, pelas duas fontes.
+
+Uso:
+    python benchmarks/bench_indicadores_lote.py --carteiras 10 50 --tickers 20 --dias 750
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import g
+
+from app import create_app, db
+from app.model.Asset import Asset
+from app.model.Carteira import Carteira
+from app.model.Cliente import Cliente
+from app.model.User import User
+from app.services.Asset_service import AssetService
+
+
+def _carteiras(cliente_id, n_carteiras, n_tickers, dias, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = []
+    for i in range(n_carteiras):
+        carteira = Carteira(cliente_id, f'Carteira {i:03d}')
+        Carteira.save(carteira)
+        ids.append(carteira.id)
+        rows = []
+        for ticker in ['BOVA11.SA'] + [f"TCK{j:03d}.SA" for j in range(n_tickers)]:
+            closes = 30 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, dias)))
+            rows.extend({'carteira_id': carteira.id, 'ticker': ticker, 'date': date.fromordinal(735000 + day),
+                         'close': float(close)} for day, close in enumerate(closes))
+        Asset.bulk_insert(rows)
+    return ids
+
+
+def _timeit(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--carteiras', type=int, nargs='+', default=[10, 50], help='Carteiras do admin')
+    parser.add_argument('--tickers', type=int, default=20, help='Ativos por carteira (além do BOVA11.SA)')
+    parser.add_argument('--dias', type=int, default=750, help='Fechamentos por ativo')
+    parser.add_argument('--iterations', type=int, default=3, help='Repetições por medição')
+    parser.add_argument('--workers', type=int, default=0, help='ANALYTICS_WORKERS (0 = número de CPUs)')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.config.update(INDICADORES_CACHE_ENABLED=False, ANALYTICS_WORKERS=args.workers)
+
+    print(f"{args.tickers + 1} ativos x {args.dias} fechamentos por carteira")
+    print(f"{'carteiras':>10} {'fonte':>10} {'individual (ms)':>16} {'lote (ms)':>10} {'speedup':>8}")
+    for n_carteiras in args.carteiras:
+        with app.app_context():
+            db.create_all()
+            user = User('Benchmark', 'bench@example.com', 'bench123')
+            db.session.add(user)
+            db.session.commit()
+            cliente = Cliente(user.id, 'Cliente Benchmark', 'cliente@example.com', '000.000.000-00')
+            Cliente.save(cliente)
+            ids = _carteiras(cliente.id, n_carteiras, args.tickers, args.dias)
+
+            with app.test_request_context():
+                g.current_user_id = user.id
+                for source in ('history', 'streaming'):
+                    app.config['INDICADORES_SOURCE'] = source
+                    # Aquecimento: estatísticas incrementais salvas e pool criado
+                    response, status = AssetService.calcular_indicadores_lote(ids)
+                    if status != 200 or response['calculadas'] != n_carteiras:
+                        raise RuntimeError(f"Falha ao calcular os indicadores em lote: {response}")
+
+                    individual = _timeit(lambda: [AssetService.calcular_indicadores_carteira(carteira_id)
+                                                  for carteira_id in ids], args.iterations)
+                    lote = _timeit(lambda: AssetService.calcular_indicadores_lote(ids), args.iterations)
+                    print(f"{n_carteiras:>10} {source:>10} {individual * 1000:>16.1f} {lote * 1000:>10.1f} "
+                          f"{individual / lote:>7.1f}x")
+
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark da otimização de carteiras (app/utils/otimizacao.py).
+
+Gera retornos sintéticos com um modelo de 3 fatores (o que deixa a matriz de
+covariância mal condicionada, como em carteiras reais) e mede o tempo de:
+- otimizar_carteira (mínima variância, máximo Sharpe e fronteira eficiente)
+- avaliar_pesos em lote (einsum) vs. um laço por vetor de pesos
+
+Uso:
+    python benchmarks/bench_otimizacao.py --ativos 10 100 200 --pontos 20 --max-peso 0.1 --cenarios 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.otimizacao import avaliar_pesos, otimizar_carteira
+
+
+def _momentos(n_ativos, dias, seed=0):
+    rng = np.random.default_rng(seed)
+    fatores = rng.normal(0, 0.01, (dias, 3))
+    retornos = fatores @ rng.normal(1, 0.5, (n_ativos, 3)).T + rng.normal(0, 0.015, (dias, n_ativos))
+    retornos += rng.normal(0.0005, 0.0005, n_ativos)
+    return retornos.mean(axis=0), np.cov(retornos.T)
+
+
+def _avaliar_laco(W, mu, cov):
+    """Um vetor de pesos por vez, como no recálculo com pesos iguais."""
+    resultados = []
+    for w in W:
+        retorno = float(w @ mu)
+        desvio = float(np.sqrt(w @ cov @ w))
+        resultados.append((retorno, desvio))
+    return resultados
+
+
+def bench_cenarios(n_ativos, dias, cenarios, iterations):
+    mu, cov = _momentos(n_ativos, dias)
+    print(f"\navaliação de cenários ({n_ativos} ativos)")
+    print(f"{'cenários':>9} {'laço (ms)':>10} {'lote (ms)':>10} {'speedup':>9}")
+    for n_cenarios in cenarios:
+        W = np.random.default_rng(1).dirichlet(np.ones(n_ativos), n_cenarios)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            _avaliar_laco(W, mu, cov)
+        t_laco = (time.perf_counter() - start) / iterations
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            avaliar_pesos(W, mu, cov)
+        t_lote = (time.perf_counter() - start) / iterations
+
+        print(f"{n_cenarios:>9} {t_laco * 1000:>10.1f} {t_lote * 1000:>10.2f} {t_laco / t_lote:>8.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ativos', type=int, nargs='+', default=[10, 50, 100, 200], help='Ativos por carteira')
+    parser.add_argument('--dias', type=int, default=504, help='Dias de retornos')
+    parser.add_argument('--pontos', type=int, default=20, help='Pontos da fronteira')
+    parser.add_argument('--max-peso', type=float, default=0.1, help='Peso máximo por ativo')
+    parser.add_argument('--cenarios', type=int, nargs='+', default=[1000, 10000], help='Vetores de pesos avaliados')
+    parser.add_argument('--iterations', type=int, default=5, help='Repetições por medição')
+    args = parser.parse_args()
+
+    print(f"{'ativos':>8} {'max_peso':>9} {'iterações':>10} {'ms (melhor)':>12} {'ms (mediana)':>13} {'sharpe':>8}")
+    for n_ativos in args.ativos:
+        mu, cov = _momentos(n_ativos, args.dias)
+        max_peso = max(args.max_peso, 1.0 / n_ativos)
+
+        tempos = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            resultado = otimizar_carteira(mu, cov, args.pontos, max_peso=max_peso)
+            tempos.append(time.perf_counter() - start)
+
+        print(f"{n_ativos:>8} {max_peso:>9.3f} {resultado['iteracoes']:>10} {min(tempos) * 1000:>12.1f} "
+              f"{np.median(tempos) * 1000:>13.1f} {resultado['maximo_sharpe']['indice_sharpe']:>8.4f}")
+
+    bench_cenarios(max(args.ativos), args.dias, args.cenarios, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
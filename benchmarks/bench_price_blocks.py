@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos blocos anuais de fechamentos (PRICE_STORAGE='blocks').
+
+Compara a carga da matriz de preços de uma carteira pelas linhas de
+price_bar (uma por barra) e pelos blocos de price_block (um por ticker e
+ano): linhas lidas, bytes armazenados dos fechamentos e tempo de carga.
+
+Uso:
+    python benchmarks/bench_price_blocks.py --tickers 50 --anos 1 10
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func
+
+from app import create_app, db
+from app.model.Asset import Asset
+from app.model.Carteira import Carteira
+from app.model.Cliente import Cliente
+from app.model.PriceBar import PriceBar
+from app.model.PriceBlock import PriceBlock
+from app.model.User import User
+from app.utils.price_matrix import load_price_matrix
+
+
+def _carteira(cliente_id, n_tickers, anos, seed=0):
+    rng = np.random.default_rng(seed)
+    carteira = Carteira(cliente_id, 'Carteira Benchmark')
+    Carteira.save(carteira)
+    inicio = date(2024 - anos + 1, 1, 1).toordinal()
+    dias = [date.fromordinal(day) for day in range(inicio, date(2025, 1, 1).toordinal())
+            if date.fromordinal(day).weekday() < 5]
+    for ticker in ['BOVA11.SA'] + [f"TCK{j:03d}.SA" for j in range(n_tickers - 1)]:
+        closes = np.round(30 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, len(dias)))), 2)
+        Asset.bulk_insert([{'carteira_id': carteira.id, 'ticker': ticker, 'date': day, 'close': float(close)}
+                           for day, close in zip(dias, closes)])
+    return carteira.id
+
+
+def _timeit(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=50, help='Ativos da carteira')
+    parser.add_argument('--anos', type=int, nargs='+', default=[1, 10], help='Anos de histórico')
+    parser.add_argument('--iterations', type=int, default=5, help='Repetições por medição')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+
+    print(f"{'anos':>5} {'linhas':>8} {'blocos':>7} {'KB linhas':>10} {'KB blocos':>10} "
+          f"{'ms linhas':>10} {'ms blocos':>10} {'speedup':>8}")
+    for anos in args.anos:
+        with app.app_context():
+            db.create_all()
+            user = User('Benchmark', 'bench@example.com', 'bench123')
+            db.session.add(user)
+            db.session.commit()
+            cliente = Cliente(user.id, 'Cliente Benchmark', 'cliente@example.com', '000.000.000-00')
+            Cliente.save(cliente)
+            carteira_id = _carteira(cliente.id, args.tickers, anos)
+
+            linhas = PriceBar.query.count()
+            blocos = PriceBlock.query.count()
+            # Fechamento (8 bytes) + data (4 bytes) por linha, sem o overhead de tupla do banco
+            kb_linhas = linhas * 12 / 1024
+            kb_blocos = (db.session.query(func.sum(func.length(PriceBlock.payload))).scalar() or 0) / 1024
+
+            app.config['PRICE_STORAGE'] = 'rows'
+            esperado = load_price_matrix(carteira_id)
+            por_linhas = _timeit(lambda: load_price_matrix(carteira_id), args.iterations)
+            app.config['PRICE_STORAGE'] = 'blocks'
+            if not np.array_equal(load_price_matrix(carteira_id).prices, esperado.prices, equal_nan=True):
+                raise RuntimeError("A matriz dos blocos difere da matriz das linhas")
+            por_blocos = _timeit(lambda: load_price_matrix(carteira_id), args.iterations)
+
+            print(f"{anos:>5} {linhas:>8} {blocos:>7} {kb_linhas:>10.0f} {kb_blocos:>10.0f} "
+                  f"{por_linhas * 1000:>10.1f} {por_blocos * 1000:>10.1f} {por_linhas / por_blocos:>7.1f}x")
+
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark da matriz de fechamentos compartilhada (PRICE_STORE_DIR).
+
+Compara a carga da matriz de uma carteira pelo banco (linhas de price_bar)
+com a carga pelo armazenamento compartilhado (.npy mapeados em memória), e
+mostra o tamanho da geração, que fica uma única vez no cache de páginas
+para todos os workers.
+
+Uso:
+    python benchmarks/bench_price_store.py --tickers 50 --anos 1 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.model.Asset import Asset
+from app.model.Carteira import Carteira
+from app.model.Cliente import Cliente
+from app.model.User import User
+from app.utils.price_matrix import load_price_matrix
+from app.utils.price_store import attach_price_store, build_price_store
+
+
+def _carteira(cliente_id, n_tickers, anos, seed=0):
+    rng = np.random.default_rng(seed)
+    carteira = Carteira(cliente_id, 'Carteira Benchmark')
+    Carteira.save(carteira)
+    inicio = date(2024 - anos + 1, 1, 1).toordinal()
+    dias = [date.fromordinal(day) for day in range(inicio, date(2025, 1, 1).toordinal())
+            if date.fromordinal(day).weekday() < 5]
+    for ticker in ['BOVA11.SA'] + [f"TCK{j:03d}.SA" for j in range(n_tickers - 1)]:
+        closes = 30 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, len(dias))))
+        Asset.bulk_insert([{'carteira_id': carteira.id, 'ticker': ticker, 'date': day, 'close': float(close)}
+                           for day, close in zip(dias, closes)])
+    return carteira.id
+
+
+def _timeit(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=50, help='Ativos da carteira')
+    parser.add_argument('--anos', type=int, nargs='+', default=[1, 10], help='Anos de histórico')
+    parser.add_argument('--iterations', type=int, default=5, help='Repetições por medição')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.config['PRICE_STORE_AUTO_REFRESH'] = False
+
+    print(f"{'anos':>5} {'KB geração':>11} {'ms montagem':>12} {'ms banco':>9} {'ms compartilhada':>17} {'speedup':>8}")
+    for anos in args.anos:
+        with app.app_context(), tempfile.TemporaryDirectory() as directory:
+            db.create_all()
+            user = User('Benchmark', 'bench@example.com', 'bench123')
+            db.session.add(user)
+            db.session.commit()
+            cliente = Cliente(user.id, 'Cliente Benchmark', 'cliente@example.com', '000.000.000-00')
+            Cliente.save(cliente)
+            carteira_id = _carteira(cliente.id, args.tickers, anos)
+
+            app.config['PRICE_STORE_DIR'] = None
+            esperado = load_price_matrix(carteira_id)
+            banco = _timeit(lambda: load_price_matrix(carteira_id), args.iterations)
+
+            app.config['PRICE_STORE_DIR'] = directory
+            montagem = _timeit(build_price_store, 1)
+            if not np.array_equal(load_price_matrix(carteira_id).prices, esperado.prices, equal_nan=True):
+                raise RuntimeError("A matriz compartilhada difere da matriz do banco")
+            compartilhada = _timeit(lambda: load_price_matrix(carteira_id), args.iterations)
+            tamanho = attach_price_store().prices.nbytes / 1024
+
+            print(f"{anos:>5} {tamanho:>11.0f} {montagem * 1000:>12.1f} {banco * 1000:>9.1f} "
+                  f"{compartilhada * 1000:>17.1f} {banco / compartilhada:>7.1f}x")
+
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark da simulação de Monte Carlo de VaR/CVaR (app/utils/risco.py).
+
+Gera uma covariância sintética com um modelo de 3 fatores e mede o tempo de
+simular_retornos + medidas_risco por número de caminhos, em série e com o pool
+de processos, comparando com um laço diário (um vetor de choques por pregão).
+
+Uso:
+    python benchmarks/bench_risco.py --ativos 50 --horizonte 10 --caminhos 100000 1000000 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.risco import fator_covariancia, medidas_risco, simular_retornos
+
+CONFIANCAS = [0.95, 0.99]
+
+
+def _momentos(n_ativos, dias=504, seed=0):
+    rng = np.random.default_rng(seed)
+    fatores = rng.normal(0, 0.01, (dias, 3))
+    retornos = fatores @ rng.normal(1, 0.5, (n_ativos, 3)).T + rng.normal(0, 0.015, (dias, n_ativos))
+    retornos += rng.normal(0.0005, 0.0005, n_ativos)
+    return retornos.mean(axis=0), np.cov(retornos.T)
+
+
+def _simular_diario(mu, cov, pesos, horizonte, caminhos, seed=0):
+    """Referência: retornos diários μ + L·z acumulados pregão a pregão."""
+    rng = np.random.default_rng(seed)
+    fator_t = fator_covariancia(cov).T
+    acumulado = np.ones((caminhos, len(mu)))
+    for _ in range(horizonte):
+        acumulado *= 1.0 + mu + rng.standard_normal((caminhos, len(mu))) @ fator_t
+    return acumulado @ pesos - pesos.sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ativos', type=int, default=50, help='Ativos da carteira')
+    parser.add_argument('--horizonte', type=int, default=10, help='Horizonte em pregões')
+    parser.add_argument('--caminhos', type=int, nargs='+', default=[100_000, 1_000_000], help='Caminhos simulados')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processos do pool')
+    parser.add_argument('--chunk-mb', type=float, default=32, help='Memória máxima por bloco')
+    args = parser.parse_args()
+
+    mu, cov = _momentos(args.ativos)
+    pesos = np.full(args.ativos, 1.0 / args.ativos)
+    print(f"{args.ativos} ativos, horizonte de {args.horizonte} pregões, {args.workers} processo(s)")
+    print(f"{'caminhos':>10} {'diário (ms)':>12} {'série (ms)':>11} {'pool (ms)':>10} {'VaR 95%':>8} {'VaR 99%':>8}")
+
+    # Aquece o pool (criação dos processos) fora da medição
+    simular_retornos(mu, cov, pesos, args.horizonte, 10_000, workers=args.workers, chunk_mb=0.1,
+                     pool_min_caminhos=0)
+
+    for caminhos in args.caminhos:
+        start = time.perf_counter()
+        medidas_risco(_simular_diario(mu, cov, pesos, args.horizonte, caminhos), CONFIANCAS)
+        t_diario = time.perf_counter() - start
+
+        tempos = {}
+        for modo, workers in (('serie', 1), ('pool', args.workers)):
+            start = time.perf_counter()
+            simulacao = simular_retornos(mu, cov, pesos, args.horizonte, caminhos, seed=0, workers=workers,
+                                         chunk_mb=args.chunk_mb, pool_min_caminhos=0)
+            medidas = medidas_risco(simulacao['retornos'], CONFIANCAS)
+            tempos[modo] = time.perf_counter() - start
+
+        print(f"{caminhos:>10} {t_diario * 1000:>12.0f} {tempos['serie'] * 1000:>11.0f} {tempos['pool'] * 1000:>10.0f} "
+              f"{medidas['var'][0]:>8.4f} {medidas['var'][1]:>8.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Grava séries do yfinance em CSV para o provedor de replay.
+
+Uso:
+    python benchmarks/record_replay_data.py --out replay_data --period 5y PETR4.SA ITUB4.SA BOVA11.SA
+
+Depois, rode a aplicação ou os benchmarks com:
+    MARKET_DATA_PROVIDER=replay REPLAY_DATA_DIR=replay_data
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.providers.yfinance_provider import YFinanceProvider
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('tickers', nargs='+', help='Tickers a gravar (ex: PETR4.SA)')
+    parser.add_argument('--out', default='replay_data', help='Diretório de saída')
+    parser.add_argument('--period', default='5y', help='Período a gravar')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    frames = YFinanceProvider().history_many(args.tickers, period=args.period, interval='1d')
+
+    for ticker in args.tickers:
+        df = frames.get(ticker)
+        if df is None:
+            print(f"{ticker}: sem dados")
+            continue
+        path = os.path.join(args.out, f"{ticker}.csv")
+        df.to_csv(path, index_label='Date')
+        print(f"{ticker}: {len(df)} barras -> {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,4 +11,8 @@ pip install -r requirements.txt
 echo "🗄️ Executando migrações do banco..."
 flask db upgrade
 
+# Garante as partições anuais de price_bar (Postgres)
+echo "🗂️ Criando partições de price_bar..."
+flask partitions ensure
+
 echo "✅ Build concluído com sucesso!"
@@ -23,6 +23,61 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', SECRET_KEY)
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 3600))  # 1 hora
 
+    # Cache persistente de séries históricas (yfinance)
+    PRICE_CACHE_ENABLED = os.getenv('PRICE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    # Sem caminho configurado, o cache fica no diretório instance da aplicação
+    PRICE_CACHE_PATH = os.getenv('PRICE_CACHE_PATH')
+    PRICE_CACHE_TTL = int(os.getenv('PRICE_CACHE_TTL', 900))  # 15 minutos
+    PRICE_CACHE_MAX_MB = int(os.getenv('PRICE_CACHE_MAX_MB', 256))
+    PRICE_CACHE_RETENTION = int(os.getenv('PRICE_CACHE_RETENTION', 7 * 24 * 3600))  # 7 dias
+
+    # Sincronização incremental: baixa apenas as barras que faltam
+    DELTA_SYNC_ENABLED = os.getenv('DELTA_SYNC_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    # Indicadores de carteira materializados (invalidados por cadastro/remoção de ativos)
+    INDICADORES_CACHE_ENABLED = os.getenv('INDICADORES_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    # Origem das médias/covariâncias: 'streaming' (estatísticas incrementais) ou 'history' (recalcula)
+    INDICADORES_SOURCE = os.getenv('INDICADORES_SOURCE', 'streaming')
+
+    # Processos do pool das análises pesadas em CPU, por worker do gunicorn (0 = número de CPUs)
+    ANALYTICS_WORKERS = int(os.getenv('ANALYTICS_WORKERS', '2'))
+    # Indicadores em lote: carteiras a calcular a partir das quais o pool é usado
+    INDICADORES_POOL_MIN_CARTEIRAS = int(os.getenv('INDICADORES_POOL_MIN_CARTEIRAS', '4'))
+
+    # Simulação de Monte Carlo (VaR/CVaR): caminhos a partir dos quais o pool é
+    # usado e memória máxima por bloco
+    MONTE_CARLO_POOL_MIN_PATHS = int(os.getenv('MONTE_CARLO_POOL_MIN_PATHS', '200000'))
+    MONTE_CARLO_CHUNK_MB = int(os.getenv('MONTE_CARLO_CHUNK_MB', '32'))
+
+    # Paginação por cursor das listagens (clientes, carteiras, ativos)
+    PAGE_DEFAULT_LIMIT = int(os.getenv('PAGE_DEFAULT_LIMIT', '50'))
+    PAGE_MAX_LIMIT = int(os.getenv('PAGE_MAX_LIMIT', '1000'))
+
+    # Origem dos fechamentos das análises: 'rows' (price_bar, uma linha por barra) ou
+    # 'blocks' (price_block, um bloco comprimido por ticker e ano)
+    PRICE_STORAGE = os.getenv('PRICE_STORAGE', 'rows')
+
+    # Matriz de fechamentos compartilhada entre os workers (.npy mapeados em memória);
+    # vazio = desligado. Use um tmpfs (ex: /dev/shm/price_store)
+    PRICE_STORE_DIR = os.getenv('PRICE_STORE_DIR')
+    PRICE_STORE_AUTO_REFRESH = os.getenv('PRICE_STORE_AUTO_REFRESH', 'true').lower() in ('1', 'true', 'yes')
+    PRICE_STORE_REFRESH_SECONDS = int(os.getenv('PRICE_STORE_REFRESH_SECONDS', '30'))
+
+    # Partições anuais de price_bar (Postgres): anos à frente criados por `flask partitions ensure`
+    PRICE_PARTITION_AHEAD_YEARS = int(os.getenv('PRICE_PARTITION_AHEAD_YEARS', '1'))
+
+    # Provedor de dados de mercado: 'yfinance' ou 'replay' (offline, para benchmarks/testes de carga)
+    MARKET_DATA_PROVIDER = os.getenv('MARKET_DATA_PROVIDER', 'yfinance')
+    REPLAY_DATA_DIR = os.getenv('REPLAY_DATA_DIR')
+    REPLAY_LATENCY_MS = float(os.getenv('REPLAY_LATENCY_MS', 0))
+    REPLAY_ERROR_RATE = float(os.getenv('REPLAY_ERROR_RATE', 0))
+    REPLAY_SEED = int(os.getenv('REPLAY_SEED', 42))
+
+    # Coalescência de buscas idênticas (lock no Redis ou, sem ele, lock de arquivo local)
+    SINGLE_FLIGHT_LOCK_TIMEOUT = float(os.getenv('SINGLE_FLIGHT_LOCK_TIMEOUT', 30))
+    # Locks de arquivo (sem Redis); sem caminho configurado, ficam no diretório instance da aplicação
+    SINGLE_FLIGHT_LOCK_DIR = os.getenv('SINGLE_FLIGHT_LOCK_DIR')
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
@@ -45,6 +100,7 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    PRICE_CACHE_ENABLED = False
 
 config = {
     'development': DevelopmentConfig,
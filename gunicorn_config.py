@@ -26,6 +26,23 @@ limit_request_field_size = 8190
 def on_starting(server):
     server.log.info("🚀 Iniciando servidor Gunicorn na Render...")
 
+def when_ready(server):
+    # Monta a matriz de preços compartilhada no master (preload_app), antes dos workers
+    if not os.getenv('PRICE_STORE_DIR'):
+        return
+    try:
+        from app import db
+        from app.utils.price_store import build_price_store
+        app = server.app.wsgi()
+        with app.app_context():
+            generation = build_price_store()
+            db.session.remove()
+            # Os workers não devem herdar conexões abertas pelo master
+            db.engine.dispose()
+        server.log.info(f"📦 Matriz de preços compartilhada: geração {generation}")
+    except Exception as e:
+        server.log.warning(f"Matriz de preços compartilhada indisponível: {e}")
+
 def worker_int(worker):
     worker.log.info(f"💀 Worker {worker.pid} interrompido")
 
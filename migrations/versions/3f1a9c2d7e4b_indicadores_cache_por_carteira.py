@@ -0,0 +1,32 @@
+"""indicadores materializados por carteira
+
+Revision ID: 3f1a9c2d7e4b
+Revises: 8c097be14bd5
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2d7e4b'
+down_revision = '8c097be14bd5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('carteira_indicadores_cache',
+    sa.Column('carteira_id', sa.Integer(), nullable=False),
+    sa.Column('data_version', sa.Integer(), nullable=False),
+    sa.Column('payload_version', sa.Integer(), nullable=True),
+    sa.Column('payload', sa.LargeBinary(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['carteira_id'], ['carteiras.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('carteira_id')
+    )
+
+
+def downgrade():
+    op.drop_table('carteira_indicadores_cache')
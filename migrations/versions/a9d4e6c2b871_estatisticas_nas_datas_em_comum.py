@@ -0,0 +1,24 @@
+"""estatísticas incrementais restritas às datas em comum a todos os tickers
+
+Revision ID: a9d4e6c2b871
+Revises: f3c7d2a8b915
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e6c2b871'
+down_revision = 'f3c7d2a8b915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Os estados gravados no formato anterior (por par de tickers) são reconstruídos na próxima leitura
+    op.execute("DELETE FROM carteira_estatisticas")
+
+
+def downgrade():
+    op.execute("DELETE FROM carteira_estatisticas")
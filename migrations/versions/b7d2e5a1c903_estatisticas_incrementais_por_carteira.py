@@ -0,0 +1,31 @@
+"""estatísticas incrementais de covariância por carteira
+
+Revision ID: b7d2e5a1c903
+Revises: 3f1a9c2d7e4b
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e5a1c903'
+down_revision = '3f1a9c2d7e4b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('carteira_estatisticas',
+    sa.Column('carteira_id', sa.Integer(), nullable=False),
+    sa.Column('data_version', sa.Integer(), nullable=False),
+    sa.Column('state', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['carteira_id'], ['carteiras.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('carteira_id')
+    )
+
+
+def downgrade():
+    op.drop_table('carteira_estatisticas')
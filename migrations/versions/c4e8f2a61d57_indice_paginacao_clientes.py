@@ -0,0 +1,24 @@
+"""índice (user_adm_id, id) para a paginação por cursor dos clientes
+
+Revision ID: c4e8f2a61d57
+Revises: b7d2e5a1c903
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8f2a61d57'
+down_revision = 'b7d2e5a1c903'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_clientes_user_adm_id_id', 'clientes', ['user_adm_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_clientes_user_adm_id_id', table_name='clientes')
@@ -0,0 +1,24 @@
+"""indicadores materializados gravados em MessagePack
+
+Revision ID: c5e81f3a9d42
+Revises: a9d4e6c2b871
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e81f3a9d42'
+down_revision = 'a9d4e6c2b871'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Os payloads gravados com pickle são descartados e recalculados na próxima leitura
+    op.execute("UPDATE carteira_indicadores_cache SET payload = NULL, payload_version = NULL")
+
+
+def downgrade():
+    op.execute("UPDATE carteira_indicadores_cache SET payload = NULL, payload_version = NULL")
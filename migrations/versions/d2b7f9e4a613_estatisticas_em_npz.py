@@ -0,0 +1,24 @@
+"""estatísticas incrementais gravadas em .npz
+
+Revision ID: d2b7f9e4a613
+Revises: c5e81f3a9d42
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b7f9e4a613'
+down_revision = 'c5e81f3a9d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Os estados gravados com pickle são reconstruídos na próxima leitura
+    op.execute("DELETE FROM carteira_estatisticas")
+
+
+def downgrade():
+    op.execute("DELETE FROM carteira_estatisticas")
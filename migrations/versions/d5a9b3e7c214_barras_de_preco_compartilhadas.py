@@ -0,0 +1,105 @@
+"""barras de preço compartilhadas (price_bar) e associação carteira-ticker (carteira_ativo)
+
+Revision ID: d5a9b3e7c214
+Revises: c4e8f2a61d57
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a9b3e7c214'
+down_revision = 'c4e8f2a61d57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('price_bar',
+    sa.Column('ticker', sa.String(length=20), nullable=False),
+    sa.Column('interval', sa.String(length=5), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=True),
+    sa.Column('high', sa.Float(), nullable=True),
+    sa.Column('low', sa.Float(), nullable=True),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('volume', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('close > 0', name='check_price_bar_close_positive'),
+    sa.PrimaryKeyConstraint('ticker', 'interval', 'date')
+    )
+    op.create_table('carteira_ativo',
+    sa.Column('carteira_id', sa.Integer(), nullable=False),
+    sa.Column('ticker', sa.String(length=20), nullable=False),
+    sa.Column('interval', sa.String(length=5), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['carteira_id'], ['carteiras.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('carteira_id', 'ticker')
+    )
+    with op.batch_alter_table('carteira_ativo', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_carteira_ativo_ticker'), ['ticker'], unique=False)
+
+    # Os registros antigos são diários; cada (ticker, data) fica com o registro mais recente
+    op.execute("""
+        INSERT INTO price_bar (ticker, interval, date, close, created_at)
+        SELECT ticker, '1d', date, close, created_at FROM asset
+        WHERE id IN (SELECT MAX(id) FROM asset GROUP BY ticker, date)
+    """)
+    # A janela de cada carteira começa na sua primeira data cadastrada
+    op.execute("""
+        INSERT INTO carteira_ativo (carteira_id, ticker, interval, start_date, created_at)
+        SELECT carteira_id, ticker, '1d', MIN(date), MIN(created_at) FROM asset
+        GROUP BY carteira_id, ticker
+    """)
+    # As carteiras passam a enxergar as barras das outras: indicadores e estatísticas são refeitos
+    op.execute("""
+        UPDATE carteira_indicadores_cache
+        SET data_version = data_version + 1, payload = NULL, payload_version = NULL
+    """)
+    op.execute("DELETE FROM carteira_estatisticas")
+
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_asset_ticker'))
+        batch_op.drop_index(batch_op.f('ix_asset_date'))
+        batch_op.drop_index(batch_op.f('ix_asset_carteira_id'))
+    op.drop_table('asset')
+
+
+def downgrade():
+    op.create_table('asset',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('carteira_id', sa.Integer(), nullable=False),
+    sa.Column('ticker', sa.String(length=20), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('close > 0', name='check_close_positive'),
+    sa.ForeignKeyConstraint(['carteira_id'], ['carteiras.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('carteira_id', 'ticker', 'date', name='uq_carteira_ticker_date')
+    )
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_asset_carteira_id'), ['carteira_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_asset_date'), ['date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_asset_ticker'), ['ticker'], unique=False)
+
+    op.execute("""
+        INSERT INTO asset (carteira_id, ticker, date, close, created_at)
+        SELECT ativo.carteira_id, bar.ticker, bar.date, bar.close, bar.created_at
+        FROM carteira_ativo ativo
+        JOIN price_bar bar ON bar.ticker = ativo.ticker AND bar.interval = ativo.interval
+            AND (ativo.start_date IS NULL OR bar.date >= ativo.start_date)
+    """)
+    op.execute("""
+        UPDATE carteira_indicadores_cache
+        SET data_version = data_version + 1, payload = NULL, payload_version = NULL
+    """)
+    op.execute("DELETE FROM carteira_estatisticas")
+
+    with op.batch_alter_table('carteira_ativo', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_carteira_ativo_ticker'))
+    op.drop_table('carteira_ativo')
+    op.drop_table('price_bar')
@@ -0,0 +1,74 @@
+"""price_bar particionada por ano (Postgres) com índice BRIN em date
+
+Revision ID: e8b1c4f9a376
+Revises: d5a9b3e7c214
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b1c4f9a376'
+down_revision = 'd5a9b3e7c214'
+branch_labels = None
+depends_on = None
+
+COLUNAS = 'ticker, interval, date, open, high, low, close, volume, created_at'
+
+
+def _price_bar_columns():
+    return [
+        sa.Column('ticker', sa.String(length=20), nullable=False),
+        sa.Column('interval', sa.String(length=5), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('open', sa.Float(), nullable=True),
+        sa.Column('high', sa.Float(), nullable=True),
+        sa.Column('low', sa.Float(), nullable=True),
+        sa.Column('close', sa.Float(), nullable=False),
+        sa.Column('volume', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.CheckConstraint('close > 0', name='check_price_bar_close_positive'),
+        sa.PrimaryKeyConstraint('ticker', 'interval', 'date'),
+    ]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # Sem particionamento: tabela comum com índice em date
+        op.create_index('ix_price_bar_date', 'price_bar', ['date'], unique=False)
+        return
+
+    op.rename_table('price_bar', 'price_bar_legacy')
+    op.execute("ALTER TABLE price_bar_legacy RENAME CONSTRAINT price_bar_pkey TO price_bar_legacy_pkey")
+    op.create_table('price_bar', *_price_bar_columns(), postgresql_partition_by='RANGE (date)')
+    op.create_index('ix_price_bar_date', 'price_bar', ['date'], unique=False, postgresql_using='brin')
+
+    # Uma partição por ano, dos dados existentes até o ano seguinte ao atual, e a partição padrão
+    current = date.today().year
+    first = op.get_bind().execute(sa.text("SELECT MIN(date) FROM price_bar_legacy")).scalar()
+    for year in range(min(first.year, current) if first else current, current + 2):
+        op.execute(
+            f"CREATE TABLE price_bar_{year} PARTITION OF price_bar "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+    op.execute("CREATE TABLE price_bar_default PARTITION OF price_bar DEFAULT")
+
+    op.execute(f"INSERT INTO price_bar ({COLUNAS}) SELECT {COLUNAS} FROM price_bar_legacy")
+    op.drop_table('price_bar_legacy')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        op.drop_index('ix_price_bar_date', table_name='price_bar')
+        return
+
+    # Partições desanexadas com `flask partitions detach` não voltam para a tabela
+    op.rename_table('price_bar', 'price_bar_partitioned')
+    op.execute("ALTER TABLE price_bar_partitioned RENAME CONSTRAINT price_bar_pkey TO price_bar_partitioned_pkey")
+    op.create_table('price_bar', *_price_bar_columns())
+    op.execute(f"INSERT INTO price_bar ({COLUNAS}) SELECT {COLUNAS} FROM price_bar_partitioned")
+    op.execute("DROP TABLE price_bar_partitioned CASCADE")
@@ -0,0 +1,70 @@
+"""blocos anuais comprimidos de fechamentos por ticker (price_block)
+
+Revision ID: f3c7d2a8b915
+Revises: e8b1c4f9a376
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from datetime import datetime
+from itertools import groupby
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+from app.utils.price_blocks import encode_block
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c7d2a8b915'
+down_revision = 'e8b1c4f9a376'
+branch_labels = None
+depends_on = None
+
+# Blocos gravados por INSERT durante a conversão
+BATCH_BLOCKS = 500
+
+
+def upgrade():
+    price_block = op.create_table('price_block',
+    sa.Column('ticker', sa.String(length=20), nullable=False),
+    sa.Column('interval', sa.String(length=5), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('first_date', sa.Date(), nullable=False),
+    sa.Column('last_date', sa.Date(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('ticker', 'interval', 'year')
+    )
+
+    # Converte as barras existentes: um bloco por (ticker, interval, ano)
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT ticker, interval, date, close FROM price_bar ORDER BY ticker, interval, date"
+    )).yield_per(50_000)
+    now = datetime.utcnow()
+    batch = []
+    for (ticker, interval, year), group in groupby(rows, key=lambda row: (row[0], row[1], _date(row[2]).year)):
+        group = list(group)
+        dates = np.array([_date(row[2]) for row in group], dtype='datetime64[D]')
+        closes = np.array([row[3] for row in group], dtype=float)
+        batch.append({
+            'ticker': ticker, 'interval': interval, 'year': year, 'count': len(group),
+            'first_date': dates[0].item(), 'last_date': dates[-1].item(),
+            'payload': encode_block(year, dates, closes), 'updated_at': now,
+        })
+        if len(batch) >= BATCH_BLOCKS:
+            op.bulk_insert(price_block, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(price_block, batch)
+
+
+def _date(value):
+    """Data da linha (o SQLite devolve texto ISO em consultas textuais)."""
+    return datetime.strptime(value, '%Y-%m-%d').date() if isinstance(value, str) else value
+
+
+def downgrade():
+    op.drop_table('price_block')
@@ -0,0 +1,50 @@
+"""
+Fixtures compartilhadas dos testes com banco: app de teste, admin autenticado, cliente e carteira.
+"""
+import pytest
+from flask import g
+
+from app import create_app, db
+from app.model.User import User
+from app.model.Cliente import Cliente
+from app.model.Carteira import Carteira
+
+
+@pytest.fixture
+def app():
+    """Fixture para criar app de teste."""
+    app = create_app('testing')
+    return app
+
+
+@pytest.fixture
+def admin(app):
+    """Admin com o banco criado, dentro de um contexto de requisição autenticado (g.current_user_id)."""
+    with app.app_context():
+        db.create_all()
+        user = User('Test User', 'test@example.com', 'password123')
+        db.session.add(user)
+        db.session.commit()
+
+        with app.test_request_context():
+            g.current_user_id = user.id
+            yield user
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def cliente(admin):
+    """Cliente do admin."""
+    cliente = Cliente(admin.id, 'Cliente', 'cliente@example.com', '000.000.000-00')
+    Cliente.save(cliente)
+    return cliente
+
+
+@pytest.fixture
+def carteira(cliente):
+    """Carteira vazia do cliente."""
+    carteira = Carteira(cliente.id, 'Carteira')
+    Carteira.save(carteira)
+    return carteira
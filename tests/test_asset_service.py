@@ -263,6 +263,81 @@ class TestAssetServiceIntegration(unittest.TestCase):
                     self.assertIsInstance(result['results'][key], (int, float))
 
 
+class TestAssetServiceHistorico(unittest.TestCase):
+    """Testes para a serialização vetorizada do histórico."""
+
+    def test_historico_matches_row_by_row_semantics(self):
+        """Arredondamento, colunas ausentes e datas inválidas seguem a montagem linha a linha."""
+        index = pd.DatetimeIndex(['2024-01-02 10:00', None, '2024-01-04'], name='Date')
+        df = pd.DataFrame({
+            'Close': [53.005, 28.405, 0.125],
+            'High': [53.5, 29.0, np.nan],
+        }, index=index)
+
+        result = AssetService.calculateIndexAsset(df, 'PETR4.SA')
+
+        self.assertEqual(result['historico'], [
+            {'data': '2024-01-02', 'close': round(53.005, 2), 'high': 53.5, 'low': round(53.005, 2), 'open': round(53.005, 2)},
+            {'data': '2024-01-04', 'close': round(0.125, 2), 'high': result['historico'][1]['high'], 'low': 0.12, 'open': 0.12},
+        ])
+        self.assertTrue(np.isnan(result['historico'][1]['high']))
+        self.assertIsInstance(result['historico'][0]['close'], float)
+
+    def test_columnar_format_matches_records(self):
+        """O formato colunar traz os mesmos valores dos registros, um array por campo."""
+        dates = pd.date_range('2024-01-01', periods=30, freq='D', name='Date')
+        prices = 30 + np.linspace(0, 3, 30)
+        df = pd.DataFrame({'Open': prices, 'High': prices + 1, 'Low': prices - 1, 'Close': prices}, index=dates)
+
+        records = AssetService.calculateIndexAsset(df.copy(), 'PETR4.SA')
+        columnar = AssetService.calculateIndexAsset(df.copy(), 'PETR4.SA', formato='columnar')
+
+        self.assertEqual(records['results'], columnar['results'])
+        self.assertEqual(list(columnar['historico']), ['data', 'close', 'high', 'low', 'open'])
+        for field, values in columnar['historico'].items():
+            self.assertEqual(values, [bar[field] for bar in records['historico']])
+
+
+class TestAssetServiceBatch(unittest.TestCase):
+    """Testes para a busca de ativos em lote."""
+
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        dates = pd.date_range('2024-01-01', periods=20, freq='D')
+        self.frames = {}
+        for i, ticker in enumerate(['PETR4.SA', 'ITUB4.SA']):
+            prices = 30 + i + np.linspace(0, 2, 20)
+            self.frames[ticker] = pd.DataFrame({
+                'Open': prices, 'High': prices * 1.01, 'Low': prices * 0.99, 'Close': prices
+            }, index=dates)
+
+    @patch('app.services.Asset_service.get_price_cache', return_value=None)
+    @patch('app.services.Asset_service.get_market_data_provider')
+    def test_batch_single_download_with_partial_failure(self, mock_provider, _):
+        """Um único download atende o lote e tickers sem dados falham isoladamente."""
+        mock_download = mock_provider.return_value.history_many
+        mock_download.return_value = self.frames
+
+        result, status_code = AssetService.get_assets_data_batch(['PETR4', 'itub4', 'XXXX3'], '1mo')
+
+        self.assertEqual(status_code, 200)
+        mock_download.assert_called_once()
+        self.assertEqual(mock_download.call_args.args[0], ['PETR4.SA', 'ITUB4.SA', 'XXXX3.SA'])
+
+        assets = result['assets']
+        self.assertEqual(list(assets), ['PETR4.SA', 'ITUB4.SA', 'XXXX3.SA'])
+        self.assertEqual(len(assets['PETR4.SA']['historico']), 20)
+        self.assertIn('sharpe', assets['ITUB4.SA']['results'])
+        self.assertFalse(assets['XXXX3.SA']['success'])
+
+    def test_batch_requires_list(self):
+        """Lista vazia ou ausente retorna 400."""
+        result, status_code = AssetService.get_assets_data_batch([], '1mo')
+
+        self.assertEqual(status_code, 400)
+        self.assertFalse(result['success'])
+
+
 if __name__ == '__main__':
     # Configure logging for tests
     import logging
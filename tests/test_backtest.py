@@ -0,0 +1,150 @@
+"""
+Testes do backtest vetorizado (comprar e manter e rebalanceamento periódico).
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.model.Asset import Asset
+from app.services.Analise_service import AnaliseService
+from app.utils.backtest import drawdown, inicios_periodos, metricas_desempenho, simular_alocacao
+from app.utils.jwt_utils import generate_token
+
+
+def _precos(dias=300, ativos=5, seed=0):
+    rng = np.random.default_rng(seed)
+    return 30 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (dias, ativos)), axis=0))
+
+
+def _simular_laco(precos, pesos, inicios, custo):
+    """Referência: quantidades por ativo atualizadas pregão a pregão."""
+    rebalancear = set(inicios.tolist())
+    patrimonio, turnover = [], []
+    quantidades, valor = None, 1.0
+    for t, linha in enumerate(precos):
+        if quantidades is not None:
+            valor = quantidades @ linha
+        if t in rebalancear:
+            if quantidades is None:
+                valor *= 1 - custo * np.abs(pesos).sum()
+            else:
+                atuais = quantidades * linha / valor
+                negociado = np.abs(pesos - atuais).sum()
+                turnover.append(negociado / 2)
+                valor *= 1 - custo * negociado
+            quantidades = pesos * valor / linha
+        patrimonio.append(valor)
+    return np.array(patrimonio), np.array(turnover)
+
+
+def test_inicios_periodos():
+    """Rebalanceia no primeiro pregão de cada mês/trimestre."""
+    dates = np.array(['2024-01-30', '2024-01-31', '2024-02-01', '2024-03-28', '2024-04-01', '2024-05-02'],
+                     dtype='datetime64[D]')
+    assert inicios_periodos(dates, 'nenhum').tolist() == [0]
+    assert inicios_periodos(dates, 'mensal').tolist() == [0, 2, 3, 4, 5]
+    assert inicios_periodos(dates, 'trimestral').tolist() == [0, 4]
+
+
+@pytest.mark.parametrize('custo', [0.0, 0.002])
+def test_rebalanceamento_matches_loop(custo):
+    """A versão vetorizada bate com o laço por pregão, com e sem custos."""
+    precos = _precos()
+    pesos = np.array([0.3, 0.25, 0.2, 0.15, 0.1])
+    inicios = np.array([0, 21, 42, 63, 126, 250])
+
+    resultado = simular_alocacao(precos, pesos, inicios, custo)
+    patrimonio, turnover = _simular_laco(precos, pesos, inicios, custo)
+
+    np.testing.assert_allclose(resultado['patrimonio'], patrimonio, rtol=1e-12)
+    np.testing.assert_allclose(resultado['turnover'], turnover, rtol=1e-12)
+    assert (resultado['custos'] > 0) == (custo > 0)
+
+
+def test_comprar_e_manter():
+    """Sem rebalanceamento, o patrimônio é a média ponderada dos preços relativos."""
+    precos = _precos()
+    pesos = np.full(5, 0.2)
+    resultado = simular_alocacao(precos, pesos, np.zeros(1, dtype=int))
+
+    np.testing.assert_allclose(resultado['patrimonio'], (precos / precos[0]) @ pesos)
+    assert len(resultado['turnover']) == 0 and resultado['custos'] == 0
+
+
+def test_metricas_e_drawdown():
+    """Drawdown em relação ao máximo anterior e retorno total da curva."""
+    patrimonio = np.array([1.0, 1.2, 0.9, 1.1, 1.3])
+    np.testing.assert_allclose(drawdown(patrimonio), [0, 0, -0.25, -1 / 12, 0])
+
+    metricas = metricas_desempenho(patrimonio)
+    assert metricas['retorno_total'] == pytest.approx(0.3)
+    assert metricas['max_drawdown'] == pytest.approx(-0.25)
+
+
+@pytest.fixture
+def carteira_id(carteira):
+    """Carteira com BOVA11.SA e três ativos em ~4 meses de pregões, com o contexto de um admin autenticado."""
+    rng = np.random.default_rng(7)
+    inicio = date(2024, 1, 1).toordinal()
+    rows = []
+    for ticker in ['BOVA11.SA', 'ITUB4.SA', 'PETR4.SA', 'VALE3.SA']:
+        closes = 30 * np.exp(np.cumsum(rng.normal(0.001, 0.02, 120)))
+        rows.extend({'carteira_id': carteira.id, 'ticker': ticker, 'date': date.fromordinal(inicio + day),
+                     'close': float(close)} for day, close in enumerate(closes))
+    Asset.bulk_insert(rows)
+    return carteira.id
+
+
+def test_backtest_service(carteira_id):
+    """Rebalanceamento mensal em pesos iguais, comparado ao BOVA11.SA."""
+    result, status = AnaliseService.backtest(carteira_id, {'rebalanceamento': 'mensal', 'custo_transacao': 0.001})
+
+    assert status == 200
+    backtest = result['backtest']
+    assert backtest['ativos'] == ['ITUB4.SA', 'PETR4.SA', 'VALE3.SA']
+    assert backtest['pregoes'] == 120
+    assert backtest['rebalanceamentos'] == 3
+    assert backtest['serie']['datas'][0] == '2024-01-01'
+    assert backtest['serie']['carteira'][0] == pytest.approx(1 - 0.001)
+    assert backtest['serie']['benchmark'][0] == 1.0
+    assert backtest['benchmark']['ticker'] == 'BOVA11.SA'
+    assert backtest['carteira']['turnover_total'] > 0
+    assert backtest['retorno_excedente'] == pytest.approx(
+        backtest['carteira']['retorno_total'] - backtest['benchmark']['retorno_total'])
+
+    periodo, _ = AnaliseService.backtest(carteira_id, {'rebalanceamento': 'nenhum', 'pesos': {'VALE3': 1.0},
+                                                       'inicio': '2024-02-01', 'fim': '2024-02-29'})
+    assert periodo['backtest']['pregoes'] == 29
+    assert periodo['backtest']['rebalanceamentos'] == 0
+    assert periodo['backtest']['carteira']['turnover_total'] == 0
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'rebalanceamento': 'semanal'}, 'rebalanceamento'),
+    ({'custo_transacao': 0.5}, 'custo_transacao'),
+    ({'inicio': '2024-13-01'}, 'YYYY-MM-DD'),
+    ({'pesos': [1.0]}, '3 finite values'),
+    ({'pesos': [0.25, 0.25, 0]}, 'sum to 1'),
+    ({'pesos': {'VALE3': 0.5, 'PETR4': 0.6}}, 'sum to 1'),
+])
+def test_backtest_validation(carteira_id, data, message):
+    """Parâmetros inválidos devolvem 400."""
+    result, status = AnaliseService.backtest(carteira_id, data)
+    assert status == 400
+    assert message in result['message']
+
+
+def test_backtest_endpoint(app, admin, carteira_id):
+    """O endpoint devolve a curva de patrimônio e as métricas."""
+    token = generate_token(admin.id, 'admin')
+    response = app.test_client().post(
+        f'/api/wallets/{carteira_id}/backtest',
+        json={'rebalanceamento': 'trimestral'},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == 200
+    backtest = response.get_json()['backtest']
+    assert backtest['rebalanceamentos'] == 1
+    assert len(backtest['serie']['drawdown_carteira']) == 120
@@ -0,0 +1,113 @@
+"""
+Testes da listagem e do detalhe de carteiras (consulta agregada, sem N+1).
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.model.User import User
+from app.model.Cliente import Cliente
+from app.model.Carteira import Carteira
+from app.model.Asset import Asset
+from app.services.Carteira_service import CarteiraService
+from app.utils.jwt_utils import generate_token
+
+
+def _popular(cliente_id, carteiras, tickers, dias):
+    ids, rows = [], []
+    for i in range(carteiras):
+        carteira = Carteira(cliente_id, f'Carteira {i}')
+        Carteira.save(carteira)
+        ids.append(carteira.id)
+        rows.extend({'carteira_id': carteira.id, 'ticker': f'TCK{j}.SA', 'date': date.fromordinal(738000 + day),
+                     'close': 10.0 + day} for j in range(tickers) for day in range(dias))
+    Asset.bulk_insert(rows)
+    return ids
+
+
+@pytest.fixture
+def dados(admin, cliente):
+    """Admin com dois clientes; a carteira vazia e as de outro admin não aparecem nas contagens."""
+    outro = User('Other User', 'other@example.com', 'password123')
+    db.session.add(outro)
+    db.session.commit()
+    cliente_b = Cliente(admin.id, 'Cliente B', 'b@example.com', '111.111.111-11')
+    Cliente.save(cliente_b)
+    cliente_outro = Cliente(outro.id, 'Outro', 'outro@example.com', '222.222.222-22')
+    Cliente.save(cliente_outro)
+
+    ids = _popular(cliente.id, 2, 3, 10)
+    vazia = Carteira(cliente_b.id, 'Vazia')
+    Carteira.save(vazia)
+    _popular(cliente_outro.id, 1, 2, 5)
+    return {'user_id': admin.id, 'cliente_id': cliente.id, 'carteiras': ids, 'vazia': vazia.id}
+
+
+def _contar_consultas(fn):
+    consultas = []
+    engine = db.engine
+
+    def _registrar(conn, cursor, statement, *args):
+        consultas.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', _registrar)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', _registrar)
+    return result, len(consultas)
+
+
+def test_get_portfolios_counts(dados):
+    """Nome do cliente, tickers distintos e registros de preço por carteira."""
+    result, status = CarteiraService.get_portfolios()
+
+    assert status == 200
+    portfolios = {p['id']: p for p in result['portfolios']}
+    assert list(portfolios) == dados['carteiras'] + [dados['vazia']]
+    for carteira_id in dados['carteiras']:
+        assert portfolios[carteira_id]['cliente_nome'] == 'Cliente'
+        assert portfolios[carteira_id]['quantidade_ativos'] == 3
+        assert portfolios[carteira_id]['quantidade_registros'] == 30
+    assert portfolios[dados['vazia']]['cliente_nome'] == 'Cliente B'
+    assert portfolios[dados['vazia']]['quantidade_ativos'] == 0
+    assert portfolios[dados['vazia']]['quantidade_registros'] == 0
+
+
+def test_get_portfolios_query_count_is_constant(dados):
+    """Uma consulta, qualquer que seja o número de carteiras ou o tamanho do histórico."""
+    db.session.expire_all()
+    _, poucas = _contar_consultas(CarteiraService.get_portfolios)
+
+    _popular(dados['cliente_id'], 5, 4, 50)
+    db.session.expire_all()
+    result, muitas = _contar_consultas(CarteiraService.get_portfolios)
+
+    assert len(result[0]['portfolios']) == 8
+    assert poucas == muitas == 1
+
+
+def test_get_portfolio_by_id(dados):
+    """O detalhe usa a mesma consulta agregada e respeita o admin."""
+    carteira_id = dados['carteiras'][0]
+    db.session.expire_all()
+    (result, status), consultas = _contar_consultas(lambda: CarteiraService.get_portfolio_by_id(carteira_id))
+
+    assert status == 200
+    assert consultas == 1
+    assert result['portfolio']['quantidade_ativos'] == 3
+
+    outro = Carteira.query.filter(Carteira.id.notin_(dados['carteiras'] + [dados['vazia']])).first()
+    _, status = CarteiraService.get_portfolio_by_id(outro.id)
+    assert status == 404
+
+
+def test_portfolios_endpoint(app, dados):
+    """GET /api/wallets devolve as contagens agregadas."""
+    token = generate_token(dados['user_id'], 'admin')
+    response = app.test_client().get('/api/wallets', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200
+    assert [p['quantidade_ativos'] for p in response.get_json()['portfolios']] == [3, 3, 0]
@@ -0,0 +1,72 @@
+"""
+Testes unitários para a redução de pontos do histórico.
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.downsampling import lttb_indices, downsample_historico
+from app.services.Asset_service import AssetService
+
+
+class TestDownsampling(unittest.TestCase):
+    """Testes para LTTB e agregação OHLC."""
+
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        rng = np.random.default_rng(1)
+        n = 5000
+        close = 30 + np.cumsum(rng.normal(0, 0.2, n))
+        close[1234] += 15  # pico isolado
+        self.arrays = {
+            'data': np.array([f"d{i}" for i in range(n)], dtype=object),
+            'close': close,
+            'high': close + 0.5,
+            'low': close - 0.5,
+            'open': close - 0.1,
+        }
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        """LTTB devolve n_out índices crescentes, com extremidades e picos preservados."""
+        indices = lttb_indices(self.arrays['close'], 300)
+
+        self.assertEqual(len(indices), 300)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], len(self.arrays['close']) - 1)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(1234, indices)
+
+    def test_ohlc_preserves_extremes(self):
+        """A agregação OHLC mantém máxima/mínima globais e a primeira/última barra."""
+        result = downsample_historico(self.arrays, 200, method='ohlc')
+
+        self.assertEqual(len(result['close']), 200)
+        self.assertEqual(result['high'].max(), self.arrays['high'].max())
+        self.assertEqual(result['low'].min(), self.arrays['low'].min())
+        self.assertEqual(result['open'][0], self.arrays['open'][0])
+        self.assertEqual(result['close'][-1], self.arrays['close'][-1])
+        self.assertEqual(result['data'][0], 'd0')
+
+    def test_statistics_use_full_resolution(self):
+        """Os resultados estatísticos não mudam quando o histórico é reduzido."""
+        dates = pd.date_range('2010-01-01', periods=len(self.arrays['close']), freq='D', name='Date')
+        df = pd.DataFrame({'Close': self.arrays['close']}, index=dates)
+
+        full = AssetService.calculateIndexAsset(df.copy(), 'PETR4.SA')
+        reduced = AssetService.calculateIndexAsset(df.copy(), 'PETR4.SA', max_points=600)
+
+        self.assertEqual(full['results'], reduced['results'])
+        self.assertEqual(len(reduced['historico']), 600)
+        self.assertEqual(reduced['downsampling'], {'method': 'lttb', 'original_points': 5000, 'points': 600})
+        self.assertNotIn('downsampling', full)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
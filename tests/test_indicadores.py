@@ -0,0 +1,61 @@
+"""
+Testes unitários para os indicadores de carteira vetorizados.
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.indicadores import calcular_indicadores, ordenar_tickers, matriz_para_dict
+
+
+class TestIndicadores(unittest.TestCase):
+    """Testes para calcular_indicadores."""
+
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        rng = np.random.default_rng(7)
+        prices = 30 * np.exp(np.cumsum(rng.normal(0, 0.02, (60, 4)), axis=0))
+        self.df = pd.DataFrame(prices, columns=['BOVA11.SA', 'ITUB4.SA', 'PETR4.SA', 'VALE3.SA'])
+        self.tickers = ordenar_tickers(list(self.df.columns))
+
+    def test_ordenar_tickers_moves_market_last(self):
+        """O índice de mercado vai para o final, mantendo a ordem dos demais."""
+        self.assertEqual(self.tickers, ['ITUB4.SA', 'PETR4.SA', 'VALE3.SA', 'BOVA11.SA'])
+
+    def test_matches_pandas(self):
+        """Médias, desvios, covariância e betas batem com o cálculo do pandas."""
+        ind = calcular_indicadores(self.df[self.tickers].to_numpy())
+        returns = self.df[self.tickers].pct_change().dropna()
+
+        np.testing.assert_allclose(ind['retorno_esperado'], returns.mean().to_numpy())
+        np.testing.assert_allclose(ind['desvio_padrao'], returns.std().to_numpy())
+        np.testing.assert_allclose(ind['matriz_covariancia'], returns.cov().to_numpy())
+
+        bova = returns['BOVA11.SA']
+        expected_beta = [returns[t].cov(bova) / bova.var() for t in self.tickers[:-1]] + [1.0]
+        np.testing.assert_allclose(ind['beta'], expected_beta)
+        np.testing.assert_allclose(ind['pesos'], [1 / 3, 1 / 3, 1 / 3, 0.0])
+
+    def test_single_index_covariance(self):
+        """Fora da diagonal: beta_i * beta_j * Var(mercado); na diagonal: variâncias."""
+        ind = calcular_indicadores(self.df[self.tickers].to_numpy())
+        custom = ind['matriz_cov_customizada']
+        beta = ind['beta']
+        market_var = ind['matriz_covariancia'][-1, -1]
+
+        self.assertAlmostEqual(custom[0, 1], beta[0] * beta[1] * market_var)
+        np.testing.assert_allclose(np.diag(custom), np.diag(ind['matriz_covariancia']))
+
+        as_dict = matriz_para_dict(self.tickers, custom)
+        self.assertEqual(as_dict['PETR4.SA']['ITUB4.SA'], custom[0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,112 @@
+"""
+Testes dos indicadores de carteira materializados e da invalidação por escrita.
+"""
+import pickle
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import db
+from app.model.Carteira import Carteira
+from app.model.Asset import Asset
+from app.model.IndicadoresCache import IndicadoresCache
+from app.services.Asset_service import AssetService
+from app.utils import serialization
+
+_EXPLOIT_CALLS = []
+
+
+def _exploit():
+    _EXPLOIT_CALLS.append(1)
+
+
+class _Exploit:
+    """Objeto que executa código ao ser lido com pickle."""
+
+    def __reduce__(self):
+        return (_exploit, ())
+
+
+@pytest.fixture
+def carteira_id(carteira):
+    """Carteira com BOVA11.SA e PETR4.SA, com o contexto de um admin autenticado."""
+    rng = np.random.default_rng(3)
+    rows = []
+    for ticker in ['BOVA11.SA', 'PETR4.SA']:
+        closes = 30 * np.exp(np.cumsum(rng.normal(0, 0.02, 20)))
+        rows.extend({'carteira_id': carteira.id, 'ticker': ticker, 'date': date(2024, 1, day + 1),
+                     'close': float(close)} for day, close in enumerate(closes))
+    Asset.bulk_insert(rows)
+    return carteira.id
+
+
+def test_second_call_is_served_from_cache(carteira_id):
+    """A segunda chamada devolve o payload materializado, idêntico ao calculado."""
+    first, status = AssetService.calcular_indicadores_carteira(carteira_id)
+    second, _ = AssetService.calcular_indicadores_carteira(carteira_id)
+
+    assert status == 200
+    assert first['cache'] == 'miss'
+    assert second['cache'] == 'hit'
+    assert first['indicadores'] == second['indicadores']
+
+    with patch('app.services.Asset_service.load_price_matrix') as mock_loader:
+        AssetService.calcular_indicadores_carteira(carteira_id)
+        mock_loader.assert_not_called()
+
+
+@pytest.mark.skipif(serialization.msgpack is None, reason="msgpack não instalado")
+def test_payload_is_msgpack_not_pickle(carteira_id):
+    """O payload é gravado em MessagePack; um payload com pickle no banco não é executado."""
+    first, _ = AssetService.calcular_indicadores_carteira(carteira_id, formato='arrays')
+    stored = db.session.get(IndicadoresCache, carteira_id)
+    np.testing.assert_array_equal(serialization.from_msgpack(stored.payload)['matriz_covariancia'],
+                                  first['indicadores']['matriz_covariancia'])
+
+    stored.payload = pickle.dumps(_Exploit())
+    db.session.commit()
+    result, status = AssetService.calcular_indicadores_carteira(carteira_id)
+    assert status == 200 and result['cache'] == 'miss'
+    assert _EXPLOIT_CALLS == []
+
+
+@patch('app.services.Asset_service.get_market_data_provider')
+def test_cadastrar_ativo_bumps_version(mock_provider, carteira_id):
+    """Cadastrar um ativo invalida os indicadores materializados."""
+    AssetService.calcular_indicadores_carteira(carteira_id)
+
+    dates = pd.date_range('2024-01-01', periods=20, freq='D', name='Date')
+    mock_provider.return_value.history.return_value = pd.DataFrame({'Close': np.linspace(10, 12, 20)}, index=dates)
+    _, status = AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': carteira_id, 'period': '1mo'})
+    assert status == 201
+
+    result, _ = AssetService.calcular_indicadores_carteira(carteira_id)
+    assert result['cache'] == 'miss'
+    assert 'VALE3.SA' in result['indicadores']['ativos_ordenados']
+
+
+def test_remover_ativo_bumps_version(carteira_id):
+    """Remover um ativo invalida os indicadores materializados."""
+    AssetService.calcular_indicadores_carteira(carteira_id)
+
+    result, status = AssetService.remover_ativo(carteira_id, 'PETR4')
+    assert status == 200
+    assert result['data']['deleted_records'] == 20
+
+    result, status = AssetService.calcular_indicadores_carteira(carteira_id)
+    assert status == 400
+    assert 'No investment assets' in result['message']
+
+
+def test_carteira_delete_removes_cache(carteira_id):
+    """Remover a carteira remove também os indicadores materializados."""
+    AssetService.calcular_indicadores_carteira(carteira_id)
+    assert db.session.get(IndicadoresCache, carteira_id) is not None
+
+    Carteira.delete(Carteira.find_by_id(carteira_id))
+    db.session.expire_all()
+
+    assert db.session.get(IndicadoresCache, carteira_id) is None
@@ -0,0 +1,128 @@
+"""
+Testes dos indicadores em lote (todas as carteiras de um admin em uma chamada).
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app import db
+from app.model.User import User
+from app.model.Cliente import Cliente
+from app.model.Carteira import Carteira
+from app.model.Asset import Asset
+from app.services.Asset_service import AssetService
+from app.utils.jwt_utils import generate_token
+from app.utils.price_matrix import load_price_matrices, load_price_matrix
+
+CARTEIRAS = {
+    'Ações': (['BOVA11.SA', 'ITUB4.SA', 'PETR4.SA'], 0, 60),
+    'Commodities': (['BOVA11.SA', 'VALE3.SA', 'PETR4.SA', 'SUZB3.SA'], 20, 40),
+    'Sem índice': (['WEGE3.SA'], 0, 30),
+}
+
+
+@pytest.fixture
+def carteira_ids(cliente):
+    """Três carteiras do admin (períodos diferentes, uma sem BOVA11.SA) e uma de outro admin."""
+    outro = User('Other User', 'other@example.com', 'password123')
+    db.session.add(outro)
+    db.session.commit()
+    cliente_outro = Cliente(outro.id, 'Outro', 'outro@example.com', '111.111.111-11')
+    Cliente.save(cliente_outro)
+
+    # Um histórico por ticker (as barras são compartilhadas entre as carteiras)
+    rng = np.random.default_rng(3)
+    tickers = sorted({ticker for tickers, _, _ in CARTEIRAS.values() for ticker in tickers})
+    historico = {ticker: 30 * np.exp(np.cumsum(rng.normal(0.001, 0.02, 60))) for ticker in tickers}
+    ids, rows = {}, []
+    for nome, (tickers, inicio, dias) in CARTEIRAS.items():
+        carteira = Carteira(cliente.id, nome)
+        Carteira.save(carteira)
+        ids[nome] = carteira.id
+        for ticker in tickers:
+            rows.extend({'carteira_id': carteira.id, 'ticker': ticker,
+                         'date': date.fromordinal(738000 + day), 'close': float(historico[ticker][day])}
+                        for day in range(inicio, inicio + dias))
+    carteira_outro = Carteira(cliente_outro.id, 'Outro')
+    Carteira.save(carteira_outro)
+    ids['outro'] = carteira_outro.id
+    Asset.bulk_insert(rows)
+    return ids
+
+
+def test_load_price_matrices_matches_single_loads(carteira_ids):
+    """Cada fatia da matriz compartilhada tem os mesmos fechamentos da carga individual."""
+    ids = [carteira_ids['Ações'], carteira_ids['Commodities']]
+    matrizes = load_price_matrices(ids)
+
+    for carteira_id in ids:
+        esperado = load_price_matrix(carteira_id)
+        fatia = matrizes[carteira_id]
+        assert fatia.tickers == esperado.tickers
+        assert fatia.prices.base is matrizes[ids[0]].prices.base is not None
+        completa = fatia.complete()
+        np.testing.assert_array_equal(completa.dates, esperado.complete().dates)
+        np.testing.assert_array_equal(completa.prices, esperado.complete().prices)
+
+    assert load_price_matrices([carteira_ids['outro']])[carteira_ids['outro']].empty
+
+
+@pytest.mark.parametrize('source', ['streaming', 'history'])
+def test_lote_matches_single(app, carteira_ids, source):
+    """Os indicadores em lote são os mesmos de /indicadores, carteira a carteira."""
+    app.config['INDICADORES_SOURCE'] = source
+    result, status = AssetService.calcular_indicadores_lote()
+
+    assert status == 200
+    assert result['total'] == 3 and result['calculadas'] == 3
+    por_id = {item['carteira_id']: item for item in result['carteiras']}
+    assert carteira_ids['outro'] not in por_id
+    assert not por_id[carteira_ids['Sem índice']]['success']
+    assert 'BOVA11.SA' in por_id[carteira_ids['Sem índice']]['message']
+    assert [linha['nome'] for linha in result['comparacao']] == ['Ações', 'Commodities']
+
+    for nome in ('Ações', 'Commodities'):
+        lote = por_id[carteira_ids[nome]]
+        assert lote['cache'] == 'miss'
+        individual, _ = AssetService.calcular_indicadores_carteira(carteira_ids[nome])
+        assert individual['cache'] == 'hit'
+        assert lote['indicadores'] == individual['indicadores']
+
+    # Segunda chamada: tudo materializado
+    again, _ = AssetService.calcular_indicadores_lote([carteira_ids['Ações']])
+    assert again['calculadas'] == 0
+    assert again['carteiras'][0]['cache'] == 'hit'
+
+
+def test_lote_process_pool(app, carteira_ids):
+    """Com o pool de processos, o resultado é o mesmo da execução em série."""
+    app.config['INDICADORES_CACHE_ENABLED'] = False
+    ids = [carteira_ids['Ações'], carteira_ids['Commodities']]
+    serie, _ = AssetService.calcular_indicadores_lote(ids)
+
+    app.config.update(INDICADORES_SOURCE='history', ANALYTICS_WORKERS=2, INDICADORES_POOL_MIN_CARTEIRAS=1)
+    pool, _ = AssetService.calcular_indicadores_lote(ids)
+    for esperado, obtido in zip(serie['comparacao'], pool['comparacao']):
+        assert obtido['indice_sharpe'] == pytest.approx(esperado['indice_sharpe'])
+
+
+def test_lote_unauthorized_subset(carteira_ids):
+    """Carteiras de outro admin devolvem 404."""
+    result, status = AssetService.calcular_indicadores_lote([carteira_ids['Ações'], carteira_ids['outro']])
+    assert status == 404
+    assert str(carteira_ids['outro']) in result['message']
+
+
+def test_lote_endpoint(app, admin, carteira_ids):
+    """O endpoint aceita um subconjunto em `ids`."""
+    token = generate_token(admin.id, 'admin')
+    client = app.test_client()
+    response = client.get(f"/api/wallets/indicadores?ids={carteira_ids['Ações']},{carteira_ids['Commodities']}",
+                          headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200
+    assert [item['nome'] for item in response.get_json()['carteiras']] == ['Ações', 'Commodities']
+
+    invalid = client.get('/api/wallets/indicadores?ids=a,b', headers={'Authorization': f'Bearer {token}'})
+    assert invalid.status_code == 400
@@ -0,0 +1,100 @@
+"""
+Testes da ingestão em lote idempotente (INSERT ... ON CONFLICT DO NOTHING RETURNING).
+"""
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.model.Carteira import Carteira
+from app.model.Asset import Asset
+from app.model.PriceBar import PriceBar
+from app.model.IndicadoresCache import IndicadoresCache
+from app.services.Asset_service import AssetService
+
+
+def _history(start, days, seed=0):
+    dates = pd.bdate_range(start, periods=days)
+    closes = 30 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.02, days)))
+    return pd.DataFrame({'Close': closes}, index=dates)
+
+
+def _rows(carteira_id, history, ticker='VALE3.SA'):
+    return [{'carteira_id': carteira_id, 'ticker': ticker, 'date': day.date(), 'close': float(close)}
+            for day, close in history['Close'].items()]
+
+
+@pytest.fixture
+def carteira_id(carteira):
+    """Carteira vazia, com o contexto de um admin autenticado."""
+    return carteira.id
+
+
+def test_insert_ignore_duplicates_returns_inserted(carteira_id):
+    """Só os registros novos são inseridos e devolvidos; repetidos na entrada ficam com o último."""
+    history = _history('2024-01-01', 10)
+    assert len(PriceBar.insert_ignore_duplicates(_rows(carteira_id, history.iloc[:6]))) == 6
+
+    rows = _rows(carteira_id, history)
+    rows.append({**rows[-1], 'close': 99.0})
+    inserted = PriceBar.insert_ignore_duplicates(rows)
+    db.session.commit()
+
+    assert inserted == [('VALE3.SA', '1d', day.date()) for day in history.index[6:]]
+    assert PriceBar.query.filter_by(ticker='VALE3.SA').count() == 10
+    assert PriceBar.query.filter_by(date=history.index[-1].date()).one().close == 99.0
+
+
+def test_insert_fallback_without_on_conflict(carteira_id):
+    """Sem ON CONFLICT no banco, as chaves existentes são lidas em uma consulta."""
+    history = _history('2024-01-01', 10)
+    Asset.bulk_insert(_rows(carteira_id, history.iloc[:4]))
+
+    with patch.object(PriceBar, '_insert_on_conflict', return_value=None):
+        inserted = PriceBar.insert_ignore_duplicates(_rows(carteira_id, history))
+    db.session.commit()
+
+    assert [day for _, _, day in inserted] == [day.date() for day in history.index[4:]]
+    assert PriceBar.query.filter_by(ticker='VALE3.SA').count() == 10
+
+
+@patch('app.services.Asset_service.get_market_data_provider')
+def test_cadastrar_ativo_is_idempotent(mock_provider, carteira_id):
+    """Recadastrar reporta os registros existentes e não altera a versão dos dados."""
+    history = _history('2024-01-01', 250)
+    mock_provider.return_value.history.return_value = history
+    data = {'ticker': 'VALE3', 'carteira_id': carteira_id, 'period': '1y', 'sync_mode': 'full'}
+
+    statements = []
+
+    def _registrar(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _registrar)
+    try:
+        first, status = AssetService.cadastrar_ativo(data)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _registrar)
+
+    assert status == 201
+    assert first['data']['inserted_records'] == 250 and first['data']['existing_records'] == 0
+    # Um único INSERT para as 250 barras, sem uma consulta de duplicata por barra
+    inserts = [statement for statement in statements if statement.startswith('INSERT INTO price_bar')]
+    assert len(inserts) == 1 and 'ON CONFLICT' in inserts[0]
+    assert len(statements) < 20
+    version = db.session.get(IndicadoresCache, carteira_id).data_version
+
+    mock_provider.return_value.history.return_value = pd.concat([history.iloc[-10:], _history('2025-01-01', 5)])
+    second, _ = AssetService.cadastrar_ativo(data)
+    assert second['data']['inserted_records'] == 5 and second['data']['existing_records'] == 10
+    assert db.session.get(IndicadoresCache, carteira_id).data_version == version + 1
+
+    mock_provider.return_value.history.return_value = history
+    third, _ = AssetService.cadastrar_ativo(data)
+    assert third['data']['inserted_records'] == 0 and third['data']['existing_records'] == 250
+    assert db.session.get(IndicadoresCache, carteira_id).data_version == version + 1
+    assert db.session.get(Carteira, carteira_id).get_quantidade_registros() == 255
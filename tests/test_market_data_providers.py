@@ -0,0 +1,80 @@
+"""
+Testes unitários para os provedores de dados de mercado.
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.providers.base import MarketDataProvider
+from app.providers.replay_provider import ReplayProvider
+
+
+class TestReplayProvider(unittest.TestCase):
+    """Testes para o ReplayProvider."""
+
+    def test_synthetic_series_is_deterministic(self):
+        """A mesma semente gera a mesma série; tickers diferentes geram séries diferentes."""
+        first = ReplayProvider(seed=7).history('PETR4.SA', period='1y')
+        second = ReplayProvider(seed=7).history('PETR4.SA', period='1y')
+        other = ReplayProvider(seed=7).history('ITUB4.SA', period='1y')
+
+        self.assertFalse(first.empty)
+        self.assertEqual(list(first.columns), ['Open', 'High', 'Low', 'Close', 'Volume'])
+        pd.testing.assert_frame_equal(first, second)
+        self.assertFalse(first['Close'].equals(other['Close']))
+
+    def test_start_end_and_resampling(self):
+        """Intervalos de datas e barras semanais seguem a semântica do yfinance."""
+        provider = ReplayProvider()
+        daily = provider.history('PETR4.SA', start='2024-01-01', end='2024-03-01')
+        weekly = provider.history('PETR4.SA', start='2024-01-01', end='2024-03-01', interval='1wk')
+
+        self.assertGreaterEqual(daily.index.min(), pd.Timestamp('2024-01-01'))
+        self.assertLess(daily.index.max(), pd.Timestamp('2024-03-01'))
+        self.assertLess(len(weekly), len(daily))
+        self.assertEqual(weekly['High'].max(), daily['High'].max())
+
+    def test_recorded_series_takes_precedence(self):
+        """Arquivos gravados em data_dir são servidos no lugar da série sintética."""
+        with tempfile.TemporaryDirectory() as data_dir:
+            dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=5, name='Date')
+            recorded = pd.DataFrame({'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5, 'Volume': 100}, index=dates)
+            recorded.to_csv(os.path.join(data_dir, 'PETR4.SA.csv'))
+
+            df = ReplayProvider(data_dir=data_dir).history('PETR4.SA', period='1mo')
+
+        self.assertEqual(len(df), 5)
+        self.assertTrue((df['Close'] == 1.5).all())
+
+    def test_error_injection(self):
+        """Com error_rate=1 toda chamada falha; history_many conta como uma chamada."""
+        provider = ReplayProvider(error_rate=1.0)
+
+        with self.assertRaises(ConnectionError):
+            provider.history('PETR4.SA', period='1mo')
+        with self.assertRaises(ConnectionError):
+            provider.history_many(['PETR4.SA', 'ITUB4.SA'], period='1mo')
+
+
+
+class TestMarketDataProvider(unittest.TestCase):
+    """Testes para a interface dos provedores."""
+
+    def test_provider_without_history_fails_on_creation(self):
+        """Um provedor que não implementa `history` não pode ser criado."""
+        class Incompleto(MarketDataProvider):
+            name = 'incompleto'
+
+        with self.assertRaises(TypeError):
+            Incompleto()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,186 @@
+"""
+Testes da otimização de carteiras (mínima variância, máximo Sharpe e fronteira)
+e da avaliação de cenários de pesos em lote.
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.model.Asset import Asset
+from app.services.Analise_service import AnaliseService
+from app.services.Asset_service import AssetService
+from app.utils import serialization
+from app.utils.indicadores import TAXA_LIVRE_RISCO
+from app.utils.jwt_utils import generate_token
+from app.utils.otimizacao import avaliar_pesos, otimizar_carteira, projetar_pesos
+
+
+def _moments(k=30, seed=2):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (500, 3))
+    returns = factors @ rng.normal(1, 0.5, (k, 3)).T + rng.normal(0, 0.015, (500, k))
+    returns += rng.normal(0.0008, 0.0002, k)
+    return returns.mean(axis=0), np.cov(returns.T)
+
+
+def test_projection_is_feasible_and_closest():
+    """A projeção respeita soma 1 e limites e é o ponto viável mais próximo."""
+    rng = np.random.default_rng(0)
+    V = rng.normal(0, 0.5, (50, 12))
+    W = projetar_pesos(V, 0.0, 0.2)
+
+    np.testing.assert_allclose(W.sum(axis=1), 1.0, atol=1e-12)
+    assert W.min() >= 0.0 and W.max() <= 0.2
+
+    # Nenhum ponto viável aleatório fica mais perto de V
+    candidates = projetar_pesos(rng.random((200, 12)), 0.0, 0.2)
+    distances = ((candidates[None, :, :] - V[:, None, :]) ** 2).sum(axis=2)
+    assert (((W - V) ** 2).sum(axis=1)[:, None] <= distances + 1e-12).all()
+
+    # Único ponto viável: k * peso máximo = 1
+    np.testing.assert_allclose(projetar_pesos(V[:, :5], 0.0, 0.2), 0.2)
+
+
+def test_avaliar_pesos_matches_loop():
+    """A avaliação em lote bate com a avaliação vetor a vetor."""
+    mu, cov = _moments()
+    W = np.random.default_rng(3).dirichlet(np.ones(len(mu)), 500)
+    metricas = avaliar_pesos(W, mu, cov)
+
+    for i in (0, 137, 499):
+        variancia = W[i] @ cov @ W[i]
+        assert metricas['retorno_esperado'][i] == pytest.approx(W[i] @ mu)
+        assert metricas['variancia'][i] == pytest.approx(variancia)
+        assert metricas['indice_sharpe'][i] == pytest.approx((W[i] @ mu - TAXA_LIVRE_RISCO) / np.sqrt(variancia))
+
+
+def test_unconstrained_solutions_match_closed_form():
+    """Sem limites ativos, mínima variância e máximo Sharpe batem com as fórmulas fechadas."""
+    mu, cov = _moments()
+    inverse = np.linalg.inv(cov)
+    minima = inverse.sum(axis=1) / inverse.sum()
+    tangente = inverse @ (mu - TAXA_LIVRE_RISCO)
+    tangente /= tangente.sum()
+
+    assert np.abs(tangente).max() < 1.0 and np.abs(minima).max() < 1.0
+    resultado = otimizar_carteira(mu, cov, 10, max_peso=1.0, long_only=False)
+
+    np.testing.assert_allclose(resultado['minima_variancia']['pesos'], minima, atol=1e-6)
+    sharpe = avaliar_pesos(tangente, mu, cov)['indice_sharpe'][0]
+    assert resultado['maximo_sharpe']['indice_sharpe'] == pytest.approx(sharpe, rel=1e-6)
+
+
+def test_constrained_frontier():
+    """Com long-only e peso máximo, todos os pontos são viáveis e a fronteira é monotônica."""
+    mu, cov = _moments()
+    resultado = otimizar_carteira(mu, cov, 15, max_peso=0.1)
+    fronteira = resultado['fronteira']
+
+    pesos = np.vstack([fronteira['pesos'], resultado['maximo_sharpe']['pesos']])
+    np.testing.assert_allclose(pesos.sum(axis=1), 1.0, atol=1e-9)
+    assert pesos.min() >= 0.0 and pesos.max() <= 0.1 + 1e-12
+
+    assert fronteira['pesos'].shape == (15, 30)
+    assert np.all(np.diff(fronteira['retorno_esperado']) >= -1e-12)
+    assert np.all(np.diff(fronteira['desvio_padrao']) >= -1e-9)
+    assert fronteira['desvio_padrao'][0] == pytest.approx(resultado['minima_variancia']['desvio_padrao'])
+    assert resultado['maximo_sharpe']['indice_sharpe'] >= fronteira['indice_sharpe'].max() - 1e-12
+
+
+@pytest.fixture
+def carteira_id(carteira):
+    """Carteira com BOVA11.SA e três ativos, com o contexto de um admin autenticado."""
+    rng = np.random.default_rng(7)
+    rows = []
+    for ticker in ['BOVA11.SA', 'ITUB4.SA', 'PETR4.SA', 'VALE3.SA']:
+        closes = 30 * np.exp(np.cumsum(rng.normal(0.001, 0.02, 60)))
+        rows.extend({'carteira_id': carteira.id, 'ticker': ticker, 'date': date.fromordinal(738000 + day),
+                     'close': float(close)} for day, close in enumerate(closes))
+    Asset.bulk_insert(rows)
+    return carteira.id
+
+
+def test_otimizar_service(carteira_id):
+    """O serviço otimiza apenas os ativos de investimento e devolve pesos por ticker."""
+    result, status = AnaliseService.otimizar(carteira_id, {'pontos_fronteira': 5, 'max_peso': 0.5})
+
+    assert status == 200
+    otimizacao = result['otimizacao']
+    assert otimizacao['ativos'] == ['ITUB4.SA', 'PETR4.SA', 'VALE3.SA']
+    assert set(otimizacao['minima_variancia']['pesos']) == set(otimizacao['ativos'])
+    assert sum(otimizacao['maximo_sharpe']['pesos'].values()) == pytest.approx(1.0)
+    assert len(otimizacao['fronteira']['pesos']) == 5
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'max_peso': 0.2}, 'infeasible'),
+    ({'pontos_fronteira': 1}, 'pontos_fronteira'),
+    ({'covariancia': 'outra'}, 'covariancia'),
+])
+def test_otimizar_validation(carteira_id, data, message):
+    """Parâmetros inválidos devolvem 400."""
+    result, status = AnaliseService.otimizar(carteira_id, data)
+    assert status == 400
+    assert message in result['message']
+
+
+def test_avaliar_cenarios_service(carteira_id):
+    """Vetores alinhados e dicionários por ticker dão o mesmo resultado."""
+    result, status = AnaliseService.avaliar_cenarios(carteira_id, {
+        'ativos': ['itub4', 'PETR4.SA', 'VALE3'],
+        'pesos': [[1 / 3, 1 / 3, 1 / 3], [1.0, 0.0, 0.0]]
+    })
+    assert status == 200
+    avaliacao = result['avaliacao']
+    assert avaliacao['ativos'] == ['ITUB4.SA', 'PETR4.SA', 'VALE3.SA']
+    assert avaliacao['n_cenarios'] == 2
+
+    por_ticker, _ = AnaliseService.avaliar_cenarios(carteira_id, {'pesos': [{'ITUB4': 1.0}]})
+    assert por_ticker['avaliacao']['variancia'][0] == pytest.approx(avaliacao['variancia'][1])
+    unico, _ = AnaliseService.avaliar_cenarios(carteira_id, {'pesos': {'ITUB4': 1.0}})
+    assert unico['avaliacao']['variancia'] == por_ticker['avaliacao']['variancia']
+
+    # Pesos iguais reproduzem a carteira dos indicadores
+    igual, _ = AnaliseService.avaliar_cenarios(carteira_id, {'pesos': [[1 / 3] * 3]})
+    indicadores, _ = AssetService.calcular_indicadores_carteira(carteira_id)
+    carteira = indicadores['indicadores']['indicadores_carteira']
+    assert igual['avaliacao']['retorno_esperado'][0] == pytest.approx(carteira['retorno_esperado'])
+    assert igual['avaliacao']['variancia'][0] == pytest.approx(carteira['variancia'])
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'pesos': [[0.5, 0.5]]}, '3 values'),
+    ({'pesos': [[1.0]], 'ativos': ['XPTO3']}, 'XPTO3.SA'),
+    ({'pesos': []}, 'pesos is required'),
+    ({'pesos': None}, 'pesos is required'),
+    ({'pesos': 5}, 'pesos must be a list'),
+    ({'pesos': 'abc'}, 'pesos must be a list'),
+    ({'pesos': [{'ITUB4': 1.0}, 5]}, 'aligned with ativos'),
+    ({'pesos': [[1.0]], 'ativos': 'ITUB4'}, 'ativos must be a list'),
+])
+def test_avaliar_cenarios_validation(carteira_id, data, message):
+    """Pesos desalinhados, de tipo inválido ou tickers fora da carteira devolvem 400."""
+    result, status = AnaliseService.avaliar_cenarios(carteira_id, data)
+    assert status == 400
+    assert message in result['message']
+
+
+@pytest.mark.skipif(serialization.msgpack is None, reason="msgpack não instalado")
+def test_cenarios_endpoint_msgpack(app, admin, carteira_id):
+    """O endpoint aceita a matriz de pesos em MessagePack e responde com buffers."""
+    W = np.random.default_rng(0).dirichlet(np.ones(3), 1000)
+    token = generate_token(admin.id, 'admin')
+
+    response = app.test_client().post(
+        f'/api/wallets/{carteira_id}/cenarios',
+        data=serialization.to_msgpack({'pesos': W}),
+        headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/msgpack',
+                 'Accept': 'application/msgpack'}
+    )
+
+    assert response.status_code == 200
+    avaliacao = serialization.from_msgpack(response.get_data())['avaliacao']
+    assert avaliacao['n_cenarios'] == 1000
+    assert avaliacao['indice_sharpe'].shape == (1000,)
+    np.testing.assert_allclose(avaliacao['soma_pesos'], 1.0)
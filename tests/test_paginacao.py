@@ -0,0 +1,159 @@
+"""
+Testes da paginação por cursor (keyset) e da projeção de campos das listagens.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.model.User import User
+from app.model.Cliente import Cliente
+from app.model.Carteira import Carteira
+from app.model.Asset import Asset
+from app.services.Asset_service import AssetService
+from app.services.Carteira_service import CarteiraService
+from app.services.Cliente_service import ClienteService
+from app.utils.jwt_utils import generate_token
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def dados(admin):
+    """Admin com 7 clientes, 5 carteiras (uma com 3 tickers x 4 dias) e um cliente de outro admin."""
+    outro = User('Other User', 'other@example.com', 'password123')
+    db.session.add(outro)
+    db.session.commit()
+
+    clientes = []
+    for i in range(7):
+        cliente = Cliente(admin.id, f'Cliente {i}', f'c{i}@example.com', f'{i:03d}.000.000-00')
+        Cliente.save(cliente)
+        clientes.append(cliente.id)
+    Cliente.save(Cliente(outro.id, 'Outro', 'outro@example.com', '999.999.999-99'))
+
+    carteiras = []
+    for i in range(5):
+        carteira = Carteira(clientes[i % 2], f'Carteira {i}')
+        Carteira.save(carteira)
+        carteiras.append(carteira.id)
+    Asset.bulk_insert([{'carteira_id': carteiras[0], 'ticker': ticker, 'date': date(2024, 1, day),
+                        'close': 10.0 + day} for ticker in ('VALE3.SA', 'ITUB4.SA', 'PETR4.SA')
+                       for day in range(1, 5)])
+    return {'user_id': admin.id, 'clientes': clientes, 'carteiras': carteiras}
+
+
+def _todas_as_paginas(fetch, key, **kwargs):
+    items, cursor, paginas = [], None, 0
+    while True:
+        result, status = fetch(cursor=cursor, **kwargs)
+        assert status == 200
+        items.extend(result[key])
+        paginas += 1
+        cursor = result['pagina']['next_cursor']
+        if cursor is None:
+            return items, paginas
+
+
+def test_cursor_roundtrip():
+    """O cursor é opaco e devolve a chave da última linha."""
+    cursor = encode_cursor(['PETR4.SA', date(2024, 1, 3)])
+    assert decode_cursor(cursor, 2) == ['PETR4.SA', '2024-01-03']
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 1)
+    with pytest.raises(ValueError):
+        decode_cursor('não é cursor', 1)
+
+
+def test_clientes_keyset_pages(dados):
+    """Páginas de 3 cobrem todos os clientes do admin, em ordem de ID, sem repetição."""
+    items, paginas = _todas_as_paginas(ClienteService.get_clientes, 'clientes', limit='3')
+
+    assert paginas == 3
+    assert [item['id'] for item in items] == dados['clientes']
+    assert items[0]['name'] == 'Cliente 0'
+
+
+def test_clientes_fields_projection(dados):
+    """Só as colunas pedidas são lidas do banco."""
+    consultas = []
+
+    def _registrar(conn, cursor, statement, *args):
+        consultas.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _registrar)
+    try:
+        result, status = ClienteService.get_clientes(limit='2', fields='name')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _registrar)
+
+    assert status == 200
+    assert result['clientes'] == [{'name': 'Cliente 0'}, {'name': 'Cliente 1'}]
+    assert len(consultas) == 1
+    assert 'clientes.email' not in consultas[0] and 'clientes.cpf' not in consultas[0]
+
+
+@pytest.mark.parametrize('params, message', [
+    ({'limit': '0'}, 'limit'),
+    ({'limit': 'abc'}, 'limit'),
+    ({'fields': 'name,senha'}, 'fields'),
+    ({'cursor': 'xyz'}, 'cursor'),
+])
+def test_invalid_page_params(dados, params, message):
+    """Parâmetros de paginação inválidos devolvem 400."""
+    result, status = ClienteService.get_clientes(**params)
+    assert status == 400
+    assert message in result['message']
+
+
+def test_carteiras_keyset_pages(dados):
+    """Carteiras paginadas com as contagens só quando pedidas."""
+    items, paginas = _todas_as_paginas(CarteiraService.get_portfolios, 'portfolios', limit='2',
+                                       fields='nome,cliente_nome,quantidade_ativos')
+
+    assert paginas == 3
+    assert [item['nome'] for item in items] == [f'Carteira {i}' for i in range(5)]
+    assert set(items[0]) == {'nome', 'cliente_nome', 'quantidade_ativos'}
+    assert items[0]['quantidade_ativos'] == 3
+    assert items[1]['cliente_nome'] == 'Cliente 1'
+
+
+def test_ativos_keyset_pages(dados):
+    """Registros de preço em ordem de (ticker, date), atravessando tickers entre páginas."""
+    carteira_id = dados['carteiras'][0]
+    items, paginas = _todas_as_paginas(
+        lambda **kwargs: AssetService.listar_ativos(carteira_id, **kwargs), 'assets',
+        limit='5', fields='ticker,date,close'
+    )
+
+    assert paginas == 3
+    assert [(item['ticker'], item['date']) for item in items] == [
+        (ticker, f'2024-01-0{day}') for ticker in ('ITUB4.SA', 'PETR4.SA', 'VALE3.SA') for day in range(1, 5)
+    ]
+
+    petr4, _ = AssetService.listar_ativos(carteira_id, ticker='petr4', fields='close')
+    assert petr4['assets'] == [{'close': 10.0 + day} for day in range(1, 5)]
+    assert petr4['pagina']['next_cursor'] is None
+
+
+def test_list_endpoints(app, dados):
+    """Os parâmetros chegam pela query string; a carteira de outro admin devolve 404."""
+    token = generate_token(dados['user_id'], 'admin')
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    clientes = client.get('/api/clients?limit=4&fields=id,name', headers=headers).get_json()
+    assert len(clientes['clientes']) == 4
+    seguinte = client.get(f"/api/clients?limit=4&cursor={clientes['pagina']['next_cursor']}", headers=headers)
+    assert [c['id'] for c in seguinte.get_json()['clientes']] == dados['clientes'][4:]
+
+    wallets = client.get('/api/wallets?limit=10&fields=nome', headers=headers).get_json()
+    assert len(wallets['portfolios']) == 5 and wallets['pagina']['next_cursor'] is None
+
+    assets = client.get(f"/api/wallets/{dados['carteiras'][0]}/assets?limit=2", headers=headers)
+    assert assets.status_code == 200
+    assert assets.get_json()['assets'][0]['ticker'] == 'ITUB4.SA'
+
+    outra = Carteira(Cliente.query.filter_by(name='Outro').first().id, 'Outra')
+    Carteira.save(outra)
+    assert client.get(f'/api/wallets/{outra.id}/assets', headers=headers).status_code == 404
@@ -0,0 +1,56 @@
+"""
+Testes do particionamento anual de price_bar (Postgres) e do fallback em tabela comum.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app import create_app, db
+from app.model.PriceBar import PriceBar
+from app.utils.partitions import ensure_partitions, is_partitioned, partition_bounds, partition_name
+
+
+@pytest.fixture
+def app():
+    """Fixture para criar app de teste."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_partition_naming():
+    """Uma partição por ano, com a faixa [1º de janeiro, 1º de janeiro do ano seguinte)."""
+    assert partition_name(2024) == 'price_bar_2024'
+    assert partition_bounds(2024) == (date(2024, 1, 1), date(2025, 1, 1))
+
+
+def test_postgres_ddl_is_partitioned_with_brin():
+    """No Postgres, a tabela é particionada por faixa de data e o índice em date é BRIN."""
+    table = PriceBar.__table__
+    index = next(index for index in table.indexes if index.name == 'ix_price_bar_date')
+
+    ddl = str(CreateTable(table).compile(dialect=postgresql.dialect()))
+    assert 'PARTITION BY RANGE (date)' in ddl
+    assert 'PRIMARY KEY (ticker, interval, date)' in ddl
+    assert 'USING brin (date)' in str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+
+    assert 'PARTITION BY' not in str(CreateTable(table).compile(dialect=sqlite.dialect()))
+
+
+def test_sqlite_fallback_is_plain_table(app):
+    """No SQLite, a tabela é comum e os comandos de partição não fazem nada."""
+    connection = db.session.connection()
+    assert not is_partitioned(connection)
+    assert ensure_partitions(connection) == []
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['partitions', 'list'])
+    assert result.exit_code == 0 and 'não é particionada' in result.output
+
+    result = runner.invoke(args=['partitions', 'detach', '--before', '2020'])
+    assert result.exit_code == 0 and result.output.startswith('0 partição(ões) desanexada(s)')
@@ -0,0 +1,140 @@
+"""
+Testes do armazenamento compartilhado de barras (price_bar + carteira_ativo).
+"""
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import db
+from app.model.Carteira import Carteira
+from app.model.Asset import Asset
+from app.model.PriceBar import PriceBar
+from app.model.IndicadoresCache import IndicadoresCache
+from app.services.Asset_service import AssetService
+from app.utils.price_matrix import load_price_matrix
+
+
+def _history(start, days, seed=0):
+    dates = pd.bdate_range(start, periods=days)
+    closes = 30 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.02, days)))
+    return pd.DataFrame({'Open': closes, 'High': closes * 1.01, 'Low': closes * 0.99,
+                         'Close': closes, 'Volume': np.arange(days) * 1000}, index=dates)
+
+
+@pytest.fixture
+def carteira_ids(cliente):
+    """Duas carteiras vazias do mesmo admin, com o contexto autenticado."""
+    ids = []
+    for nome in ('Primeira', 'Segunda'):
+        carteira = Carteira(cliente.id, nome)
+        Carteira.save(carteira)
+        ids.append(carteira.id)
+    return ids
+
+
+@patch('app.services.Asset_service.get_market_data_provider')
+def test_bars_shared_between_carteiras(mock_provider, carteira_ids):
+    """O mesmo ticker em duas carteiras é armazenado e baixado uma única vez."""
+    primeira, segunda = carteira_ids
+    history = _history('2024-01-01', 30)
+    mock_provider.return_value.history.return_value = history
+
+    first, status = AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': primeira, 'period': 'max'})
+    assert status == 201 and first['data']['inserted_records'] == 30
+
+    second, status = AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': segunda, 'period': 'max'})
+    assert status == 201
+    # A segunda carteira não baixa de novo o histórico já armazenado
+    assert second['data']['sync_mode'] == 'delta'
+    # A última barra armazenada é baixada de novo; sem mudança, nada é regravado
+    assert mock_provider.return_value.history.call_args.kwargs.get('start') == '2024-02-09'
+    assert second['data']['updated_records'] == 0
+
+    assert PriceBar.query.filter_by(ticker='VALE3.SA').count() == 30
+    assert db.session.get(PriceBar, ('VALE3.SA', '1d', date(2024, 1, 1))).volume == 0
+    for carteira_id in carteira_ids:
+        assert db.session.get(Carteira, carteira_id).get_quantidade_registros() == 30
+        np.testing.assert_allclose(load_price_matrix(carteira_id).prices[:, 0], history['Close'].to_numpy())
+
+
+def test_start_date_limits_visible_bars(carteira_ids):
+    """Cada carteira enxerga as barras a partir da sua primeira data; a janela só se amplia."""
+    primeira, segunda = carteira_ids
+    closes = _history('2024-01-01', 10)['Close']
+    rows = [{'carteira_id': primeira, 'ticker': 'VALE3.SA', 'date': day.date(), 'close': float(close)}
+            for day, close in closes.items()]
+    rows += [{**row, 'carteira_id': segunda} for row in rows[5:]]
+    assert Asset.bulk_insert(rows) == 10
+
+    assert db.session.get(Carteira, primeira).get_quantidade_registros() == 10
+    assert db.session.get(Carteira, segunda).get_quantidade_registros() == 5
+    assert Asset.get_date_range(segunda, 'VALE3.SA') == (closes.index[5].date(), closes.index[-1].date())
+
+    _, changed, _ = Asset.link(segunda, 'VALE3.SA', '1d', closes.index[7].date())
+    assert not changed
+    _, changed, anterior = Asset.link(segunda, 'VALE3.SA', '1d', closes.index[2].date())
+    assert changed and anterior == closes.index[5].date()
+    db.session.commit()
+    assert db.session.get(Carteira, segunda).get_quantidade_registros() == 8
+
+
+@patch('app.services.Asset_service.get_market_data_provider')
+def test_new_bars_invalidate_other_carteiras(mock_provider, carteira_ids):
+    """Barras novas de um ticker invalidam os indicadores de todas as carteiras que o acompanham."""
+    primeira, segunda = carteira_ids
+    history = _history('2024-01-01', 40)
+    mock_provider.return_value.history.return_value = history.iloc[:30]
+    for carteira_id in carteira_ids:
+        AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': carteira_id, 'period': 'max'})
+    versions = {carteira_id: db.session.get(IndicadoresCache, carteira_id).data_version
+                for carteira_id in carteira_ids}
+
+    mock_provider.return_value.history.return_value = history.iloc[30:]
+    result, _ = AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': primeira, 'period': 'max'})
+
+    assert result['data']['inserted_records'] == 10
+    for carteira_id in carteira_ids:
+        assert db.session.get(IndicadoresCache, carteira_id).data_version == versions[carteira_id] + 1
+    assert db.session.get(Carteira, segunda).get_quantidade_registros() == 40
+
+
+@patch('app.services.Asset_service.get_market_data_provider')
+def test_delta_sync_rewrites_last_bar(mock_provider, carteira_ids):
+    """A última barra, gravada com o pregão aberto, é regravada com o fechamento definitivo."""
+    primeira, segunda = carteira_ids
+    history = _history('2024-01-01', 30)
+    parcial = history.copy()
+    parcial.iloc[-1, parcial.columns.get_loc('Close')] *= 0.97
+    mock_provider.return_value.history.return_value = parcial
+    for carteira_id in carteira_ids:
+        AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': carteira_id, 'period': 'max'})
+    version = db.session.get(IndicadoresCache, segunda).data_version
+
+    mock_provider.return_value.history.return_value = history.iloc[-1:]
+    result, status = AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': primeira, 'period': 'max'})
+
+    assert status == 201
+    assert result['data']['updated_records'] == 1 and result['data']['inserted_records'] == 0
+    ultima = db.session.get(PriceBar, ('VALE3.SA', '1d', date(2024, 2, 9)))
+    assert ultima.close == history['Close'].iloc[-1] and ultima.open == history['Open'].iloc[-1]
+    assert db.session.get(IndicadoresCache, segunda).data_version == version + 1
+    np.testing.assert_allclose(load_price_matrix(segunda).prices[:, 0], history['Close'].to_numpy())
+
+
+def test_remove_keeps_shared_bars(carteira_ids):
+    """Remover o ticker de uma carteira não apaga as barras usadas pelas outras."""
+    primeira, segunda = carteira_ids
+    closes = _history('2024-01-01', 10)['Close']
+    Asset.bulk_insert([{'carteira_id': carteira_id, 'ticker': 'VALE3.SA', 'date': day.date(), 'close': float(close)}
+                       for carteira_id in carteira_ids for day, close in closes.items()])
+
+    result, status = AssetService.remover_ativo(primeira, 'VALE3')
+    assert status == 200 and result['data']['deleted_records'] == 10
+    assert AssetService.remover_ativo(primeira, 'VALE3')[1] == 404
+
+    assert PriceBar.query.filter_by(ticker='VALE3.SA').count() == 10
+    assert db.session.get(Carteira, primeira).get_quantidade_registros() == 0
+    assert db.session.get(Carteira, segunda).get_quantidade_registros() == 10
@@ -0,0 +1,89 @@
+"""
+Testes dos blocos anuais comprimidos de fechamentos (price_block).
+"""
+import zlib
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app import db
+from app.model.Asset import Asset
+from app.model.PriceBar import PriceBar
+from app.model.PriceBlock import PriceBlock
+from app.services.Asset_service import AssetService
+from app.utils.price_blocks import DELTA, decode_block, encode_block
+from app.utils.price_matrix import load_previous_closes, load_price_matrix
+
+TICKERS = ['BOVA11.SA', 'PETR4.SA', 'VALE3.SA']
+
+
+@pytest.fixture
+def carteira_id(carteira):
+    """Carteira com três tickers ao longo de três anos (2022-2024)."""
+    rng = np.random.default_rng(5)
+    dias = [date.fromordinal(day) for day in range(date(2022, 1, 3).toordinal(), date(2024, 12, 31).toordinal())
+            if date.fromordinal(day).weekday() < 5]
+    rows = []
+    for ticker in TICKERS:
+        closes = 30 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, len(dias))))
+        rows.extend({'carteira_id': carteira.id, 'ticker': ticker, 'date': day, 'close': float(close)}
+                    for day, close in zip(dias, closes))
+    Asset.bulk_insert(rows)
+    return carteira.id
+
+
+def test_block_roundtrip_is_exact():
+    """A codificação é sem perda; séries suaves usam os deltas e ficam menores que float64 cru."""
+    dates = np.arange(np.datetime64('2024-01-02'), np.datetime64('2024-12-31'), dtype='datetime64[D]')
+    closes = np.round(30 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(dates)))), 2)
+
+    payload = encode_block(2024, dates, closes)
+    decoded_dates, decoded_closes = decode_block(2024, payload)
+
+    np.testing.assert_array_equal(decoded_dates, dates)
+    np.testing.assert_array_equal(decoded_closes, closes)
+    assert len(payload) < closes.nbytes
+    assert zlib.decompress(payload)[1] == DELTA
+
+    with pytest.raises(ValueError):
+        encode_block(2023, dates, closes)
+
+
+def test_blocks_written_with_bars(carteira_id):
+    """Cada ticker vira um bloco por ano, mesclado com as barras inseridas depois."""
+    assert PriceBlock.query.count() == len(TICKERS) * 3
+    assert PriceBar.query.count() > 100 * PriceBlock.query.count()
+
+    # Uma barra nova no fim de 2024 atualiza só o bloco do ano
+    PriceBar.insert_ignore_duplicates([{'ticker': 'VALE3.SA', 'date': date(2024, 12, 31), 'close': 42.0}])
+    db.session.commit()
+    bloco = db.session.get(PriceBlock, ('VALE3.SA', '1d', 2024))
+    assert bloco.last_date == date(2024, 12, 31)
+    dates, closes = decode_block(2024, bloco.payload)
+    assert dates[-1] == np.datetime64('2024-12-31') and closes[-1] == 42.0
+    assert bloco.count == PriceBar.query.filter(PriceBar.ticker == 'VALE3.SA', PriceBar.date >= date(2024, 1, 1)).count()
+
+
+def test_block_reads_match_rows(app, carteira_id):
+    """Com PRICE_STORAGE='blocks', a matriz e os indicadores são os mesmos das linhas."""
+    # A janela da carteira começa em 2023 para um dos tickers
+    db.session.get(Asset, (carteira_id, 'PETR4.SA')).start_date = date(2023, 3, 1)
+    db.session.commit()
+
+    linhas = load_price_matrix(carteira_id)
+    recorte = load_price_matrix(carteira_id, start=date(2024, 6, 1))
+    anteriores = load_previous_closes(carteira_id, date(2024, 6, 1))
+    indicadores, _ = AssetService.calcular_indicadores_carteira(carteira_id)
+
+    app.config.update(PRICE_STORAGE='blocks', INDICADORES_CACHE_ENABLED=False)
+    blocos = load_price_matrix(carteira_id)
+    assert blocos.tickers == linhas.tickers == TICKERS
+    np.testing.assert_array_equal(blocos.dates, linhas.dates)
+    np.testing.assert_array_equal(blocos.prices, linhas.prices)
+    np.testing.assert_array_equal(load_price_matrix(carteira_id, start=date(2024, 6, 1)).prices, recorte.prices)
+    assert load_previous_closes(carteira_id, date(2024, 6, 1)) == anteriores
+
+    result, status = AssetService.calcular_indicadores_carteira(carteira_id)
+    assert status == 200
+    assert result['indicadores'] == indicadores['indicadores']
@@ -0,0 +1,159 @@
+"""
+Testes unitários para o cache persistente de preços.
+"""
+
+import unittest
+from unittest.mock import patch
+import pandas as pd
+import numpy as np
+import pickle
+import tempfile
+import time
+import sys
+import os
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.utils.price_cache import PriceCache, get_price_cache
+from app.services.Asset_service import AssetService
+
+
+_EXPLOIT_CALLS = []
+
+
+def _exploit():
+    _EXPLOIT_CALLS.append(1)
+
+
+class _Exploit:
+    """Objeto que executa código ao ser lido com pickle."""
+
+    def __reduce__(self):
+        return (_exploit, ())
+
+
+class TestPriceCache(unittest.TestCase):
+    """Testes para o PriceCache."""
+
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite3')
+
+        dates = pd.date_range('2024-01-01', periods=30, freq='D')
+        prices = 30 + np.cumsum(np.linspace(-0.5, 0.5, 30))
+        self.df = pd.DataFrame({
+            'Close': prices,
+            'Open': prices * 0.995,
+            'High': prices * 1.01,
+            'Low': prices * 0.99,
+        }, index=pd.DatetimeIndex(dates, name='Date'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip(self):
+        """Uma série gravada é devolvida idêntica."""
+        cache = PriceCache(self.path)
+        self.assertIsNone(cache.get('PETR4.SA', '1y', '1d'))
+
+        cache.set('PETR4.SA', '1y', '1d', self.df)
+        cached = cache.get('PETR4.SA', '1y', '1d')
+
+        # A frequência do índice não é um dado da série e não é gravada
+        pd.testing.assert_frame_equal(cached, self.df, check_freq=False)
+        self.assertIsNone(cache.get('PETR4.SA', '1y', '5d'))
+
+    def test_payload_is_arrow_not_pickle(self):
+        """As entradas são gravadas em Arrow IPC: um payload pickle adulterado não é executado."""
+        cache = PriceCache(self.path)
+        cache.set('PETR4.SA', '1y', '1d', self.df)
+        payload = cache._connect().execute('SELECT payload FROM price_cache').fetchone()[0]
+        self.assertEqual(payload[:4], b'\xff\xff\xff\xff')
+
+        with cache._connect() as conn:
+            conn.execute('UPDATE price_cache SET payload = ?', (pickle.dumps(_Exploit()),))
+        self.assertIsNone(cache.get('PETR4.SA', '1y', '1d'))
+        self.assertEqual(_EXPLOIT_CALLS, [])
+
+    def test_default_path_in_instance_dir(self):
+        """Sem PRICE_CACHE_PATH, o cache fica no diretório instance da aplicação."""
+        app = create_app('testing')
+        app.config.update(PRICE_CACHE_ENABLED=True, PRICE_CACHE_PATH=None)
+        app.instance_path = self.tmpdir.name
+        with app.app_context():
+            self.assertEqual(get_price_cache().path, os.path.join(self.tmpdir.name, 'price_cache.sqlite3'))
+
+    def test_ttl_expiration(self):
+        """Entradas mais antigas que o TTL são tratadas como miss."""
+        cache = PriceCache(self.path, ttl=60)
+        cache.set('PETR4.SA', '1y', '1d', self.df)
+
+        with patch('app.utils.price_cache.time.time', return_value=time.time() + 120):
+            self.assertIsNone(cache.get('PETR4.SA', '1y', '1d'))
+
+    def test_size_bounded_eviction(self):
+        """Ao ultrapassar o limite, as entradas menos acessadas saem primeiro."""
+        cache = PriceCache(self.path)
+        cache.set('PETR4.SA', '1y', '1d', self.df)
+        entry_size = cache._connect().execute('SELECT size FROM price_cache').fetchone()[0]
+
+        cache.max_bytes = entry_size * 2
+        cache.set('ITUB4.SA', '1y', '1d', self.df)
+        cache.get('PETR4.SA', '1y', '1d')
+        cache.set('VALE3.SA', '1y', '1d', self.df)
+
+        self.assertIsNotNone(cache.get('PETR4.SA', '1y', '1d'))
+        self.assertIsNone(cache.get('ITUB4.SA', '1y', '1d'))
+        self.assertIsNotNone(cache.get('VALE3.SA', '1y', '1d'))
+
+    @patch('app.services.Asset_service.get_market_data_provider')
+    @patch('app.services.Asset_service.get_price_cache')
+    def test_get_asset_data_reports_hit_and_miss(self, mock_get_cache, mock_provider):
+        """get_asset_data só baixa na primeira chamada e informa hit/miss."""
+        mock_get_cache.return_value = PriceCache(self.path)
+        mock_download = mock_provider.return_value.history
+        mock_download.return_value = self.df.copy()
+
+        first, status = AssetService.get_asset_data('PETR4', '1y', '1d')
+        second, _ = AssetService.get_asset_data('PETR4', '1y', '1d')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(first['cache'], 'miss')
+        self.assertEqual(second['cache'], 'hit')
+        self.assertEqual(first['results'], second['results'])
+        self.assertEqual(first['historico'], second['historico'])
+        mock_download.assert_called_once()
+
+    @patch('app.services.Asset_service.get_market_data_provider')
+    @patch('app.services.Asset_service.get_price_cache')
+    def test_get_asset_data_delta_sync(self, mock_get_cache, mock_provider):
+        """Com a entrada vencida, apenas as barras novas são baixadas e mescladas."""
+        cache = PriceCache(self.path, ttl=60)
+        mock_get_cache.return_value = cache
+        mock_download = mock_provider.return_value.history
+
+        dates = pd.date_range(end=pd.Timestamp.now().normalize() - pd.Timedelta(days=3), periods=95, freq='D')
+        stored = pd.DataFrame({'Close': np.linspace(30, 36, 95)}, index=pd.DatetimeIndex(dates, name='Date'))
+        cache.set('PETR4.SA', '3mo', '1d', stored)
+
+        new_dates = pd.date_range(dates[-1], periods=3, freq='D')
+        mock_download.return_value = pd.DataFrame({'Close': [36.5, 37.0, 37.5]}, index=pd.DatetimeIndex(new_dates, name='Date'))
+
+        with patch('app.utils.price_cache.time.time', return_value=time.time() + 120):
+            result, status = AssetService.get_asset_data('PETR4', '3mo', '1d')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(result['cache'], 'delta')
+        self.assertEqual(mock_download.call_args.kwargs['start'], dates[-1].strftime('%Y-%m-%d'))
+        self.assertNotIn('period', mock_download.call_args.kwargs)
+        window_start = (pd.Timestamp.now().normalize() - pd.DateOffset(months=3)).strftime('%Y-%m-%d')
+        self.assertGreaterEqual(result['historico'][0]['data'], window_start)
+        self.assertEqual(result['historico'][-1]['data'], new_dates[-1].strftime('%Y-%m-%d'))
+        self.assertEqual(result['historico'][-1]['close'], 37.5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
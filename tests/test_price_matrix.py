@@ -0,0 +1,55 @@
+"""
+Testes do carregamento de fechamentos em matriz (sem ORM).
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.model.Asset import Asset
+from app.model.PriceBar import PriceBar
+from app.utils.price_matrix import load_price_matrix
+
+
+@pytest.fixture
+def carteira_id(carteira):
+    """Carteira com três tickers e uma data faltando em um deles."""
+    rows = []
+    for i, ticker in enumerate(['PETR4.SA', 'BOVA11.SA', 'VALE3.SA']):
+        for day in range(1, 6):
+            if ticker == 'VALE3.SA' and day == 3:
+                continue
+            rows.append({'carteira_id': carteira.id, 'ticker': ticker,
+                         'date': date(2024, 1, day), 'close': 10.0 * (i + 1) + day})
+    Asset.bulk_insert(rows)
+    return carteira.id
+
+
+def test_load_price_matrix_matches_pivot(app, carteira_id):
+    """A matriz é igual ao pivot_table feito a partir dos objetos do ORM."""
+    with app.app_context():
+        assets = PriceBar.query.join(Asset, (Asset.ticker == PriceBar.ticker) & (Asset.interval == PriceBar.interval)) \
+            .filter(Asset.carteira_id == carteira_id).all()
+        df = pd.DataFrame([{'ticker': a.ticker, 'date': a.date, 'close': a.close} for a in assets])
+        pivot = df.pivot_table(index='date', columns='ticker', values='close', aggfunc='first')
+
+        matriz = load_price_matrix(carteira_id, chunk_rows=4)
+
+        assert matriz.tickers == ['BOVA11.SA', 'PETR4.SA', 'VALE3.SA']
+        assert matriz.dates[0] == np.datetime64('2024-01-01')
+        np.testing.assert_array_equal(matriz.prices, pivot.to_numpy())
+
+        complete = matriz.complete()
+        assert len(complete.dates) == 4
+        np.testing.assert_array_equal(complete.prices, pivot.dropna().to_numpy())
+
+
+def test_load_price_matrix_filters_tickers(app, carteira_id):
+    """Filtra por tickers e reordena as colunas com select()."""
+    with app.app_context():
+        matriz = load_price_matrix(carteira_id, tickers=['vale3.sa', 'PETR4.SA']).select(['VALE3.SA', 'PETR4.SA'])
+
+        assert matriz.tickers == ['VALE3.SA', 'PETR4.SA']
+        assert matriz.prices[0].tolist() == [31.0, 11.0]
+        assert load_price_matrix(carteira_id + 1).empty
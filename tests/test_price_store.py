@@ -0,0 +1,108 @@
+"""
+Testes da matriz de fechamentos compartilhada entre os workers (PRICE_STORE_DIR).
+"""
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app import db
+from app.model.Carteira import Carteira
+from app.model.Asset import Asset
+from app.model.PriceBar import PriceBar
+from app.services.Asset_service import AssetService
+from app.utils.price_matrix import load_price_matrices, load_price_matrix
+from app.utils.price_store import attach_price_store, build_price_store, load_store_matrices
+
+CARTEIRAS = {
+    'Ações': ['BOVA11.SA', 'ITUB4.SA', 'PETR4.SA'],
+    'Commodities': ['BOVA11.SA', 'PETR4.SA', 'VALE3.SA'],
+}
+
+
+@pytest.fixture
+def app(app, tmp_path):
+    """App de teste com o armazenamento em um diretório temporário (sem atualização em segundo plano)."""
+    app.config.update(PRICE_STORE_DIR=str(tmp_path / 'price_store'), PRICE_STORE_AUTO_REFRESH=False,
+                      INDICADORES_CACHE_ENABLED=False)
+    return app
+
+
+@pytest.fixture
+def carteira_ids(cliente):
+    """Duas carteiras com tickers em comum; uma delas enxerga PETR4.SA só a partir do dia 20."""
+    rng = np.random.default_rng(11)
+    historico = {ticker: 30 * np.exp(np.cumsum(rng.normal(0.001, 0.02, 80)))
+                 for ticker in sorted({ticker for tickers in CARTEIRAS.values() for ticker in tickers})}
+    ids, rows = {}, []
+    for nome, tickers in CARTEIRAS.items():
+        carteira = Carteira(cliente.id, nome)
+        Carteira.save(carteira)
+        ids[nome] = carteira.id
+        for ticker in tickers:
+            rows.extend({'carteira_id': carteira.id, 'ticker': ticker, 'date': date.fromordinal(738000 + day),
+                         'close': float(historico[ticker][day])} for day in range(80) if day % 7 != 3)
+    Asset.bulk_insert(rows)
+    db.session.get(Asset, (ids['Commodities'], 'PETR4.SA')).start_date = date.fromordinal(738020)
+    db.session.commit()
+    return ids
+
+
+def test_store_matches_database(app, carteira_ids):
+    """As matrizes do armazenamento são iguais às lidas do banco, e a geração é aberta sem cópia."""
+    esperado = {nome: load_price_matrix(carteira_id) for nome, carteira_id in carteira_ids.items()}
+    recorte = load_price_matrix(carteira_ids['Ações'], tickers=['PETR4.SA'], start=date.fromordinal(738050))
+    assert load_store_matrices(list(carteira_ids.values())) is None
+
+    build_price_store()
+    store = attach_price_store()
+    assert isinstance(store.prices, np.memmap) and not store.prices.flags.writeable
+
+    for nome, carteira_id in carteira_ids.items():
+        matriz = load_price_matrix(carteira_id)
+        assert matriz.tickers == esperado[nome].tickers
+        np.testing.assert_array_equal(matriz.dates, esperado[nome].dates)
+        np.testing.assert_array_equal(matriz.prices, esperado[nome].prices)
+    filtrada = load_price_matrix(carteira_ids['Ações'], tickers=['PETR4.SA'], start=date.fromordinal(738050))
+    np.testing.assert_array_equal(filtrada.prices, recorte.prices)
+
+    # Várias carteiras: fatias de uma única cópia, como na leitura do banco
+    matrizes = load_price_matrices(list(carteira_ids.values()))
+    assert matrizes[carteira_ids['Ações']].prices.base is matrizes[carteira_ids['Commodities']].prices.base
+    for nome, carteira_id in carteira_ids.items():
+        np.testing.assert_array_equal(matrizes[carteira_id].complete().prices, esperado[nome].complete().prices)
+
+
+def test_stale_store_falls_back_and_refreshes(app, carteira_ids):
+    """Barras novas no banco desviam a leitura para o banco até a próxima geração, publicada atomicamente."""
+    primeira = build_price_store()
+    PriceBar.insert_ignore_duplicates([{'ticker': 'VALE3.SA', 'date': date.fromordinal(738090), 'close': 50.0}])
+    db.session.commit()
+
+    assert load_store_matrices([carteira_ids['Commodities']]) is None
+    assert load_price_matrix(carteira_ids['Commodities']).prices[-1, -1] == 50.0
+    # Carteiras sem o ticker alterado continuam usando o armazenamento
+    assert load_store_matrices([carteira_ids['Ações']]) is not None
+
+    segunda = build_price_store()
+    diretorio = app.config['PRICE_STORE_DIR']
+    assert sorted(os.listdir(diretorio)) == sorted(['CURRENT', segunda])
+    assert attach_price_store().generation == segunda != primeira
+    matriz = load_store_matrices([carteira_ids['Commodities']])[carteira_ids['Commodities']]
+    assert matriz.prices[-1, -1] == 50.0
+
+
+def test_indicadores_from_store(app, carteira_ids):
+    """Os indicadores calculados a partir do armazenamento são os mesmos do banco."""
+    app.config['INDICADORES_SOURCE'] = 'history'
+    esperado, _ = AssetService.calcular_indicadores_carteira(carteira_ids['Ações'])
+
+    build_price_store()
+    result, status = AssetService.calcular_indicadores_carteira(carteira_ids['Ações'])
+    assert status == 200
+    assert result['indicadores'] == esperado['indicadores']
+
+    runner = app.test_cli_runner()
+    output = runner.invoke(args=['prices', 'refresh']).output
+    assert output.startswith('Geração ') and attach_price_store().generation in output
@@ -0,0 +1,68 @@
+"""
+Testes do pool de processos das análises pesadas em CPU.
+"""
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils import process_pool
+from app.utils.process_pool import DEFAULT_POOL_WORKERS, parallel_map, pool_workers
+
+
+def _quadrado(x):
+    return x * x
+
+
+@pytest.mark.parametrize('configurado, esperado', [
+    (None, DEFAULT_POOL_WORKERS),
+    (3, 3),
+    (0, 8),
+])
+def test_pool_workers(configurado, esperado):
+    """O padrão é um limite pequeno por worker; 0 usa o número de CPUs."""
+    with patch('app.utils.process_pool.get_setting', side_effect=lambda key, default=None:
+               default if configurado is None else configurado), \
+            patch('app.utils.process_pool.os.cpu_count', return_value=8):
+        assert pool_workers() == esperado
+
+
+class _Threadpool:
+    """Threadpool do hub do gevent: executa em uma thread nativa."""
+
+    def __init__(self):
+        self.threads = []
+
+    def spawn(self, fn):
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(value=fn()))
+        thread.start()
+        self.threads.append(thread)
+        return _AsyncResult(thread, result)
+
+
+class _AsyncResult:
+    def __init__(self, thread, result):
+        self.thread = thread
+        self.result = result
+
+    def get(self):
+        self.thread.join()
+        return self.result['value']
+
+
+def test_parallel_map_waits_in_gevent_threadpool():
+    """Com o gevent ativo, a espera pelos resultados do pool roda no threadpool do hub."""
+    threadpool = _Threadpool()
+    monkey = MagicMock(is_module_patched=lambda module: module == 'threading')
+    with patch.object(process_pool, 'gevent_monkey', monkey), \
+            patch.object(process_pool, 'get_hub', return_value=MagicMock(threadpool=threadpool)):
+        assert parallel_map(_quadrado, [1, 2, 3], workers=2) == [1, 4, 9]
+    assert len(threadpool.threads) == 1
+
+
+def test_parallel_map_serial_without_pool():
+    """Com um processo, a execução é em série, sem pool."""
+    with patch('app.utils.process_pool.get_process_pool') as mock_pool:
+        assert parallel_map(_quadrado, [1, 2, 3], workers=1) == [1, 4, 9]
+        mock_pool.assert_not_called()
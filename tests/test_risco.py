@@ -0,0 +1,140 @@
+"""
+Testes das medidas de risco (VaR, CVaR e probabilidade de perda) e da simulação de Monte Carlo.
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.model.Asset import Asset
+from app.services.Analise_service import AnaliseService
+from app.utils.jwt_utils import generate_token
+from app.utils.risco import (fator_covariancia, medidas_risco, retornos_historicos, risco_parametrico,
+                             simular_retornos)
+
+
+def _moments(k=8, seed=1):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, (400, 2)) @ rng.normal(1, 0.3, (k, 2)).T + rng.normal(0, 0.01, (400, k))
+    return np.full(k, 0.0005), np.cov(returns.T)
+
+
+def test_fator_covariancia_singular():
+    """Covariância singular (menos observações que ativos) ainda é fatorada."""
+    returns = np.random.default_rng(0).normal(0, 0.01, (5, 10))
+    cov = np.cov(returns.T)
+    fator = fator_covariancia(cov)
+    np.testing.assert_allclose(fator @ fator.T, cov, atol=1e-12)
+
+
+def test_medidas_risco_matches_sorted_sample():
+    """VaR é o quantil inferior e CVaR a média da cauda, como na amostra ordenada."""
+    retornos = np.random.default_rng(2).normal(0.001, 0.02, 10_000)
+    medidas = medidas_risco(retornos, [0.95, 0.99])
+    ordenados = np.sort(retornos)
+
+    assert medidas['var'].tolist() == [-ordenados[500], -ordenados[100]]
+    assert medidas['cvar'][0] == pytest.approx(-ordenados[:501].mean())
+    assert medidas['probabilidade_perda'] == pytest.approx((retornos < 0).mean())
+
+
+def test_simulation_matches_parametric():
+    """Com muitos caminhos e volatilidade baixa, o Monte Carlo (lognormal) se aproxima da normal."""
+    mu, cov = _moments()
+    cov /= 16
+    pesos = np.full(len(mu), 1 / len(mu))
+    simulacao = simular_retornos(mu, cov, pesos, 10, 400_000, seed=3, workers=1)
+    monte_carlo = medidas_risco(simulacao['retornos'], [0.95, 0.99])
+    parametrico = risco_parametrico(mu, cov, pesos, 10, [0.95, 0.99])
+
+    assert len(simulacao['retornos']) == 400_000
+    np.testing.assert_allclose(monte_carlo['var'], parametrico['var'], rtol=0.03)
+    np.testing.assert_allclose(monte_carlo['cvar'], parametrico['cvar'], rtol=0.03)
+    assert monte_carlo['probabilidade_perda'] == pytest.approx(parametrico['probabilidade_perda'], abs=0.01)
+
+
+def test_simulation_is_reproducible_across_workers():
+    """A mesma semente dá os mesmos caminhos em série e no pool de processos."""
+    mu, cov = _moments()
+    pesos = np.full(len(mu), 1 / len(mu))
+    kwargs = dict(seed=11, chunk_mb=0.1, pool_min_caminhos=0)
+
+    serie = simular_retornos(mu, cov, pesos, 5, 20_000, workers=1, **kwargs)
+    pool = simular_retornos(mu, cov, pesos, 5, 20_000, workers=2, **kwargs)
+
+    assert serie['blocos'] > 2
+    assert pool['workers'] == 2
+    np.testing.assert_array_equal(serie['retornos'], pool['retornos'])
+
+
+def test_retornos_historicos():
+    """Retorno de comprar e manter em cada janela de h pregões."""
+    precos = np.array([[10.0, 20.0], [11.0, 20.0], [12.0, 22.0], [9.0, 24.0]])
+    pesos = np.array([0.5, 0.5])
+    esperado = [0.5 * (12 / 10 - 1) + 0.5 * (22 / 20 - 1), 0.5 * (9 / 11 - 1) + 0.5 * (24 / 20 - 1)]
+    np.testing.assert_allclose(retornos_historicos(precos, pesos, 2), esperado)
+    assert len(retornos_historicos(precos, pesos, 4)) == 0
+
+
+@pytest.fixture
+def carteira_id(carteira):
+    """Carteira com BOVA11.SA e três ativos, com o contexto de um admin autenticado."""
+    rng = np.random.default_rng(7)
+    rows = []
+    for ticker in ['BOVA11.SA', 'ITUB4.SA', 'PETR4.SA', 'VALE3.SA']:
+        closes = 30 * np.exp(np.cumsum(rng.normal(0.001, 0.02, 60)))
+        rows.extend({'carteira_id': carteira.id, 'ticker': ticker, 'date': date.fromordinal(738000 + day),
+                     'close': float(close)} for day, close in enumerate(closes))
+    Asset.bulk_insert(rows)
+    return carteira.id
+
+
+def test_simular_risco_service(carteira_id):
+    """Os três métodos respondem por nível de confiança e a semente reproduz o Monte Carlo."""
+    data = {'horizonte': 5, 'confiancas': [0.9, 0.99], 'caminhos': 5000, 'seed': 42}
+    result, status = AnaliseService.simular_risco(carteira_id, data)
+
+    assert status == 200
+    risco = result['risco']
+    assert risco['ativos'] == ['ITUB4.SA', 'PETR4.SA', 'VALE3.SA']
+    assert risco['pesos'] == pytest.approx({ticker: 1 / 3 for ticker in risco['ativos']})
+    assert risco['historico']['observacoes'] == 55
+    for metodo in ('historico', 'parametrico', 'monte_carlo'):
+        assert len(risco[metodo]['var']) == 2
+        assert risco[metodo]['cvar'][1] >= risco[metodo]['var'][1]
+    assert risco['monte_carlo']['seed'] == 42
+
+    repetido, _ = AnaliseService.simular_risco(carteira_id, data)
+    assert repetido['risco']['monte_carlo']['var'] == risco['monte_carlo']['var']
+
+    concentrado, _ = AnaliseService.simular_risco(carteira_id, {**data, 'pesos': {'PETR4': 1.0}})
+    assert concentrado['risco']['pesos'] == {'ITUB4.SA': 0.0, 'PETR4.SA': 1.0, 'VALE3.SA': 0.0}
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'horizonte': 0}, 'horizonte'),
+    ({'caminhos': 10}, 'caminhos'),
+    ({'confiancas': [0.95, 1.0]}, 'confiancas'),
+    ({'pesos': [0.5, 0.5]}, '3 finite values'),
+])
+def test_simular_risco_validation(carteira_id, data, message):
+    """Parâmetros inválidos devolvem 400."""
+    result, status = AnaliseService.simular_risco(carteira_id, data)
+    assert status == 400
+    assert message in result['message']
+
+
+def test_risco_endpoint(app, admin, carteira_id):
+    """O endpoint devolve as três estimativas e o tempo da simulação."""
+    token = generate_token(admin.id, 'admin')
+    response = app.test_client().post(
+        f'/api/wallets/{carteira_id}/risco',
+        json={'caminhos': 2000, 'seed': 1},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == 200
+    risco = response.get_json()['risco']
+    assert risco['confiancas'] == [0.95, 0.99]
+    assert risco['monte_carlo']['caminhos'] == 2000
+    assert risco['monte_carlo']['tempo_ms'] >= 0
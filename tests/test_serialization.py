@@ -0,0 +1,94 @@
+"""
+Testes unitários para a negociação de conteúdo das respostas analíticas.
+"""
+
+import unittest
+import json
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils import serialization
+from app.utils.serialization import negotiate_format, to_msgpack, from_msgpack, to_arrow_ipc
+from app.services.Asset_service import AssetService, ARRAYS_FORMAT
+from app.controllers.Asset_controller import _historico_lote_arrow_table
+
+
+@unittest.skipIf(serialization.msgpack is None or serialization.pa is None, "msgpack/pyarrow não instalados")
+class TestSerialization(unittest.TestCase):
+    """Testes para MessagePack, Arrow IPC e a escolha do formato."""
+
+    def test_negotiate_format(self):
+        """JSON continua o padrão; formatos binários só quando pedidos."""
+        self.assertEqual(negotiate_format(''), 'json')
+        self.assertEqual(negotiate_format('*/*'), 'json')
+        self.assertEqual(negotiate_format('text/html'), 'json')
+        self.assertEqual(negotiate_format('application/msgpack'), 'msgpack')
+        self.assertEqual(negotiate_format('application/x-msgpack'), 'msgpack')
+        self.assertEqual(
+            negotiate_format('application/vnd.apache.arrow.stream, application/json;q=0.5'), 'arrow'
+        )
+
+    def test_msgpack_encodes_arrays_as_buffers(self):
+        """Arrays numéricos viram buffers little-endian com dtype e shape."""
+        matrix = np.arange(6, dtype=float).reshape(2, 3)
+        payload = {'success': True, 'matriz': matrix, 'datas': np.array(['2024-01-02', '2024-01-03'], dtype=object)}
+
+        decoded = serialization.msgpack.unpackb(to_msgpack(payload))
+
+        self.assertTrue(decoded['success'])
+        self.assertEqual(decoded['datas'], ['2024-01-02', '2024-01-03'])
+        self.assertEqual(decoded['matriz']['dtype'], '<f8')
+        restored = np.frombuffer(decoded['matriz']['data'], dtype='<f8').reshape(decoded['matriz']['shape'])
+        np.testing.assert_array_equal(restored, matrix)
+
+    def test_msgpack_roundtrip_restores_arrays(self):
+        """Requisições em MessagePack reconstroem os arrays enviados como buffers."""
+        matrix = np.random.default_rng(0).random((3, 4))
+        decoded = from_msgpack(to_msgpack({'ativos': ['A', 'B'], 'pesos': matrix}))
+
+        self.assertEqual(decoded['ativos'], ['A', 'B'])
+        np.testing.assert_array_equal(decoded['pesos'], matrix)
+
+    def test_arrow_roundtrip_with_metadata(self):
+        """O histórico vira um record batch e os demais campos vão nos metadados."""
+        dates = pd.date_range('2024-01-01', periods=20, freq='D', name='Date')
+        df = pd.DataFrame({'Close': np.linspace(30, 32, 20)}, index=dates)
+        result = AssetService.calculateIndexAsset(df, 'PETR4.SA', ARRAYS_FORMAT)
+
+        historico = result.pop('historico')
+        stream = to_arrow_ipc(historico, result)
+        table = serialization.pa.ipc.open_stream(stream).read_all()
+
+        self.assertEqual(table.schema.names, ['data', 'close', 'high', 'low', 'open'])
+        self.assertEqual(table.column('data').to_pylist()[0], '2024-01-01')
+        np.testing.assert_array_equal(table.column('close').to_numpy(), historico['close'])
+        self.assertEqual(json.loads(table.schema.metadata[b'payload'])['results'], result['results'])
+
+    def test_arrow_batch_one_row_per_bar(self):
+        """Na busca em lote, as barras de todos os tickers ficam em uma tabela com a coluna ticker."""
+        dates = pd.date_range('2024-01-01', periods=20, freq='D', name='Date')
+        assets = {}
+        for ticker, closes in (('PETR4.SA', np.linspace(30, 32, 20)), ('ITUB4.SA', np.linspace(20, 19, 20))):
+            df = pd.DataFrame({'Close': closes}, index=dates)
+            assets[ticker] = AssetService.calculateIndexAsset(df, ticker, ARRAYS_FORMAT)
+        assets['XXXX3.SA'] = {'success': False, 'message': 'No data found for the given asset'}
+
+        columns, metadata = _historico_lote_arrow_table({'success': True, 'assets': assets})
+        table = serialization.pa.ipc.open_stream(to_arrow_ipc(columns, metadata)).read_all()
+
+        self.assertEqual(table.schema.names, ['ticker', 'data', 'close', 'high', 'low', 'open'])
+        self.assertEqual(table.column('ticker').to_pylist(), ['PETR4.SA'] * 20 + ['ITUB4.SA'] * 20)
+        np.testing.assert_array_equal(table.column('close').to_numpy()[20:], assets['ITUB4.SA']['historico']['close'])
+        payload = json.loads(table.schema.metadata[b'payload'])
+        self.assertNotIn('historico', payload['assets']['PETR4.SA'])
+        self.assertEqual(payload['assets']['XXXX3.SA']['success'], False)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
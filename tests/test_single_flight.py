@@ -0,0 +1,104 @@
+"""
+Testes unitários para a coalescência de buscas (single-flight).
+"""
+
+import unittest
+import threading
+import tempfile
+import time
+import sys
+import os
+from unittest.mock import patch
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fcntl
+
+from app import create_app
+from app.utils.single_flight import SingleFlight, coalesce, cross_worker_lock
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Testes para o SingleFlight."""
+
+    def _run_concurrently(self, target, n=8):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Chamadas concorrentes com a mesma chave executam a busca uma única vez."""
+        flight = SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'PETR4.SA'
+
+        results = self._run_concurrently(lambda: flight.do(('history', 'PETR4.SA', '1y', '1d'), fetch))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['PETR4.SA'] * 8)
+
+    def test_errors_propagate_to_waiters(self):
+        """Todos os chamadores coalescidos recebem o erro da busca."""
+        flight = SingleFlight()
+
+        def fetch():
+            time.sleep(0.2)
+            raise ValueError('yfinance indisponível')
+
+        def call():
+            try:
+                flight.do('key', fetch)
+            except ValueError as e:
+                return str(e)
+
+        results = self._run_concurrently(call, n=4)
+        self.assertEqual(results, ['yfinance indisponível'] * 4)
+
+    def test_coalesce_uses_recheck_result(self):
+        """Após o lock entre workers, um resultado já armazenado evita a busca."""
+        result = coalesce(('history', 'ITUB4.SA', '1y', '1d'),
+                          lambda: self.fail('fetch não deveria ser chamado'),
+                          recheck=lambda: 'cached')
+        self.assertEqual(result, 'cached')
+
+    def test_file_lock_gives_up_after_timeout(self):
+        """Com o lock de arquivo preso por outro worker, a espera termina no timeout e a busca segue sem ele."""
+        with tempfile.TemporaryDirectory() as lock_dir, \
+                patch.dict(os.environ, {'SINGLE_FLIGHT_LOCK_DIR': lock_dir, 'SINGLE_FLIGHT_LOCK_TIMEOUT': '0.3',
+                                        'REDIS_URL': ''}):
+            with cross_worker_lock('key'):
+                # Outro descritor do mesmo arquivo, como o de outro worker
+                lock_path = os.path.join(lock_dir, os.listdir(lock_dir)[0])
+            with open(lock_path, 'a') as other_worker:
+                fcntl.flock(other_worker, fcntl.LOCK_EX)
+                start = time.monotonic()
+                with cross_worker_lock('key'):
+                    elapsed = time.monotonic() - start
+
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertLess(elapsed, 2)
+
+    def test_file_lock_default_dir_in_instance_dir(self):
+        """Sem SINGLE_FLIGHT_LOCK_DIR, os locks ficam no diretório instance, acessível só ao processo."""
+        app = create_app('testing')
+        app.config.update(SINGLE_FLIGHT_LOCK_DIR=None, REDIS_URL='')
+        with tempfile.TemporaryDirectory() as instance_path:
+            app.instance_path = instance_path
+            with app.app_context(), patch.dict(os.environ, {'REDIS_URL': ''}):
+                with cross_worker_lock('key'):
+                    lock_dir = os.path.join(instance_path, 'single_flight')
+                    self.assertEqual(len(os.listdir(lock_dir)), 1)
+            self.assertEqual(os.stat(lock_dir).st_mode & 0o777, 0o700)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
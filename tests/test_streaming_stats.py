@@ -0,0 +1,247 @@
+"""
+Testes das estatísticas incrementais de covariância.
+"""
+import pickle
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import db
+from app.model.Asset import Asset
+from app.model.CarteiraEstatisticas import CarteiraEstatisticas
+from app.model.IndicadoresCache import IndicadoresCache
+from app.services.Asset_service import AssetService
+from app.utils.price_matrix import load_price_matrix
+from app.utils.streaming_stats import CovarianceState
+
+TICKERS = ['t0', 't1', 't2', 't3']
+
+_EXPLOIT_CALLS = []
+
+
+def _exploit():
+    _EXPLOIT_CALLS.append(1)
+
+
+class _Exploit:
+    """Objeto que executa código ao ser lido com pickle."""
+
+    def __reduce__(self):
+        return (_exploit, ())
+
+
+def _prices(rows=120, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = 30 * np.exp(np.cumsum(rng.normal(0, 0.02, (rows, len(TICKERS))), axis=0))
+    dates = np.datetime64('2024-01-01') + np.arange(rows)
+    return dates, prices
+
+
+def _assert_same_state(state, expected):
+    assert state.tickers == expected.tickers
+    assert state.n == expected.n
+    np.testing.assert_allclose(state.mean, expected.mean, atol=1e-14)
+    np.testing.assert_allclose(state.comoment, expected.comoment, atol=1e-14)
+    assert state.last_date == expected.last_date
+    np.testing.assert_array_equal(state.last_close, expected.last_close)
+
+
+def test_aligned_moments_match_pandas():
+    """Com datas alinhadas, médias e covariância são as da recomputação."""
+    dates, prices = _prices()
+    means, cov, min_obs = CovarianceState.from_prices(TICKERS, dates, prices).moments()
+
+    returns = pd.DataFrame(prices).pct_change().dropna()
+    np.testing.assert_allclose(means, returns.mean().values, atol=1e-15)
+    np.testing.assert_allclose(cov, returns.cov().values, atol=1e-15)
+    assert min_obs == len(dates) - 1
+
+
+def test_moments_use_shared_dates():
+    """Com datas diferentes, todos os pares usam as datas com fechamento para todos os tickers."""
+    dates, prices = _prices()
+    prices[:40, 2] = np.nan
+    prices[70:75, 3] = np.nan
+    means, cov, min_obs = CovarianceState.from_prices(TICKERS, dates, prices).moments()
+
+    returns = pd.DataFrame(prices).dropna().pct_change().dropna()
+    np.testing.assert_allclose(means, returns.mean().values, atol=1e-15)
+    np.testing.assert_allclose(cov, returns.cov().values, atol=1e-15)
+    assert min_obs == len(returns)
+    assert np.linalg.eigvalsh(cov).min() > 0
+
+
+def test_append_matches_full_rebuild():
+    """Anexar as barras novas ticker a ticker equivale a reconstruir tudo."""
+    dates, prices = _prices()
+    prices[:40, 2] = np.nan
+    prices[70:75, 3] = np.nan
+    prices[95:98, 1] = np.nan
+    cut = 90
+
+    state = CovarianceState.from_prices(TICKERS, dates[:cut], prices[:cut])
+    for column, ticker in enumerate(TICKERS):
+        assert state.can_append(dates[cut])
+        # Banco após a inserção do ticker: barras novas apenas até ele
+        stored = prices.copy()
+        stored[cut:, column + 1:] = np.nan
+        window = dates > state.last_date
+        state.append(TICKERS, dates[window], stored[window])
+
+    _assert_same_state(state, CovarianceState.from_prices(TICKERS, dates, prices))
+    assert not state.can_append(dates[-1])
+
+
+def test_bytes_roundtrip():
+    """O estado é gravado em .npz e lido sem pickle, inclusive vazio (sem última data)."""
+    dates, prices = _prices()
+    state = CovarianceState.from_prices(TICKERS, dates, prices)
+    _assert_same_state(CovarianceState.from_bytes(state.to_bytes()), state)
+
+    empty = CovarianceState.from_bytes(CovarianceState().to_bytes())
+    assert empty.tickers == [] and empty.n == 0 and np.isnat(empty.last_date)
+
+    with pytest.raises(ValueError):
+        CovarianceState.from_bytes(pickle.dumps(_Exploit()))
+    assert _EXPLOIT_CALLS == []
+
+
+@pytest.fixture
+def carteira_id(carteira):
+    """Carteira com BOVA11.SA e PETR4.SA, com o contexto de um admin autenticado."""
+    rng = np.random.default_rng(5)
+    rows = []
+    for ticker in ['BOVA11.SA', 'PETR4.SA']:
+        closes = 30 * np.exp(np.cumsum(rng.normal(0, 0.02, 30)))
+        rows.extend({'carteira_id': carteira.id, 'ticker': ticker, 'date': date(2024, 1, day + 1),
+                     'close': float(close)} for day, close in enumerate(closes))
+    Asset.bulk_insert(rows)
+    return carteira.id
+
+
+def _history(start, periods, seed):
+    dates = pd.date_range(start, periods=periods, freq='D', name='Date')
+    closes = 20 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.02, periods)))
+    return pd.DataFrame({'Close': closes}, index=dates)
+
+
+def _full_state(carteira_id):
+    matriz = load_price_matrix(carteira_id)
+    return CovarianceState.from_prices(matriz.tickers, matriz.dates, matriz.prices)
+
+
+@patch('app.services.Asset_service.get_market_data_provider')
+def test_cadastrar_ativo_updates_stats(mock_provider, carteira_id):
+    """O cadastro incorpora as barras às estatísticas, sem reconstrução na leitura."""
+    AssetService.calcular_indicadores_carteira(carteira_id)
+
+    # Ticker novo (reconstrói o estado) e barras novas no fim (combinação incremental)
+    mock_provider.return_value.history.return_value = _history('2024-01-01', 30, 1)
+    AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': carteira_id, 'period': '1mo'})
+    mock_provider.return_value.history.return_value = _history('2024-01-31', 10, 2)
+    AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': carteira_id, 'period': '3mo',
+                                  'sync_mode': 'full'})
+
+    version, state = CarteiraEstatisticas.load(carteira_id)
+    assert version == db.session.get(IndicadoresCache, carteira_id).data_version
+    _assert_same_state(state, _full_state(carteira_id))
+
+    with patch('app.services.Estatisticas_service.load_price_matrix') as mock_loader, \
+            patch('app.services.Asset_service.load_price_matrix') as mock_history:
+        result, status = AssetService.calcular_indicadores_carteira(carteira_id)
+        mock_loader.assert_not_called()
+        mock_history.assert_not_called()
+    assert status == 200
+    assert result['indicadores']['ativos_ordenados'] == ['PETR4.SA', 'VALE3.SA', 'BOVA11.SA']
+
+
+def test_streaming_matches_history(app, carteira_id):
+    """As duas origens dão os mesmos indicadores com datas alinhadas."""
+    streaming, _ = AssetService.calcular_indicadores_carteira(carteira_id)
+    app.config['INDICADORES_SOURCE'] = 'history'
+    app.config['INDICADORES_CACHE_ENABLED'] = False
+    history, _ = AssetService.calcular_indicadores_carteira(carteira_id)
+
+    for key in ('retorno_esperado', 'desvio_padrao', 'beta'):
+        for ticker, value in history['indicadores'][key].items():
+            assert streaming['indicadores'][key][ticker] == pytest.approx(value, rel=1e-9)
+
+
+def _assert_sources_match(app, carteira_id):
+    app.config.update(INDICADORES_SOURCE='streaming', INDICADORES_CACHE_ENABLED=False)
+    streaming, _ = AssetService.calcular_indicadores_carteira(carteira_id, formato='arrays')
+    app.config['INDICADORES_SOURCE'] = 'history'
+    history, _ = AssetService.calcular_indicadores_carteira(carteira_id, formato='arrays')
+
+    streaming, history = streaming['indicadores'], history['indicadores']
+    assert streaming['ativos_ordenados'] == history['ativos_ordenados']
+    for key in ('retorno_esperado', 'desvio_padrao', 'beta', 'matriz_covariancia', 'matriz_cov_customizada'):
+        np.testing.assert_allclose(streaming[key], history[key], rtol=1e-9, atol=1e-15)
+    for key, value in history['indicadores_carteira'].items():
+        assert streaming['indicadores_carteira'][key] == pytest.approx(value, rel=1e-9)
+
+
+@patch('app.services.Asset_service.get_market_data_provider')
+def test_streaming_matches_history_with_different_windows(mock_provider, app, carteira_id):
+    """Tickers com janelas de datas diferentes: as duas origens usam as datas em comum e coincidem."""
+    AssetService.calcular_indicadores_carteira(carteira_id)
+
+    # VALE3.SA começa depois e termina depois dos demais
+    mock_provider.return_value.history.return_value = _history('2024-01-10', 25, 3)
+    AssetService.cadastrar_ativo({'ticker': 'VALE3', 'carteira_id': carteira_id, 'period': '1mo'})
+    _assert_sources_match(app, carteira_id)
+
+    # Barras novas dos outros tickers completam as últimas datas de VALE3.SA (combinação incremental)
+    app.config['INDICADORES_SOURCE'] = 'streaming'
+    for ticker, seed in (('BOVA11', 4), ('PETR4', 5)):
+        mock_provider.return_value.history.return_value = _history('2024-01-31', 4, seed)
+        AssetService.cadastrar_ativo({'ticker': ticker, 'carteira_id': carteira_id, 'period': '3mo',
+                                      'sync_mode': 'full'})
+    version, state = CarteiraEstatisticas.load(carteira_id)
+    assert version == db.session.get(IndicadoresCache, carteira_id).data_version
+    assert state.last_date == np.datetime64('2024-02-03')
+    _assert_same_state(state, _full_state(carteira_id))
+    _assert_sources_match(app, carteira_id)
+
+    # A remoção de VALE3.SA devolve as datas que só os demais tinham
+    AssetService.remover_ativo(carteira_id, 'VALE3')
+    _assert_sources_match(app, carteira_id)
+
+
+def test_remover_ativo_updates_stats(carteira_id):
+    """A remoção tira o ticker das estatísticas."""
+    AssetService.calcular_indicadores_carteira(carteira_id)
+    AssetService.remover_ativo(carteira_id, 'PETR4')
+
+    version, state = CarteiraEstatisticas.load(carteira_id)
+    assert state.tickers == ['BOVA11.SA']
+    assert version == db.session.get(IndicadoresCache, carteira_id).data_version
+
+
+def test_save_is_an_upsert(carteira_id):
+    """Gravar o estado cria ou substitui a linha em um comando; um estado mais antigo não substitui o atual."""
+    state = _full_state(carteira_id)
+    CarteiraEstatisticas.save(carteira_id, 3, state)
+    CarteiraEstatisticas.save(carteira_id, 3, state)
+    db.session.commit()
+    assert CarteiraEstatisticas.query.count() == 1
+
+    CarteiraEstatisticas.save(carteira_id, 2, CovarianceState())
+    db.session.commit()
+    version, saved = CarteiraEstatisticas.load(carteira_id)
+    assert version == 3
+    _assert_same_state(saved, state)
+
+
+def test_pickled_state_is_not_loaded(carteira_id):
+    """Um estado com pickle no banco não é executado: é tratado como ausente e reconstruído."""
+    AssetService.calcular_indicadores_carteira(carteira_id)
+    db.session.get(CarteiraEstatisticas, carteira_id).state = pickle.dumps(_Exploit())
+    db.session.commit()
+
+    assert CarteiraEstatisticas.load(carteira_id) == (None, None)
+    assert CarteiraEstatisticas.load_many([carteira_id]) == {}
+    assert _EXPLOIT_CALLS == []